@@ -0,0 +1,70 @@
+"""Tokenizer throughput, and incremental against full compile of an
+edited .hola source.
+
+    python examples/compiler_bench.py [units]
+
+Times the tokenizer on a source of 5000 pages. Then builds a source of
+``units`` pages and actions (2000 by default, about 0.3 MB), compiles it
+once, and times one small edit compiled from scratch and through
+`IncrementalCompiler`.
+"""
+import sys
+import time
+
+from highorder.base.compiler import Compiler, IncrementalCompiler, Tokenizer
+
+TOKENIZER_UNIT = '''Page {
+    route: "/home"
+    // landing page
+    Header { title: "Hello, \\"world\\"", visible: true }
+    List { items: [1, 2.5, 3_000, null], style: {color: "#ff0000"} }
+}
+'''
+
+UNIT = '''Page {{ route: "/page{0}"
+    Header {{ title: "Page {0}" }}
+    List {{ items: [1, 2, 3], style: {{ color: "#ff0000" }} }}
+}}
+Action {{ name: "action{0}", args: ["a", "b"] }}
+'''
+
+
+def bench_tokenizer():
+    code = TOKENIZER_UNIT * 5000
+    size = len(code.encode("utf-8"))
+    elapsed = None
+    for _ in range(3):
+        start = time.perf_counter()
+        tokens = Tokenizer().tokenize(code)
+        elapsed = min(elapsed or float("inf"), time.perf_counter() - start)
+    print(f"tokenize     {size / 1e6:6.2f} MB  {len(tokens)} tokens  {size / elapsed / 1e6:6.2f} MB/s")
+
+
+def main_bench():
+    bench_tokenizer()
+    units = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    code = "".join(UNIT.format(i) for i in range(units))
+    middle = units // 2
+    edited = code.replace(f'title: "Page {middle}"', f'title: "Page {middle} edited"')
+
+    start = time.perf_counter()
+    Compiler().compile(edited)
+    full = time.perf_counter() - start
+
+    compiler = IncrementalCompiler()
+    start = time.perf_counter()
+    compiler.compile(code)
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiler.compile(edited)
+    incremental = time.perf_counter() - start
+
+    print(f"source       {len(code) / 1e6:6.2f} MB")
+    print(f"full         {full * 1000:8.1f} ms")
+    print(f"first        {first * 1000:8.1f} ms")
+    print(f"incremental  {incremental * 1000:8.1f} ms  {full / incremental:6.1f}x")
+
+
+if __name__ == "__main__":
+    main_bench()
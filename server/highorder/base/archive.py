@@ -0,0 +1,134 @@
+"""Member reads of release zip archives from an mmap.
+
+    archive = ReleaseArchive.get(zip_path)
+    data = archive.read("app/main.hola.json")      # bytes
+    view = archive.view("datafile/items.json")     # memoryview if stored
+
+The central directory of an archive is parsed once, members are read
+from the mapped file without opening it again. Stored members are
+slices of the mapping, deflated ones are inflated from it. Archives are
+kept open per process, an archive rewritten in place is noticed by its
+size and mtime and opened again.
+"""
+import mmap
+import os
+import struct
+import threading
+import zipfile
+import zlib
+from collections import OrderedDict
+
+__all__ = ["ReleaseArchive", "ZERO_COPY_SIZE"]
+
+# raw reads of stored members this large are served as memoryviews
+ZERO_COPY_SIZE = 64 * 1024
+
+# signature, versions, flags, method, time, date, crc, sizes, name and
+# extra lengths
+_LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+_LOCAL_MAGIC = b"PK\x03\x04"
+
+
+class ReleaseArchive:
+    max_open = 32
+    # path -> archive, least recently used first
+    _archives = OrderedDict()
+    # FileCache reads in executor threads
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, path):
+        stat = os.stat(path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        with cls._lock:
+            archive = cls._archives.get(path)
+            if archive is not None:
+                if archive.stamp == stamp:
+                    cls._archives.move_to_end(path)
+                    return archive
+                # not closed, a thread may still read it, the mapping goes
+                # with the last reference
+                del cls._archives[path]
+            archive = cls._archives[path] = cls(path)
+            while len(cls._archives) > cls.max_open:
+                cls._archives.popitem(last=False)
+            return archive
+
+    @classmethod
+    def close_all(cls):
+        with cls._lock:
+            while cls._archives:
+                cls._archives.popitem()[1].close()
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if not stat.st_size:
+                raise zipfile.BadZipFile(f"{path} is empty")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.stamp = (stat.st_size, stat.st_mtime_ns)
+        try:
+            with zipfile.ZipFile(self._mmap) as zfile:
+                self._members = {info.filename: info for info in zfile.infolist()}
+        except Exception:
+            self._mmap.close()
+            raise
+        # member name -> offset of its data
+        self._offsets = {}
+
+    def __contains__(self, name):
+        return name in self._members
+
+    def namelist(self):
+        return list(self._members)
+
+    def getinfo(self, name):
+        info = self._members.get(name)
+        if info is None:
+            raise KeyError(f"There is no item named {name!r} in the archive")
+        return info
+
+    def _data_offset(self, info):
+        offset = self._offsets.get(info.filename)
+        if offset is None:
+            header = _LOCAL_HEADER.unpack_from(self._mmap, info.header_offset)
+            if header[0] != _LOCAL_MAGIC:
+                raise zipfile.BadZipFile(
+                    f"bad local header of {info.filename} in {self.path}"
+                )
+            offset = info.header_offset + _LOCAL_HEADER.size + header[9] + header[10]
+            self._offsets[info.filename] = offset
+        return offset
+
+    def view(self, name):
+        """The content of member ``name``, a memoryview of the mapping when
+        it is stored, bytes otherwise."""
+        info = self.getinfo(name)
+        if info.flag_bits & 0x1:
+            raise RuntimeError(f"{name} is encrypted")
+        start = self._data_offset(info)
+        data = memoryview(self._mmap)[start:start + info.compress_size]
+        if info.compress_type == zipfile.ZIP_STORED:
+            return data
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -15, info.file_size or zlib.DEF_BUF_SIZE)
+            if zlib.crc32(data) != info.CRC:
+                raise zipfile.BadZipFile(f"Bad CRC-32 for file {name!r}")
+            return data
+        # bzip2 and lzma are left to zipfile
+        with zipfile.ZipFile(self.path) as zfile:
+            return zfile.read(info)
+
+    def read(self, name):
+        data = self.view(name)
+        if isinstance(data, memoryview):
+            return data.tobytes()
+        return data
+
+    def close(self):
+        try:
+            self._mmap.close()
+        except BufferError:
+            # views are still in use, the mapping goes with the last one
+            pass
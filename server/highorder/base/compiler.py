@@ -2,8 +2,9 @@ from __future__ import annotations
 from enum import Enum
 from dataclasses import dataclass, field
 from typing import Dict, List
+from bisect import bisect_right
 import string
-from copy import deepcopy
+import re
 
 # import pprint
 # pp = pprint.PrettyPrinter(indent=4)
@@ -59,12 +60,66 @@ class CharPosition:
         self.column = 1
 
 
-@dataclass
+class LineIndex:
+    """Maps character offsets to line/column, built on first lookup."""
+
+    __slots__ = ("code", "_starts")
+
+    def __init__(self, code):
+        self.code = code
+        self._starts = None
+
+    def position(self, index):
+        starts = self._starts
+        if starts is None:
+            starts = [0]
+            find = self.code.find
+            pos = find("\n")
+            while pos >= 0:
+                starts.append(pos + 1)
+                pos = find("\n", pos + 1)
+            self._starts = starts
+        line = bisect_right(starts, index) - 1
+        return CharPosition(index=index, line=line, column=index - starts[line])
+
+
 class Token:
-    kind: TokenKind
-    value: str
-    start_pos: CharPosition
-    end_pos: CharPosition
+    """A token only keeps its offsets (end inclusive), positions are lazy."""
+
+    __slots__ = ("kind", "value", "start", "end", "lines")
+
+    def __init__(self, kind, value, start, end, lines=None):
+        self.kind = kind
+        self.value = value
+        self.start = start
+        self.end = end
+        self.lines = lines
+
+    def _position(self, index):
+        if self.lines is None:
+            return CharPosition(index=index, line=0, column=index)
+        return self.lines.position(index)
+
+    @property
+    def start_pos(self):
+        return self._position(self.start)
+
+    @property
+    def end_pos(self):
+        return self._position(self.end)
+
+    def __eq__(self, other):
+        if not isinstance(other, Token):
+            return NotImplemented
+        return (
+            self.kind == other.kind
+            and self.value == other.value
+            and self.start == other.start
+            and self.end == other.end
+        )
+
+    def __repr__(self):
+        return f"Token(kind={self.kind!r}, value={self.value!r}, start={self.start}, end={self.end})"
 
 
 @dataclass
@@ -106,270 +161,127 @@ ESCAPE_CHAR_MAP = {
 }
 
 
-class Tokenizer:
-    def __init__(self):
-        pass
+TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<punct>[{}:\n,\[\];])
+  | (?P<quote>["'])
+  | (?P<number>[0-9][0-9._]*)
+  | //(?P<comment>[^\n]*)
+  | (?P<division>/)
+""",
+    re.VERBOSE,
+)
+
+PUNCTUATION_KINDS = {
+    "{": TokenKind.LBrace,
+    "}": TokenKind.RBrace,
+    ":": TokenKind.Colon,
+    "\n": TokenKind.LineBreak,
+    ",": TokenKind.Comma,
+    "[": TokenKind.LBracket,
+    "]": TokenKind.RBracket,
+    ";": TokenKind.Semicolon,
+}
 
-    def tokenize(self, code):
-        pos = CharPosition(index=0, line=0, column=0)
-        tokens = []
-        while pos.index < len(code):
-            ch = code[pos.index]
-            if ch == "{":
-                tokens.append(
-                    Token(
-                        kind=TokenKind.LBrace,
-                        value="{",
-                        start_pos=deepcopy(pos),
-                        end_pos=deepcopy(pos),
-                    )
-                )
+NAME_KINDS = {
+    "true": TokenKind.BoolLiteral,
+    "false": TokenKind.BoolLiteral,
+    "null": TokenKind.Null,
+}
 
-                pos.move(1)
+STRING_BODY_PATTERNS = {
+    '"': re.compile(r'(?:[^"\\]|\\[\s\S])*'),
+    "'": re.compile(r"(?:[^'\\]|\\[\s\S])*"),
+}
 
-            elif ch == "}":
-                tokens.append(
-                    Token(
-                        kind=TokenKind.RBrace,
-                        value="}",
-                        start_pos=deepcopy(pos),
-                        end_pos=deepcopy(pos),
-                    )
-                )
+ESCAPE_PATTERN = re.compile(r"\\([\s\S])")
 
-                pos.move(1)
 
-            elif ch == ":":
-                tokens.append(
-                    Token(
-                        kind=TokenKind.Colon,
-                        value=":",
-                        start_pos=deepcopy(pos),
-                        end_pos=deepcopy(pos),
-                    )
-                )
-                pos.move(1)
-            elif ch == "\n":
-                tokens.append(
-                    Token(
-                        kind=TokenKind.LineBreak,
-                        value="\n",
-                        start_pos=deepcopy(pos),
-                        end_pos=deepcopy(pos),
-                    )
-                )
-                pos.move(1)
-            elif ch == ",":
-                tokens.append(
-                    Token(
-                        kind=TokenKind.Comma,
-                        value=",",
-                        start_pos=deepcopy(pos),
-                        end_pos=deepcopy(pos),
-                    )
-                )
-                pos.move(1)
-            elif ch == "[":
-                tokens.append(
-                    Token(
-                        kind=TokenKind.LBracket,
-                        value="[",
-                        start_pos=deepcopy(pos),
-                        end_pos=deepcopy(pos),
-                    )
-                )
-                pos.move(1)
-            elif ch == "]":
-                tokens.append(
-                    Token(
-                        kind=TokenKind.RBracket,
-                        value="]",
-                        start_pos=deepcopy(pos),
-                        end_pos=deepcopy(pos),
-                    )
-                )
-                pos.move(1)
-            elif ch == ";":
-                tokens.append(
-                    Token(
-                        kind=TokenKind.Semicolon,
-                        value=";",
-                        start_pos=deepcopy(pos),
-                        end_pos=deepcopy(pos),
-                    )
-                )
-                pos.move(1)
-            elif ch == "/":
-                token = self.tokenize_comment_or_division(pos, code)
-                if token:
-                    tokens.append(token)
-            elif ch == '"' or ch == "'":
-                token = self.tokenize_string(pos, code)
-                if token:
-                    tokens.append(token)
-            elif ch in string.ascii_letters or ch == "_":
-                token = self.tokenize_identifier(pos, code)
-                if token:
-                    tokens.append(token)
-            elif ch in string.digits:
-                token = self.tokenize_number(pos, code)
-                if token:
-                    tokens.append(token)
-            else:
-                pos.move(1)
+def unescape_char(match):
+    ch = match.group(1)
+    return ESCAPE_CHAR_MAP.get(ch, ch)
 
-        return tokens
 
-    def tokenize_identifier(self, pos, code):
-        chars = []
-        chars.append(code[pos.index])
-        index = pos.index + 1
-        while index < len(code):
-            ch = code[index]
-            if ch in string.ascii_letters or ch == "_" or ch in string.digits:
-                chars.append(ch)
-                index += 1
-            else:
-                break
-        start_pos = deepcopy(pos)
-        count = index - pos.index - 1
-        pos.move(count)
-        end_pos = deepcopy(pos)
-        pos.move(1)
-        kind = TokenKind.Identifier
-        value = "".join(chars)
-        if chars[0] in string.ascii_lowercase:
-            if value == "true" or value == "false":
-                kind = TokenKind.BoolLiteral
-            elif value == "null":
-                kind = TokenKind.Null
-            else:
-                kind = TokenKind.PropertyName
-        return Token(kind=kind, value=value, start_pos=start_pos, end_pos=end_pos)
+class Tokenizer:
+    def __init__(self):
+        pass
 
-    def tokenize_string(self, pos, code):
-        chars = []
-        tmp_pos = deepcopy(pos)
-        last_line_end_pos = None
-        quote_char = code[pos.index]
-        tmp_pos.move(1)
-        while tmp_pos.index < len(code):
-            index = tmp_pos.index
-            ch = code[index]
-            if ch == "\\":
-                if index + 1 >= len(code):
-                    chars.append(ch)
-                    tmp_pos.move(1)
-                    break
-                next_char = code[index + 1]
-                if next_char in ESCAPE_CHAR_MAP:
-                    chars.append(ESCAPE_CHAR_MAP[next_char])
+    def tokenize(self, code, start=0, stop=None):
+        """Tokenize code, or only the tokens starting in [start, stop)."""
+        if stop is None:
+            stop = len(code)
+        lines = LineIndex(code)
+        tokens = []
+        append = tokens.append
+        search = TOKEN_PATTERN.search
+        punctuation_kinds = PUNCTUATION_KINDS
+        name_kinds = NAME_KINDS
+        property_name = TokenKind.PropertyName
+        identifier = TokenKind.Identifier
+        # characters which start no token (whitespace, '-', '#' ...) are
+        # skipped by search()
+        m = search(code, start)
+        while m is not None and m.start() < stop:
+            group = m.lastgroup
+            start = m.start()
+            end = m.end()
+            if group == "name":
+                value = m.group()
+                if "a" <= value[0] <= "z":
+                    kind = name_kinds.get(value, property_name)
                 else:
-                    chars.append(next_char)
-                tmp_pos.move(2)
-            elif ch == quote_char:
-                tmp_pos.move(1)
-                break
-            elif ch == "\n":
-                chars.append(ch)
-                last_line_end_pos = deepcopy(tmp_pos)
-                tmp_pos.newline()
+                    kind = identifier
+                append(Token(kind, value, start, end - 1, lines))
+            elif group == "punct":
+                value = m.group()
+                append(Token(punctuation_kinds[value], value, start, start, lines))
+            elif group == "quote":
+                token = self.tokenize_string(code, start, lines)
+                end = token.end + 1
+                append(token)
+            elif group == "number":
+                append(self.tokenize_number(m.group(), start, end, lines))
+            elif group == "comment":
+                append(Token(TokenKind.Comment, m.group(group), start, end - 1, lines))
             else:
-                chars.append(ch)
-                tmp_pos.move(1)
-        start_pos = deepcopy(pos)
-        if tmp_pos.index == 1:
-            end_pos = last_line_end_pos
-        else:
-            end_pos = deepcopy(tmp_pos)
-            end_pos.move(-1)
+                append(Token(TokenKind.Division, "/", start, start, lines))
+            m = search(code, end)
 
-        pos.moveto(tmp_pos)
-
-        return Token(
-            kind=TokenKind.StringLiteral,
-            value="".join(chars),
-            start_pos=start_pos,
-            end_pos=end_pos,
-        )
+        return tokens
 
-    def tokenize_number(self, pos, code):
-        chars = []
-        chars.append(code[pos.index])
-        has_dot = False
-        index = pos.index + 1
-        while index < len(code):
-            ch = code[index]
-            if ch in string.digits:
-                chars.append(ch)
-                index += 1
-            elif ch == ".":
-                chars.append(ch)
-                has_dot = True
-                index += 1
-            elif ch == "_":
-                index += 1
-            else:
-                break
-        start_pos = deepcopy(pos)
-        count = index - pos.index - 1
-        pos.move(count)
-        end_pos = deepcopy(pos)
-        pos.move(1)
-
-        raw_value = "".join(chars)
-        if not has_dot:
+    def tokenize_string(self, code, start, lines):
+        quote_char = code[start]
+        m = STRING_BODY_PATTERNS[quote_char].match(code, start + 1)
+        value = m.group()
+        end = m.end()
+        if "\\" in value:
+            value = ESCAPE_PATTERN.sub(unescape_char, value)
+        if end >= len(code):
+            # unterminated string runs to the end of code
+            end -= 1
+        elif code[end] != quote_char:
+            # a lone trailing backslash, kept as is
+            value += "\\"
+        return Token(TokenKind.StringLiteral, value, start, end, lines)
+
+    def tokenize_number(self, raw_value, start, end, lines):
+        raw_value = raw_value.replace("_", "")
+        if "." not in raw_value:
             value = int(raw_value)
         else:
             value = float(raw_value)
-        return Token(
-            kind=TokenKind.NumberLiteral,
-            value=value,
-            start_pos=start_pos,
-            end_pos=end_pos,
-        )
-
-    def tokenize_comment_or_division(self, pos, code):
-        chars = []
-        index = pos.index + 1
-        if (index < len(code) and code[index] != "/") or (index == len(code)):
-            pos.move(1)
-            return Token(
-                kind=TokenKind.Division,
-                value="/",
-                start_pos=deepcopy(pos),
-                end_pos=deepcopy(pos),
-            )
-
-        index += 1
-        while index < len(code):
-            ch = code[index]
-            if ch == "\n":
-                break
-            else:
-                chars.append(ch)
-                index += 1
-        start_pos = deepcopy(pos)
-        count = index - pos.index - 1
-        pos.move(count)
-        end_pos = deepcopy(pos)
-        pos.move(1)
-
-        return Token(
-            kind=TokenKind.Comment,
-            value="".join(chars),
-            start_pos=start_pos,
-            end_pos=end_pos,
-        )
+        return Token(TokenKind.NumberLiteral, value, start, end - 1, lines)
 
 
 class TokenStream:
     def __init__(self, tokens):
         self.tokens = tokens
+        self.size = len(tokens)
         self.idx = 0
 
     def peek(self):
-        if self.idx >= len(self.tokens):
+        if self.idx >= self.size:
             return None
         return self.tokens[self.idx]
 
@@ -377,7 +289,7 @@ class TokenStream:
         if num < 0:
             raise Exception(f"TokenStream.peek_next num must >= 0, but {num} given.")
         new_idx = self.idx + num
-        if new_idx >= len(self.tokens):
+        if new_idx >= self.size:
             return None
         return self.tokens[new_idx]
 
@@ -388,7 +300,7 @@ class TokenStream:
             kinds = kind
         else:
             kinds = [kind]
-        while idx < len(self.tokens) and self.tokens[idx].kind in kinds:
+        while idx < self.size and self.tokens[idx].kind in kinds:
             idx += 1
         self.idx = idx
         return self.idx - old_idx
@@ -410,18 +322,18 @@ class TokenStream:
 
     def next(self):
         self.idx += 1
-        if self.idx > len(self.tokens):
-            self.idx = len(self.tokens)
+        if self.idx > self.size:
+            self.idx = self.size
 
     def move(self, steps):
         if steps < 0:
             raise Exception(f"TokenStream.move steps must >= 0, but {steps} given.")
         self.idx += steps
-        if self.idx > len(self.tokens):
-            self.idx = len(self.tokens)
+        if self.idx > self.size:
+            self.idx = self.size
 
     def eof(self):
-        return self.idx >= len(self.tokens)
+        return self.idx >= self.size
 
 
 class HolaSyntaxError(Exception):
@@ -463,13 +375,17 @@ class Parser:
             properties={},
             children=[],
         )
+        root.children.extend(self.parse_objects(tokens))
+        return root
+
+    def parse_objects(self, tokens):
+        nodes = []
         tokens.consume(TokenKind.LineBreak)
         while not tokens.eof():
             node = self.parse_object(tokens)
-            root.children.append(node)
+            nodes.append(node)
             tokens.consume(TokenKind.LineBreak)
-
-        return root
+        return nodes
 
     def parse_object(self, tokens):
         token = tokens.peek()
@@ -484,7 +400,7 @@ class Parser:
 
         node = SyntaxNode(
             kind=NodeKind.Object,
-            start_pos=deepcopy(token.start_pos),
+            start_pos=token.start_pos,
             end_pos=CharPosition(index=-1, line=-1, column=-1),
             value=name,
             properties={},
@@ -518,7 +434,7 @@ class Parser:
                 continue
 
         token = tokens.peek()
-        node.end_pos = deepcopy(token.end_pos)
+        node.end_pos = token.end_pos
         tokens.expect(TokenKind.RBrace)
         return node
 
@@ -537,16 +453,16 @@ class Parser:
             return SyntaxNode(
                 kind=NodeKind.Null,
                 value=None,
-                start_pos=deepcopy(token.start_pos),
-                end_pos=deepcopy(token.end_pos),
+                start_pos=token.start_pos,
+                end_pos=token.end_pos,
             )
         elif token.kind == TokenKind.BoolLiteral:
             tokens.next()
             return SyntaxNode(
                 kind=NodeKind.Bool,
                 value=True if token.value == "true" else False,
-                start_pos=deepcopy(token.start_pos),
-                end_pos=deepcopy(token.end_pos),
+                start_pos=token.start_pos,
+                end_pos=token.end_pos,
             )
 
         elif token.kind == TokenKind.StringLiteral:
@@ -554,8 +470,8 @@ class Parser:
             return SyntaxNode(
                 kind=NodeKind.String,
                 value=token.value,
-                start_pos=deepcopy(token.start_pos),
-                end_pos=deepcopy(token.end_pos),
+                start_pos=token.start_pos,
+                end_pos=token.end_pos,
             )
 
         elif token.kind == TokenKind.NumberLiteral:
@@ -563,8 +479,8 @@ class Parser:
             return SyntaxNode(
                 kind=NodeKind.Number,
                 value=token.value,
-                start_pos=deepcopy(token.start_pos),
-                end_pos=deepcopy(token.end_pos),
+                start_pos=token.start_pos,
+                end_pos=token.end_pos,
             )
 
         elif token.kind == TokenKind.LBracket:
@@ -581,7 +497,7 @@ class Parser:
         token = tokens.peek()
         node = SyntaxNode(
             kind=NodeKind.List,
-            start_pos=deepcopy(token.start_pos),
+            start_pos=token.start_pos,
             end_pos=CharPosition(index=-1, line=-1, column=-1),
             value=None,
             properties={},
@@ -598,8 +514,8 @@ class Parser:
                 node.children.append(
                     node=SyntaxNode(
                         kind=NodeKind.Null,
-                        start_pos=deepcopy(token.start_pos),
-                        end_pos=deepcopy(token.start_pos),
+                        start_pos=token.start_pos,
+                        end_pos=token.start_pos,
                         value=None,
                         properties={},
                         children=[],
@@ -618,7 +534,7 @@ class Parser:
                 continue
 
         token = tokens.peek()
-        node.end_pos = deepcopy(token.end_pos)
+        node.end_pos = token.end_pos
         tokens.expect(TokenKind.RBracket)
         return node
 
@@ -725,3 +641,149 @@ class Compiler:
             return generator.gen(node)
         else:
             raise Exception(f"Only target with object_tree supported.")
+
+
+@dataclass
+class ParsedObject:
+    start: int
+    end: int
+    node: SyntaxNode
+    obj: dict = None
+
+
+class IncrementalParser(Parser):
+    """Parser which re-parses only the top-level objects touched by an edit.
+
+    The previous source and its top-level objects (with their character
+    spans) are kept. On the next parse the edited range is found by
+    comparing with the previous source, and only the tokens between the
+    nearest untouched top-level objects are re-tokenized and re-parsed.
+    Objects after the edit keep their nodes, their spans are shifted. The
+    nodes' own positions are not shifted, ParsedObject.start/end are the
+    authoritative offsets.
+    """
+
+    def __init__(self):
+        self.code = None
+        self.objects = []
+
+    def reset(self):
+        self.code = None
+        self.objects = []
+
+    def parse(self, code):
+        self.parse_incremental(code)
+        root = SyntaxNode(
+            kind=NodeKind.Root,
+            start_pos=CharPosition(index=0, line=0, column=0),
+            end_pos=CharPosition(index=-1, line=-1, column=-1),
+            value="",
+            properties={},
+            children=[],
+        )
+        root.children.extend(x.node for x in self.objects)
+        return root
+
+    def parse_incremental(self, code):
+        """Parse code and return the list of top-level ParsedObject."""
+        old_code = self.code
+        if old_code is None:
+            return self.parse_full(code)
+        if old_code == code:
+            return self.objects
+
+        prefix = self.common_prefix(old_code, code)
+        suffix = self.common_suffix(old_code, code, prefix)
+        old_end = len(old_code) - suffix
+        delta = len(code) - len(old_code)
+
+        objects = self.objects
+        # untouched objects end before the edit (with at least one unchanged
+        # character in between) or start after it
+        head = 0
+        while head < len(objects) and objects[head].end < prefix - 1:
+            head += 1
+        tail = head
+        while tail < len(objects) and objects[tail].start <= old_end:
+            tail += 1
+
+        start = objects[head - 1].end + 1 if head > 0 else 0
+        stop = objects[tail].start + delta if tail < len(objects) else len(code)
+
+        raw_tokens = Tokenizer().tokenize(code, start, stop)
+        if raw_tokens and raw_tokens[-1].end >= stop:
+            # a token (e.g. an unterminated string) runs over the untouched
+            # objects, so they have to be tokenized again as well
+            return self.parse_full(code)
+
+        nodes = self.parse_objects(TokenStream(raw_tokens))
+        middle = [ParsedObject(x.start_pos.index, x.end_pos.index, x) for x in nodes]
+        after = objects[tail:]
+        if delta:
+            for x in after:
+                x.start += delta
+                x.end += delta
+        self.objects = objects[:head] + middle + after
+        self.code = code
+        return self.objects
+
+    def parse_full(self, code):
+        tokens = TokenStream(Tokenizer().tokenize(code))
+        nodes = self.parse_objects(tokens)
+        self.objects = [ParsedObject(x.start_pos.index, x.end_pos.index, x) for x in nodes]
+        self.code = code
+        return self.objects
+
+    @staticmethod
+    def common_prefix(a, b, block=4096):
+        size = min(len(a), len(b))
+        # compare whole blocks first, slice comparison runs in C
+        index = 0
+        while index < size and a[index:index + block] == b[index:index + block]:
+            index += block
+        index = min(index, size)
+        end = min(index + block, size)
+        while index < end and a[index] == b[index]:
+            index += 1
+        return index
+
+    @staticmethod
+    def common_suffix(a, b, prefix, block=4096):
+        size = min(len(a), len(b)) - prefix
+        len_a, len_b = len(a), len(b)
+        count = 0
+        while count < size and (
+            a[max(len_a - count - block, 0):len_a - count]
+            == b[max(len_b - count - block, 0):len_b - count]
+        ):
+            count += block
+        count = min(count, size)
+        end = min(count + block, size)
+        while count < end and a[len_a - count - 1] == b[len_b - count - 1]:
+            count += 1
+        return count
+
+
+class IncrementalCompiler(Compiler):
+    """Compiler for repeatedly edited source, e.g. in the editor.
+
+    Produces the same object tree as Compiler.compile, the generated object
+    of every untouched top-level object is reused from the last compile.
+    """
+
+    def __init__(self):
+        self.parser = IncrementalParser()
+        self.generator = ObjectTreeCodeGenerator()
+
+    def compile(self, code, target="object_tree"):
+        if target != "object_tree":
+            raise Exception(f"Only target with object_tree supported.")
+        objects = self.parser.parse_incremental(code)
+        json_obj_root = {}
+        for parsed in objects:
+            if parsed.obj is None:
+                parsed.obj = self.generator.gen_object(parsed.node)
+            obj = parsed.obj
+            category = OBJECT_CATEGORY_MAP.get(obj["type"], "objects")
+            json_obj_root.setdefault(category, []).append(obj)
+        return json_obj_root
@@ -0,0 +1,186 @@
+"""Datafiles compiled into an indexed layout, records read one at a time.
+
+A datafile that is a JSON list of records, levels of a playable
+collection for instance, is compiled at publish time (`index_directory`)
+into ``<name>.idx`` next to ``<name>.json``::
+
+    header   magic, record count, key field
+    entries  record offset, record size, key offset, key size, in list order
+    order    entry positions sorted by key
+    data     keys (utf-8) and records (json)
+
+`IndexedDatafile` reads it from a buffer, a stored release member mapped
+by `ReleaseArchive` usually, and decodes only the records asked for. It is
+a sequence of the records in list order, ``datafile[0]`` and
+``random.choice(datafile)`` work as on the list, and finds records by key
+with a binary search of the order table. Keys are compared as strings.
+"""
+import os
+import struct
+from collections.abc import Sequence
+
+from basepy import jsoncodec
+
+__all__ = ["IndexedDatafile", "compile_datafile", "index_directory", "INDEX_SUFFIX"]
+
+INDEX_SUFFIX = ".idx"
+KEY_FIELDS = ("level_id", "id")
+
+MAGIC = b"HODF\x00\x00\x00\x01"
+# magic, record count, key field size
+_HEADER = struct.Struct("<8sII")
+_ENTRY = struct.Struct("<IIII")
+_POSITION = struct.Struct("<I")
+
+
+def _key_field(records):
+    for field in KEY_FIELDS:
+        if all(field in record for record in records):
+            return field
+    return None
+
+
+def compile_datafile(records, key_field=None):
+    """The indexed layout of a list of dict ``records``. ``key_field``
+    defaults to the first of `KEY_FIELDS` every record has, without one
+    records are found by position only."""
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError("only a list of objects can be indexed")
+    if key_field is None:
+        key_field = _key_field(records) if records else None
+    field = (key_field or "").encode("utf-8")
+
+    keys = []
+    blobs = []
+    for record in records:
+        key = record.get(key_field) if key_field else None
+        keys.append(b"" if key is None else str(key).encode("utf-8"))
+        blobs.append(jsoncodec.dumpb(record))
+
+    count = len(records)
+    data_start = _HEADER.size + len(field) + count * (_ENTRY.size + _POSITION.size)
+    entries = bytearray()
+    data = bytearray()
+    for key, blob in zip(keys, blobs):
+        key_offset = data_start + len(data)
+        data += key
+        record_offset = data_start + len(data)
+        data += blob
+        entries += _ENTRY.pack(record_offset, len(blob), key_offset, len(key))
+    # equal keys keep list order, a lookup finds the first
+    order = sorted(range(count), key=lambda i: (keys[i], i))
+
+    out = bytearray(_HEADER.pack(MAGIC, count, len(field)))
+    out += field
+    out += entries
+    for position in order:
+        out += _POSITION.pack(position)
+    out += data
+    return bytes(out)
+
+
+def index_directory(directory):
+    """Write ``<name>.idx`` for every ``<name>.json`` list in
+    ``directory`` and remove the ones left from removed or changed
+    datafiles. Returns the names indexed."""
+    indexed = []
+    if not os.path.isdir(directory):
+        return indexed
+    for filename in sorted(os.listdir(directory)):
+        path = os.path.join(directory, filename)
+        base, ext = os.path.splitext(filename)
+        if ext == INDEX_SUFFIX:
+            if not os.path.exists(os.path.join(directory, base + ".json")):
+                os.remove(path)
+            continue
+        if ext != ".json":
+            continue
+        index_path = os.path.join(directory, base + INDEX_SUFFIX)
+        with open(path, "rb") as f:
+            try:
+                compiled = compile_datafile(jsoncodec.loads(f.read()))
+            except ValueError:
+                compiled = None
+        if compiled is None:
+            if os.path.exists(index_path):
+                os.remove(index_path)
+            continue
+        with open(index_path, "wb") as f:
+            f.write(compiled)
+        indexed.append(base)
+    return indexed
+
+
+class IndexedDatafile(Sequence):
+    def __init__(self, buffer):
+        self._buffer = buffer if isinstance(buffer, memoryview) else memoryview(buffer)
+        if len(self._buffer) < _HEADER.size:
+            raise ValueError("not an indexed datafile")
+        magic, count, field_size = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not an indexed datafile")
+        field = self._buffer[_HEADER.size:_HEADER.size + field_size].tobytes()
+        self.key_field = field.decode("utf-8") or None
+        self._count = count
+        self._entries = _HEADER.size + field_size
+        self._order = self._entries + count * _ENTRY.size
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._record(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("datafile index out of range")
+        return self._record(index)
+
+    def _record(self, position):
+        offset, size, _, _ = _ENTRY.unpack_from(self._buffer, self._entries + position * _ENTRY.size)
+        return jsoncodec.loads(self._buffer[offset:offset + size])
+
+    def _key(self, position):
+        _, _, offset, size = _ENTRY.unpack_from(self._buffer, self._entries + position * _ENTRY.size)
+        return self._buffer[offset:offset + size].tobytes()
+
+    def position(self, key):
+        """List position of the first record with ``key``, or None."""
+        if self.key_field is None or key is None:
+            return None
+        target = str(key).encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            position = _POSITION.unpack_from(self._buffer, self._order + mid * _POSITION.size)[0]
+            if self._key(position) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            position = _POSITION.unpack_from(self._buffer, self._order + lo * _POSITION.size)[0]
+            if self._key(position) == target:
+                return position
+        return None
+
+    def get(self, key, default=None):
+        position = self.position(key)
+        if position is None:
+            return default
+        return self._record(position)
+
+    def scan(self, key=None, limit=None, after=False):
+        """Records in list order from the one with ``key`` (the first
+        when None), from the next one with ``after``."""
+        if key is None:
+            start = 0
+        else:
+            start = self.position(key)
+            if start is None:
+                return
+            if after:
+                start += 1
+        stop = self._count if limit is None else min(self._count, start + limit)
+        for position in range(start, stop):
+            yield self._record(position)
@@ -1,13 +1,18 @@
+import asyncio
 import os
-import json
+from functools import partial
+from basepy import jsoncodec
 import dataclass_factory
 import time
-from zipfile import ZipFile
 from dataclasses import dataclass, field
 from typing import List
 from datetime import datetime
 from basepy.config import settings
+from basepy.asynclib import inotify
 from basepy.asynclib.threaded import threaded
+from callpy.web.assets import AssetManifest
+from .archive import ReleaseArchive, ZERO_COPY_SIZE
+from .datafile import IndexedDatafile, INDEX_SUFFIX
 
 factory = dataclass_factory.Factory()
 
@@ -27,58 +32,187 @@ class ApplicationSummary:
     client_keys: List[ApplicationClientKey] = field(default_factory=list)
 
 
+file_cache_settings = settings.get("file_cache", {})
+
+
 class FileCache:
+    """Files and zip members, raw or parsed, cached per process.
+
+    An LRU of at most ``max_entries`` files and ``max_bytes`` bytes read.
+    Entries loaded with ``max_cached`` expire after it. The others are
+    checked against the size and mtime of their file, at most every
+    ``stat_interval`` seconds, and not at all while `watch` has an inotify
+    watch on their directory. Concurrent loads of a file share one read.
+    """
+
+    # filepath -> {"meta", "checked", parse_method: data}, least recently
+    # used first
     _cache = {}
+    _bytes = 0
+    # (filepath, parse_method) -> task loading it
+    _loading = {}
+    _watcher = None
+    max_entries = file_cache_settings.get("max_entries", 4096)
+    max_bytes = file_cache_settings.get("max_bytes", 256 * 1024 * 1024)
+    stat_interval = file_cache_settings.get("stat_interval", 2)
 
     @classmethod
     async def get(
         cls, filepath, parse_method="raw", max_cached=-1, cache_policy="normal"
     ):
-        if filepath in cls._cache:
-            meta = cls._cache[filepath]["meta"]
-            if "expires" in meta:
-                expired = time.time() - meta["expires"]
-                if expired >= 0:
+        entry = cls._cache.get(filepath)
+        if entry is not None and parse_method in entry:
+            if await cls._is_fresh(filepath, entry):
+                if cls._cache.get(filepath) is entry:
+                    # reinsert as the most recently used
                     del cls._cache[filepath]
+                    cls._cache[filepath] = entry
+                return entry["meta"], entry[parse_method]
+            if cls._cache.get(filepath) is entry:
+                cls.invalidate(filepath)
+
+        key = (filepath, parse_method)
+        task = cls._loading.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                cls._load(filepath, parse_method, max_cached, cache_policy)
+            )
+            cls._loading[key] = task
+            task.add_done_callback(partial(cls._load_done, key))
+        # a cancelled request leaves the read running for the others
+        return await asyncio.shield(task)
 
-                elif parse_method not in cls._cache[filepath]:
-                    del cls._cache[filepath]
-                else:
-                    return (
-                        cls._cache[filepath]["meta"],
-                        cls._cache[filepath][parse_method],
-                    )
+    @classmethod
+    async def _is_fresh(cls, filepath, entry):
+        meta = entry["meta"]
+        if "expires" in meta:
+            return time.time() < meta["expires"]
+        if cls._watcher is not None and cls._watcher.watching(cls._dirname(filepath)):
+            return True
+        now = time.monotonic()
+        if now - entry["checked"] < cls.stat_interval:
+            return True
+        # concurrent lookups skip the stat in flight
+        entry["checked"] = now
+        file_meta = await cls.get_meta(filepath)
+        return (
+            meta["modified"] == file_meta["modified"]
+            and meta["size"] == file_meta["size"]
+        )
+
+    @classmethod
+    async def _load(cls, filepath, parse_method, max_cached, cache_policy):
+        if cls._watcher is not None:
+            # watched before the read, a change during it is not missed
+            cls._watcher.watch(cls._dirname(filepath))
+        checked = time.monotonic()
+        meta, data = await cls.get_file_info(filepath, parse_method)
+
+        if not data:
+            data = {} if parse_method == "json" else ""
+
+        now = int(time.time())
+        if cache_policy == "normal" and max_cached > 0:
+            meta["expires"] = now + max_cached
+        elif cache_policy == "align":
+            if max_cached < 60:
+                raise Exception(
+                    f"max cached time must greater than 60 when cache policy is align."
+                )
             else:
-                file_meta = await cls.get_meta(filepath)
-                if (
-                    meta["modified"] != file_meta["modified"]
-                    or meta["size"] != file_meta["size"]
-                ):
-                    del cls._cache[filepath]
-                else:
-                    return (
-                        cls._cache[filepath]["meta"],
-                        cls._cache[filepath][parse_method],
-                    )
-
-        if filepath not in cls._cache:
-            meta, data = await cls.get_file_info(filepath, parse_method)
-
-            if not data:
-                data = {} if parse_method == "json" else ""
-
-            now = int(time.time())
-            if cache_policy == "normal" and max_cached > 0:
-                meta["expires"] = now + max_cached
-            elif cache_policy == "align":
-                if max_cached < 60:
-                    raise Exception(
-                        f"max cached time must greater than 60 when cache policy is align."
-                    )
-                else:
-                    meta["expires"] = now + (max_cached - (now % max_cached))
-            cls._cache[filepath] = {"meta": meta, parse_method: data}
-            return meta, data
+                meta["expires"] = now + (max_cached - (now % max_cached))
+
+        # invalidated while reading: the caller gets the data, the cache not
+        if cls._loading.get((filepath, parse_method)) is asyncio.current_task():
+            cls._remove(filepath)
+            cls._cache[filepath] = {"meta": meta, "checked": checked, parse_method: data}
+            cls._bytes += meta.get("bytes", 0)
+            cls._evict()
+        return meta, data
+
+    @classmethod
+    def _load_done(cls, key, task):
+        if cls._loading.get(key) is task:
+            del cls._loading[key]
+
+    @classmethod
+    def _remove(cls, filepath):
+        entry = cls._cache.pop(filepath, None)
+        if entry is not None:
+            cls._bytes -= entry["meta"].get("bytes", 0)
+
+    @classmethod
+    def _evict(cls):
+        while cls._cache and (
+            len(cls._cache) > cls.max_entries or cls._bytes > cls.max_bytes
+        ):
+            cls._remove(next(iter(cls._cache)))
+
+    @classmethod
+    def invalidate(cls, filepath):
+        """Drop ``filepath``, a read running for it is not cached."""
+        cls._remove(filepath)
+        for key in [k for k in cls._loading if k[0] == filepath]:
+            del cls._loading[key]
+
+    @classmethod
+    def invalidate_tree(cls, root):
+        """Drop the entries of files under the directory ``root``."""
+        prefix = os.path.join(root, "")
+        for filepath in list(cls._cache) + [k[0] for k in cls._loading]:
+            if cls._path(filepath).startswith(prefix):
+                cls.invalidate(filepath)
+
+    @classmethod
+    def clear(cls):
+        cls._cache.clear()
+        cls._loading.clear()
+        cls._bytes = 0
+
+    @classmethod
+    def stats(cls):
+        return {"entries": len(cls._cache), "bytes": cls._bytes}
+
+    @classmethod
+    def watch(cls, loop=None):
+        """Invalidate entries on inotify events of their directories
+        instead of checking their files. Returns False where inotify is not
+        available, entries are checked with stat then."""
+        if cls._watcher is not None:
+            return True
+        if not inotify.available():
+            return False
+        watcher = inotify.DirectoryWatcher(cls._on_change)
+        watcher.start(loop)
+        cls._watcher = watcher
+        return True
+
+    @classmethod
+    def unwatch(cls):
+        if cls._watcher is not None:
+            cls._watcher.close()
+            cls._watcher = None
+
+    @classmethod
+    def _on_change(cls, directory, name):
+        if directory is None:
+            cls.clear()
+            return
+        path = os.path.join(directory, name) if name is not None else None
+        for filepath in list(cls._cache) + [k[0] for k in cls._loading]:
+            fpath = cls._path(filepath)
+            if fpath == path or (path is None and os.path.dirname(fpath) == directory):
+                cls.invalidate(filepath)
+
+    @staticmethod
+    def _path(filepath):
+        if isinstance(filepath, (list, tuple)):
+            return filepath[0]
+        return filepath
+
+    @classmethod
+    def _dirname(cls, filepath):
+        return os.path.dirname(cls._path(filepath))
 
     @classmethod
     @threaded
@@ -88,19 +222,34 @@ class FileCache:
             return meta, None
 
         if isinstance(filepath, str):
+            if parse_method == "indexed":
+                with open(filepath, "rb") as f:
+                    data = f.read()
+                meta["bytes"] = len(data)
+                return meta, IndexedDatafile(data)
             with open(filepath, "r", encoding="utf-8") as f:
                 data = f.read()
+                meta["bytes"] = len(data)
                 if parse_method == "json":
-                    data = json.loads(data)
+                    data = jsoncodec.loads(data)
                 return meta, data
         elif isinstance(filepath, (list, tuple)):
-            fpath = filepath[0]
-            with ZipFile(fpath, "r") as zfile:
-                with zfile.open(filepath[1], "r") as somefile:
-                    data = somefile.read()
-                    if parse_method == "json":
-                        data = json.loads(data)
-                    return meta, data
+            archive = ReleaseArchive.get(filepath[0])
+            name = filepath[1]
+            if parse_method == "indexed":
+                if name not in archive:
+                    return meta, None
+                data = archive.view(name)
+                meta["bytes"] = len(data)
+                return meta, IndexedDatafile(data)
+            if parse_method == "json" or archive.getinfo(name).file_size >= ZERO_COPY_SIZE:
+                data = archive.view(name)
+            else:
+                data = archive.read(name)
+            meta["bytes"] = len(data)
+            if parse_method == "json":
+                data = jsoncodec.loads(data)
+            return meta, data
 
         else:
             raise Exception(
@@ -147,15 +296,50 @@ class ApplicationFolder:
         return os.path.abspath(os.path.join(cls._root_dir, f"APP_{app_id}"))
 
     @classmethod
-    def get_content_url_root(cls, app_id, host_url):
+    def list_app_ids(cls):
+        """Ids of the apps with a folder under the root."""
+        if not os.path.isdir(cls._root_dir):
+            return []
+        return sorted(
+            name[len("APP_"):]
+            for name in os.listdir(cls._root_dir)
+            if name.startswith("APP_")
+            and os.path.isdir(os.path.join(cls._root_dir, name))
+        )
+
+    @classmethod
+    def get_content_root(cls, app_id):
+        # the directory served as /static/APP_<app_id>/content, see main.py
+        return os.path.abspath(
+            os.path.join(cls._root_dir, "live", f"APP_{app_id}", "content")
+        )
+
+    @classmethod
+    def get_content_url_root(cls, app_id, host_url=""):
         host_url = host_url.strip("/")
         root_url = settings.get("content_url", "").strip("/")
         if not root_url:
             root_url = host_url
         return f"{root_url}/static/APP_{app_id}/content"
 
+    @classmethod
+    def get_content_url(cls, app_id, host_url, relative, hashed=True):
+        """URL of a content file, content-hashed (cacheable as immutable)
+        when the file is listed in the published asset manifest. Only this
+        server's static handler resolves hashed names, content served from
+        a ``content_url`` keeps the plain ones."""
+        relative = relative.lstrip("/")
+        if hashed and not settings.get("content_url"):
+            manifest = AssetManifest.get(cls.get_content_root(app_id))
+            relative = manifest.url_path(relative)
+        return f"{cls.get_content_url_root(app_id, host_url)}/{relative}"
+
 
 class ConfigLoader:
+    # seconds release.json is cached, longer while the release bus
+    # announces publishes
+    release_max_cached = 120
+
     def __init__(self, app_id, live=True):
         self.app_id = app_id
         self.config_dir = ApplicationFolder.get_app_root(app_id)
@@ -168,10 +352,17 @@ class ConfigLoader:
     def client_keys(self):
         return self._client_keys
 
+    @property
+    def release(self):
+        return self.config_file or self.config_dir
+
     async def load(self):
         release_file = os.path.join(self.config_dir, "release.json")
         meta, data = await FileCache.get(
-            release_file, parse_method="json", max_cached=120, cache_policy="align"
+            release_file,
+            parse_method="json",
+            max_cached=self.release_max_cached,
+            cache_policy="align",
         )
 
         if meta["exist"]:
@@ -207,3 +398,15 @@ class ConfigLoader:
             jsonfile, parse_method="json", max_cached=self.max_cached
         )
         return data
+
+    async def get_indexed_datafile(self, name):
+        """The `IndexedDatafile` compiled from datafile ``name`` at
+        publish, None if it was not indexed. Only releases are indexed
+        consistently, an app folder may have datafiles changed since."""
+        if not self.config_file:
+            return None
+        indexfile = self.get_filepath(f"datafile/{name}{INDEX_SUFFIX}")
+        meta, data = await FileCache.get(
+            indexfile, parse_method="indexed", max_cached=self.max_cached
+        )
+        return data if isinstance(data, IndexedDatafile) else None
@@ -0,0 +1,61 @@
+"""Release bus: a published release reaches every worker at once.
+
+The editor calls `publish(app_id)` after writing a release. Workers
+listening on the ``highorder_release`` channel drop the app's cached
+files and compiled expressions and load the new release, instead of
+finding it when their ``release.json`` cache window ends. A listening
+worker caches ``release.json`` for ``[release] max_cached`` seconds, a
+fallback for notifications lost to a broken connection. Without the
+channel (notify off, or no database) a publish reaches this process only.
+"""
+from basepy.asynclog import logger
+from basepy.config import settings
+from postmodel.channel import NotifyChannel
+
+from highorder.base.loader import ConfigLoader
+from highorder.base.model import DB_NAME
+
+release_settings = settings.get("release", {})
+
+channel = NotifyChannel(
+    "highorder_release",
+    db_name=DB_NAME,
+    reconnect_interval=release_settings.get("reconnect_interval", 5),
+)
+
+
+def subscribe(on_release, on_reconnect=None):
+    """Call ``on_release(app_id)`` for every published release, and
+    ``on_reconnect()`` after notifications may have been lost."""
+    channel.subscribe(on_release)
+    if on_reconnect is not None:
+        channel.on_reconnect(on_reconnect)
+
+
+async def start():
+    if not release_settings.get("notify", True):
+        return False
+    try:
+        await channel.start()
+    except Exception as e:
+        await logger.warning("release bus not listening", error=str(e))
+        return False
+    ConfigLoader.release_max_cached = release_settings.get("max_cached", 600)
+    return True
+
+
+async def stop():
+    await channel.stop()
+
+
+async def publish(app_id):
+    if release_settings.get("notify", True):
+        try:
+            await channel.publish(app_id)
+        except Exception as e:
+            await logger.warning("release notify failed", app_id=app_id, error=str(e))
+        else:
+            if channel.listening:
+                # the notification comes back to this process too
+                return
+    channel.deliver(app_id)
@@ -0,0 +1,216 @@
+"""Generated dump/load functions for dataclasses.
+
+A drop-in for the ``dataclass_factory.Factory`` dump/load used on the hot
+paths: the source of one dump and one load function is generated per
+dataclass from its type hints, compiled once and cached, so a call costs
+plain attribute and key access instead of introspection.
+
+``dumpb`` encodes a tree of dataclasses straight to JSON bytes. With a
+codec that encodes dataclasses natively (orjson) no intermediate dicts
+are built at all, otherwise each dataclass becomes a shallow dict inside
+the encoder.
+"""
+import dataclasses
+import datetime
+import enum
+import typing
+from typing import Any, Union
+
+from basepy import jsoncodec
+
+_MISSING = dataclasses.MISSING
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+def _dump_any(value):
+    """Dump a value whose type is only known at runtime."""
+    if isinstance(value, _PRIMITIVES):
+        return value
+    if isinstance(value, dict):
+        return {k: _dump_any(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_dump_any(v) for v in value]
+    if dataclasses.is_dataclass(value):
+        return serializer.dumper(type(value))(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def _json_default(value):
+    if dataclasses.is_dataclass(value):
+        return serializer.shallow_dumper(type(value))(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _load_str(value):
+    if not isinstance(value, str):
+        raise ValueError(f"data type is not {str}")
+    return value
+
+
+def _optional_arg(tp):
+    """``X`` for ``Optional[X]``, None for any other type."""
+    if typing.get_origin(tp) is Union:
+        args = [x for x in typing.get_args(tp) if x is not type(None)]
+        if len(args) == 1 and len(typing.get_args(tp)) == 2:
+            return args[0]
+    return None
+
+
+class Serializer:
+    def __init__(self):
+        self._dumpers = {}
+        self._shallow_dumpers = {}
+        self._loaders = {}
+
+    def dump(self, data):
+        if dataclasses.is_dataclass(data) and not isinstance(data, type):
+            return self.dumper(type(data))(data)
+        return _dump_any(data)
+
+    def load(self, data, cls):
+        return self.loader(cls)(data)
+
+    def dumpb(self, data):
+        """JSON bytes of ``data``, a dataclass or a dict/list containing them."""
+        return jsoncodec.dumpb(data, default=_json_default)
+
+    def compile(self, cls):
+        self.dumper(cls)
+        self.shallow_dumper(cls)
+        self.loader(cls)
+
+    def compile_all(self, namespace):
+        """Compile every dataclass defined in a module namespace."""
+        module = namespace.get("__name__")
+        for value in list(namespace.values()):
+            if (
+                isinstance(value, type)
+                and dataclasses.is_dataclass(value)
+                and value.__module__ == module
+            ):
+                self.compile(value)
+
+    def dumper(self, cls):
+        func = self._dumpers.get(cls)
+        if func is None:
+            func = self._dumpers[cls] = self._build_dumper(cls)
+        return func
+
+    def shallow_dumper(self, cls):
+        func = self._shallow_dumpers.get(cls)
+        if func is None:
+            func = self._shallow_dumpers[cls] = self._build_shallow_dumper(cls)
+        return func
+
+    def loader(self, cls):
+        func = self._loaders.get(cls)
+        if func is None:
+            func = self._loaders[cls] = self._build_loader(cls)
+        return func
+
+    def _exec(self, name, lines, namespace):
+        namespace.setdefault("_dump_any", _dump_any)
+        namespace.setdefault("_load_str", _load_str)
+        exec("\n".join(lines), namespace)
+        return namespace[name]
+
+    def _build_shallow_dumper(self, cls):
+        items = ", ".join(
+            f"{f.name!r}: obj.{f.name}" for f in dataclasses.fields(cls)
+        )
+        lines = ["def shallow_dump(obj):", f"    return {{{items}}}"]
+        return self._exec("shallow_dump", lines, {})
+
+    def _build_dumper(self, cls):
+        hints = typing.get_type_hints(cls)
+        namespace = {}
+        items = []
+        for f in dataclasses.fields(cls):
+            expr = self._dump_expr(hints.get(f.name, Any), f"obj.{f.name}", namespace)
+            items.append(f"{f.name!r}: {expr}")
+        lines = ["def dump(obj):", "    return {%s}" % ", ".join(items)]
+        return self._exec("dump", lines, namespace)
+
+    def _dump_expr(self, tp, value, namespace):
+        if tp in (str, int, float, bool):
+            return value
+        optional = _optional_arg(tp)
+        if optional is not None and optional in (str, int, float, bool):
+            return value
+        if isinstance(tp, type) and dataclasses.is_dataclass(tp):
+            # fields declared as a dataclass sometimes default to a dict
+            name = f"_cls_{len(namespace)}"
+            namespace[name] = tp
+            namespace[f"{name}_dump"] = lambda obj, tp=tp: self.dumper(tp)(obj)
+            return (
+                f"({name}_dump({value}) if type({value}) is {name} "
+                f"else _dump_any({value}))"
+            )
+        return f"_dump_any({value})"
+
+    def _build_loader(self, cls):
+        if not (isinstance(cls, type) and dataclasses.is_dataclass(cls)):
+            namespace = {}
+            expr = self._load_expr(cls, "v", namespace)
+            return self._exec("load", ["def load(v):", f"    return {expr}"], namespace)
+        hints = typing.get_type_hints(cls)
+        namespace = {"_cls": cls}
+        lines = [
+            "def load(data):",
+            "    if not isinstance(data, dict):",
+            f"        raise TypeError('{cls.__name__} must be loaded from a dict, not %s' % type(data).__name__)",
+            "    kwargs = {}",
+        ]
+        for f in dataclasses.fields(cls):
+            if not f.init:
+                continue
+            tp = hints.get(f.name, Any)
+            conv = self._load_expr(tp, "v", namespace, none_ok=f.default is None)
+            lines.append(f"    v = data.get({f.name!r}, _missing)")
+            lines.append("    if v is not _missing:")
+            lines.append(f"        kwargs[{f.name!r}] = {conv}")
+        lines.append("    return _cls(**kwargs)")
+        namespace["_missing"] = _MISSING
+        return self._exec("load", lines, namespace)
+
+    def _load_expr(self, tp, value, namespace, none_ok=False):
+        optional = _optional_arg(tp)
+        if optional is not None:
+            inner = self._load_expr(optional, value, namespace)
+            return f"(None if {value} is None else {inner})"
+        if tp is str:
+            if none_ok:
+                return f"(None if {value} is None else _load_str({value}))"
+            return f"_load_str({value})"
+        if tp in (int, float, bool):
+            return f"{tp.__name__}({value})"
+        if tp is Any or tp is dict or tp is list or tp is object:
+            return value
+        origin = typing.get_origin(tp)
+        if origin is list:
+            args = typing.get_args(tp)
+            item = args[0] if args else Any
+            if item in (Any, dict):
+                return f"list({value})"
+            inner = self._load_expr(item, "x", namespace)
+            return f"[{inner} for x in {value}]"
+        if origin is dict:
+            return value
+        if isinstance(tp, type) and dataclasses.is_dataclass(tp):
+            name = f"_load_{len(namespace)}"
+            namespace[name] = lambda data, tp=tp: self.loader(tp)(data)
+            return f"{name}({value})"
+        return value
+
+
+serializer = Serializer()
@@ -126,6 +126,23 @@ def init():
     creator.init()
 
 
+@app.command()
+def precompress(folder: str = typer.Argument(None)):
+    """Write gzip/brotli variants and the asset manifest of a static folder,
+    the webapp assets by default."""
+    from callpy.web.assets import precompress_directory
+
+    if not folder:
+        import importlib.resources
+
+        with importlib.resources.path("highorder", "__init__.py") as f:
+            folder = os.path.join(os.path.dirname(f), "webapp", "assets")
+    manifest = precompress_directory(folder)
+    files = manifest["files"]
+    compressed = sum(1 for x in files.values() if x["encodings"])
+    typer.echo(f"Precompressed {compressed} of {len(files)} files in {folder}.")
+
+
 @app.command()
 def help():
     typer.echo(f"Help.")
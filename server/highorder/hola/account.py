@@ -1,4 +1,10 @@
+import copy
 import hashlib
+from basepy import jsoncodec
+from basepy.asynclog import logger
+from basepy.cache import AsyncCache
+from basepy.config import settings
+from postmodel.channel import NotifyChannel
 from .model import SocialAccount, User, Session, UserAuth
 from highorder.base.utils import random_str, time_random_id, IDPrefix
 from highorder.base.model import DB_NAME
@@ -202,10 +208,67 @@ class UserAuthService:
             }
 
 
+cache_settings = settings.get("cache", {})
+
+# a saved or deleted session is dropped from the caches of all workers
+session_channel = NotifyChannel(
+    "highorder_session",
+    db_name=DB_NAME,
+    reconnect_interval=cache_settings.get("reconnect_interval", 5),
+)
+session_cache = AsyncCache(
+    max_size=cache_settings.get("session_size", 10000),
+    ttl=cache_settings.get("session_ttl", 5),
+    cache_none=False,
+)
+
+
+def _drop_cached_session(payload):
+    app_id, session_token = jsoncodec.loads(payload)
+    session_cache.invalidate((app_id, session_token))
+
+
+session_channel.subscribe(_drop_cached_session)
+session_channel.on_reconnect(session_cache.clear)
+
+
+async def start_session_cache():
+    """Cache sessions while the invalidation channel listens, without it
+    every load reads the database."""
+    if cache_settings.get("session_ttl", 5) <= 0:
+        return False
+    try:
+        await session_channel.start()
+    except Exception as e:
+        await logger.warning("session cache off, channel not listening", error=str(e))
+        return False
+    return True
+
+
+async def stop_session_cache():
+    await session_channel.stop()
+    session_cache.clear()
+
+
+async def invalidate_session(app_id, session_token):
+    session_cache.invalidate((app_id, session_token))
+    if session_channel.listening:
+        # delivered when the current transaction commits
+        await session_channel.publish(jsoncodec.dumps([app_id, session_token]))
+
+
 class SessionService:
     @classmethod
     async def load(cls, app_id, session_token):
-        model = await Session.load(app_id=app_id, session_token=session_token)
+        if session_channel.listening:
+            model = await session_cache.get(
+                (app_id, session_token),
+                lambda: Session.load(app_id=app_id, session_token=session_token),
+            )
+            # requests change their session, the cached model stays as saved
+            model = copy.deepcopy(model)
+        else:
+            model = await Session.load(app_id=app_id, session_token=session_token)
         if model:
             return cls(model)
         return None
@@ -215,6 +278,7 @@ class SessionService:
         model = await Session.load(app_id=app_id, session_token=session_token)
         if model:
             await model.delete()
+        await invalidate_session(app_id, session_token)
         return None
 
     @classmethod
@@ -310,6 +374,7 @@ class SessionService:
 
     async def save(self):
         await self.model.save()
+        await invalidate_session(self.model.app_id, self.model.session_token)
 
 
 class WeiXinService:
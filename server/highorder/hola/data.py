@@ -3,6 +3,9 @@ from typing import Any, Optional, List, TypeVar, Callable, Type, cast
 from enum import auto
 from datetime import datetime
 
+from highorder.base.serializer import serializer
+
+
 @dataclass
 class ComponentDefine:
     type: str
@@ -338,3 +341,7 @@ class ClientRequestCommand:
 class SetupRequestCommand:
     command: str
     args: dict = field(default_factory=dict)
+
+
+# generate the dump/load functions of the dataclasses above once, at import
+serializer.compile_all(globals())
@@ -0,0 +1,98 @@
+"""Warm the per-process caches of every app before workers fork.
+
+Registered as a ``CallPy.preload`` hook: with preloading enabled it runs
+once in the supervisor and the forked workers share the parsed app
+definitions (the `FileCache`) and compiled expressions copy-on-write.
+Nothing here opens a connection, DB pools stay per worker.
+
+`reload_app` and `reload_apps` are the release bus subscribers, they
+drop what a worker cached of an app before loading its new release.
+"""
+from callpy.web.assets import AssetManifest
+from highorder.base.loader import ApplicationFolder, ConfigLoader, FileCache
+from .transformer import CompiledExpression, FormatTemplate
+
+
+def iter_expressions(definition):
+    """Yield ``(kind, expr)`` for the expressions in a hola definition,
+    kind is ``"format"`` or ``"expr"``."""
+    stack = [definition]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+        for key, value in node.items():
+            if isinstance(value, str):
+                if key == "format":
+                    yield "format", value
+                elif key in ("expr", "condition"):
+                    yield "expr", value
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
+
+
+def compile_expressions(definition, release):
+    """Compile the expressions of a definition into the release caches,
+    returns the number compiled. Invalid ones are left to fail, and be
+    reported, when a request evaluates them."""
+    count = 0
+    for kind, expr in iter_expressions(definition):
+        try:
+            if kind == "format":
+                FormatTemplate.get(expr, release=release)
+            else:
+                CompiledExpression.get(expr, release=release)
+        except Exception:
+            continue
+        count += 1
+    return count
+
+
+async def preload_app(app_id):
+    config_loader = ConfigLoader(app_id)
+    await config_loader.load()
+    hola_dict = await config_loader.get_config("main.hola")
+    return compile_expressions(hola_dict, config_loader.release)
+
+
+async def preload_apps(app_ids=None):
+    """Preload ``app_ids``, all apps when None. Returns ``{app_id: number
+    of compiled expressions}`` of the apps that loaded."""
+    if app_ids is None:
+        app_ids = ApplicationFolder.list_app_ids()
+    loaded = {}
+    for app_id in app_ids:
+        try:
+            loaded[app_id] = await preload_app(app_id)
+        except Exception:
+            # a broken app must not keep the others from serving
+            continue
+    return loaded
+
+
+def forget_app(app_id):
+    root = ApplicationFolder.get_app_root(app_id)
+    FileCache.invalidate_tree(root)
+    FormatTemplate.forget(root)
+    CompiledExpression.forget(root)
+    AssetManifest.invalidate(ApplicationFolder.get_content_root(app_id))
+
+
+async def reload_app(app_id):
+    """Forget ``app_id`` and preload its current release."""
+    if not app_id or "/" in app_id or "\\" in app_id or app_id.startswith("."):
+        return None
+    forget_app(app_id)
+    return await preload_app(app_id)
+
+
+async def reload_apps():
+    FileCache.clear()
+    FormatTemplate._cache.clear()
+    CompiledExpression._cache.clear()
+    for app_id in ApplicationFolder.list_app_ids():
+        AssetManifest.invalidate(ApplicationFolder.get_content_root(app_id))
+    return await preload_apps()
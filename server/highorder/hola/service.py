@@ -74,24 +74,25 @@ from postmodel.transaction import in_transaction
 from .transformer import (
     FilterExprTransformer,
     expr_dump,
-    DatetimeFormatter
+    DatetimeFormatter,
+    FormatTemplate,
+    CompiledExpression,
 )
 import json
 
-import dataclass_factory
-from likepy import restrictedexpr, restrictedpy
+from likepy import restrictedexpr
 from highorder.base.instant_db import (
     InstantDataStorageService,
     UserInstantDataStorageService,
 )
 from highorder.base.loader import ApplicationFolder
+from highorder.base.datafile import IndexedDatafile
+from highorder.base.serializer import serializer
 from basepy.asynclog import logger
+from callpy.web.timing import span, timed
 import zlib
 from .extension import HolaServiceRegister
 from functools import reduce
-from string import Formatter
-
-factory = dataclass_factory.Factory()
 
 def get_page_size_name(page_width):
     if page_width <= 300:
@@ -320,7 +321,7 @@ class HolaPageStateService:
 
     async def set_view_showed(self, route, tag="", limit=None):
         if limit:
-            limitobj = factory.load(limit, LimitObject)
+            limitobj = serializer.load(limit, LimitObject)
             return await self.set_instant_view_viewed(route, tag, limitobj)
         else:
             state = self.page_state.setdefault(route, {})
@@ -329,14 +330,14 @@ class HolaPageStateService:
 
     async def get_view_showed(self, route, tag="", limit=None):
         if limit:
-            limitobj = factory.load(limit, LimitObject)
+            limitobj = serializer.load(limit, LimitObject)
             return await self.get_instant_view_viewed(route, tag, limitobj)
         else:
             state = self.page_state.get(route, {})
             return state.get(f"{tag}viewed", False)
 
     async def get_set_view_hooked(self, route, hook, tag, limit):
-        limitobj = factory.load(limit, LimitObject)
+        limitobj = serializer.load(limit, LimitObject)
         viewed = await self.get_instant_view_viewed(route, f"{hook}_{tag}", limitobj)
         await self.set_instant_view_viewed(route, f"{hook}_{tag}", limitobj)
         return viewed
@@ -466,6 +467,7 @@ class HolaStorageService:
             init[name] = self.get_variable_value(vardef, context)
         return init
 
+    @timed("storage.variables")
     async def load_variables_model(self, context=None):
         if "hola_variable" in self._models:
             return self._models["hola_variable"]
@@ -487,6 +489,7 @@ class HolaStorageService:
         self._models["hola_variable"] = var
         return var
 
+    @timed("storage.variables")
     async def load_session_variables_model(self, context=None):
         if "hola_session_variable" in self._models:
             return self._models["hola_session_variable"]
@@ -518,6 +521,7 @@ class HolaStorageService:
             var = await self.load_variables_model(context)
             return munchify(var.to_dict())
 
+    @timed("storage.player")
     async def load_player_model(self):
         if "hola_player" in self._models:
             return self._models["hola_player"]
@@ -542,6 +546,7 @@ class HolaStorageService:
         self._models["hola_player"] = player
         return player
 
+    @timed("storage.player")
     async def load_session_player_model(self):
         if "hola_session_player" in self._models:
             return self._models["hola_session_player"]
@@ -579,6 +584,7 @@ class HolaStorageService:
         player._id = player.user_id
         return player
 
+    @timed("storage.save")
     async def save_player(self, player):
         if not self.user_id:
             _model = await self.load_session_player_model()
@@ -591,6 +597,7 @@ class HolaStorageService:
         _model.currency = player.currency
         await _model.save()
 
+    @timed("storage.itembox")
     async def load_session_player_itembox_model(self, name="default"):
         if "hola_session_player_itembox" in self._models:
             return self._models["hola_session_player_itembox"]
@@ -608,6 +615,7 @@ class HolaStorageService:
         self._models["hola_session_player_itembox"] = item
         return item
 
+    @timed("storage.itembox")
     async def load_player_itembox_model(self, name="default"):
         if "hola_player_itembox" in self._models:
             return self._models["hola_player_itembox"]
@@ -633,6 +641,7 @@ class HolaStorageService:
             itembox = await self.load_itembox_model(name)
             return munchify(itembox.to_dict())
 
+    @timed("storage.save")
     async def save_itembox(self, itembox):
         if not self.user_id:
             _model = await self.load_session_player_itembox_model(itembox.name)
@@ -643,6 +652,7 @@ class HolaStorageService:
         _model.detail = itembox.detail
         await _model.save()
 
+    @timed("storage.playable_state")
     async def load_session_playable_state_model(self):
         if "hola_session_playable_state" in self._models:
             return self._models["hola_session_playable_state"]
@@ -656,6 +666,7 @@ class HolaStorageService:
         self._models["hola_session_playable_state"] = state
         return state
 
+    @timed("storage.playable_state")
     async def load_playable_state_model(self):
         if "hola_playable_state" in self._models:
             return self._models["hola_playable_state"]
@@ -717,6 +728,7 @@ class HolaStorageService:
         _model.playable_state = playable_state
         await _model.save()
 
+    @timed("storage.page_state")
     async def load_session_page_state_model(self):
         if "hola_session_page_state" in self._models:
             return self._models["hola_session_page_state"]
@@ -731,6 +743,7 @@ class HolaStorageService:
         self._models["hola_session_page_state"] = page_state_model
         return page_state_model
 
+    @timed("storage.page_state")
     async def load_page_state_model(self):
         if "hola_page_state" in self._models:
             return self._models["hola_page_state"]
@@ -750,6 +763,7 @@ class HolaStorageService:
             page_state_model = await self.load_page_state_model()
         return HolaPageStateService(self.user_id, page_state_model.page_state, self)
 
+    @timed("storage.save")
     async def save_page_state(self, page_state):
         if not self.user_id:
             _model = await self.load_session_page_state_model()
@@ -847,14 +861,16 @@ class HolaDataObjectService:
             expr_cls = QueryExpression, **kwargs
         )
         if filter_expr:
-            qexpr = ft.transform(filter_expr)
+            qexpr, shape_key = ft.transform_with_shape(filter_expr)
             qexpr = operator.and_(
                 QueryExpression(app_id=self.app_id, object_name=self.name), qexpr
             )
         else:
-            qexpr = QueryExpression(app_id=self.app_id, object_name=self.name)
+            qexpr, shape_key = QueryExpression(app_id=self.app_id, object_name=self.name), ()
 
         query_expr = HolaObject.filter(qexpr)
+        if shape_key is not None:
+            query_expr = query_expr.sql_shape(("object", bool(filter_expr), shape_key))
         if order_by:
             query_expr = query_expr.order_by(*ft.transform_order_by(order_by))
         if limit:
@@ -866,13 +882,15 @@ class HolaDataObjectService:
         limit = kwargs.get("limit")
         ft = FilterExprTransformer(target="it", rename="", expr_cls = QueryExpression, **kwargs)
         if filter_expr:
-            qexpr = ft.transform(filter_expr)
+            qexpr, shape_key = ft.transform_with_shape(filter_expr)
             qexpr = operator.and_(QueryExpression(app_id=self.app_id), qexpr)
         else:
-            qexpr = QueryExpression(app_id=self.app_id)
+            qexpr, shape_key = QueryExpression(app_id=self.app_id), ()
 
         # print(expr_dump(qexpr))
         query_expr = model_class.filter(qexpr)
+        if shape_key is not None:
+            query_expr = query_expr.sql_shape(("native", bool(filter_expr), shape_key))
         if order_by:
             query_expr = query_expr.order_by(*ft.transform_order_by(order_by))
         if limit:
@@ -1035,7 +1053,7 @@ class HolaSetupService:
 
     async def load(self):
         hola_dict = await self.config_loader.get_config("main.hola")
-        hola_def = factory.load(hola_dict, HolaInterfaceDefine)
+        hola_def = serializer.load(hola_dict, HolaInterfaceDefine)
         for obj in hola_def.objects:
             obj_type = obj.get("type", "")
             if obj_type == "currency":
@@ -1151,9 +1169,10 @@ class HolaService:
         self.host_url = kwargs.get("host_url", "")
         self._commands = AutoList()
 
+    @timed("hola.load")
     async def load(self, request_context):
         hola_dict = await self.config_loader.get_config("main.hola")
-        hola_def = factory.load(hola_dict, HolaInterfaceDefine)
+        hola_def = serializer.load(hola_dict, HolaInterfaceDefine)
         self.widgets = []
         self.components = []
         self.interfaces = []
@@ -1166,7 +1185,7 @@ class HolaService:
         for interface_def in all_interfaces:
             interface_type = interface_def.get("type", "")
             if interface_type == "page":
-                page_def = factory.load(interface_def, PageDefine)
+                page_def = serializer.load(interface_def, PageDefine)
                 valid_page_size = page_def.valid.get("page_size", None)
                 valid_platform = page_def.valid.get("platform", None)
                 if (not valid_page_size) and (not valid_platform):
@@ -1396,10 +1415,9 @@ class HolaService:
         if isinstance(raw_link, str):
             if raw_link == "~" or raw_link.startswith("~/"):
                 relative = raw_link[1:].lstrip("/")
-                content_root_url = ApplicationFolder.get_content_url_root(
-                    self.app_id, self.host_url
+                return ApplicationFolder.get_content_url(
+                    self.app_id, self.host_url, relative
                 )
-                return f"{content_root_url}/{relative}"
             else:
                 return raw_link
         elif isinstance(raw_link, (dict, Mapping)):
@@ -3035,6 +3053,13 @@ class HolaService:
         raise Exception(f"no playable challenge {name} found.")
 
     def get_static_playable_level(self, levels, level_id=None, level_next=False):
+        if isinstance(levels, IndexedDatafile):
+            position = levels.position(level_id) if level_id else None
+            if position is None:
+                return None
+            if level_next:
+                position = min(position + 1, len(levels) - 1)
+            return levels[position]
         for idx, level in enumerate(levels):
             if level_id and level["level_id"] == level_id:
                 if level_next == False:
@@ -3049,7 +3074,10 @@ class HolaService:
     async def get_dynamic_playable_level_config(self, link):
         name = os.path.basename(link)
         name = os.path.splitext(name)[0]
-        data = await self.config_loader.get_datafile(name)
+        # levels indexed at publish are read one at a time
+        data = await self.config_loader.get_indexed_datafile(name)
+        if data is None:
+            data = await self.config_loader.get_datafile(name)
         return data
 
     async def get_playable_levels(self, collection_name):
@@ -3123,6 +3151,7 @@ class HolaService:
                 return element
         raise Exception(f"no playable found in interface {page_def.name}")
 
+    @timed("hola.modal")
     async def get_show_modal_command(self, modal, context):
         component = await self.transform_element(modal, context)
         if component and component["type"] == "modal":
@@ -3157,6 +3186,7 @@ class HolaService:
                 }
         return {}
 
+    @timed("hola.page")
     async def get_show_page_command(self, page_def, context, include_elements=True):
         origin_context = context
         context = copy.copy(origin_context)
@@ -3255,6 +3285,7 @@ class HolaService:
         else:
             itembox.detail["items"] = items
 
+    @timed("hola.changes")
     async def apply_changes(self, changes):
         player = await self.storage_svc.load_player()
         itemboxes = {}
@@ -3312,10 +3343,13 @@ class HolaService:
             raise Exception(f"no valid expression in condition {condition}")
 
         try:
-            ret = restrictedpy.eval(expr, context)
+            with span("hola.expr"):
+                ret = CompiledExpression.get(
+                    expr, release=self.config_loader.release
+                ).eval(context)
         except Exception as ex:
             logger.sync().error(
-                "eval condition error", expr=expr, context=context.to_dict()
+                "eval condition error", expr=expr, context=context.to_dict
             )
             raise (ex)
 
@@ -3393,24 +3427,27 @@ class HolaService:
             return value_def
 
     def eval_format_value(self, expr, context):
-        f = Formatter()
-        parsed = list(f.parse(expr))
-        if len(parsed) == 1 and parsed[0][1] == None and parsed[0][2] == None:
-            return expr
+        template = FormatTemplate.get(expr, release=self.config_loader.release)
+        if template.constant is not None:
+            return template.constant
         try:
-            return f.vformat(expr, [], context)
+            with span("hola.expr"):
+                return template.render(context)
         except Exception as ex:
             logger.sync().error(
-                "format error.", expr=expr, context=context.to_dict()
+                "format error.", expr=expr, context=context.to_dict
             )
             raise (ex)
 
     def eval_expr_value(self, expr, context):
         try:
-            return restrictedpy.eval(expr, context)
+            with span("hola.expr"):
+                return CompiledExpression.get(
+                    expr, release=self.config_loader.release
+                ).eval(context)
         except Exception as ex:
             logger.sync().error(
-                "eval error.", expr=expr, context=context.to_dict()
+                "eval error.", expr=expr, context=context.to_dict
             )
             raise (ex)
 
@@ -3895,8 +3932,8 @@ class HolaService:
         orig_playable.update(
             {
                 "succeed": args.succeed,
-                "archievement": factory.dump(args.archievement),
-                "itemlist": factory.dump(args.items),
+                "archievement": serializer.dump(args.archievement),
+                "itemlist": serializer.dump(args.items),
             }
         )
         context.playable = munchify(orig_playable)
@@ -4589,7 +4626,7 @@ class HolaService:
         if request_cmd:
             args = request_cmd.args
             context = await self._create_context(
-                factory.dump(request_cmd.context), args.get("locals", {})
+                serializer.dump(request_cmd.context), args.get("locals", {})
             )
             await self.load_variables_to_context(context=context)
             await self.load_player_to_context(context=context)
@@ -4625,7 +4662,7 @@ class HolaService:
                 code = args.get("code")
                 ret_commands.add(await self.auth_weixin(code, context=context))
             elif request_cmd.command == "playable_completed":
-                args = factory.load(args, PlayableCompletedArg)
+                args = serializer.load(args, PlayableCompletedArg)
                 ret_commands.add(await self.playable_completed(args, context=context))
             elif request_cmd.command == "playable_next":
                 ret_commands.add(await self.playable_next(args, context=context))
@@ -1,7 +1,16 @@
 import ast
+import os
+import re
 from datetime import timedelta, datetime, date
+from string import Formatter
+import _string
+import copy
 import arrow
 import pprint
+from postmodel.models import value_shape
+from likepy import safe_builtins
+from likepy.exceptions import CompileError
+from likepy.restricted import compile_restricted_eval
 
 pp = pprint.PrettyPrinter(indent=4)
 
@@ -62,6 +71,40 @@ class QueryExpr:
         pass
 
 
+class _Const:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, bound, context):
+        return self.value
+
+
+class FilterExprTemplate:
+    """A filter expression compiled once per normalized shape.
+
+    ``func`` builds the query expression from the bound values: the literals
+    of the filter text followed by the context values it references.
+    """
+
+    def __init__(self, func, context_paths, shape):
+        self.func = func
+        self.context_paths = context_paths
+        self.shape = shape
+
+    def render(self, values, context):
+        bound = values
+        if self.context_paths:
+            bound = values + [deep_get(context, p, None) for p in self.context_paths]
+        return self.func(bound, context), bound
+
+    def shape_key(self, bound):
+        if self.shape is None:
+            return None
+        return (self.shape, tuple(value_shape(v) for v in bound))
+
+
 class FilterExprTransformer:
     op_suffix_map = {
         "eq": "",
@@ -73,6 +116,22 @@ class FilterExprTransformer:
         "in": "in",
         "notin": "not_in",
     }
+    attr_suffixes = (
+        "contains",
+        "has_key",
+        "has_keys",
+        "has_anykeys",
+        "startswith",
+        "endswith",
+    )
+    literal_pattern = re.compile(
+        r'"(?:[^"\\\n]|\\.)*"'
+        r"|'(?:[^'\\\n]|\\.)*'"
+        r"|(?<![\w.])(?:0|[1-9]\d*)(?:\.\d+)?(?![\w.])"
+    )
+
+    _templates = {}
+    max_templates = 1024
 
     def __init__(self, target, rename=None, expr_cls=QueryExpr, **kwargs):
         self.expr_cls = expr_cls
@@ -101,13 +160,90 @@ class FilterExprTransformer:
         return expr_ast
 
     def transform(self, expr):
+        return self.transform_with_shape(expr)[0]
+
+    def transform_with_shape(self, expr):
+        """Transforms expr, also returning the SQL shape key of the result.
+
+        Expressions that only differ in their literal values share a cached
+        template and a shape key; the key is None if it can't be derived.
+        """
         if not expr:
-            f_expr = self.expr_cls()
-        else:
-            expr_ast = self.parse(expr)
-            # print(ast.dump(expr_ast, indent='\t'))
-            f_expr = self.transform_node(expr_ast)
-        return f_expr
+            return self.expr_cls(), ()
+        template, values = self.compile(expr)
+        f_expr, bound = template.render(values, self.context)
+        return f_expr, template.shape_key(bound)
+
+    def compile(self, expr):
+        matches = list(self.literal_pattern.finditer(expr))
+        try:
+            values = [self.literal_value(m.group()) for m in matches]
+        except (SyntaxError, ValueError):
+            self.parse(expr)
+            raise
+        normalized = self.literal_pattern.sub("?", expr)
+        key = (normalized, self.target, self.rename, self.expr_cls)
+        template = self._templates.get(key)
+        if template is not None:
+            return template, values
+
+        expr_ast = self.parse(expr)
+        slots = self.find_slots(expr, expr_ast, matches)
+        if slots is None:
+            # literals can't be matched back to the ast, compile this text only.
+            return self.compile_template(expr_ast, {}, None), []
+
+        template = self.compile_template(expr_ast, slots, key[:3])
+        if len(self._templates) >= self.max_templates:
+            self._templates.clear()
+        self._templates[key] = template
+        return template, values
+
+    @staticmethod
+    def literal_value(text):
+        first = text[0]
+        if first == '"' or first == "'":
+            if "\\" in text:
+                return ast.literal_eval(text)
+            return text[1:-1]
+        if "." in text:
+            return float(text)
+        return int(text)
+
+    def find_slots(self, expr, expr_ast, matches):
+        positions = {}
+        for idx, m in enumerate(matches):
+            prefix = expr[: m.start()]
+            line_start = prefix.rfind("\n") + 1
+            lineno = prefix.count("\n") + 1
+            col = len(prefix[line_start:].encode("utf-8"))
+            positions[(lineno, col)] = idx
+
+        slots = {}
+        for node in ast.walk(expr_ast):
+            if not isinstance(node, ast.Constant):
+                continue
+            idx = positions.get((node.lineno, node.col_offset))
+            if idx is None:
+                continue
+            literal = self.literal_value(matches[idx].group())
+            if type(literal) is not type(node.value) or literal != node.value:
+                return None
+            slots[id(node)] = idx
+
+        if len(slots) != len(matches):
+            return None
+        return slots
+
+    def compile_template(self, expr_ast, slots, shape):
+        self._slots = slots
+        self._slot_count = len(slots)
+        self._context_paths = []
+        self._shaped = shape is not None
+        func = self.compile_node(expr_ast)
+        return FilterExprTemplate(
+            func, self._context_paths, shape if self._shaped else None
+        )
 
     def transform_order_by(self, order_by):
         ready_order_by = order_by or []
@@ -132,91 +268,118 @@ class FilterExprTransformer:
         transformed = ".".join(parts)
         return f"{prefix}{transformed}"
 
-    def transform_node(self, node):
+    def compile_node(self, node):
         name = camel_to_snake(node.__class__.__name__)
-        method_name = f"transform_{name}"
+        method_name = f"compile_{name}"
         method = getattr(self, method_name, None)
         if callable(method):
             return method(node)
         else:
             raise Exception(f"no transform for node type: {name}.")
 
-    def transform_expression(self, node):
-        return self.transform_node(node.body)
+    def compile_expression(self, node):
+        return self.compile_node(node.body)
 
-    def transform_compare(self, node):
-        name = self.transform_node(node.left)
+    def compile_compare(self, node):
+        name = self.compile_node(node.left)
         op = node.ops[0].__class__.__name__.lower()
         suffix = self.op_suffix_map[op]
-        if suffix:
-            key_name = f"{name}__{suffix}"
-        else:
-            key_name = f"{name}"
-        target = self.transform_node(node.comparators[0])
-        return self.expr_cls(**{key_name: target})
+        target = self.compile_node(node.comparators[0])
+        expr_cls = self.expr_cls
+        if isinstance(name, _Const):
+            key_name = f"{name.value}__{suffix}" if suffix else f"{name.value}"
+            return lambda bound, context: expr_cls(**{key_name: target(bound, context)})
+
+        # the key comes from the context, so the sql differs per call.
+        self._shaped = False
+        def compare(bound, context):
+            key_name = f"{name(bound, context)}__{suffix}" if suffix else f"{name(bound, context)}"
+            return expr_cls(**{key_name: target(bound, context)})
+        return compare
+
+    def compile_call(self, node):
+        func_name = self.compile_node(node.func)
+        args = [self.compile_node(arg) for arg in node.args]
+        expr_cls = self.expr_cls
+        if not isinstance(func_name, _Const):
+            self._shaped = False
+        return lambda bound, context: expr_cls(
+            **{func_name(bound, context): [arg(bound, context) for arg in args]}
+        )
 
-    def transform_call(self, node):
-        func_name = self.transform_node(node.func)
-        args = [self.transform_node(arg) for arg in node.args]
-        return self.expr_cls(**{func_name: args})
+    def compile_attribute(self, node):
+        value = self.compile_node(node.value)
+        attr = node.attr
+        target, rename = self.target, self.rename
+        if isinstance(value, _Const):
+            resolved = self.resolve_attribute(target, rename, value.value, attr)
+            if isinstance(resolved, str):
+                return _Const(resolved)
+            idx = self._slot_count + len(self._context_paths)
+            self._context_paths.append(resolved[0])
+            return lambda bound, context: bound[idx]
+
+        self._shaped = False
+        def attribute(bound, context):
+            resolved = self.resolve_attribute(target, rename, value(bound, context), attr)
+            if isinstance(resolved, str):
+                return resolved
+            return deep_get(context, resolved[0], None)
+        return attribute
 
-    def transform_attribute(self, node):
-        keys = []
+    @classmethod
+    def resolve_attribute(cls, target, rename, name, attr):
+        """Returns the filter key for attr on name, or a 1-tuple holding the
+        context path to look up."""
+        keys = [name]
         suffix = ""
-        keys.append(self.transform_node(node.value))
-        if node.attr in [
-            "contains",
-            "has_key",
-            "has_keys",
-            "has_anykeys",
-            "startswith",
-            "endswith",
-        ]:
-            suffix = f"__{node.attr}"
+        if attr in cls.attr_suffixes:
+            suffix = f"__{attr}"
         else:
-            keys.append(node.attr)
+            keys.append(attr)
 
-        name = keys[0]
-        if name == self.target or name.startswith(f'{self.target}.') or len(suffix) > 0:
-            if name == self.target and self.rename != None:
-                keys[0] = self.rename
+        if name == target or name.startswith(f"{target}.") or len(suffix) > 0:
+            if name == target and rename != None:
+                keys[0] = rename
                 keys = list(filter(lambda x: x, keys))
             return ".".join(keys) + suffix
         else:
-            obj_key = ".".join(keys)
-            return deep_get(self.context, obj_key, None)
+            return (".".join(keys),)
 
-    def transform_name(self, node):
+    def compile_name(self, node):
         name = node.id
-        if name == 'true':
-            return True
-        elif name == 'false':
-            return False
-        elif name == 'null':
-            return None
+        if name == "true":
+            return _Const(True)
+        elif name == "false":
+            return _Const(False)
+        elif name == "null":
+            return _Const(None)
         else:
-            return name
+            return _Const(name)
 
-    def transform_list(self, node):
-        transformed_list = []
-        for n in node.elts:
-            transformed_list.append(self.transform_node(n))
-        return transformed_list
+    def compile_list(self, node):
+        elements = [self.compile_node(n) for n in node.elts]
+        return lambda bound, context: [el(bound, context) for el in elements]
 
-    def transform_tuple(self, node):
-        transformed_list = []
-        for n in node.elts:
-            transformed_list.append(self.transform_node(n))
-        return transformed_list
+    def compile_tuple(self, node):
+        return self.compile_list(node)
 
-    def transform_constant(self, node):
-        return node.value
+    def compile_constant(self, node):
+        idx = self._slots.get(id(node))
+        if idx is None:
+            return _Const(node.value)
+        return lambda bound, context: bound[idx]
 
-    def transform_bool_op(self, node):
+    def compile_bool_op(self, node):
         op = node.op.__class__.__name__.upper()
-        expr_values = [self.transform_node(n) for n in node.values]
-        expr_values = list(filter(lambda x: x != None, expr_values))
-        return self.expr_cls(*expr_values, join_type=op)
+        values = [self.compile_node(n) for n in node.values]
+        expr_cls = self.expr_cls
+
+        def bool_op(bound, context):
+            expr_values = [v(bound, context) for v in values]
+            expr_values = list(filter(lambda x: x != None, expr_values))
+            return expr_cls(*expr_values, join_type=op)
+        return bool_op
 
 
 def expr_to_dict(expr):
@@ -252,3 +415,134 @@ class DatetimeFormatter:
     @classmethod
     def parse(self, dt_str):
         return arrow.get(dt_str)
+
+
+
+class ReleaseCached:
+    """Instances built from an expression, cached per app release.
+
+    Subclasses define their own ``_cache`` dict and build from ``cls(expr)``.
+    """
+
+    _cache = None
+    max_cached = 4096
+    max_releases = 64
+
+    @classmethod
+    def get(cls, expr, release=None):
+        release_cache = cls._cache.get(release)
+        if release_cache is None:
+            if len(cls._cache) >= cls.max_releases:
+                del cls._cache[next(iter(cls._cache))]
+            release_cache = cls._cache[release] = {}
+        item = release_cache.get(expr)
+        if item is None:
+            if len(release_cache) >= cls.max_cached:
+                release_cache.clear()
+            item = release_cache[expr] = cls(expr)
+        return item
+
+    @classmethod
+    def cached_count(cls):
+        return sum(len(x) for x in cls._cache.values())
+
+    @classmethod
+    def forget(cls, root):
+        """Drop the releases under the directory ``root``."""
+        prefix = os.path.join(root, "")
+        for release in [r for r in cls._cache if isinstance(r, str)]:
+            if release == root or release.startswith(prefix):
+                del cls._cache[release]
+
+
+class FormatTemplate(ReleaseCached):
+    """A str.format template compiled once into literal and field segments.
+
+    Rendering walks the precomputed segments and attribute paths instead of
+    re-parsing the template on every call. Templates without fields render
+    to a constant. Templates using positional fields or nested format specs
+    fall back to ``Formatter.vformat``.
+    """
+
+    _converters = {"s": str, "r": repr, "a": ascii}
+    _cache = {}
+
+    def __init__(self, expr):
+        self.expr = expr
+        self.constant = None
+        self.segments = None
+        parsed = list(Formatter().parse(expr))
+        if all(field_name is None for _, field_name, _, _ in parsed):
+            self.constant = expr if len(parsed) == 1 else "".join(
+                literal for literal, _, _, _ in parsed
+            )
+            return
+
+        segments = []
+        for literal, field_name, format_spec, conversion in parsed:
+            if literal:
+                segments.append(literal)
+            if field_name is None:
+                continue
+            first, rest = _string.formatter_field_name_split(field_name)
+            if (
+                not isinstance(first, str)
+                or first == ""
+                or (format_spec and "{" in format_spec)
+                or (conversion and conversion not in self._converters)
+            ):
+                # positional or nested fields keep the stdlib semantics.
+                self.render = self._render_vformat
+                return
+            segments.append(
+                (
+                    first,
+                    tuple(rest),
+                    self._converters.get(conversion),
+                    format_spec or "",
+                )
+            )
+        self.segments = tuple(segments)
+
+    def render(self, context):
+        if self.segments is None:
+            return self.constant
+        parts = []
+        for segment in self.segments:
+            if segment.__class__ is str:
+                parts.append(segment)
+                continue
+            first, path, converter, format_spec = segment
+            obj = context[first]
+            for is_attr, key in path:
+                obj = getattr(obj, key) if is_attr else obj[key]
+            if converter is not None:
+                obj = converter(obj)
+            parts.append(format(obj, format_spec))
+        return "".join(parts)
+
+    def _render_vformat(self, context):
+        return Formatter().vformat(self.expr, [], context)
+
+
+class CompiledExpression(ReleaseCached):
+    """A restricted python expression compiled once.
+
+    Evaluates like ``restrictedpy.eval(expr, context)`` without running the
+    restricting compiler on every call.
+    """
+
+    _cache = {}
+
+    def __init__(self, expr):
+        self.expr = expr
+        result = compile_restricted_eval(expr)
+        if result.errors:
+            raise CompileError(result.errors[0])
+        self.code = result.code
+
+    def eval(self, context):
+        scope = copy.copy(context)
+        if "__builtins__" not in scope:
+            scope["__builtins__"] = safe_builtins.copy()
+        return eval(self.code, scope)
@@ -1,19 +1,23 @@
 from callpy.web import Blueprint
 from callpy.web.response import Response
+from callpy.web.timing import span, timed
 from .service import HolaService, HolaSetupService
-import dataclass_factory
 import hmac, hashlib
 from highorder.base.loader import ConfigLoader
 from highorder.base import error
 from highorder.hola.account import SessionService
 from .data import ClientRequestCommand, SetupRequestCommand
-import json
+from highorder.base.serializer import serializer
 from basepy.config import settings
 
-factory = dataclass_factory.Factory()
 
 bp = Blueprint("hola", url_prefix="/service/hola")
 
+# bytes, larger request bodies are refused before they are read
+max_body_size = settings.get("max_body_size", 1024 * 1024)
+# setup requests carry whole app definitions
+setup_max_body_size = settings.get("setup_max_body_size", 32 * 1024 * 1024)
+
 
 class AppConfig:
     @classmethod
@@ -35,26 +39,31 @@ class AppConfig:
         return None
 
 
+def sign_matches(hex_sign_server, hex_sign):
+    # the header is decoded as latin-1, compare_digest refuses str with
+    # non-ASCII characters
+    return hmac.compare_digest(
+        hex_sign_server.encode(), hex_sign.encode("latin-1", "replace")
+    )
+
+
 async def validate_client(app_id, sign, request):
     hex_sign, timestamp, client_key = sign.split(",", 3)
-    raw_data = await request.body()
 
     app_config = await AppConfig.get(app_id)
     client_secret = app_config.get_client_secret(client_key)
     request.config_loader = app_config.loader
     if not client_secret:
+        # rejected without reading the body
         return False
 
-    msg = bytes(f"{app_id}{timestamp}", encoding="utf-8") + raw_data
-    hex_sign_server = hmac.new(
-        bytes(client_secret, encoding="utf-8"), msg, hashlib.sha256
-    ).hexdigest()
-
-    if hex_sign_server == hex_sign:
-        return True
-    return False
+    hex_sign_server = await request.body_hmac(
+        client_secret, prefix=f"{app_id}{timestamp}", digestmod=hashlib.sha256
+    )
+    return sign_matches(hex_sign_server, hex_sign)
 
 
+@timed("session")
 async def validate_session_token(session_token, app_id):
     assert session_token
     session_svc = await SessionService.load(app_id, session_token)
@@ -69,7 +78,8 @@ async def validate_client_request(request):
     assert app_id != None
     session_token = request.headers.get("X-HighOrder-Session-Token")
 
-    sign_valid = await validate_client(app_id, sign, request)
+    with span("sign"):
+        sign_valid = await validate_client(app_id, sign, request)
     if not sign_valid:
         return False, error.client_invalid("sign not correct.")
     request.app_id = app_id
@@ -84,15 +94,16 @@ async def validate_client_request(request):
     return True, None
 
 
-@bp.route("/main", methods=["POST", "GET"])
+@bp.route("/main", methods=["POST", "GET"], max_body_size=max_body_size)
 async def hola_main(request):
     valid, err_response = await validate_client_request(request)
     if not valid:
         return err_response
-    data = await request.json()
-    request_cmd = None
-    if "command" in data:
-        request_cmd = factory.load(data, ClientRequestCommand)
+    with span("parse"):
+        data = await request.json()
+        request_cmd = None
+        if "command" in data:
+            request_cmd = serializer.load(data, ClientRequestCommand)
 
     hola_svc = await HolaService.create(
         request.app_id,
@@ -101,21 +112,17 @@ async def hola_main(request):
         request_cmd.context,
         host_url=request.host_url,
     )
-    commands = await hola_svc.handle_request(request_cmd)
+    with span("handle"):
+        commands = await hola_svc.handle_request(request_cmd)
 
-    ret_data = json.dumps(
-        {"ok": True, "data": factory.dump({"commands": commands})},
-        ensure_ascii=False,
-        indent=None,
-        separators=(",", ":"),
-    )
+    with span("dump"):
+        ret_data = serializer.dumpb({"ok": True, "data": {"commands": commands}})
 
     return Response(ret_data, content_type="application/json")
 
 
 async def validate_editor(app_id, sign, request):
     hex_sign, timestamp, client_key = sign.split(",", 3)
-    raw_data = await request.body()
 
     app_config = await AppConfig.get(app_id)
     client_secret = None
@@ -127,14 +134,10 @@ async def validate_editor(app_id, sign, request):
     if not client_secret:
         return False
 
-    msg = bytes(f"{app_id}{timestamp}", encoding="utf-8") + raw_data
-    hex_sign_server = hmac.new(
-        bytes(client_secret, encoding="utf-8"), msg, hashlib.sha256
-    ).hexdigest()
-
-    if hex_sign_server == hex_sign:
-        return True
-    return False
+    hex_sign_server = await request.body_hmac(
+        client_secret, prefix=f"{app_id}{timestamp}", digestmod=hashlib.sha256
+    )
+    return sign_matches(hex_sign_server, hex_sign)
 
 
 async def validate_setup_request(request):
@@ -149,7 +152,7 @@ async def validate_setup_request(request):
     return True, None
 
 
-@bp.route("/setup", methods=["POST", "GET"])
+@bp.route("/setup", methods=["POST", "GET"], max_body_size=setup_max_body_size)
 async def hola_setup(request):
     valid, err_response = await validate_setup_request(request)
     if not valid:
@@ -157,17 +160,12 @@ async def hola_setup(request):
     data = await request.json()
     request_cmd = None
     if "command" in data:
-        request_cmd = factory.load(data, SetupRequestCommand)
+        request_cmd = serializer.load(data, SetupRequestCommand)
 
     setup_svc = await HolaSetupService.create(request.app_id, request.config_loader)
     info = await setup_svc.handle_request(request_cmd)
 
-    ret_data = json.dumps(
-        {"ok": True, "data": factory.dump(info or {})},
-        ensure_ascii=False,
-        indent=None,
-        separators=(",", ":"),
-    )
+    ret_data = serializer.dumpb({"ok": True, "data": info or {}})
     return Response(ret_data, content_type="application/json")
 
 
@@ -189,7 +187,7 @@ async def validate_client_lite_request(request):
     return True, None
 
 
-@bp.route("/lite", methods=["POST", "GET"])
+@bp.route("/lite", methods=["POST", "GET"], max_body_size=max_body_size)
 async def hola_lite(request):
     valid, err_response = await validate_client_lite_request(request)
     if not valid:
@@ -197,7 +195,7 @@ async def hola_lite(request):
     data = await request.json()
     request_cmd = None
     if "command" in data:
-        request_cmd = factory.load(data, ClientRequestCommand)
+        request_cmd = serializer.load(data, ClientRequestCommand)
 
     hola_svc = await HolaService.create(
         request.app_id,
@@ -208,10 +206,5 @@ async def hola_lite(request):
     )
     commands = await hola_svc.handle_request(request_cmd)
 
-    ret_data = json.dumps(
-        {"ok": True, "data": factory.dump({"commands": commands})},
-        ensure_ascii=False,
-        indent=None,
-        separators=(",", ":"),
-    )
+    ret_data = serializer.dumpb({"ok": True, "data": {"commands": commands}})
     return Response(ret_data, content_type="application/json")
@@ -10,6 +10,10 @@ if debug:
 from callpy import CallPy
 from callpy.web import response
 from callpy.web.response import FileResponse
+from callpy.web.compress import Compressor
+from callpy.web.timing import RequestTiming
+from callpy.web.metrics import RequestMetrics
+from basepy.asyncstatsd import StatsdClient, AggregatingStatsdClient
 import os
 import importlib
 import importlib.resources
@@ -17,6 +21,12 @@ import importlib.resources
 from .base import error
 
 from .boot import boot_components
+from .base.loader import FileCache, file_cache_settings
+from .base.archive import ReleaseArchive
+from .maintenance import scheduler, maintenance_settings
+from .hola.preload import preload_apps, reload_app, reload_apps
+from .base import release
+from .hola.account import start_session_cache, stop_session_cache
 
 app = CallPy('highorder')
 
@@ -60,16 +70,92 @@ if not content_url:
     app.static('/static/<app_folder_name>/content', os.path.join(data_dir, 'live/{app_folder_name}/content'))
 
 
+statsd_settings = settings.get('statsd', {})
+statsd = None
+if statsd_settings.get('host'):
+    # connects on the first send, in the worker
+    if statsd_settings.get('aggregate', True):
+        statsd = AggregatingStatsdClient(
+            host=statsd_settings.get('host'),
+            port=statsd_settings.get('port', 8125),
+            prefix=statsd_settings.get('prefix', 'highorder'),
+            interval=statsd_settings.get('flush_interval', 10),
+        )
+    else:
+        statsd = StatsdClient(
+            host=statsd_settings.get('host'),
+            port=statsd_settings.get('port', 8125),
+            prefix=statsd_settings.get('prefix', 'highorder'),
+        )
+
+compress_settings = settings.get('compress', {})
+if compress_settings.get('enabled', True):
+    # registered first so it runs after every other after_request hook
+    compressor = Compressor(
+        min_size=compress_settings.get('min_size', 1024),
+        level=compress_settings.get('level', 6),
+        statsd=statsd,
+    )
+    app.after_request(compressor)
+
+timing_settings = settings.get('timing', {})
+if timing_settings.get('enabled', False):
+    RequestTiming(
+        paths=('/service/',),
+        header=timing_settings.get('header', True),
+        log=timing_settings.get('log', True),
+        statsd=statsd,
+    ).install(app)
+
+metrics_settings = settings.get('metrics', {})
+if metrics_settings.get('enabled', False):
+    RequestMetrics(path=metrics_settings.get('path', '/metrics')).install(app)
+
+
+@app.preload
+async def app_preload():
+    # the hola dataclass codecs are compiled when .hola.view is imported
+    await preload_apps()
+
+
+log_settings = settings.get('log', {})
+
 @app.before_start
 async def app_before_start():
     if not debug:
         await logger.init()
     else:
         await logger.init()
+    queue_size = log_settings.get('queue_size', 10000)
+    if queue_size:
+        logger.start_queue(queue_size,
+            overflow=log_settings.get('overflow', 'drop'),
+            batch_size=log_settings.get('batch_size', 256))
     try:
         await boot_components()
     except Exception as ex:
         await logger.error(str(ex))
+    if maintenance_settings.get('enabled', True):
+        scheduler.start()
+    release.subscribe(reload_app, on_reconnect=reload_apps)
+    await release.start()
+    await start_session_cache()
+    if file_cache_settings.get('watch', False) and not FileCache.watch():
+        await logger.warning('inotify not available, app files are checked with stat')
+
+@app.before_stop
+async def app_before_stop():
+    await scheduler.stop(timeout=5)
+    await release.stop()
+    await stop_session_cache()
+
+@app.after_stop
+async def app_after_stop():
+    FileCache.unwatch()
+    ReleaseArchive.close_all()
+    if isinstance(statsd, AggregatingStatsdClient):
+        await statsd.close()
+    await logger.close()
 
 @app.before_request
 async def app_before_request(request):
@@ -98,4 +184,23 @@ def main():
     debug = settings.get('debug', False)
     port = settings.get('port', 5000)
     host = settings.get('host', '0.0.0.0')
-    app.run(host=host, port=port, debug=debug)
\ No newline at end of file
+    shedding = settings.get('load_shedding', {})
+    app.run(
+        host=host, port=port, debug=debug,
+        workers=settings.get('workers', 1),
+        preload=settings.get('preload', False),
+        # served by every worker before it takes over in a rolling reload
+        warmup_path=settings.get('warmup_path', '/'),
+        shed_loop_lag=shedding.get('loop_lag', None),
+        shed_in_flight=shedding.get('in_flight', None),
+        shed_retry_after=shedding.get('retry_after', 1),
+        statsd=statsd,
+        metrics_interval=settings.get('metrics', {}).get('interval', 10),
+        # the hola service is shed last, static files first
+        route_priorities=[
+            ('/service/hola/', 'high'),
+            ('/assets/', 'low'),
+            ('/static/', 'low'),
+            ('/favicon.ico', 'low'),
+        ],
+    )
\ No newline at end of file
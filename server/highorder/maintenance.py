@@ -0,0 +1,45 @@
+"""Periodic maintenance of a server process.
+
+Jobs marked ``leader_only`` clean shared tables, one worker of the cluster
+runs them: the one holding the ``highorder.maintenance`` advisory lock.
+"""
+from datetime import datetime, timezone
+
+from basepy.asynclog import logger
+from basepy.config import settings
+from basepy.schedule import AsyncScheduler
+from postmodel.leader import AdvisoryLockLeader
+
+from highorder.base.instant_db import InstantKV, InstantKVPack
+from highorder.base.model import DB_NAME
+from highorder.hola.model import Session
+
+maintenance_settings = settings.get('maintenance', {})
+
+scheduler = AsyncScheduler(
+    leader=AdvisoryLockLeader('highorder.maintenance', db_name=DB_NAME)
+)
+
+
+async def purge_expired_instant_data():
+    now = datetime.now(timezone.utc)
+    kv = await InstantKV.filter(expire_at__lte=now).delete()
+    packs = await InstantKVPack.filter(expire_at__lte=now).delete()
+    if kv or packs:
+        await logger.info("purged expired instant data", kv=kv, packs=packs)
+
+
+async def purge_expired_sessions():
+    now = datetime.now(timezone.utc)
+    count = await Session.filter(expire_time__lte=now).delete()
+    if count:
+        await logger.info("purged expired sessions", count=count)
+
+
+scheduler.every(
+    maintenance_settings.get('instant_expiry_interval', 60), 's'
+).jitter(10).leader_only().do(purge_expired_instant_data)
+
+scheduler.every(
+    maintenance_settings.get('session_cleanup_interval', 600), 's'
+).jitter(60).leader_only().do(purge_expired_sessions)
@@ -0,0 +1,133 @@
+"""Changes of files in directories from Linux inotify, read on the event
+loop.
+
+    def changed(directory, name):
+        ...
+
+    watcher = DirectoryWatcher(changed)
+    watcher.start()
+    watcher.watch('/data/APP_demo')
+
+``changed(directory, name)`` is called for every file written, created,
+deleted or moved in a watched directory. ``name`` is None when anything
+in ``directory`` may have changed, because it stopped being watched, and
+``directory`` is None too when the kernel queue overflowed. `available`
+is False off Linux, callers poll with `os.stat` instead.
+"""
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+
+__all__ = ['DirectoryWatcher', 'available']
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+CHANGE_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+               | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+# struct inotify_event without its name
+_EVENT = struct.Struct('iIII')
+
+_libc = None
+if sys.platform.startswith('linux'):
+    try:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        _libc.inotify_init1.argtypes = [ctypes.c_int]
+        _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except (OSError, AttributeError):
+        _libc = None
+
+
+def available():
+    return _libc is not None
+
+
+class DirectoryWatcher(object):
+
+    def __init__(self, callback):
+        self.callback = callback
+        self._fd = None
+        self._loop = None
+        # wd -> directory, directory -> wd
+        self._directories = {}
+        self._wds = {}
+
+    def start(self, loop=None):
+        if not available():
+            raise OSError('inotify is not available')
+        fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._fd = fd
+        self._loop = loop or asyncio.get_event_loop()
+        self._loop.add_reader(fd, self._read)
+
+    def watch(self, directory):
+        """Watch ``directory``, False when it can not be watched (it does
+        not exist, the watch limit is reached or the watcher is closed)."""
+        if directory in self._wds:
+            return True
+        if self._fd is None:
+            return False
+        wd = _libc.inotify_add_watch(self._fd, os.fsencode(directory), CHANGE_MASK)
+        if wd < 0:
+            return False
+        self._directories[wd] = directory
+        self._wds[directory] = wd
+        return True
+
+    def watching(self, directory):
+        return directory in self._wds
+
+    def close(self):
+        if self._fd is None:
+            return
+        self._loop.remove_reader(self._fd)
+        os.close(self._fd)
+        self._fd = None
+        self._directories.clear()
+        self._wds.clear()
+
+    def _read(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except (BlockingIOError, InterruptedError):
+            return
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.callback(None, None)
+                continue
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._directories[wd]
+                del self._wds[directory]
+                self.callback(directory, None)
+            elif mask & IN_MOVE_SELF:
+                # the watch follows the moved directory, its path is gone
+                _libc.inotify_rm_watch(self._fd, wd)
+            elif name:
+                self.callback(directory, os.fsdecode(name))
@@ -2,6 +2,8 @@
 import time
 import sys
 import asyncio
+import atexit
+import socket
 import traceback
 import os
 import platform
@@ -45,6 +47,25 @@ class StdoutHandler(BaseHandler):
         except Exception:
             self.handle_error(record)
 
+    async def emit_batch(self, records):
+        self.emit_batch_sync(records)
+
+    def emit_batch_sync(self, records):
+        """One write and one flush for all the records."""
+        messages = []
+        for record in records:
+            try:
+                messages.append(self.make_message(record) + self.terminator)
+            except Exception:
+                self.handle_error(record)
+        if not messages:
+            return
+        try:
+            self.stream.write(''.join(messages))
+            self.flush()
+        except Exception:
+            self.handle_error(records[-1])
+
     def make_message(self, record):
         data = record.to_dict()
         data['created'] = time.strftime("%Y-%m-%d %H:%M:%S %z", time.localtime(data['created']))
@@ -110,17 +131,34 @@ class SocketHandler(BaseHandler):
         except Exception:
             self.handle_error(record)
 
+    async def emit_batch(self, records):
+        if self.connection_type != "TCP":
+            # one datagram per record, a batch could exceed the datagram size
+            return await super().emit_batch(records)
+        messages = []
+        for record in records:
+            try:
+                messages.append("{}{}".format(json.dumps(record.to_dict()), self.terminator))
+            except Exception:
+                self.handle_error(record)
+        if not messages:
+            return
+        try:
+            await self._write_tcp(''.join(messages).encode("utf-8"))
+        except Exception:
+            self.handle_error(records[-1])
+
     def _write_tcp_sync(self, data):
         if self.tcp_socket is None:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((self.host, self.port))
-                self.tcp_socket = s
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.connect((self.host, self.port))
+            self.tcp_socket = s
         self.tcp_socket.sendall(data)
 
     def _write_udp_sync(self, data):
         if self.udp_socket is None:
             self.udp_socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
-        self.udp_socket.sendto(data)
+        self.udp_socket.sendto(data, (self.host, self.port))
 
     def _write_sync(self, data):
         if self.connection_type.upper() == "TCP":
@@ -140,7 +178,20 @@ class SocketHandler(BaseHandler):
         return '<%s [%s:%s(%s)]>' % (self.__class__.__name__, self.host, self.port, self.level)
 
 
+OVERFLOW_DROP = 'drop'
+OVERFLOW_BLOCK = 'block'
+
+
 class AsyncLoggerEngine:
+    """Sends log records to the handlers.
+
+    By default each record is emitted inline, the logging call returns once
+    every handler wrote it. After `start_queue` records are put in a bounded
+    queue instead and a writer task emits them in batches, one write (and
+    flush or drain) per handler and batch. When the queue is full a record
+    is dropped and counted in ``dropped`` (``overflow='drop'``), or the
+    logging call waits for room (``overflow='block'``).
+    """
     handler_class_map = {
         'stdout': StdoutHandler,
         'socket': SocketHandler
@@ -150,6 +201,13 @@ class AsyncLoggerEngine:
         self.dev_mode = True
         self.min_levelno = LoggerLevel.CRITICAL
         self.hostname = platform.node()
+        self.queue = None
+        self.overflow = OVERFLOW_DROP
+        self.batch_size = 256
+        self.dropped = 0
+        self._writer = None
+        self._loop = None
+        self._atexit = False
 
     @classmethod
     def register_handler(cls, name, handler_cls):
@@ -166,6 +224,94 @@ class AsyncLoggerEngine:
                 if handler_type not in self.handler_class_map:
                     continue
                 self.add(handler_type, **conf)
+            queue_size = config.get('queue_size', 0)
+            if queue_size:
+                self.start_queue(queue_size, overflow=config.get('overflow', OVERFLOW_DROP),
+                                 batch_size=config.get('batch_size', 256))
+
+    def start_queue(self, max_size=10000, overflow=OVERFLOW_DROP, batch_size=256):
+        """Queue records and write them from a task of the running loop."""
+        if overflow not in (OVERFLOW_DROP, OVERFLOW_BLOCK):
+            raise ValueError("overflow must be one of ['drop', 'block'].")
+        if self.queue is not None:
+            return
+        self.overflow = overflow
+        self.batch_size = max(1, batch_size)
+        self._loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_size)
+        self._writer = self._loop.create_task(self._write_loop(self.queue))
+        if not self._atexit:
+            atexit.register(self.flush_sync)
+            self._atexit = True
+
+    async def _write_loop(self, queue):
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await self._emit_batch(batch)
+            except Exception:
+                pass
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _emit_batch(self, records):
+        for handler in self.handlers:
+            levelno = handler.levelno
+            selected = [r for r in records if r.levelno >= levelno]
+            if selected:
+                await handler.emit_batch(selected)
+
+    async def flush(self):
+        """Wait until the queued records are written."""
+        if self.queue is not None and self._writer is not None and not self._writer.done():
+            await self.queue.join()
+
+    def flush_sync(self):
+        """Write the queued records synchronously, for when the loop is gone."""
+        queue = self.queue
+        if queue is None:
+            return
+        records = []
+        while not queue.empty():
+            records.append(queue.get_nowait())
+            queue.task_done()
+        for handler in self.handlers:
+            for record in records:
+                if record.levelno >= handler.levelno:
+                    handler.emit_sync(record)
+
+    async def close(self):
+        """Flush the queue and stop the writer task, records are emitted
+        inline again afterwards."""
+        if self.queue is None:
+            return
+        await self.flush()
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self.flush_sync()
+        self.queue = None
+        self._writer = None
+        self._loop = None
+
+    def _enqueue_nowait(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def _queue_usable(self):
+        if self.queue is None:
+            return False
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
 
     def add(self, handler, level="INFO", log_format=None, **kwargs):
         h_cls = self.handler_class_map.get(handler)
@@ -179,11 +325,18 @@ class AsyncLoggerEngine:
 
     def clear(self):
         self.handlers = []
+        self.min_levelno = LoggerLevel.CRITICAL
+
+    def enabled_for(self, levelno):
+        if levelno < self.min_levelno or not self.handlers:
+            return False
+        if levelno == LoggerLevel.DEBUG:
+            return self.dev_mode
+        return True
 
     def _filter_handlers(self, level):
         levelno = LoggerLevel.get_levelno(level)
-        handlers = list(filter(lambda x: levelno >= x.levelno, self.handlers))
-        return handlers
+        return [x for x in self.handlers if levelno >= x.levelno]
 
     def log_sync(self, name, level, message, args, kwargs):
         handlers = self._filter_handlers(level)
@@ -191,9 +344,12 @@ class AsyncLoggerEngine:
             return None
         exc_info = kwargs.pop('exc_info', None)
         record = LogRecord(name, level, message, args, exc_info, None, **kwargs)
-        if len(self.handlers) > 0:
-            for handler in self.handlers:
-                handler.emit_sync(record)
+        if self._queue_usable():
+            # never blocks, a sync caller can not wait for room
+            self._enqueue_nowait(record)
+            return
+        for handler in handlers:
+            handler.emit_sync(record)
 
     async def log(self, name, level, message, args, kwargs):
         handlers = self._filter_handlers(level)
@@ -201,9 +357,14 @@ class AsyncLoggerEngine:
             return None
         exc_info = kwargs.pop('exc_info', None)
         record = LogRecord(name, level, message, args, exc_info, None, **kwargs)
-        if len(self.handlers) > 0:
-            for handler in self.handlers:
-                await handler.emit(record)
+        if self._queue_usable():
+            if self.overflow == OVERFLOW_BLOCK:
+                await self.queue.put(record)
+            else:
+                self._enqueue_nowait(record)
+            return
+        for handler in handlers:
+            await handler.emit(record)
 
 class SyncLogger:
     def __init__(self, name="", engine=None, **kwargs):
@@ -221,6 +382,11 @@ class SyncLogger:
     def sync(self):
         return self
 
+    def enabled_for(self, levelno):
+        """Whether a record at ``levelno`` would be emitted, to skip building
+        costly log arguments."""
+        return self.engine.enabled_for(levelno)
+
     def bind(self, **kwargs):
         name = kwargs.pop('name', '') or self.name
         new_kwargs = copy(self.kwargs)
@@ -233,8 +399,8 @@ class SyncLogger:
         self.engine.log_sync(self.name, level, message, args, merged_args)
 
     def debug(self, message, *args, **kwargs):
-        if self.engine.dev_mode:
-            self.log('DEBUG', message, args, kwargs)
+        if not self.engine.enabled_for(LoggerLevel.DEBUG): return
+        self.log('DEBUG', message, args, kwargs)
 
     def info(self, message, *args, **kwargs):
         if self.engine.min_levelno > LoggerLevel.INFO: return
@@ -274,6 +440,15 @@ class AsyncLogger(object):
             await self.engine.init(config)
             self.inited = True
 
+    def start_queue(self, max_size=10000, overflow=OVERFLOW_DROP, batch_size=256):
+        return self.engine.start_queue(max_size, overflow=overflow, batch_size=batch_size)
+
+    async def flush(self):
+        return await self.engine.flush()
+
+    async def close(self):
+        return await self.engine.close()
+
     def add(self, handler, level="DEBUG", log_format=None, **kwargs):
         return self.engine.add(handler, level=level, log_format=log_format, **kwargs)
 
@@ -283,6 +458,11 @@ class AsyncLogger(object):
     def sync(self):
         return SyncLogger(self.name, self.engine, **self.kwargs)
 
+    def enabled_for(self, levelno):
+        """Whether a record at ``levelno`` would be emitted, to skip building
+        costly log arguments."""
+        return self.engine.enabled_for(levelno)
+
     def bind(self, **kwargs):
         name = kwargs.pop('name', '') or self.name
         new_kwargs = copy(self.kwargs)
@@ -295,8 +475,8 @@ class AsyncLogger(object):
         await self.engine.log(self.name, level, message, args, merged_args)
 
     async def debug(self, message, *args, **kwargs):
-        if self.engine.dev_mode:
-            await self.log('DEBUG', message, args, kwargs)
+        if not self.engine.enabled_for(LoggerLevel.DEBUG): return
+        await self.log('DEBUG', message, args, kwargs)
 
     async def info(self, message, *args, **kwargs):
         if self.engine.min_levelno > LoggerLevel.INFO: return
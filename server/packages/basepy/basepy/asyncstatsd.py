@@ -3,8 +3,9 @@ import random
 import time
 
 from basepy.asynclib import datagram
+from basepy.common.statsd import Aggregator, pack_lines, MTU_PAYLOAD
 
-__all__ = ['StatsdClient']
+__all__ = ['StatsdClient', 'AggregatingStatsdClient']
 
 
 class StatsdClient(object):
@@ -13,7 +14,7 @@ class StatsdClient(object):
     def __init__(self, host='127.0.0.1', port=8125, prefix=None, loop=None):
         """Create a new client."""
         self._prefix = prefix
-        self._loop = loop or asyncio.get_event_loop()
+        self._loop = loop
         self._stream = datagram.DatagramAutoClient(host, port)
 
     async def init(self):
@@ -113,14 +114,81 @@ class Pipeline(StatsdClient):
         await self.send()
 
     async def send(self):
-        # Use pop(0) to preserve the order of the stats.
-        data = self._stats.pop(0)
-        while self._stats:
-            stat = self._stats.pop(0)
-            if len(stat) + len(data) + 1 >= 512:
-                await self._client._send(data)
-                data = stat
-            else:
-                data += '\n' + stat
-        if data:
+        stats, self._stats = self._stats, []
+        for data in pack_lines(stats, 511):
             await self._client._send(data)
+
+
+class AggregatingStatsdClient(StatsdClient):
+    """A client aggregating metrics in process.
+
+    Counters are summed, gauges keep their last value and timings go into
+    a histogram, see `basepy.common.statsd.Aggregator`. Every ``interval``
+    seconds a task of the running loop, started by the first metric, sends
+    the aggregates in payloads of at most ``max_packet`` bytes. Sample
+    rates are ignored, every call is counted.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix=None, loop=None,
+                 interval=10, max_packet=MTU_PAYLOAD, percentiles=(50, 95, 99),
+                 max_samples=1024):
+        super().__init__(host, port, prefix=prefix, loop=loop)
+        self.interval = interval
+        self.max_packet = max_packet
+        self.aggregator = Aggregator(percentiles, max_samples)
+        self._flusher = None
+
+    def pipeline(self):
+        return AggregatedPipeline(self)
+
+    def _start_flusher(self):
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                pass
+
+    async def timing(self, stat, delta, rate=1):
+        self.aggregator.timing(stat, delta)
+        self._start_flusher()
+
+    async def incr(self, stat, count=1, rate=1):
+        self.aggregator.incr(stat, count)
+        self._start_flusher()
+
+    async def gauge(self, stat, value, rate=1, delta=False):
+        self.aggregator.gauge(stat, value, delta=delta)
+        self._start_flusher()
+
+    async def flush(self):
+        """Send what was aggregated since the last flush."""
+        for data in pack_lines(self.aggregator.lines(self._prefix), self.max_packet):
+            await self._send(data)
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+
+class AggregatedPipeline(object):
+    """Metrics are aggregated already, a pipeline is the client itself."""
+
+    def __init__(self, client):
+        self._client = client
+
+    async def __aenter__(self):
+        return self._client
+
+    async def __aexit__(self, typ, value, tb):
+        pass
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 
 from functools import wraps
-from time import time
+from time import time, monotonic
+from collections import OrderedDict
 from collections.abc import Hashable
 import functools
+import inspect
+import sys
 
 try:
     import asyncio
@@ -33,14 +36,10 @@ class cached_property(object):
         return value
 
     def _wrap_in_coroutine(self, obj):
-        @wraps(obj)
-        @asyncio.coroutine
-        def wrapper():
-            future = asyncio.ensure_future(self.func(obj))
-            obj.__dict__[self.func.__name__] = future
-            return future
-
-        return wrapper()
+        # the task replaces the property, every await gets its result
+        future = asyncio.ensure_future(self.func(obj))
+        obj.__dict__[self.func.__name__] = future
+        return future
 
 
 class cached_property_ttl(object):
@@ -129,3 +128,216 @@ class memoized(object):
 
 
 _memoize_cache = {}
+
+
+def default_sizeof(value):
+    if isinstance(value, (bytes, bytearray, memoryview, str)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class CacheStats(object):
+    __slots__ = ('hits', 'stale_hits', 'misses', 'loads', 'load_errors',
+                 'evictions', 'expirations')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def hit_ratio(self):
+        total = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / total if total else 0.0
+
+    def as_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+
+class AsyncCache(object):
+    """LRU cache of async loaded values.
+
+        cache = AsyncCache(max_size=1000, ttl=60, stale_ttl=30)
+        value = await cache.get(key, lambda: load(key))
+
+    Args:
+
+      * max_size: entries kept, the least recently used go first.
+      * max_bytes: total size kept, None for no limit. Sizes come from
+                   ``sizeof(value)``, the length of bytes and str and
+                   `sys.getsizeof` of anything else by default.
+      * ttl: seconds an entry is fresh, None for no expiry.
+      * stale_ttl: seconds past ``ttl`` an entry is still returned while
+                   one background load refreshes it.
+      * cache_none: keep ``None`` results, otherwise a ``None`` is
+                    returned and loaded again next time.
+
+    Concurrent misses of a key share one load. A failed load is raised to
+    all of them and nothing is cached.
+    """
+
+    def __init__(self, max_size=1024, max_bytes=None, ttl=None, stale_ttl=0,
+                 sizeof=None, cache_none=True):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.sizeof = sizeof or default_sizeof
+        self.cache_none = cache_none
+        self.stats = CacheStats()
+        self.bytes = 0
+        # key -> [value, fresh until, stale until, size]
+        self._entries = OrderedDict()
+        # key -> future of the running load
+        self._loading = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        entry = self._entries.get(key)
+        return entry is not None and entry[2] > monotonic()
+
+    def peek(self, key, default=None):
+        """The cached value if not expired, without loading or counting."""
+        entry = self._entries.get(key)
+        if entry is None or entry[2] <= monotonic():
+            return default
+        return entry[0]
+
+    async def get(self, key, loader):
+        """The value of ``key``, loaded with ``await loader()`` on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = monotonic()
+            if now < entry[1]:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry[0]
+            if now < entry[2]:
+                self._entries.move_to_end(key)
+                self.stats.stale_hits += 1
+                if key not in self._loading:
+                    self._start_load(key, loader)
+                return entry[0]
+            self._remove(key)
+            self.stats.expirations += 1
+        self.stats.misses += 1
+        future = self._loading.get(key)
+        if future is None:
+            future = self._start_load(key, loader)
+        # a cancelled waiter leaves the load running for the others
+        return await asyncio.shield(future)
+
+    def _start_load(self, key, loader):
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        asyncio.ensure_future(self._load(key, loader, future))
+        return future
+
+    async def _load(self, key, loader, future):
+        try:
+            value = await loader()
+        except BaseException as e:
+            self.stats.load_errors += 1
+            if self._loading.get(key) is future:
+                del self._loading[key]
+            if not future.done():
+                future.set_exception(e)
+                # a stale refresh has nobody waiting on it
+                future.exception()
+            if not isinstance(e, Exception):
+                raise
+            return
+        self.stats.loads += 1
+        # invalidated while loading: hand the value out, keep it out
+        if self._loading.get(key) is future:
+            del self._loading[key]
+            if value is not None or self.cache_none:
+                self.set(key, value)
+        if not future.done():
+            future.set_result(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        now = monotonic()
+        fresh = now + ttl if ttl is not None else float('inf')
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if key in self._entries:
+            self._remove(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._entries[key] = [value, fresh, fresh + self.stale_ttl, size]
+        self.bytes += size
+        while self._entries and (len(self._entries) > self.max_size or (
+                self.max_bytes is not None and self.bytes > self.max_bytes)):
+            _, entry = self._entries.popitem(last=False)
+            self.bytes -= entry[3]
+            self.stats.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry[3]
+
+    def invalidate(self, key):
+        """Drop ``key``, a load running for it is not cached."""
+        self._loading.pop(key, None)
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        self._loading.clear()
+        self._entries.clear()
+        self.bytes = 0
+
+
+def async_cached(cache=None, key=None, noself=False, **cache_kwargs):
+    """Cache an async function in an `AsyncCache`.
+
+        class SessionService:
+            @classmethod
+            @async_cached(ttl=10, noself=True)
+            async def load(cls, app_id, session_token):
+                ...
+
+        SessionService.load.invalidate(app_id, session_token)
+
+    The key is ``key(*args, **kwargs)``, or the arguments bound to the
+    signature, so positional and keyword calls share entries. ``noself``
+    leaves the first argument (``self`` or ``cls``) out of the key and out
+    of the arguments of ``invalidate``. The other keyword arguments make
+    the cache when ``cache`` is None.
+    """
+    def decorator(func):
+        if not asyncio.iscoroutinefunction(func):
+            raise TypeError('async_cached needs an async function')
+        store = cache if cache is not None else AsyncCache(**cache_kwargs)
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs):
+            if key is not None:
+                return key(*args, **kwargs)
+            bound = signature.bind(None, *args, **kwargs) if noself \
+                else signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            values = list(bound.arguments.items())
+            if noself:
+                values = values[1:]
+            return tuple(values)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = make_key(args[1:], kwargs) if noself else make_key(args, kwargs)
+            try:
+                hash(cache_key)
+            except TypeError:
+                # uncacheable, a list argument for instance
+                return await func(*args, **kwargs)
+            return await store.get(cache_key, lambda: func(*args, **kwargs))
+
+        def invalidate(*args, **kwargs):
+            store.invalidate(make_key(args, kwargs))
+
+        wrapper.cache = store
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
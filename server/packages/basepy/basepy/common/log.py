@@ -30,7 +30,46 @@ class LoggerLevel:
     def get_levelno(cls, name, default=0):
         return cls.name_level_map.get(name.strip().upper(), default)
 
+def is_lazy(value):
+    """Log fields given as a function are only called once a handler takes
+    the record, ``context=context.to_dict`` costs nothing when the level is
+    disabled."""
+    return callable(value) and not isinstance(value, type)
+
+
+def cap_value(obj, max_depth=6, max_items=100, max_string=2048, depth=0):
+    """A copy of a dumped log field, with containers cut at ``max_items``,
+    strings at ``max_string`` and nesting at ``max_depth``."""
+    if isinstance(obj, str):
+        if len(obj) > max_string:
+            return '{}...({} more)'.format(obj[:max_string], len(obj) - max_string)
+        return obj
+    if isinstance(obj, dict):
+        if depth >= max_depth:
+            return '<dict of {}>'.format(len(obj))
+        value = {}
+        for index, (key, item) in enumerate(obj.items()):
+            if index >= max_items:
+                value['...'] = '({} more)'.format(len(obj) - max_items)
+                break
+            value[key] = cap_value(item, max_depth, max_items, max_string, depth + 1)
+        return value
+    if isinstance(obj, (list, tuple)):
+        if depth >= max_depth:
+            return '<list of {}>'.format(len(obj))
+        value = [cap_value(x, max_depth, max_items, max_string, depth + 1) for x in obj[:max_items]]
+        if len(obj) > max_items:
+            value.append('...({} more)'.format(len(obj) - max_items))
+        return value
+    return obj
+
+
 class BaseHandler(object):
+    async def emit_batch(self, records):
+        """Emit several records, handlers override it to write them at once."""
+        for record in records:
+            await self.emit(record)
+
     def handle_error(self, record):
         if sys.stderr:  # see issue 13807
             t, v, tb = sys.exc_info()
@@ -58,6 +97,11 @@ class BaseHandler(object):
                 del t, v, tb
 
 class LogRecord(object):
+    # limits of cap_value for the fields of a record
+    max_field_depth = 6
+    max_field_items = 100
+    max_field_string = 2048
+
     def __init__(self, name, level,
                  msg, args, exc_info, sinfo=None, **kwargs):
         """
@@ -78,6 +122,12 @@ class LogRecord(object):
         self.msecs = (ct - int(ct)) * 1000
         self.msecs_since_start = (self.created - _start_time) * 1000
         self.debuginfo = kwargs.pop('debuginfo', '')
+        for key, value in kwargs.items():
+            if is_lazy(value):
+                try:
+                    kwargs[key] = value()
+                except Exception as ex:
+                    kwargs[key] = '<{} evaluating field: {}>'.format(type(ex).__name__, ex)
         self.kwargs = kwargs
 
     def __repr__(self):
@@ -107,7 +157,9 @@ class LogRecord(object):
                 return ToDictMixin.dump_obj(obj)
             except:
                 raise Exception('Object can not covert to json dict or not have `to_dict` method.')
-        data = dict([(k, format_obj(v)) for k, v in self.kwargs.items()])
+        data = dict([(k, cap_value(format_obj(v), self.max_field_depth, self.max_field_items,
+                                   self.max_field_string))
+                     for k, v in self.kwargs.items()])
         return dict(
             name = self.name,
             level = self.levelname,
@@ -0,0 +1,122 @@
+import math
+import random
+
+__all__ = ['Histogram', 'Aggregator', 'pack_lines']
+
+# a UDP payload that fits an ethernet frame without fragmenting
+MTU_PAYLOAD = 1432
+
+
+def pack_lines(lines, max_size):
+    """Join statsd lines with newlines into payloads of at most ``max_size``
+    bytes, a longer line is a payload of its own."""
+    payloads = []
+    current = []
+    size = 0
+    for line in lines:
+        if current and size + 1 + len(line) > max_size:
+            payloads.append('\n'.join(current))
+            current = []
+            size = 0
+        size += len(line) + (1 if current else 0)
+        current.append(line)
+    if current:
+        payloads.append('\n'.join(current))
+    return payloads
+
+
+class Histogram(object):
+    """Count, sum, min, max and a uniform sample of at most ``max_samples``
+    values, percentiles are read from the sample."""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'samples', 'max_samples')
+
+    def __init__(self, max_samples=1024):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.samples = []
+        self.max_samples = max_samples
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if len(self.samples) < self.max_samples:
+            self.samples.append(value)
+        else:
+            index = random.randrange(self.count)
+            if index < self.max_samples:
+                self.samples[index] = value
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentiles(self, percentiles):
+        """``{p: value}`` by nearest rank."""
+        samples = sorted(self.samples)
+        size = len(samples)
+        if not size:
+            return dict((p, 0.0) for p in percentiles)
+        return dict((p, samples[min(size - 1, max(0, int(math.ceil(p / 100.0 * size)) - 1))])
+                    for p in percentiles)
+
+
+class Aggregator(object):
+    """Counters, gauges and timing histograms collected in process.
+
+    `lines` returns the statsd lines of everything recorded since the last
+    call and starts over. A timer ``stat`` is sent as the counter
+    ``stat.count`` and the gauges ``stat.mean``, ``stat.min``, ``stat.max``
+    and ``stat.p<N>`` for each percentile, in milliseconds.
+    """
+
+    def __init__(self, percentiles=(50, 95, 99), max_samples=1024):
+        self.percentiles = tuple(percentiles)
+        self.max_samples = max_samples
+        self.counters = {}
+        self.gauges = {}
+        self.timers = {}
+
+    def __len__(self):
+        return len(self.counters) + len(self.gauges) + len(self.timers)
+
+    def incr(self, stat, count=1):
+        self.counters[stat] = self.counters.get(stat, 0) + count
+
+    def gauge(self, stat, value, delta=False):
+        # (value, is_delta), a delta on top of a set value is folded in
+        current = self.gauges.get(stat)
+        if delta and current is not None:
+            self.gauges[stat] = (current[0] + value, current[1])
+        else:
+            self.gauges[stat] = (value, delta)
+
+    def timing(self, stat, ms):
+        histogram = self.timers.get(stat)
+        if histogram is None:
+            histogram = self.timers[stat] = Histogram(self.max_samples)
+        histogram.add(ms)
+
+    def lines(self, prefix=None):
+        counters, gauges, timers = self.counters, self.gauges, self.timers
+        self.counters, self.gauges, self.timers = {}, {}, {}
+        prefix = prefix + '.' if prefix else ''
+        lines = []
+        for stat, count in counters.items():
+            lines.append('%s%s:%s|c' % (prefix, stat, count))
+        for stat, (value, delta) in gauges.items():
+            lines.append('%s%s:%s|g' % (prefix, stat, ('%+g' if delta else '%g') % value))
+        for stat, histogram in timers.items():
+            name = prefix + stat
+            lines.append('%s.count:%d|c' % (name, histogram.count))
+            lines.append('%s.mean:%g|g' % (name, histogram.mean()))
+            lines.append('%s.min:%g|g' % (name, histogram.min))
+            lines.append('%s.max:%g|g' % (name, histogram.max))
+            for p, value in histogram.percentiles(self.percentiles).items():
+                lines.append('%s.p%s:%g|g' % (name, p, value))
+        return lines
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""A process wide JSON codec.
+
+    from basepy import jsoncodec
+
+    jsoncodec.dumpb({'a': 1})     # b'{"a":1}'
+    jsoncodec.dumps({'a': 1})     # '{"a":1}'
+    jsoncodec.loads(b'{"a":1}')   # str, bytes, bytearray or memoryview
+
+Output is compact and not ASCII escaped. The fastest installed codec is
+used (``orjson``, then ``ujson``), the stdlib ``json`` otherwise. Set
+``BASEPY_JSON_CODEC`` or call ``use_codec`` to pick one explicitly, and
+``register_codec`` to add another.
+
+Values a fast codec cannot encode (non-str dict keys it does not handle,
+integers wider than 64 bits, ...) are retried with the stdlib codec, so
+switching codecs does not change what can be serialized.
+"""
+import json
+import os
+
+__all__ = ['JSONCodec', 'register_codec', 'use_codec', 'get_codec', 'codec_names',
+           'dumps', 'dumpb', 'loads']
+
+
+class JSONCodec(object):
+    """The stdlib codec, base class of the others."""
+    name = 'json'
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        self._sorted_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'),
+                                                sort_keys=True)
+
+    def dumps(self, obj, default=None, sort_keys=False):
+        if default is not None:
+            return json.dumps(obj, ensure_ascii=False, separators=(',', ':'),
+                              sort_keys=sort_keys, default=default)
+        encoder = self._sorted_encoder if sort_keys else self._encoder
+        return encoder.encode(obj)
+
+    def dumpb(self, obj, default=None, sort_keys=False):
+        return self.dumps(obj, default=default, sort_keys=sort_keys).encode('utf-8')
+
+    def loads(self, data):
+        if isinstance(data, (bytearray, memoryview)):
+            data = bytes(data)
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        super().__init__()
+        self._orjson = orjson
+        self._option = orjson.OPT_NON_STR_KEYS
+        self._sorted_option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+
+    def dumpb(self, obj, default=None, sort_keys=False):
+        try:
+            return self._orjson.dumps(obj, default=default,
+                                      option=self._sorted_option if sort_keys else self._option)
+        except TypeError:
+            return JSONCodec.dumps(self, obj, default=default, sort_keys=sort_keys).encode('utf-8')
+
+    def dumps(self, obj, default=None, sort_keys=False):
+        return self.dumpb(obj, default=default, sort_keys=sort_keys).decode('utf-8')
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        super().__init__()
+        self._ujson = ujson
+
+    def dumps(self, obj, default=None, sort_keys=False):
+        if default is not None:
+            return super().dumps(obj, default=default, sort_keys=sort_keys)
+        try:
+            return self._ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False,
+                                     sort_keys=sort_keys)
+        except (TypeError, OverflowError):
+            return super().dumps(obj, sort_keys=sort_keys)
+
+    def loads(self, data):
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return self._ujson.loads(data)
+
+
+# name -> codec class, in preference order for auto selection
+_registry = {
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+    'json': JSONCodec,
+}
+
+_codec = None
+
+
+def register_codec(name, codec_class, preferred=False):
+    """Register ``codec_class``; it must raise ImportError on construction if
+    its library is missing. A preferred codec is tried first by auto selection."""
+    global _registry
+    if preferred:
+        _registry = dict([(name, codec_class)] + [x for x in _registry.items() if x[0] != name])
+    else:
+        _registry[name] = codec_class
+
+
+def codec_names():
+    return list(_registry)
+
+
+def use_codec(name=None):
+    """Switch the process wide codec. ``None`` selects the fastest installed."""
+    global _codec
+    if name is not None:
+        if name not in _registry:
+            raise ValueError(f'unknown json codec {name}, one of {codec_names()}')
+        _codec = _registry[name]()
+    else:
+        for codec_class in _registry.values():
+            try:
+                _codec = codec_class()
+                break
+            except ImportError:
+                continue
+    return _codec
+
+
+def get_codec():
+    return _codec
+
+
+def dumps(obj, default=None, sort_keys=False):
+    return _codec.dumps(obj, default=default, sort_keys=sort_keys)
+
+
+def dumpb(obj, default=None, sort_keys=False):
+    return _codec.dumpb(obj, default=default, sort_keys=sort_keys)
+
+
+def loads(data):
+    return _codec.loads(data)
+
+
+use_codec(os.environ.get('BASEPY_JSON_CODEC') or None)
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""Process wide metrics, read by a ``/metrics`` scrape or pushed to statsd.
+
+    from basepy import metrics
+
+    requests = metrics.counter('requests_total', {'endpoint': 'main'})
+    requests.inc()
+    latency = metrics.summary('request_seconds', {'endpoint': 'main'})
+    latency.observe(0.012)
+    metrics.gauge('in_flight', lambda: state.in_flight)
+
+    metrics.registry.render()           # text exposition format
+    await metrics.registry.report(statsd)
+
+Looking a metric up builds its key, hot paths keep the returned object.
+Summaries keep count and sum since start, and quantiles of the latest
+``max_samples`` observations. Every process has its own registry, a
+worker reports its own requests.
+"""
+import collections
+import math
+import re
+
+__all__ = ['Counter', 'Summary', 'Registry', 'registry', 'counter', 'summary', 'gauge']
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+_invalid_name = re.compile(r'[^a-zA-Z0-9_:]')
+_invalid_stat = re.compile(r'[^a-zA-Z0-9_\-]')
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(key, extra=None):
+    items = list(key)
+    if extra:
+        items.append(extra)
+    if not items:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (k, _escape(v)) for k, v in items)
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(value)
+
+
+class Counter(object):
+    __slots__ = ('value', 'reported')
+
+    def __init__(self):
+        self.value = 0
+        self.reported = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Summary(object):
+    __slots__ = ('count', 'total', 'recent', 'reported')
+
+    def __init__(self, max_samples=1024):
+        self.count = 0
+        self.total = 0.0
+        self.recent = collections.deque(maxlen=max_samples)
+        self.reported = 0
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+
+    def quantiles(self, quantiles=QUANTILES):
+        samples = sorted(self.recent)
+        size = len(samples)
+        if not size:
+            return [(q, math.nan) for q in quantiles]
+        return [(q, samples[min(size - 1, max(0, int(math.ceil(q * size)) - 1))])
+                for q in quantiles]
+
+
+class Registry(object):
+    """Counters, summaries and callback gauges by name and labels."""
+
+    def __init__(self, max_samples=1024, quantiles=QUANTILES):
+        self.max_samples = max_samples
+        self.quantiles = tuple(quantiles)
+        # name -> (type, help, {label key: metric})
+        self._families = {}
+        # gauges `report` skips
+        self._unreported = set()
+
+    def _family(self, name, kind, help):
+        family = self._families.get(name)
+        if family is None:
+            if _invalid_name.search(name):
+                raise ValueError(f'invalid metric name {name}')
+            family = self._families[name] = (kind, help or '', {})
+        elif family[0] != kind:
+            raise ValueError(f'metric {name} is a {family[0]}, not a {kind}')
+        return family[2]
+
+    def counter(self, name, labels=None, help=None):
+        metrics = self._family(name, 'counter', help)
+        key = _label_key(labels)
+        metric = metrics.get(key)
+        if metric is None:
+            metric = metrics[key] = Counter()
+        return metric
+
+    def summary(self, name, labels=None, help=None):
+        """A summary of values in seconds, reported to statsd as timings."""
+        metrics = self._family(name, 'summary', help)
+        key = _label_key(labels)
+        metric = metrics.get(key)
+        if metric is None:
+            metric = metrics[key] = Summary(self.max_samples)
+        return metric
+
+    def gauge(self, name, func, labels=None, help=None, report=True):
+        """A gauge read from ``func()`` when rendered or reported, registering
+        it again replaces the function. ``report=False`` leaves it out of
+        `report`, for values sent to statsd otherwise."""
+        self._family(name, 'gauge', help)[_label_key(labels)] = func
+        if not report:
+            self._unreported.add(name)
+
+    def clear(self):
+        self._families.clear()
+        self._unreported.clear()
+
+    def render(self):
+        """The metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, (kind, help, metrics) in self._families.items():
+            if help:
+                lines.append(f'# HELP {name} {_escape(help)}')
+            lines.append(f'# TYPE {name} {kind}')
+            for key, metric in list(metrics.items()):
+                labels = _format_labels(key)
+                if kind == 'counter':
+                    lines.append(f'{name}{labels} {_format_value(metric.value)}')
+                elif kind == 'gauge':
+                    try:
+                        value = metric()
+                    except Exception:
+                        continue
+                    lines.append(f'{name}{labels} {_format_value(value)}')
+                else:
+                    for q, value in metric.quantiles(self.quantiles):
+                        lines.append(f'{name}{_format_labels(key, ("quantile", q))} '
+                                     f'{_format_value(value)}')
+                    lines.append(f'{name}_sum{labels} {_format_value(metric.total)}')
+                    lines.append(f'{name}_count{labels} {metric.count}')
+        lines.append('')
+        return '\n'.join(lines)
+
+    @staticmethod
+    def stat_name(name, key):
+        """statsd name of a metric, its label values joined with dots."""
+        if not key:
+            return name
+        return '.'.join([name] + [_invalid_stat.sub('_', str(v)) for _, v in key])
+
+    async def report(self, statsd):
+        """Send what changed since the last report to a
+        `basepy.asyncstatsd` client, best an aggregating one: counter
+        deltas, gauge values and the new summary observations as timings."""
+        for name, (kind, _, metrics) in list(self._families.items()):
+            if name in self._unreported:
+                continue
+            for key, metric in list(metrics.items()):
+                stat = self.stat_name(name, key)
+                if kind == 'counter':
+                    delta = metric.value - metric.reported
+                    if delta:
+                        metric.reported = metric.value
+                        await statsd.incr(stat, delta)
+                elif kind == 'gauge':
+                    try:
+                        value = metric()
+                    except Exception:
+                        continue
+                    await statsd.gauge(stat, value)
+                else:
+                    new = min(metric.count - metric.reported, len(metric.recent))
+                    metric.reported = metric.count
+                    if new > 0:
+                        for value in list(metric.recent)[-new:]:
+                            await statsd.timing(stat, value * 1000)
+
+
+registry = Registry()
+
+
+def counter(name, labels=None, help=None):
+    return registry.counter(name, labels, help)
+
+
+def summary(name, labels=None, help=None):
+    return registry.summary(name, labels, help)
+
+
+def gauge(name, func, labels=None, help=None, report=True):
+    return registry.gauge(name, func, labels, help, report)
@@ -38,9 +38,13 @@ Usage:
 [3] https://adam.herokuapp.com/past/2010/6/30/replace_cron_with_clockwork/
 """
 from collections.abc import Hashable
+import asyncio
 import datetime
 from datetime import timedelta
 import functools
+import heapq
+import inspect
+import itertools
 import logging
 import random
 import re
@@ -70,6 +74,23 @@ class CancelJob(object):
     pass
 
 
+def _period(number: int, unit: str) -> timedelta:
+    kwargs = {}
+    if unit in ['d', 'day', 'days']:
+        kwargs['days'] = number
+    elif unit in ['h', 'hour', 'hours']:
+        kwargs['hours'] = number
+    elif unit in ['m', 'minute', 'minutes']:
+        kwargs['minutes'] = number
+    elif unit in ['s', 'second', 'seconds']:
+        kwargs['seconds'] = number
+    elif unit in ['w', 'week', 'weeks']:
+        kwargs['weeks'] = number
+    else:
+        raise Exception(f'time unit of {unit} not supported.')
+    return timedelta(**kwargs)
+
+
 class Scheduler(object):
     """
     Objects instantiated by the :class:`Scheduler <Scheduler>` are
@@ -174,23 +195,7 @@ class Scheduler(object):
             - "s", "second", "seconds"
         :return: An unconfigured :class:`Job <Job>`
         """
-        td = None
-        kwargs = {}
-        if unit in ['d', 'day', 'days']:
-            kwargs['days'] = number
-        elif unit in ['h', 'hour', 'hours']:
-            kwargs['hours'] = number
-        elif unit in ['m', 'minute', 'minutes']:
-            kwargs['minutes'] = number
-        elif unit in ['s', 'second', 'seconds']:
-            kwargs['seconds'] = number
-        elif unit in ['w', 'week', 'weeks']:
-            kwargs['weeks'] = number
-        else:
-            raise Exception(f'time unit of {unit} not supported.')
-
-        td = timedelta(**kwargs)
-        job = Job(td, self)
+        job = Job(_period(number, unit), self)
         return job
 
     def _run_job(self, job: "Job") -> None:
@@ -529,3 +534,227 @@ class Job(object):
 
 #: Default :class:`Scheduler <Scheduler>` object
 scheduler = Scheduler()
+
+
+class AsyncJob(Job):
+    """
+    A periodic job of an :class:`AsyncScheduler`, configured like a
+    :class:`Job` plus:
+
+    * :meth:`jitter` delays every run by a random amount of seconds.
+    * :meth:`concurrency` limits the runs in progress at once, a run that
+      is due while the limit is reached is skipped.
+    * :meth:`leader_only` runs the job only in the process that is the
+      leader of the cluster, once per cluster instead of once per worker.
+
+    The job function may be a coroutine function, it runs as a task of the
+    scheduler's loop. A plain function is called in the loop, keep it short.
+    """
+
+    def __init__(self, interval: timedelta, scheduler: "AsyncScheduler" = None):
+        super().__init__(interval, scheduler)
+        self.jitter_seconds: float = 0
+        self.max_running: int = 1
+        self.leader: bool = False
+        self.running: int = 0
+        self.skipped: int = 0
+        # time.monotonic() of the next run, the heap key
+        self.next_due: Optional[float] = None
+        self.cancelled: bool = False
+
+    def jitter(self, seconds: float):
+        if seconds < 0:
+            raise ScheduleValueError("jitter must not be negative")
+        self.jitter_seconds = seconds
+        return self
+
+    def concurrency(self, limit: int):
+        if limit < 1:
+            raise ScheduleValueError("concurrency limit must be at least 1")
+        self.max_running = limit
+        return self
+
+    def leader_only(self):
+        self.leader = True
+        return self
+
+    def do(self, job_func: Callable, *args, **kwargs):
+        if self.scheduler is None:
+            raise ScheduleError(
+                "Unable to a add job to schedule. "
+                "Job is not associated with an scheduler"
+            )
+        self.job_func = functools.partial(job_func, *args, **kwargs)
+        functools.update_wrapper(self.job_func, job_func)
+        self._schedule_next_run()
+        self.scheduler._add_job(self)
+        return self
+
+    def _schedule_next_run(self) -> None:
+        delay = (self.period + self.at_offset).total_seconds()
+        if self.jitter_seconds:
+            delay += random.uniform(0, self.jitter_seconds)
+        self.next_due = time.monotonic() + delay
+        self.next_run = datetime.datetime.now() + timedelta(seconds=delay)
+
+
+class AsyncScheduler(object):
+    """
+    Runs :class:`AsyncJob` s from one task of the running loop.
+
+    Jobs are kept in a min-heap by the time of their next run, the task
+    sleeps until the first one is due, or until a job is added, instead of
+    polling. Missed runs are not caught up, a job is rescheduled from the
+    time it was started.
+
+    :param leader: decides which process runs the :meth:`AsyncJob.leader_only`
+                   jobs, an object with an ``async is_leader()`` method and
+                   optionally an ``async release()`` one, e.g.
+                   ``postmodel.leader.AdvisoryLockLeader``. Without one every
+                   process runs them.
+    """
+
+    def __init__(self, leader=None) -> None:
+        self.jobs: List[AsyncJob] = []
+        self.leader = leader
+        self._heap: list = []
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def every_s(self, interval: int) -> AsyncJob:
+        return AsyncJob(timedelta(seconds=interval), self)
+
+    def every_delta(self, delta: timedelta) -> AsyncJob:
+        return AsyncJob(delta, self)
+
+    def every(self, number: int, unit="d") -> AsyncJob:
+        """See :meth:`Scheduler.every`."""
+        return AsyncJob(_period(number, unit), self)
+
+    def get_jobs(self, tag: Optional[Hashable] = None) -> List[AsyncJob]:
+        if tag is None:
+            return self.jobs[:]
+        return [job for job in self.jobs if tag in job.tags]
+
+    def _add_job(self, job: AsyncJob) -> None:
+        self.jobs.append(job)
+        self._push(job)
+
+    def _push(self, job: AsyncJob) -> None:
+        heapq.heappush(self._heap, (job.next_due, next(self._counter), job))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def cancel_job(self, job: AsyncJob) -> None:
+        # its heap entry is skipped when popped
+        job.cancelled = True
+        try:
+            self.jobs.remove(job)
+        except ValueError:
+            pass
+
+    def clear(self, tag: Optional[Hashable] = None) -> None:
+        for job in self.get_jobs(tag):
+            self.cancel_job(job)
+
+    @property
+    def idle_seconds(self) -> Optional[float]:
+        """Seconds until the next job is due, None without jobs."""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return self._heap[0][0] - time.monotonic()
+
+    def _drop_stale(self) -> None:
+        heap = self._heap
+        while heap and (heap[0][2].cancelled or heap[0][0] != heap[0][2].next_due):
+            heapq.heappop(heap)
+
+    def start(self) -> asyncio.Task:
+        """Start running jobs in the running loop, the first runs are
+        scheduled from now."""
+        if self._task is None or self._task.done():
+            self._heap = []
+            for job in self.jobs:
+                job._schedule_next_run()
+                heapq.heappush(self._heap, (job.next_due, next(self._counter), job))
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop scheduling, wait for, up to ``timeout`` seconds, then cancel
+        the runs in progress and release the leadership."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        if self._running:
+            _, pending = await asyncio.wait(list(self._running), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+        release = getattr(self.leader, "release", None)
+        if release is not None:
+            await release()
+
+    async def _run(self) -> None:
+        heap = self._heap
+        wakeup = self._wakeup
+        while True:
+            wakeup.clear()
+            now = time.monotonic()
+            while heap and heap[0][0] <= now:
+                due, _, job = heapq.heappop(heap)
+                if job.cancelled or due != job.next_due:
+                    continue
+                self._dispatch(job)
+            self._drop_stale()
+            timeout = heap[0][0] - time.monotonic() if heap else None
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self, job: AsyncJob) -> None:
+        if job._is_overdue(datetime.datetime.now()):
+            logger.debug("Cancelling job %s", job)
+            self.cancel_job(job)
+            return
+        job._schedule_next_run()
+        if job._is_overdue(job.next_run):
+            # this run is the last one
+            self.cancel_job(job)
+        else:
+            heapq.heappush(self._heap, (job.next_due, next(self._counter), job))
+        if job.running >= job.max_running:
+            logger.debug("Skipping job %s, %d runs in progress", job, job.running)
+            job.skipped += 1
+            return
+        job.running += 1
+        task = asyncio.get_running_loop().create_task(self._run_job(job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_job(self, job: AsyncJob) -> None:
+        try:
+            if job.leader and self.leader is not None and not await self.leader.is_leader():
+                return
+            logger.debug("Running job %s", job)
+            ret = job.job_func()
+            if inspect.isawaitable(ret):
+                ret = await ret
+            job.last_run = datetime.datetime.now()
+            if isinstance(ret, CancelJob) or ret is CancelJob:
+                self.cancel_job(job)
+        except Exception:
+            logger.exception("Job %s failed", job)
+        finally:
+            job.running -= 1
@@ -1,10 +1,14 @@
+import atexit
 import random
 import socket
+import threading
 import time
 from functools import wraps
 
+from basepy.common.statsd import Aggregator, pack_lines, MTU_PAYLOAD
 
-__all__ = ['StatsdClient']
+
+__all__ = ['StatsdClient', 'AggregatingStatsdClient']
 
 class StatsdClient(object):
     """A client for statsd."""
@@ -83,3 +87,111 @@ class StatsdClient(object):
             # No time for love, Dr. Jones!
             pass
 
+
+class Timer(object):
+    """A context manager/decorator for statsd.timing()."""
+
+    def __init__(self, client, stat, rate=1):
+        self.client = client
+        self.stat = stat
+        self.rate = rate
+        self.ms = None
+
+    def __call__(self, f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with self:
+                return f(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, typ, value, tb):
+        dt = time.time() - self.start
+        self.ms = int(round(1000 * dt))  # Convert to ms.
+        self.client.timing(self.stat, self.ms, self.rate)
+
+
+class Pipeline(StatsdClient):
+    def __init__(self, client):
+        self._client = client
+        self._prefix = client._prefix
+        self._stats = []
+
+    def _after(self, data):
+        self._stats.append(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, value, tb):
+        self.send()
+
+    def send(self):
+        stats, self._stats = self._stats, []
+        for data in pack_lines(stats, 511):
+            self._client._send(data)
+
+
+class AggregatingStatsdClient(StatsdClient):
+    """The sync counterpart of `basepy.asyncstatsd.AggregatingStatsdClient`.
+
+    There is no flush task, the metric call that finds ``interval`` seconds
+    passed since the last flush sends the aggregates. `flush` runs at exit.
+    Safe to share between threads.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix=None, interval=10,
+                 max_packet=MTU_PAYLOAD, percentiles=(50, 95, 99), max_samples=1024):
+        super().__init__(host, port, prefix=prefix)
+        self.interval = interval
+        self.max_packet = max_packet
+        self.aggregator = Aggregator(percentiles, max_samples)
+        self._lock = threading.Lock()
+        self._next_flush = time.monotonic() + interval
+        atexit.register(self.flush)
+
+    def pipeline(self):
+        return AggregatedPipeline(self)
+
+    def timing(self, stat, delta, rate=1):
+        with self._lock:
+            self.aggregator.timing(stat, delta)
+        self._maybe_flush()
+
+    def incr(self, stat, count=1, rate=1):
+        with self._lock:
+            self.aggregator.incr(stat, count)
+        self._maybe_flush()
+
+    def gauge(self, stat, value, rate=1, delta=False):
+        with self._lock:
+            self.aggregator.gauge(stat, value, delta=delta)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def flush(self):
+        """Send what was aggregated since the last flush."""
+        with self._lock:
+            self._next_flush = time.monotonic() + self.interval
+            lines = self.aggregator.lines(self._prefix)
+        for data in pack_lines(lines, self.max_packet):
+            self._send(data)
+
+
+class AggregatedPipeline(object):
+    """Metrics are aggregated already, a pipeline is the client itself."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __enter__(self):
+        return self._client
+
+    def __exit__(self, typ, value, tb):
+        pass
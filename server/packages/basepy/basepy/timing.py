@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""Timing spans of the current unit of work, usually a request.
+
+    from basepy import timing
+
+    timings = timing.start()
+    with timing.span('db'):
+        ...
+    timings.spans       # {'db': [seconds, count]}
+    timing.finish()
+
+Outside a started unit a span costs one context variable lookup and
+records nothing. Tasks created while a unit runs inherit it, their spans
+add up in the same `Timings`.
+"""
+import contextvars
+import functools
+import inspect
+import time
+
+__all__ = ['Timings', 'start', 'finish', 'current', 'span', 'timed']
+
+_current = contextvars.ContextVar('basepy_timings', default=None)
+
+
+class Timings(object):
+    """Total seconds and count of each span name."""
+
+    __slots__ = ('started', 'spans')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+
+    def add(self, name, seconds):
+        item = self.spans.get(name)
+        if item is None:
+            self.spans[name] = [seconds, 1]
+        else:
+            item[0] += seconds
+            item[1] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        """``{name: {'ms': milliseconds, 'count': count}}``"""
+        return dict((name, {'ms': round(seconds * 1000, 3), 'count': count})
+                    for name, (seconds, count) in self.spans.items())
+
+
+def start():
+    """Start recording spans in the current context."""
+    timings = Timings()
+    _current.set(timings)
+    return timings
+
+
+def finish():
+    """Stop recording, returns the `Timings` recorded or None."""
+    timings = _current.get()
+    _current.set(None)
+    return timings
+
+
+def current():
+    return _current.get()
+
+
+class span(object):
+    """A context manager timing its block as ``name``."""
+
+    __slots__ = ('name', 'timings', 'begin')
+
+    def __init__(self, name):
+        self.name = name
+        self.timings = None
+
+    def __enter__(self):
+        self.timings = _current.get()
+        if self.timings is not None:
+            self.begin = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.begin)
+        return False
+
+
+def timed(name):
+    """A decorator timing every call of a function, or coroutine function,
+    as ``name``."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                timings = _current.get()
+                if timings is None:
+                    return await func(*args, **kwargs)
+                begin = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    timings.add(name, time.perf_counter() - begin)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            begin = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add(name, time.perf_counter() - begin)
+        return wrapper
+    return decorator
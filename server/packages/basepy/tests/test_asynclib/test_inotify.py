@@ -0,0 +1,34 @@
+import asyncio
+import os
+
+import pytest
+
+from basepy.asynclib import inotify
+
+
+@pytest.mark.skipif(not inotify.available(), reason="inotify not available")
+@pytest.mark.asyncio
+async def test_directory_watcher(tmp_path):
+    events = []
+    watcher = inotify.DirectoryWatcher(lambda directory, name: events.append((directory, name)))
+    watcher.start()
+    try:
+        directory = str(tmp_path / 'watched')
+        assert not watcher.watch(directory)
+        os.mkdir(directory)
+        assert watcher.watch(directory)
+        with open(os.path.join(directory, 'a.json'), 'w') as f:
+            f.write('{}')
+        os.rename(os.path.join(directory, 'a.json'), os.path.join(directory, 'b.json'))
+        await asyncio.sleep(0.05)
+        names = [name for _, name in events]
+        assert 'a.json' in names and 'b.json' in names
+        assert all(d == directory for d, _ in events)
+
+        os.remove(os.path.join(directory, 'b.json'))
+        os.rmdir(directory)
+        await asyncio.sleep(0.05)
+        assert events[-1] == (directory, None)
+        assert not watcher.watching(directory)
+    finally:
+        watcher.close()
@@ -1,5 +1,5 @@
 
-from basepy.common.log import  LoggerLevel, LogRecord
+from basepy.common.log import  LoggerLevel, LogRecord, cap_value
 from basepy.asynclog import AsyncLogger
 import pytest
 import json
@@ -134,3 +134,117 @@ async def test_log_have_no_to_json(capsys):
     #print(captured.out)
     assert captured.out.find('foo_with_jsonmixin_foo_value') > 1
     logger.clear()
+
+class RecordingStream:
+    def __init__(self):
+        self.writes = []
+        self.flushes = 0
+
+    def isatty(self):
+        return False
+
+    def write(self, data):
+        self.writes.append(data)
+
+    def flush(self):
+        self.flushes += 1
+
+@pytest.mark.asyncio
+async def test_log_filtered_handlers():
+    logger = AsyncLogger("test_log_filtered")
+    debug_stream, error_stream = RecordingStream(), RecordingStream()
+    logger.add('stdout', level="DEBUG", stream=debug_stream)
+    logger.add('stdout', level="ERROR", stream=error_stream)
+    await logger.info('info')
+    logger.sync().info('info sync')
+    assert len(debug_stream.writes) == 2
+    assert error_stream.writes == []
+
+@pytest.mark.asyncio
+async def test_log_queue_batches():
+    logger = AsyncLogger("test_log_queue")
+    stream = RecordingStream()
+    logger.add('stdout', stream=stream)
+    logger.start_queue(100, batch_size=50)
+    for i in range(10):
+        await logger.info('hello %s', i)
+    logger.sync().info('from sync')
+    assert stream.writes == []
+    await logger.flush()
+    assert len(stream.writes) == 1
+    assert stream.flushes == 1
+    lines = stream.writes[0].splitlines()
+    assert len(lines) == 11
+    assert lines[0].endswith('[hello 0]')
+    assert lines[-1].endswith('[from sync]')
+    await logger.close()
+    assert logger.engine.queue is None
+    await logger.info('inline')
+    assert stream.writes[-1].endswith('[inline]\n')
+
+@pytest.mark.asyncio
+async def test_log_queue_overflow_drop():
+    logger = AsyncLogger("test_log_drop")
+    stream = RecordingStream()
+    logger.add('stdout', stream=stream)
+    logger.start_queue(5, overflow='drop')
+    for i in range(8):
+        await logger.info('hello %s', i)
+    assert logger.engine.dropped == 3
+    await logger.close()
+    assert ''.join(stream.writes).count('hello') == 5
+
+@pytest.mark.asyncio
+async def test_log_queue_overflow_block():
+    logger = AsyncLogger("test_log_block")
+    stream = RecordingStream()
+    logger.add('stdout', stream=stream)
+    logger.start_queue(2, overflow='block', batch_size=2)
+    for i in range(8):
+        await logger.info('hello %s', i)
+    await logger.close()
+    assert logger.engine.dropped == 0
+    assert ''.join(stream.writes).count('hello') == 8
+
+@pytest.mark.asyncio
+async def test_log_queue_flush_sync():
+    logger = AsyncLogger("test_log_flush_sync")
+    stream = RecordingStream()
+    logger.add('stdout', stream=stream)
+    logger.start_queue(100)
+    await logger.warning('pending')
+    logger.engine.flush_sync()
+    assert stream.writes[0].endswith('[pending]\n')
+    await logger.close()
+    assert len(stream.writes) == 1
+
+@pytest.mark.asyncio
+async def test_log_lazy_field():
+    logger = AsyncLogger("test_log_lazy")
+    stream = RecordingStream()
+    logger.add('stdout', level="WARNING", stream=stream)
+    calls = []
+    def context():
+        calls.append(1)
+        return {'level': 3}
+    await logger.info('skipped', context=context)
+    await logger.debug('skipped', context=context)
+    assert calls == []
+    assert not logger.enabled_for(LoggerLevel.INFO)
+    assert logger.enabled_for(LoggerLevel.ERROR)
+    await logger.error('eval error', context=context)
+    assert calls == [1]
+    assert '[context = {"level": 3}]' in stream.writes[-1]
+    def broken():
+        raise KeyError('x')
+    await logger.error('eval error', context=broken)
+    assert '<KeyError evaluating field' in stream.writes[-1]
+
+def test_log_capped_fields():
+    assert cap_value('a' * 10, max_string=4) == 'aaaa...(6 more)'
+    assert cap_value(list(range(5)), max_items=2) == [0, 1, '...(3 more)']
+    assert cap_value({'a': {'b': {'c': 1}}}, max_depth=2) == {'a': {'b': '<dict of 1>'}}
+    lr = LogRecord('record', "INFO", "message", [], None, context={str(i): i for i in range(500)})
+    data = lr.to_dict()['data']['context']
+    assert len(data) == LogRecord.max_field_items + 1
+    assert data['...'] == '(400 more)'
@@ -2,7 +2,7 @@ import asyncio
 
 import pytest
 
-from basepy.asyncstatsd import StatsdClient
+from basepy.asyncstatsd import StatsdClient, AggregatingStatsdClient
 
 
 class MockStatsdClient(StatsdClient):
@@ -69,3 +69,69 @@ async def test_timer(statsd_client):
     async with statsd_client.timer('request.cost'):
         await asyncio.sleep(0.1)
     assert statsd_client.statsd_data[0].endswith('|ms')
+
+
+@pytest.mark.asyncio
+async def test_pipeline_empty(statsd_client):
+    async with statsd_client.pipeline():
+        pass
+    assert statsd_client.statsd_data == []
+
+
+@pytest.mark.asyncio
+async def test_pipeline_packets(statsd_client):
+    async with statsd_client.pipeline() as pipeline:
+        for i in range(100):
+            await pipeline.incr(f'request.number.{i}')
+    assert len(statsd_client.statsd_data) > 1
+    assert all(len(x) < 512 for x in statsd_client.statsd_data)
+    lines = '\n'.join(statsd_client.statsd_data).split('\n')
+    assert lines == [f'test.request.number.{i}:1|c' for i in range(100)]
+
+
+class MockAggregatingClient(AggregatingStatsdClient):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statsd_data = []
+
+    async def _send(self, data):
+        self.statsd_data.append(data)
+
+
+@pytest.mark.asyncio
+async def test_aggregating_client():
+    client = MockAggregatingClient(prefix='test', interval=60, percentiles=(50, 99))
+    for i in range(1, 101):
+        await client.incr('request.number')
+        await client.timing('request.cost', i)
+    async with client.pipeline() as pipe:
+        await pipe.gauge('server.in_flight', 3)
+        await pipe.gauge('server.in_flight', 2, delta=True)
+    assert client.statsd_data == []
+    await client.close()
+    assert len(client.statsd_data) == 1
+    lines = client.statsd_data[0].split('\n')
+    assert lines == [
+        'test.request.number:100|c',
+        'test.server.in_flight:5|g',
+        'test.request.cost.count:100|c',
+        'test.request.cost.mean:50.5|g',
+        'test.request.cost.min:1|g',
+        'test.request.cost.max:100|g',
+        'test.request.cost.p50:50|g',
+        'test.request.cost.p99:99|g',
+    ]
+    await client.flush()
+    assert len(client.statsd_data) == 1
+
+
+@pytest.mark.asyncio
+async def test_aggregating_client_auto_flush():
+    client = MockAggregatingClient(prefix='test', interval=0.05, max_packet=64)
+    for i in range(20):
+        await client.incr(f'request.number.{i}')
+    await asyncio.sleep(0.12)
+    assert len(client.statsd_data) > 1
+    assert all(len(x) <= 64 for x in client.statsd_data)
+    await client.close()
@@ -1,7 +1,10 @@
 from datetime import datetime
+import asyncio
 import time
 
-from basepy.cache import memoized
+import pytest
+
+from basepy.cache import memoized, cached_property, AsyncCache, async_cached
 
 
 # timing function execution time
@@ -37,3 +40,142 @@ def test_memorized():
     assert t >= 1.0
     _, t = func2(1002)
     assert t <= 0.5
+
+
+class Thing(object):
+    loads = 0
+
+    @cached_property
+    async def value(self):
+        self.loads += 1
+        return 42
+
+
+@pytest.mark.asyncio
+async def test_cached_property_async():
+    thing = Thing()
+    assert await thing.value == 42
+    assert await thing.value == 42
+    assert thing.loads == 1
+
+
+@pytest.mark.asyncio
+async def test_async_cache_single_flight():
+    cache = AsyncCache()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'v'
+
+    values = await asyncio.gather(*[cache.get('k', load) for _ in range(10)])
+    assert values == ['v'] * 10
+    assert len(calls) == 1
+    assert await cache.get('k', load) == 'v'
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 10
+    assert cache.stats.loads == 1
+
+
+@pytest.mark.asyncio
+async def test_async_cache_load_error_not_cached():
+    cache = AsyncCache()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    results = await asyncio.gather(cache.get('k', fail), cache.get('k', fail),
+                                   return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert cache.stats.load_errors == 1
+    assert 'k' not in cache
+
+    async def load():
+        return 1
+    assert await cache.get('k', load) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_cache_lru_bounds():
+    cache = AsyncCache(max_size=2)
+    for key in 'abc':
+        cache.set(key, key)
+    assert len(cache) == 2
+    assert 'a' not in cache
+    assert cache.stats.evictions == 1
+
+    cache = AsyncCache(max_size=100, max_bytes=10)
+    cache.set('a', b'12345')
+    cache.set('b', b'12345')
+
+    async def load():
+        return b'x'
+    # a hit makes `a` the most recently used
+    assert await cache.get('a', load) == b'12345'
+    cache.set('c', b'123')
+    assert 'a' in cache and 'b' not in cache and 'c' in cache
+    assert cache.bytes == 8
+    cache.set('big', b'x' * 11)
+    assert 'big' not in cache
+
+
+@pytest.mark.asyncio
+async def test_async_cache_ttl_and_stale():
+    cache = AsyncCache(ttl=0.05, stale_ttl=0.2)
+    version = [0]
+
+    async def load():
+        version[0] += 1
+        return version[0]
+
+    assert await cache.get('k', load) == 1
+    await asyncio.sleep(0.08)
+    # stale, returned while it is refreshed
+    assert await cache.get('k', load) == 1
+    assert cache.stats.stale_hits == 1
+    await asyncio.sleep(0.01)
+    assert await cache.get('k', load) == 2
+    await asyncio.sleep(0.3)
+    assert await cache.get('k', load) == 3
+    assert cache.stats.expirations == 1
+
+
+@pytest.mark.asyncio
+async def test_async_cache_invalidate_while_loading():
+    cache = AsyncCache()
+
+    async def load():
+        await asyncio.sleep(0.02)
+        return 'old'
+
+    task = asyncio.ensure_future(cache.get('k', load))
+    await asyncio.sleep(0)
+    cache.invalidate('k')
+    assert await task == 'old'
+    assert 'k' not in cache
+
+
+class Service(object):
+    calls = 0
+
+    @classmethod
+    @async_cached(ttl=60, noself=True, cache_none=False)
+    async def load(cls, app_id, token=None):
+        cls.calls += 1
+        return None if token is None else (app_id, token)
+
+
+@pytest.mark.asyncio
+async def test_async_cached_classmethod():
+    assert await Service.load('app', 't') == ('app', 't')
+    assert await Service.load(app_id='app', token='t') == ('app', 't')
+    assert Service.calls == 1
+    Service.load.invalidate('app', token='t')
+    assert await Service.load('app', 't') == ('app', 't')
+    assert Service.calls == 2
+    assert await Service.load('app') is None
+    assert await Service.load('app') is None
+    assert Service.calls == 4
+    assert Service.load.cache.stats.hits == 1
@@ -0,0 +1,64 @@
+import pytest
+
+from basepy import jsoncodec
+
+
+data = {'name': '名字', 'items': [1, 2.5, None, True], 'nested': {'b': 1, 'a': 'x/y'}}
+
+
+@pytest.fixture(params=[name for name in jsoncodec.codec_names()])
+def codec(request):
+    previous = jsoncodec.get_codec()
+    try:
+        yield jsoncodec.use_codec(request.param)
+    except ImportError:
+        pytest.skip(f'{request.param} not installed')
+    finally:
+        jsoncodec._codec = previous
+
+
+def test_auto_select():
+    assert jsoncodec.get_codec() is not None
+    assert jsoncodec.get_codec().name in jsoncodec.codec_names()
+    with pytest.raises(ValueError):
+        jsoncodec.use_codec('no_such_codec')
+
+
+def test_codec_round_trip(codec):
+    assert codec.name == jsoncodec.get_codec().name
+    encoded = jsoncodec.dumpb(data)
+    assert isinstance(encoded, bytes)
+    assert jsoncodec.dumps(data).encode('utf-8') == encoded
+    assert '名字' in jsoncodec.dumps(data)
+    assert b' ' not in jsoncodec.dumpb([1, {'a': 2}])
+    for value in (encoded, encoded.decode('utf-8'), bytearray(encoded), memoryview(encoded)):
+        assert jsoncodec.loads(value) == data
+    assert jsoncodec.dumps({'b': 1, 'a': 2}, sort_keys=True) == '{"a":2,"b":1}'
+
+
+def test_codec_fallback(codec):
+    # values some fast codecs reject are encoded like the stdlib does
+    assert jsoncodec.loads(jsoncodec.dumps({'n': 2 ** 70})) == {'n': 2 ** 70}
+    assert jsoncodec.loads(jsoncodec.dumps({1: 'a'})) == {'1': 'a'}
+    assert jsoncodec.dumps({'s': {1}}, default=sorted) == '{"s":[1]}'
+    with pytest.raises(TypeError):
+        jsoncodec.dumps({'s': object()})
+
+
+def test_register_codec():
+    class UpperCodec(jsoncodec.JSONCodec):
+        name = 'upper'
+
+        def dumps(self, obj, default=None, sort_keys=False):
+            return super().dumps(obj, default=default, sort_keys=sort_keys).upper()
+
+    previous = jsoncodec.get_codec()
+    registry = dict(jsoncodec._registry)
+    try:
+        jsoncodec.register_codec('upper', UpperCodec, preferred=True)
+        assert jsoncodec.codec_names()[0] == 'upper'
+        jsoncodec.use_codec()
+        assert jsoncodec.dumps({'a': 'b'}) == '{"A":"B"}'
+    finally:
+        jsoncodec._registry = registry
+        jsoncodec._codec = previous
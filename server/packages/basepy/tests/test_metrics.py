@@ -0,0 +1,76 @@
+import math
+
+import pytest
+
+from basepy.metrics import Registry
+
+
+class FakeStatsd:
+    def __init__(self):
+        self.sent = []
+
+    async def incr(self, stat, count=1, rate=1):
+        self.sent.append(('incr', stat, count))
+
+    async def gauge(self, stat, value, rate=1, delta=False):
+        self.sent.append(('gauge', stat, value))
+
+    async def timing(self, stat, delta, rate=1):
+        self.sent.append(('timing', stat, delta))
+
+
+def test_render():
+    registry = Registry(quantiles=(0.5, 0.99))
+    counter = registry.counter('requests_total', {'endpoint': 'main', 'status': 200}, help='requests')
+    assert registry.counter('requests_total', {'status': 200, 'endpoint': 'main'}) is counter
+    counter.inc()
+    counter.inc(2)
+    latency = registry.summary('request_seconds', {'endpoint': 'main'})
+    for i in range(1, 101):
+        latency.observe(i / 1000)
+    registry.gauge('in_flight', lambda: 3)
+    registry.gauge('broken', lambda: 1 / 0)
+    registry.summary('empty_seconds')
+    text = registry.render()
+    assert '# HELP requests_total requests\n# TYPE requests_total counter\n' in text
+    assert 'requests_total{endpoint="main",status="200"} 3\n' in text
+    assert 'request_seconds{endpoint="main",quantile="0.5"} 0.05\n' in text
+    assert 'request_seconds{endpoint="main",quantile="0.99"} 0.099\n' in text
+    assert 'request_seconds_count{endpoint="main"} 100\n' in text
+    assert 'in_flight 3\n' in text
+    assert '\nbroken ' not in text
+    assert 'empty_seconds{quantile="0.5"} NaN\n' in text
+    assert math.isclose(latency.total, 5.05)
+
+
+def test_metric_kind_conflict():
+    registry = Registry()
+    registry.counter('requests')
+    with pytest.raises(ValueError):
+        registry.summary('requests')
+    with pytest.raises(ValueError):
+        registry.counter('bad name')
+
+
+@pytest.mark.asyncio
+async def test_report():
+    registry = Registry(max_samples=2)
+    counter = registry.counter('requests_total', {'endpoint': 'a.b'})
+    latency = registry.summary('request_seconds')
+    registry.gauge('pool_in_use', lambda: 4)
+    registry.gauge('in_flight', lambda: 1, report=False)
+    counter.inc(2)
+    for value in (0.1, 0.2, 0.3):
+        latency.observe(value)
+    statsd = FakeStatsd()
+    await registry.report(statsd)
+    assert statsd.sent == [
+        ('incr', 'requests_total.a_b', 2),
+        ('timing', 'request_seconds', 200.0),
+        ('timing', 'request_seconds', 300.0),
+        ('gauge', 'pool_in_use', 4),
+    ]
+    statsd.sent = []
+    latency.observe(0.4)
+    await registry.report(statsd)
+    assert statsd.sent == [('timing', 'request_seconds', 400.0), ('gauge', 'pool_in_use', 4)]
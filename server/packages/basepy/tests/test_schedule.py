@@ -1,11 +1,15 @@
 """Unit tests for schedule.py"""
+import asyncio
 import datetime
 import functools
 import mock
+import pytest
 
 
 from  basepy.schedule import (
     scheduler,
+    AsyncScheduler,
+    CancelJob,
     ScheduleError,
     ScheduleValueError,
 )
@@ -65,3 +69,107 @@ def test_at_time():
     mock_job = make_mock_job()
     with mock_datetime(2022, 3, 2, 20, 32):
         assert scheduler.every(1, 'd').do(mock_job).next_run.hour == 20
+
+
+class FakeLeader:
+    def __init__(self, leader):
+        self.leader = leader
+        self.released = False
+
+    async def is_leader(self):
+        return self.leader
+
+    async def release(self):
+        self.released = True
+
+
+@pytest.mark.asyncio
+async def test_async_scheduler_runs_due_jobs():
+    scheduler = AsyncScheduler()
+    runs = []
+
+    async def job(name):
+        runs.append(name)
+
+    scheduler.every_delta(datetime.timedelta(seconds=0.04)).do(job, 'fast')
+    scheduler.every(1, 'h').do(job, 'slow')
+    scheduler.start()
+    await asyncio.sleep(0.15)
+    await scheduler.stop()
+    assert runs.count('fast') >= 2
+    assert 'slow' not in runs
+    assert 0 < scheduler.idle_seconds <= 3600
+
+
+@pytest.mark.asyncio
+async def test_async_scheduler_wakes_for_new_job():
+    scheduler = AsyncScheduler()
+    runs = []
+    scheduler.start()
+    await asyncio.sleep(0.01)
+    scheduler.every_delta(datetime.timedelta(seconds=0.02)).do(lambda: runs.append(1))
+    await asyncio.sleep(0.05)
+    await scheduler.stop()
+    assert runs
+
+
+@pytest.mark.asyncio
+async def test_async_scheduler_concurrency():
+    scheduler = AsyncScheduler()
+    running = []
+    peak = []
+
+    async def slow():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.1)
+        running.pop()
+
+    job = scheduler.every_delta(datetime.timedelta(seconds=0.02)).jitter(0.005).do(slow)
+    scheduler.start()
+    await asyncio.sleep(0.2)
+    await scheduler.stop(timeout=0.2)
+    assert max(peak) == 1
+    assert job.skipped > 0
+    assert job.running == 0
+
+
+@pytest.mark.asyncio
+async def test_async_scheduler_leader_only():
+    leader = FakeLeader(False)
+    scheduler = AsyncScheduler(leader=leader)
+    runs = []
+    scheduler.every_delta(datetime.timedelta(seconds=0.02)).leader_only().do(lambda: runs.append('leader'))
+    scheduler.every_delta(datetime.timedelta(seconds=0.02)).do(lambda: runs.append('worker'))
+    scheduler.start()
+    await asyncio.sleep(0.07)
+    assert 'leader' not in runs and 'worker' in runs
+    leader.leader = True
+    await asyncio.sleep(0.05)
+    await scheduler.stop()
+    assert 'leader' in runs
+    assert leader.released
+
+
+@pytest.mark.asyncio
+async def test_async_scheduler_cancel_job():
+    scheduler = AsyncScheduler()
+    runs = []
+
+    def once():
+        runs.append(1)
+        return CancelJob
+
+    def failing():
+        raise ValueError('job error')
+
+    scheduler.every_delta(datetime.timedelta(seconds=0.02)).do(once)
+    failing_job = scheduler.every_delta(datetime.timedelta(seconds=0.02)).do(failing)
+    scheduler.start()
+    await asyncio.sleep(0.09)
+    await scheduler.stop()
+    assert runs == [1]
+    assert scheduler.jobs == [failing_job]
+    scheduler.clear()
+    assert scheduler.jobs == []
+    assert scheduler.idle_seconds is None
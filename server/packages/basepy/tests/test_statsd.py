@@ -0,0 +1,73 @@
+from basepy.common.statsd import Aggregator, Histogram, pack_lines
+from basepy.statsd import AggregatingStatsdClient, StatsdClient
+
+
+class MockStatsdClient(StatsdClient):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statsd_data = []
+
+    def _send(self, data):
+        self.statsd_data.append(data)
+
+
+class MockAggregatingClient(AggregatingStatsdClient):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statsd_data = []
+
+    def _send(self, data):
+        self.statsd_data.append(data)
+
+
+def test_pack_lines():
+    assert pack_lines([], 10) == []
+    assert pack_lines(['aaaa', 'bbbb', 'cc'], 10) == ['aaaa\nbbbb', 'cc']
+    assert pack_lines(['a' * 12, 'b'], 10) == ['a' * 12, 'b']
+
+
+def test_histogram_sample():
+    histogram = Histogram(max_samples=10)
+    for i in range(1000):
+        histogram.add(i)
+    assert histogram.count == 1000
+    assert len(histogram.samples) == 10
+    assert (histogram.min, histogram.max) == (0, 999)
+    assert histogram.mean() == 499.5
+
+
+def test_aggregator_resets():
+    aggregator = Aggregator()
+    aggregator.incr('a', 2)
+    aggregator.gauge('b', 1, delta=True)
+    aggregator.gauge('b', -3, delta=True)
+    assert aggregator.lines('p') == ['p.a:2|c', 'p.b:-2|g']
+    assert len(aggregator) == 0
+    assert aggregator.lines() == []
+
+
+def test_pipeline():
+    client = MockStatsdClient(prefix='test')
+    with client.pipeline() as pipeline:
+        pipeline.incr('request.number')
+        pipeline.timing('request.cost', 100)
+    assert client.statsd_data == ['test.request.number:1|c\ntest.request.cost:100|ms']
+
+
+def test_aggregating_client():
+    client = MockAggregatingClient(prefix='test', interval=60)
+    with client.timer('request.cost'):
+        pass
+    with client.pipeline() as pipe:
+        pipe.incr('request.number')
+        pipe.incr('request.number')
+    assert client.statsd_data == []
+    client.flush()
+    lines = client.statsd_data[0].split('\n')
+    assert lines[0] == 'test.request.number:2|c'
+    assert 'test.request.cost.count:1|c' in lines
+    client._next_flush = 0
+    client.incr('request.number')
+    assert client.statsd_data[-1] == 'test.request.number:1|c'
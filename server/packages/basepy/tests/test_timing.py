@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+from basepy import timing
+
+
+def test_span_outside_unit():
+    timing.finish()
+    with timing.span('db') as s:
+        pass
+    assert s.timings is None
+    assert timing.current() is None
+
+
+def test_spans():
+    timings = timing.start()
+    with timing.span('db'):
+        time.sleep(0.01)
+    with timing.span('db'):
+        pass
+
+    @timing.timed('render')
+    def render():
+        return 'ok'
+
+    assert render() == 'ok'
+    assert timing.finish() is timings
+    assert timings.spans['db'][1] == 2
+    assert timings.spans['db'][0] >= 0.01
+    assert timings.as_dict()['render']['count'] == 1
+    assert timing.current() is None
+
+
+def test_timed_tasks():
+    @timing.timed('load')
+    async def load(delay):
+        await asyncio.sleep(delay)
+        return delay
+
+    async def unit():
+        timings = timing.start()
+        # tasks inherit the unit of the task that created them
+        assert await asyncio.gather(load(0.01), load(0.02)) == [0.01, 0.02]
+        timing.finish()
+        return timings
+
+    timings = asyncio.run(unit())
+    assert timings.spans['load'][1] == 2
+    assert timings.spans['load'][0] >= 0.03
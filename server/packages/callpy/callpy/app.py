@@ -7,6 +7,8 @@ import traceback
 from itertools import chain
 from functools import update_wrapper
 import asyncio
+import gc
+import time
 
 from .web.routing import Router
 from .web.errors import HTTPError, InternalServerError, MethodNotAllowed, BadRequest
@@ -14,14 +16,20 @@ from .web.errors import HTTPError, InternalServerError, MethodNotAllowed, BadReq
 from .web.request import Request
 from .web.response import Response, make_response
 from .web.handlers import StaticHandler
+from .web.metrics import UNMATCHED
 from .web.utils import reraise, to_bytes, to_unicode
 from .server import Server
 from basepy.asynclog import logger
 from functools import partial
 if sys.platform != 'win32':
-    from .supervisor import Supervisor
+    from .supervisor import Supervisor, notify_ready
 else:
-    from .watcher import Watcher as Supervisor
+    from .watcher import Watcher as Supervisor, notify_ready
+
+
+async def report_ready():
+    # the Server callback_ready of a supervised worker
+    notify_ready()
 
 
 class CallPy(object):
@@ -43,6 +51,8 @@ class CallPy(object):
 
         self.name = name or 'main'
 
+        self.preload_hooks = []
+        self.preloaded = False
         self.before_start_hooks = []
         self.after_start_hooks = []
         self.before_stop_hooks = []
@@ -85,6 +95,16 @@ class CallPy(object):
 
         self.router = Router()
 
+        #: the largest request body in bytes accepted by routes without a
+        #: ``max_body_size`` option, `None` for no limit.
+        self.max_body_size = None
+        #: endpoint -> ``max_body_size`` route option
+        self.max_body_sizes = {}
+
+        #: a `callpy.web.metrics.RequestMetrics` every dispatched request
+        #: is reported to, see its ``install``.
+        self.metrics = None
+
 
     def run(self, host=None, port=None, debug=False, **options):
         """Runs the application on a local development server.
@@ -96,6 +116,15 @@ class CallPy(object):
           * port: the port of the webserver. Defaults to 5000 or the
                      port defined in the SERVER_NAME` config variable if
                      present.
+          * workers: the number of worker processes.
+          * preload: run the preload hooks once in the supervisor, before
+                     workers are forked.
+          * ready_timeout: seconds a rolling reload (SIGHUP) waits for a new
+                     worker to report ready before it is aborted.
+          * warmup_path: path of a synthetic GET request every worker serves
+                     before it reports ready.
+
+        Other options are passed to `callpy.server.ServerConfig`.
         """
         if host is None:
             host = '127.0.0.1'
@@ -105,15 +134,44 @@ class CallPy(object):
             self.debug = bool(debug)
         workers = options.get('workers', 1)
         daemon = options.get('daemon', False)
-        sv = Supervisor(self.name, workers=workers, daemon=daemon, target=self._serve_forever)
+        preload = self._preload if options.get('preload', False) else None
+        sv = Supervisor(self.name, workers=workers, daemon=daemon, target=self._serve_forever,
+                        preload=preload, ready_timeout=options.get('ready_timeout', 60))
+        options.setdefault('callback_ready', report_ready)
         self.server = Server(self, host=host, port=port, **options)
         sv.run()
 
+    def _preload(self):
+        """Run the preload hooks in the supervisor before workers are forked.
+
+        The hooks run on a temporary event loop which is closed afterwards,
+        every worker creates its own loop. Objects built here are moved to
+        the permanent gc generation, so the collector of a worker does not
+        touch, and copy, the memory pages it shares with the supervisor.
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            for hook in self.preload_hooks:
+                loop.run_until_complete(hook())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+        self.preloaded = True
+        gc.collect()
+        gc.freeze()
+
     def _serve_forever(self):
-        loop = asyncio.get_event_loop()
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
         loop.run_until_complete(self.start_serve())
 
     async def start_serve(self):
+        if not self.preloaded:
+            for hook in self.preload_hooks:
+                await hook()
+            self.preloaded = True
         if len(self.before_start_hooks) > 0:
             for hook in self.before_start_hooks:
                 await hook()
@@ -170,7 +228,9 @@ class CallPy(object):
           * view_func: the function to call when serving a request to the
                     provided endpoint
           * options: methods is a list of methods this rule should be limited
-                    to (`GET`, `POST` etc.).
+                    to (`GET`, `POST` etc.).  max_body_size is the largest
+                    request body in bytes, a larger one is refused with 413
+                    before it is read.
         """
         if endpoint is None:
             endpoint = view_func.__name__
@@ -191,6 +251,8 @@ class CallPy(object):
         defaults = options.get('defaults') or {}
 
         self.router.add(rule, endpoint, methods=methods, defaults=defaults)
+        if 'max_body_size' in options:
+            self.max_body_sizes[endpoint] = options['max_body_size']
         if view_func is not None:
             old_func = self.view_functions.get(endpoint)
             if old_func is not None and old_func != view_func:
@@ -296,6 +358,18 @@ class CallPy(object):
         if not asyncio.iscoroutinefunction(hook):
             raise Exception('before/after hooks must be coroutine functions.')
 
+    def preload(self, hook):
+        """Registers a hook which warms caches shared by all workers.
+
+        With ``run(preload=True)`` the hook runs once in the supervisor
+        before workers are forked, otherwise in every worker before the
+        ``before_start`` hooks. It must not open connections or start
+        tasks, those belong to ``before_start``.
+        """
+        self._check_hook(hook)
+        self.preload_hooks.append(hook)
+        return hook
+
     def before_start(self, hook):
         self._check_hook(hook)
         self.before_start_hooks.append(hook)
@@ -401,10 +475,14 @@ class CallPy(object):
         pre and postprocessing as well as HTTP exception catching and
         error handling.
         """
+        metrics = self.metrics
+        if metrics is not None:
+            started = time.perf_counter()
         try:
             req = request
             endpoint, view_args = self.router.match(req.full_path)
             req.endpoint, req.view_args = endpoint, view_args
+            req.max_body_size = self.max_body_sizes.get(endpoint, self.max_body_size)
             rv = await self.preprocess_request(req)
             if rv is None:
                 rv = await self.view_functions[req.endpoint](req, **req.view_args)
@@ -412,11 +490,14 @@ class CallPy(object):
             await logger.info(f'{req.endpoint}, {req.view_args}')
             await logger.info('%s'%(traceback.format_exc()))
             rv = await self.handle_user_exception(req, e)
-            return make_response(rv)
+            response = make_response(rv)
         else:
             response = make_response(rv)
             response = await self.process_response(request, response)
-            return response
+        if metrics is not None:
+            metrics.observe(req.endpoint or UNMATCHED, response.status_code,
+                            time.perf_counter() - started)
+        return response
 
     async def preprocess_request(self, request):
         """Called before the actual request dispatching and will
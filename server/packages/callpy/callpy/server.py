@@ -10,7 +10,9 @@ import time
 import typing
 from email.utils import formatdate
 from callpy.web.protocol import HttpToolsProtocol
+from callpy.web.admission import AdmissionControl
 from basepy.asynclog import logger
+from basepy import metrics
 
 loop_name = 'asyncio'
 
@@ -26,6 +28,10 @@ HANDLED_SIGNALS = (
 # Fallback to 'ssl.PROTOCOL_SSLv23' in order to support Python < 3.5.3.
 SSL_PROTOCOL_VERSION = getattr(ssl, "PROTOCOL_TLS", ssl.PROTOCOL_SSLv23)
 
+TICK_INTERVAL = 0.1
+# weight of the newest sample in the smoothed loop lag
+LOOP_LAG_ALPHA = 0.5
+
 
 class ServerConfig:
     def __init__(
@@ -48,6 +54,14 @@ class ServerConfig:
         ssl_ca_certs=None,
         ssl_ciphers="TLSv1",
         headers=None,
+        shed_loop_lag=None,
+        shed_in_flight=None,
+        shed_retry_after=1,
+        route_priorities=None,
+        statsd=None,
+        metrics_interval=10,
+        warmup_path=None,
+        callback_ready=None,
         **kwargs
     ):
         self.host = host
@@ -70,6 +84,19 @@ class ServerConfig:
         self.ssl_context = None
         self.headers = headers if headers else []  # type: List[str]
         self.encoded_headers = None  # type: List[Tuple[bytes, bytes]]
+        # load shedding, see callpy.web.admission
+        self.shed_loop_lag = shed_loop_lag
+        self.shed_in_flight = shed_in_flight
+        self.shed_retry_after = shed_retry_after
+        self.route_priorities = route_priorities
+        # a basepy.asyncstatsd.StatsdClient the server metrics are sent to
+        self.statsd = statsd
+        # seconds between pushes of `basepy.metrics.registry` to statsd
+        self.metrics_interval = metrics_interval
+        # path of a synthetic GET request served before the server reports
+        # ready, and the coroutine function it reports ready with
+        self.warmup_path = warmup_path
+        self.callback_ready = callback_ready
 
         self.loaded = False
 
@@ -124,6 +151,22 @@ class ServerState:
         self.connections = set()
         self.tasks = set()
         self.default_headers = []
+        self.in_flight = 0
+        # seconds, smoothed
+        self.loop_lag = 0.0
+        self.loop_lag_max = 0.0
+        self.admission = None
+
+    def metrics(self):
+        shed = self.admission.shed if self.admission is not None else {}
+        return {
+            "loop_lag": self.loop_lag,
+            "loop_lag_max": self.loop_lag_max,
+            "in_flight": self.in_flight,
+            "connections": len(self.connections),
+            "total_requests": self.total_requests,
+            "shed": dict(shed),
+        }
 
 
 class Server:
@@ -136,6 +179,9 @@ class Server:
         self.should_exit = False
         self.force_exit = False
         self.last_notified = 0
+        self.last_metrics_report = time.monotonic()
+        self.last_tick = None
+        self.last_shed = {}
 
     def _setup_event_loop(self):
         loop_name = self.config.loop.lower()
@@ -174,6 +220,10 @@ class Server:
                 await hook()
         if self.should_exit:
             return
+        if config.warmup_path is not None:
+            await self.warm_up(config.warmup_path)
+        if config.callback_ready is not None:
+            await config.callback_ready()
         await self.main_loop()
         if len(stop_hooks) > 0:
             for hook in stop_hooks:
@@ -188,6 +238,17 @@ class Server:
     async def startup(self, sockets=None):
         config = self.config
 
+        admission = AdmissionControl(
+            self.server_state,
+            max_loop_lag=config.shed_loop_lag,
+            max_in_flight=config.shed_in_flight,
+            route_priorities=config.route_priorities,
+            retry_after=config.shed_retry_after,
+        )
+        if admission.enabled:
+            self.server_state.admission = admission
+        self.register_metrics()
+
         create_protocol = functools.partial(
             HttpToolsProtocol, app=self.app, root_path=config.root_path,
             server_state=self.server_state,
@@ -239,16 +300,57 @@ class Server:
 
         self.started = True
 
+    async def warm_up(self, path):
+        """Serve a synthetic GET request of ``path`` through the app, so the
+        first real request does not pay for lazily built state. Returns the
+        response status, None if the app failed."""
+        config = self.config
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "server": (config.host, config.port),
+            "client": ("127.0.0.1", 0),
+            "scheme": "https" if config.is_ssl else "http",
+            "method": "GET",
+            "root_path": config.root_path,
+            "path": path,
+            "raw_path": path.encode("utf-8"),
+            "query_string": b"",
+            "headers": [(b"host", b"localhost"), (b"user-agent", b"callpy-warmup")],
+        }
+        status = None
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        except Exception as exc:
+            await logger.error("Warm-up request %s failed: %r", path, exc)
+            return None
+        await logger.info(
+            "Warm-up request %s: %s in %.3fs", path, status, time.monotonic() - start
+        )
+        return status
+
     async def main_loop(self):
         counter = 0
         should_exit = await self.on_tick(counter)
         while not should_exit:
             counter += 1
             counter = counter % 864000
-            await asyncio.sleep(0.1)
+            await asyncio.sleep(TICK_INTERVAL)
             should_exit = await self.on_tick(counter)
 
     async def on_tick(self, counter) -> bool:
+        self.measure_loop_lag()
+
         # Update the default headers, once per second.
         if counter % 10 == 0:
             current_time = time.time()
@@ -263,6 +365,13 @@ class Server:
                     self.last_notified = current_time
                     await self.config.callback_notify()
 
+            if self.config.statsd is not None:
+                await self.send_metrics()
+                now = time.monotonic()
+                if now - self.last_metrics_report >= self.config.metrics_interval:
+                    self.last_metrics_report = now
+                    await metrics.registry.report(self.config.statsd)
+
         # Determine if we should exit.
         if self.should_exit:
             return True
@@ -270,6 +379,43 @@ class Server:
             return self.server_state.total_requests >= self.config.limit_max_requests
         return False
 
+    def register_metrics(self):
+        state = self.server_state
+        # send_metrics pushes these to statsd every second
+        metrics.gauge('callpy_in_flight', lambda: state.in_flight,
+                      help='requests being handled', report=False)
+        metrics.gauge('callpy_connections', lambda: len(state.connections),
+                      help='open connections', report=False)
+        metrics.gauge('callpy_loop_lag_seconds', lambda: state.loop_lag,
+                      help='smoothed event loop lag', report=False)
+        metrics.gauge('callpy_requests', lambda: state.total_requests,
+                      help='requests received by this process', report=False)
+
+    def measure_loop_lag(self):
+        # how late this tick is, everything else that ran in the meantime
+        # delayed it
+        now = time.monotonic()
+        state = self.server_state
+        if self.last_tick is not None:
+            lag = max(now - self.last_tick - TICK_INTERVAL, 0.0)
+            state.loop_lag += LOOP_LAG_ALPHA * (lag - state.loop_lag)
+            state.loop_lag_max = max(state.loop_lag_max, lag)
+        self.last_tick = now
+
+    async def send_metrics(self):
+        metrics = self.server_state.metrics()
+        async with self.config.statsd.pipeline() as pipe:
+            await pipe.gauge("server.loop_lag", metrics["loop_lag"] * 1000)
+            await pipe.gauge("server.loop_lag_max", metrics["loop_lag_max"] * 1000)
+            await pipe.gauge("server.in_flight", metrics["in_flight"])
+            await pipe.gauge("server.connections", metrics["connections"])
+            for priority, count in metrics["shed"].items():
+                delta = count - self.last_shed.get(priority, 0)
+                if delta:
+                    await pipe.incr(f"server.shed.{priority}", delta)
+        self.last_shed = metrics["shed"]
+        self.server_state.loop_lag_max = 0.0
+
     async def shutdown(self, sockets=None):
         await logger.info("Shutting down")
 
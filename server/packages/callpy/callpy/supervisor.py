@@ -211,7 +211,10 @@ class Worker(object):
         "ABRT HUP QUIT USR1 USR2 WINCH CHLD".split()
     ]
 
-    def __init__(self, ppid, target, log):
+    # the worker of this process, None in the supervisor
+    current = None
+
+    def __init__(self, ppid, target, log, ready_fd=None):
         """This is called pre-fork so it shouldn't do anything to the
         current process. If there's a need to make process wide
         changes you'll want to do that in ``self.init_process()``.
@@ -221,6 +224,7 @@ class Worker(object):
         self.booted = False
         self.alive = True
         self.log = log
+        self.ready_fd = ready_fd
 
     def __str__(self):
         return "<Process %s>" % self.pid
@@ -243,6 +247,7 @@ class Worker(object):
             raise Exception('target function not available.')
 
     def init_process(self):
+        Worker.current = self
         # Reseed the random number generator
         seed()
 
@@ -252,6 +257,16 @@ class Worker(object):
         self.run()
         self.booted = True
 
+    def notify_ready(self):
+        """Tell the supervisor this worker is warm and serving."""
+        if self.ready_fd is None:
+            return
+        try:
+            os.write(self.ready_fd, b'.')
+        finally:
+            os.close(self.ready_fd)
+            self.ready_fd = None
+
     def init_signals(self):
         # reset signaling
         [signal.signal(s, signal.SIG_DFL) for s in self.SIGNALS]
@@ -283,6 +298,13 @@ class Worker(object):
         return
 
 
+def notify_ready():
+    """Report the worker of this process ready to its supervisor, a no-op
+    outside of a supervised worker."""
+    if Worker.current is not None:
+        Worker.current.notify_ready()
+
+
 class Supervisor(object):
     """
     Supervisor maintain the workers processes alive. It launches or
@@ -298,6 +320,10 @@ class Supervisor(object):
     START_CTX = {}
 
     WORKERS = {}
+    # workers sent a graceful stop, still finishing their requests
+    DRAINING = set()
+    # worker pid -> read end of the pipe it reports ready on
+    READY = {}
     PIPE = []
 
     # I love dynamic languages
@@ -317,8 +343,11 @@ class Supervisor(object):
                  daemon=False,
                  workers=1,
                  pid=None,
-                 target=None):
+                 target=None,
+                 preload=None,
+                 ready_timeout=60):
         self.stop_timeout = 120
+        self.ready_timeout = ready_timeout
         self.prog = prog
         self.num_workers = workers
         self.daemon = daemon
@@ -328,6 +357,7 @@ class Supervisor(object):
             self.pidfile = Pidfile(pid)
             self.pidfile.create(self.pid)
         self.target = target
+        self.preload = preload
         self.proc_name = self.target
         self.WORKER_CLASS = Worker
         if hasattr(self.WORKER_CLASS, 'setup'):
@@ -393,6 +423,8 @@ class Supervisor(object):
         self.start()
         setproctitle("supervisor of {} [{}]".format(self.prog, self.proc_name))
 
+        if self.preload is not None and not self.preload_app():
+            self.halt(reason="Preload failed.", exit_status=self.WORKER_BOOT_ERROR)
         self.manage_workers()
         while True:
             try:
@@ -430,6 +462,17 @@ class Supervisor(object):
                     self.pidfile.unlink()
                 sys.exit(-1)
 
+    def preload_app(self):
+        """Warm the application once, workers forked afterwards share it."""
+        start = time.time()
+        try:
+            self.preload()
+        except Exception:
+            self.log.error("Exception in preload:\n%s", traceback.format_exc())
+            return False
+        self.log.info("Preloaded %s in %.3fs", self.prog, time.time() - start)
+        return True
+
     def handle_chld(self, sig, frame):
         """SIGCHLD handling"""
         self.reap_workers()
@@ -571,9 +614,62 @@ class Supervisor(object):
         os.execvpe(self.START_CTX[0], self.START_CTX['args'], os.environ)
 
     def reload(self):
-        # TODO reload
-        # manage workers
-        self.manage_workers()
+        """\
+        Rolling reload. Replace the workers one at a time: spawn a new
+        worker, wait until it reports ready (preloaded, pools connected
+        and a warm-up request served), then gracefully stop an old one.
+        A replacement that dies or does not get ready in time aborts the
+        reload and the remaining old workers keep serving.
+        """
+        if self.preload is not None:
+            # new workers fork from here, refresh what they share
+            self.preload_app()
+        old_workers = self.active_workers()
+        for pid in old_workers:
+            if pid not in self.WORKERS:
+                continue
+            new_pid = self.spawn_worker()
+            if not self.wait_ready(new_pid, self.ready_timeout):
+                self.log.error("Worker %s not ready in %ss, reload aborted",
+                               new_pid, self.ready_timeout)
+                self.stop_worker(new_pid)
+                return
+            self.stop_worker(pid)
+        self.log.info("Reloaded %s workers", len(old_workers))
+
+    def wait_ready(self, pid, timeout):
+        """Wait until worker ``pid`` reports ready, False if it exits or
+        the timeout passes first."""
+        fd = self.READY.pop(pid, None)
+        if fd is None:
+            return False
+        limit = time.time() + timeout
+        try:
+            while True:
+                remaining = limit - time.time()
+                if remaining <= 0:
+                    return False
+                ready = select.select([fd], [], [], min(remaining, 1.0))
+                if ready[0]:
+                    # EOF without data: the worker exited before ready
+                    return bool(os.read(fd, 1))
+                if pid not in self.WORKERS:
+                    return False
+        finally:
+            os.close(fd)
+
+    def close_ready(self, pid):
+        fd = self.READY.pop(pid, None)
+        if fd is not None:
+            os.close(fd)
+
+    def stop_worker(self, pid):
+        """Gracefully stop a worker, it finishes its open requests first."""
+        self.DRAINING.add(pid)
+        self.kill_worker(pid, signal.SIGTERM)
+
+    def active_workers(self):
+        return [pid for pid in self.WORKERS if pid not in self.DRAINING]
 
     def reap_workers(self):
         """\
@@ -593,9 +689,11 @@ class Supervisor(object):
                     # to avoid infinite start/stop cycles.
                     exitcode = status >> 8
                     exitcodes.add(exitcode)
-                    if exitcode == 0:
+                    if exitcode == 0 and wpid not in self.DRAINING:
                         self.num_workers -= 1
                     self.WORKERS.pop(wpid, None)
+                    self.DRAINING.discard(wpid)
+                    self.close_ready(wpid)
         except OSError as e:
             if e.errno == errno.ECHILD:
                 pass
@@ -608,24 +706,32 @@ class Supervisor(object):
         Maintain the number of workers by spawning or killing
         as required.
         """
-        if len(self.WORKERS.keys()) < self.num_workers:
+        workers = self.active_workers()
+        if len(workers) < self.num_workers:
             self.spawn_workers()
 
-        workers = self.WORKERS.items()
         while len(workers) > self.num_workers:
-            (pid, _) = workers.pop(0)
+            pid = workers.pop(0)
+            self.DRAINING.add(pid)
             self.kill_worker(pid, signal.SIGQUIT)
 
     def spawn_worker(self):
-        worker = self.WORKER_CLASS(self.pid, self.target, self.log)
+        read_fd, write_fd = os.pipe()
+        worker = self.WORKER_CLASS(self.pid, self.target, self.log, ready_fd=write_fd)
 
         pid = os.fork()
 
         if pid != 0:
+            os.close(write_fd)
             self.WORKERS[pid] = worker
+            self.READY[pid] = read_fd
             return pid
 
         # Process Child
+        os.close(read_fd)
+        for fd in self.READY.values():
+            os.close(fd)
+        self.READY.clear()
         worker_pid = os.getpid()
         try:
             setproctitle("worker of {} [{}]".format(self.prog, self.proc_name))
@@ -652,7 +758,7 @@ class Supervisor(object):
         of the supervisor process.
         """
 
-        for i in range(self.num_workers - len(self.WORKERS.keys())):
+        for i in range(self.num_workers - len(self.active_workers())):
             self.spawn_worker()
 
     def kill_workers(self, sig):
@@ -6,13 +6,21 @@ import sys
 import copy
 from typing import Optional, List
 
+
+def notify_ready():
+    """Workers of the watcher are not reloaded one by one, nothing waits
+    for them to get ready."""
+
+
 class Watcher(object):
     def __init__(self,
                  prog,
                  daemon=False,
                  workers=1,
                  pid=None,
-                 target=None):
+                 target=None,
+                 preload=None,
+                 ready_timeout=60):
         self.stop_timeout = 120
         self.prog = prog
         self.num_workers = workers
@@ -20,6 +28,8 @@ class Watcher(object):
         self.pid = os.getpid()
         self.pidfile = None
         self.target = target
+        # workers are new processes, not forks, they preload themselves
+        self.preload = None
         self.proc_name = self.target
         self.workers  = []
 
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Admission control: shed requests with a fast 503 when the server is
+overloaded instead of queueing work that will time out anyway.
+
+Load is the larger of ``loop lag / max_loop_lag`` and ``in-flight requests
+/ max_in_flight``. Each route has a priority, a request is shed once the
+load reaches the factor of its priority, so low priority routes (static
+assets) are shed first and high priority ones (the hola service) last.
+"""
+
+PRIORITY_LOW = 'low'
+PRIORITY_NORMAL = 'normal'
+PRIORITY_HIGH = 'high'
+
+PRIORITY_FACTORS = {
+    PRIORITY_LOW: 0.5,
+    PRIORITY_NORMAL: 1.0,
+    PRIORITY_HIGH: 2.0,
+}
+
+
+class AdmissionControl:
+    """
+    Args:
+
+      * state: the `ServerState` to read ``loop_lag`` and ``in_flight`` from.
+      * max_loop_lag: loop lag in seconds at which normal priority requests
+                      are shed, None to ignore lag.
+      * max_in_flight: in-flight requests at which normal priority requests
+                       are shed, None to ignore concurrency.
+      * route_priorities: ``[(path_prefix, priority), ...]``, the longest
+                          matching prefix wins.
+      * retry_after: seconds sent in the ``Retry-After`` header.
+    """
+
+    def __init__(self, state, max_loop_lag=None, max_in_flight=None,
+                 route_priorities=None, default_priority=PRIORITY_NORMAL, retry_after=1):
+        for _, priority in route_priorities or ():
+            if priority not in PRIORITY_FACTORS:
+                raise ValueError(f'priority must be one of {list(PRIORITY_FACTORS)}, got {priority}')
+        self.state = state
+        self.max_loop_lag = max_loop_lag
+        self.max_in_flight = max_in_flight
+        self.route_priorities = sorted(route_priorities or [], key=lambda x: len(x[0]), reverse=True)
+        self.default_priority = default_priority
+        self.retry_after = retry_after
+        self.shed = dict((priority, 0) for priority in PRIORITY_FACTORS)
+        self._priorities = {}
+        self.reject = self.make_reject_app(retry_after)
+
+    @property
+    def enabled(self):
+        return self.max_loop_lag is not None or self.max_in_flight is not None
+
+    def priority(self, path):
+        priority = self._priorities.get(path)
+        if priority is None:
+            priority = self.default_priority
+            for prefix, value in self.route_priorities:
+                if path.startswith(prefix):
+                    priority = value
+                    break
+            if len(self._priorities) < 4096:
+                self._priorities[path] = priority
+        return priority
+
+    def load(self):
+        load = 0.0
+        if self.max_loop_lag:
+            load = self.state.loop_lag / self.max_loop_lag
+        if self.max_in_flight:
+            load = max(load, self.state.in_flight / self.max_in_flight)
+        return load
+
+    def admit(self, path):
+        load = self.load()
+        if load < PRIORITY_FACTORS[PRIORITY_LOW]:
+            return True
+        priority = self.priority(path)
+        if load < PRIORITY_FACTORS[priority]:
+            return True
+        self.shed[priority] += 1
+        return False
+
+    @staticmethod
+    def make_reject_app(retry_after):
+        body = b"Service Unavailable"
+        headers = [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            (b"retry-after", str(retry_after).encode("ascii")),
+        ]
+
+        async def reject(scope, receive, send):
+            await send({"type": "http.response.start", "status": 503, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        return reject
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""Precompressed and content-hashed static assets.
+
+``precompress_directory`` runs at publish time. It writes ``.gz`` (and
+``.br`` when the ``brotli`` package is installed) variants next to the
+compressible files, plus a manifest with a content hash of every file.
+``StaticHandler`` uses the manifest to negotiate ``Accept-Encoding`` and to
+serve hashed URLs (``name.<hash>.ext``) as immutable.
+"""
+import gzip
+import hashlib
+import os
+import re
+import threading
+import time
+
+from basepy import jsoncodec
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+MANIFEST_NAME = 'assets-manifest.json'
+HASH_LENGTH = 12
+
+# encodings in server preference order, with the suffix of their variant
+ENCODING_SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+COMPRESSIBLE_EXTENSIONS = frozenset([
+    '.html', '.htm', '.css', '.js', '.mjs', '.json', '.map', '.txt', '.xml',
+    '.svg', '.csv', '.md', '.hola', '.wasm', '.ttf', '.otf', '.eot', '.ico',
+])
+
+MIN_COMPRESS_SIZE = 1024
+# keep a variant only if it saves at least this fraction of the size
+MIN_COMPRESS_SAVING = 0.1
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+hashed_name_pattern = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[^./]+)?$' % HASH_LENGTH)
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_path(path, digest):
+    """``img/logo.png`` -> ``img/logo.<digest>.png``"""
+    head, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    name = f'{stem}.{digest}{ext}'
+    return f'{head}/{name}' if head else name
+
+
+def split_hashed_path(path):
+    """Inverse of ``hashed_path``, returns ``(path, digest)`` or ``None``."""
+    head, name = os.path.split(path)
+    m = hashed_name_pattern.match(name)
+    if not m:
+        return None
+    name = m.group('stem') + (m.group('ext') or '')
+    return (f'{head}/{name}' if head else name), m.group('hash')
+
+
+def compress_data(data, encoding, level=9):
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    elif encoding == 'br':
+        return brotli.compress(data, quality=11)
+    raise ValueError(f'unsupported encoding {encoding}')
+
+
+def available_encodings():
+    return [x for x in ENCODING_SUFFIXES if x != 'br' or brotli is not None]
+
+
+def is_variant(rel_path, files):
+    for suffix in ENCODING_SUFFIXES.values():
+        if rel_path.endswith(suffix) and rel_path[:-len(suffix)] in files:
+            return True
+    return False
+
+
+def precompress_directory(directory, min_size=MIN_COMPRESS_SIZE,
+                          extensions=COMPRESSIBLE_EXTENSIONS):
+    """Write compressed variants and the manifest for all files in directory.
+
+    Files unchanged since the last run (same hash, variants present) are
+    not compressed again. Returns the manifest.
+    """
+    directory = os.path.abspath(directory)
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    previous = read_manifest(manifest_path).get('files', {})
+
+    files = set()
+    for root, _, names in os.walk(directory):
+        for name in names:
+            rel = os.path.relpath(os.path.join(root, name), directory).replace(os.sep, '/')
+            if rel != MANIFEST_NAME:
+                files.add(rel)
+
+    encodings = available_encodings()
+    entries = {}
+    for rel in sorted(files):
+        if is_variant(rel, files):
+            continue
+        full_path = os.path.join(directory, rel)
+        size = os.path.getsize(full_path)
+        digest = file_digest(full_path)
+        entry = {'hash': digest, 'size': size, 'encodings': {}}
+        compressible = size >= min_size and os.path.splitext(rel)[1].lower() in extensions
+        old_entry = previous.get(rel)
+        data = None
+        for encoding in ENCODING_SUFFIXES:
+            variant_path = full_path + ENCODING_SUFFIXES[encoding]
+            if not compressible or encoding not in encodings:
+                if os.path.exists(variant_path):
+                    os.remove(variant_path)
+                continue
+            if (old_entry and old_entry.get('hash') == digest
+                    and encoding in old_entry.get('encodings', {})
+                    and os.path.exists(variant_path)):
+                entry['encodings'][encoding] = old_entry['encodings'][encoding]
+                continue
+            if data is None:
+                with open(full_path, 'rb') as f:
+                    data = f.read()
+            compressed = compress_data(data, encoding)
+            if len(compressed) > size * (1 - MIN_COMPRESS_SAVING):
+                if os.path.exists(variant_path):
+                    os.remove(variant_path)
+                continue
+            tmp_path = variant_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, variant_path)
+            entry['encodings'][encoding] = len(compressed)
+        entries[rel] = entry
+
+    manifest = {'version': 1, 'files': entries}
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(jsoncodec.dumps(manifest, sort_keys=True))
+    os.replace(tmp_path, manifest_path)
+    AssetManifest.invalidate(directory)
+    return manifest
+
+
+def read_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return jsoncodec.loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def parse_accept_encoding(value):
+    """Returns a dict of coding -> q value."""
+    codings = {}
+    if not value:
+        return codings
+    for item in value.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def negotiate_encoding(accept_encoding, available):
+    """Pick the preferred encoding of ``available`` the client accepts."""
+    if not available or not accept_encoding:
+        return None
+    codings = parse_accept_encoding(accept_encoding)
+    wildcard = codings.get('*', 0.0)
+    for encoding in ENCODING_SUFFIXES:
+        if encoding in available and codings.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class AssetManifest:
+    """In-memory manifest of a directory, reloaded when the file changes.
+
+    The manifest file is stat'ed at most once per ``check_interval`` seconds.
+    """
+    check_interval = 2.0
+    _manifests = {}
+    _lock = threading.Lock()
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.mtime = None
+        self.checked = None
+        self.files = {}
+
+    @classmethod
+    def get(cls, directory):
+        directory = os.path.abspath(directory)
+        manifest = cls._manifests.get(directory)
+        if manifest is None:
+            with cls._lock:
+                manifest = cls._manifests.setdefault(directory, cls(directory))
+        manifest.refresh()
+        return manifest
+
+    @classmethod
+    def invalidate(cls, directory):
+        cls._manifests.pop(os.path.abspath(directory), None)
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.checked is not None and now - self.checked < self.check_interval:
+            return
+        self.checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self.mtime:
+            self.mtime = mtime
+            self.files = read_manifest(self.path).get('files', {}) if mtime else {}
+
+    def lookup(self, path):
+        """Resolve a request path to ``(path, entry, hashed)``.
+
+        ``hashed`` is True when path is a hashed URL matching the current
+        content. Returns ``(path, None, False)`` for files not in the manifest.
+        """
+        entry = self.files.get(path)
+        if entry is not None:
+            return path, entry, False
+        split = split_hashed_path(path)
+        if split is not None:
+            original, digest = split
+            entry = self.files.get(original)
+            if entry is not None:
+                return original, entry, entry['hash'] == digest
+        return path, None, False
+
+    def url_path(self, path):
+        """The hashed path of ``path``, or path itself if it is unknown."""
+        entry = self.files.get(path)
+        if entry is None:
+            return path
+        return hashed_path(path, entry['hash'])
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""Response compression as an ``after_request`` stage.
+
+    from callpy.web.compress import Compressor
+    app.after_request(Compressor(min_size=1024, level=6))
+
+Buffered bodies are compressed in one pass, ``StreamingResponse`` bodies
+chunk by chunk. Bodies below ``min_size`` leave the stage after a single
+header lookup. Brotli is used only when the ``brotli`` package is installed.
+"""
+import time
+import zlib
+
+from .assets import parse_accept_encoding
+from .response import FileResponse, StreamingResponse
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+# in server preference order
+ENCODINGS = ('br', 'gzip', 'deflate')
+
+COMPRESSIBLE_MIMETYPES = frozenset([
+    'application/json', 'application/javascript', 'application/xml',
+    'application/x-javascript', 'image/svg+xml',
+])
+
+SKIP_STATUS = frozenset([204, 206, 304])
+
+
+def is_compressible_type(content_type):
+    mimetype = content_type.split(';', 1)[0].strip().lower()
+    return (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+            or mimetype.endswith('+json') or mimetype.endswith('+xml'))
+
+
+class ZlibEncoder:
+    def __init__(self, encoding, level):
+        # 31: gzip container, 15: zlib container (what HTTP calls deflate)
+        wbits = 31 if encoding == 'gzip' else 15
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionStats:
+    """Counters of a `Compressor`, ``cpu_time`` is in seconds."""
+
+    def __init__(self):
+        self.compressed = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_time = 0.0
+
+    @property
+    def ratio(self):
+        if not self.bytes_in:
+            return 1.0
+        return self.bytes_out / self.bytes_in
+
+    def as_dict(self):
+        return {
+            'compressed': self.compressed,
+            'skipped': self.skipped,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'ratio': self.ratio,
+            'cpu_time': self.cpu_time,
+        }
+
+
+class Compressor:
+    """Compress responses the client accepts an encoding for.
+
+    Args:
+
+      * min_size: bodies smaller than this are sent as they are.
+      * level: zlib compression level (1-9) for gzip and deflate.
+      * brotli_quality: brotli quality (0-11).
+      * encodings: the encodings to offer, in preference order.
+      * statsd: an optional `basepy.asyncstatsd.StatsdClient`, receives
+                ``<prefix>.ratio`` / ``<prefix>.cpu`` timings and byte
+                counters for every compressed buffered response.
+    """
+
+    def __init__(self, min_size=1024, level=6, brotli_quality=4,
+                 encodings=ENCODINGS, statsd=None, stat_prefix='response.compress'):
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.encodings = tuple(x for x in encodings if x != 'br' or brotli is not None)
+        self.statsd = statsd
+        self.stat_prefix = stat_prefix
+        self.stats = CompressionStats()
+
+    def make_encoder(self, encoding):
+        if encoding == 'br':
+            return BrotliEncoder(self.brotli_quality)
+        return ZlibEncoder(encoding, self.level)
+
+    def select_encoding(self, accept_encoding):
+        if not accept_encoding:
+            return None
+        codings = parse_accept_encoding(accept_encoding)
+        wildcard = codings.get('*', 0.0)
+        for encoding in self.encodings:
+            if codings.get(encoding, wildcard) > 0:
+                return encoding
+        return None
+
+    def should_compress(self, request, response):
+        if response.status_code < 200 or response.status_code in SKIP_STATUS:
+            return False
+        if isinstance(response, FileResponse) or request.method == 'HEAD':
+            return False
+        headers = response.headers
+        if 'content-encoding' in headers:
+            return False
+        if 'no-transform' in headers.get('cache-control', ''):
+            return False
+        return is_compressible_type(headers.get('content-type', response.default_content_type))
+
+    async def __call__(self, request, response):
+        streaming = isinstance(response, StreamingResponse)
+        if not streaming:
+            content_length = response.headers.get('content-length')
+            if content_length is None or int(content_length) < self.min_size:
+                return response
+        if not self.should_compress(request, response):
+            return response
+        response.add_header('Vary', 'Accept-Encoding')
+        encoding = self.select_encoding(request.headers.get('accept-encoding'))
+        if encoding is None:
+            self.stats.skipped += 1
+            return response
+        if streaming:
+            response.body_iterator = self.compress_stream(response.body_iterator, encoding,
+                                                          response.charset)
+            self.set_encoding_headers(response, encoding)
+            return response
+        return await self.compress_body(response, encoding)
+
+    async def compress_body(self, response, encoding):
+        body = response.body
+        if isinstance(body, str):
+            body = body.encode(response.charset)
+        start = time.process_time()
+        encoder = self.make_encoder(encoding)
+        data = encoder.compress(body) + encoder.finish()
+        cpu_time = time.process_time() - start
+        if len(data) >= len(body):
+            self.stats.skipped += 1
+            return response
+        response.body = data
+        self.set_encoding_headers(response, encoding)
+        response.set_header('Content-Length', str(len(data)))
+        await self.record(len(body), len(data), cpu_time)
+        return response
+
+    async def compress_stream(self, iterator, encoding, charset):
+        encoder = self.make_encoder(encoding)
+        bytes_in = bytes_out = 0
+        cpu_time = 0.0
+        async for chunk in iterator:
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode(charset)
+            start = time.process_time()
+            # flush per chunk, a streamed response is expected to arrive
+            # at the client as it is produced
+            data = encoder.compress(chunk) + encoder.flush()
+            cpu_time += time.process_time() - start
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            if data:
+                yield data
+        data = encoder.finish()
+        bytes_out += len(data)
+        if data:
+            yield data
+        await self.record(bytes_in, bytes_out, cpu_time)
+
+    def set_encoding_headers(self, response, encoding):
+        headers = response.headers
+        headers['Content-Encoding'] = encoding
+        if 'content-length' in headers:
+            del headers['content-length']
+        etag = headers.get('etag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = 'W/' + etag
+
+    async def record(self, bytes_in, bytes_out, cpu_time):
+        stats = self.stats
+        stats.compressed += 1
+        stats.bytes_in += bytes_in
+        stats.bytes_out += bytes_out
+        stats.cpu_time += cpu_time
+        if self.statsd is not None and bytes_in:
+            prefix = self.stat_prefix
+            async with self.statsd.pipeline() as pipe:
+                await pipe.timing(f'{prefix}.cpu', cpu_time * 1000)
+                await pipe.timing(f'{prefix}.ratio', 100 * bytes_out / bytes_in)
+                await pipe.incr(f'{prefix}.bytes_in', bytes_in)
+                await pipe.incr(f'{prefix}.bytes_out', bytes_out)
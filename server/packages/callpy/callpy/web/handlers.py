@@ -15,6 +15,8 @@ from .response import (
     redirect
 )
 from .types import Receive, Scope, Send
+from .assets import AssetManifest, ENCODING_SUFFIXES, IMMUTABLE_CACHE_CONTROL, negotiate_encoding
+from .utils import guess_file_mimetype
 from string import Formatter
 
 
@@ -63,8 +65,6 @@ class StaticHandler:
         self.config_checked = False
 
     async def __call__(self, request, target='', **kwargs):
-        print('_call__', target)
-
         if not self.config_checked:
             await self.check_config()
             self.config_checked = True
@@ -87,13 +87,20 @@ class StaticHandler:
             return text("Not Found", status=404)
 
         if self.directory:
+            directory = self.directory
             full_path = os.path.join(self.directory, path)
         elif self.directory_format:
-            directory = self.directory_format.format(**request.view_args)
-            full_path = os.path.join(os.path.abspath(directory), path)
+            directory = os.path.abspath(self.directory_format.format(**request.view_args))
+            full_path = os.path.join(directory, path)
         else:
+            directory = None
             full_path = path
 
+        if directory is not None:
+            response = await self.asset_response(request, directory, path)
+            if response is not None:
+                return response
+
         stat_result = await self.lookup_path(full_path)
 
         if stat_result and stat.S_ISREG(stat_result.st_mode):
@@ -123,6 +130,39 @@ class StaticHandler:
 
         return text("Not Found", status=404)
 
+    async def asset_response(self, request, directory: str, path: str) -> typing.Optional[Response]:
+        """
+        Serve a file listed in the directory's asset manifest: a precompressed
+        variant when the client accepts it, and hashed URLs as immutable.
+        """
+        manifest = AssetManifest.get(directory)
+        if not manifest.files:
+            return None
+        path, entry, hashed = manifest.lookup(path)
+        if entry is None:
+            return None
+
+        full_path = os.path.join(directory, path)
+        encodings = entry["encodings"]
+        headers = {
+            "content-type": guess_file_mimetype(full_path) or "text/plain",
+            "etag": entry["hash"],
+        }
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"), encodings)
+        if encoding is not None:
+            full_path = full_path + ENCODING_SUFFIXES[encoding]
+            headers["content-encoding"] = encoding
+            headers["etag"] = "{}-{}".format(entry["hash"], encoding)
+        if encodings:
+            headers["vary"] = "Accept-Encoding"
+        if hashed:
+            headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+
+        stat_result = await self.lookup_path(full_path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return None
+        return self.file_response(full_path, stat_result, request, headers=headers)
+
     async def lookup_path(
         self, path: str
     ) -> typing.Tuple[str, typing.Optional[os.stat_result]]:
@@ -139,12 +179,14 @@ class StaticHandler:
         stat_result: os.stat_result,
         request: Request,
         status_code: int = 200,
+        headers: dict = None,
     ) -> Response:
         method = request.method
         request_headers = request.headers
 
         response = FileResponse(
-            full_path, status_code=status_code, stat_result=stat_result, method=method
+            full_path, status_code=status_code, headers=headers or {},
+            stat_result=stat_result, method=method, request=request
         )
         if self.is_not_modified(response.headers, request_headers):
             return NotModifiedResponse(response.headers)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Request metrics per route endpoint and a ``/metrics`` text endpoint.
+
+    from callpy.web.metrics import RequestMetrics
+
+    RequestMetrics(path='/metrics').install(app)
+
+Every request dispatched by the app is counted per endpoint and status
+code, and its latency goes into the ``callpy_request_seconds`` summary.
+The server adds its in-flight, connection and loop lag gauges, postmodel
+its query, pool and transaction metrics, all in `basepy.metrics.registry`.
+With a ``statsd`` client the server pushes the registry every
+``metrics_interval`` seconds too.
+"""
+from basepy import metrics as basepy_metrics
+from .response import Response
+
+__all__ = ['RequestMetrics', 'UNMATCHED']
+
+# endpoint label of requests no route matched
+UNMATCHED = '_unmatched'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestMetrics:
+    """
+    Args:
+
+      * path: path of the metrics endpoint, None for no endpoint.
+      * registry: a `basepy.metrics.Registry`, the process wide one by
+                  default.
+    """
+
+    def __init__(self, path='/metrics', registry=None):
+        self.path = path
+        self.registry = registry or basepy_metrics.registry
+        # endpoint -> latency summary, status -> counter
+        self._endpoints = {}
+
+    def install(self, app):
+        app.metrics = self
+        if self.path is not None:
+            app.add_url_rule(self.path, 'metrics', self.metrics_view)
+        return self
+
+    def observe(self, endpoint, status_code, seconds):
+        item = self._endpoints.get(endpoint)
+        if item is None:
+            labels = {'endpoint': endpoint}
+            latency = self.registry.summary(
+                'callpy_request_seconds', labels, help='request latency in seconds')
+            item = self._endpoints[endpoint] = (latency, {})
+        latency, statuses = item
+        latency.observe(seconds)
+        counter = statuses.get(status_code)
+        if counter is None:
+            counter = statuses[status_code] = self.registry.counter(
+                'callpy_responses_total', {'endpoint': endpoint, 'status': status_code},
+                help='responses by endpoint and status code')
+        counter.value += 1
+
+    async def metrics_view(self, request):
+        return Response(self.registry.render(), content_type=CONTENT_TYPE)
@@ -1,5 +1,6 @@
 import asyncio
 import http
+import os
 import urllib
 
 import httptools
@@ -14,6 +15,7 @@ from .utils import (
 )
 
 from basepy.asynclog import logger
+from basepy.common.log import LoggerLevel
 
 from urllib.parse import unquote
 import websockets
@@ -263,6 +265,20 @@ STATUS_LINE = {
 
 HIGH_WATER_LIMIT = 65536
 
+# chunk sizes for sending files when zero-copy is not possible (TLS), the
+# chunk grows while the transport keeps up and shrinks when it pauses writing
+FILE_CHUNK_MIN = 64 * 1024
+FILE_CHUNK_MAX = 1024 * 1024
+# a file sent with sendfile has to reach the client within
+# SENDFILE_TIMEOUT plus its size at SENDFILE_MIN_RATE, slower clients are
+# disconnected
+SENDFILE_TIMEOUT = 60
+SENDFILE_MIN_RATE = 16 * 1024
+
+
+def sendfile_deadline(count):
+    return SENDFILE_TIMEOUT + count / SENDFILE_MIN_RATE
+
 class FlowControl:
     def __init__(self, transport):
         self._transport = transport
@@ -270,10 +286,49 @@ class FlowControl:
         self.write_paused = False
         self._is_writable_event = asyncio.Event()
         self._is_writable_event.set()
+        self._writable_waiter = None
 
     async def drain(self):
         await self._is_writable_event.wait()
 
+    async def flush(self):
+        """
+        Wait until the transport has written everything it buffered. The
+        water marks are dropped to zero, so resume_writing comes with the
+        last byte sent (or the connection lost).
+        """
+        if not self._transport.get_write_buffer_size():
+            return
+        low, high = self._transport.get_write_buffer_limits()
+        self._transport.set_write_buffer_limits(high=0, low=0)
+        try:
+            await self.drain()
+        finally:
+            if not self._transport.is_closing():
+                self._transport.set_write_buffer_limits(high=high, low=low)
+
+    async def wait_writable(self, fd):
+        """
+        Wait until ``fd``, a dup of the transport's socket written around
+        the transport, is writable or the connection is lost.
+        """
+        loop = asyncio.get_running_loop()
+        self._writable_waiter = waiter = loop.create_future()
+        loop.add_writer(fd, self._wake_writable)
+        try:
+            await waiter
+        finally:
+            loop.remove_writer(fd)
+            self._writable_waiter = None
+
+    def _wake_writable(self):
+        if self._writable_waiter is not None and not self._writable_waiter.done():
+            self._writable_waiter.set_result(None)
+
+    def connection_lost(self):
+        self.resume_writing()
+        self._wake_writable()
+
     def pause_reading(self):
         if not self.read_paused:
             self.read_paused = True
@@ -330,6 +385,7 @@ class HttpToolsProtocol(asyncio.Protocol):
         self.connections = server_state.connections
         self.tasks = server_state.tasks
         self.default_headers = server_state.default_headers
+        self.admission = server_state.admission
 
         # Per-connection state
         self.transport = None
@@ -337,6 +393,7 @@ class HttpToolsProtocol(asyncio.Protocol):
         self.server = None
         self.client = None
         self.scheme = None
+        self.zerocopy = False
         self.pipeline = []
 
         # Per-request state
@@ -356,6 +413,7 @@ class HttpToolsProtocol(asyncio.Protocol):
         self.server = get_local_addr(transport)
         self.client = get_remote_addr(transport)
         self.scheme = "https" if is_ssl(transport) else "http"
+        self.zerocopy = self.scheme == "http" and hasattr(os, "sendfile")
 
         prefix = "%s:%d - " % tuple(self.client) if self.client else ""
         self.logger.debug("%sConnection made", prefix)
@@ -370,7 +428,7 @@ class HttpToolsProtocol(asyncio.Protocol):
             self.cycle.disconnected = True
         self.message_event.set()
         if self.flow is not None:
-            self.flow.resume_writing()
+            self.flow.connection_lost()
 
     def eof_received(self):
         pass
@@ -452,6 +510,10 @@ class HttpToolsProtocol(asyncio.Protocol):
             "raw_path": raw_path,
             "query_string": parsed_url.query if parsed_url.query else b"",
             "headers": self.headers,
+            "extensions": {
+                "http.response.zerocopy": {},
+                "http.response.pathsend": {},
+            },
         }
 
     def on_header(self, name: bytes, value: bytes):
@@ -475,6 +537,8 @@ class HttpToolsProtocol(asyncio.Protocol):
             app = service_unavailable
             message = "Exceeded concurrency limit."
             self.logger.warning(message)
+        elif self.admission is not None and not self.admission.admit(self.scope["path"]):
+            app = self.admission.reject
         else:
             app = self.app
 
@@ -488,12 +552,12 @@ class HttpToolsProtocol(asyncio.Protocol):
             expect_100_continue=self.expect_100_continue,
             keep_alive=http_version != "1.0",
             on_response=self.on_response_complete,
+            loop=self.loop,
+            zerocopy=self.zerocopy,
         )
         if existing_cycle is None or existing_cycle.response_complete:
             # Standard case - start processing the request.
-            task = self.loop.create_task(self.cycle.run_asgi(app))
-            task.add_done_callback(self.tasks.discard)
-            self.tasks.add(task)
+            self.start_cycle(self.cycle, app)
         else:
             # Pipelined HTTP requests need to be queued up.
             self.flow.pause_reading()
@@ -531,9 +595,17 @@ class HttpToolsProtocol(asyncio.Protocol):
         # Unblock any pipelined events.
         if self.pipeline:
             cycle, app = self.pipeline.pop()
-            task = self.loop.create_task(cycle.run_asgi(app))
-            task.add_done_callback(self.tasks.discard)
-            self.tasks.add(task)
+            self.start_cycle(cycle, app)
+
+    def start_cycle(self, cycle, app):
+        self.server_state.in_flight += 1
+        task = self.loop.create_task(cycle.run_asgi(app))
+        task.add_done_callback(self.on_cycle_done)
+        self.tasks.add(task)
+
+    def on_cycle_done(self, task):
+        self.tasks.discard(task)
+        self.server_state.in_flight -= 1
 
     def shutdown(self):
         """
@@ -575,6 +647,8 @@ class RequestResponseCycle:
         expect_100_continue,
         keep_alive,
         on_response,
+        loop=None,
+        zerocopy=False,
     ):
         self.scope = scope
         self.transport = transport
@@ -582,6 +656,8 @@ class RequestResponseCycle:
         self.default_headers = default_headers
         self.message_event = message_event
         self.on_response = on_response
+        self.loop = loop or asyncio.get_event_loop()
+        self.zerocopy = zerocopy
 
         # Connection state
         self.disconnected = False
@@ -662,16 +738,17 @@ class RequestResponseCycle:
             status_code = message["status"]
             headers = self.default_headers + list(message.get("headers", []))
 
-            await logger.debug(
-                    '%s - "%s %s HTTP/%s" %d',
-                    get_client_addr(self.scope),
-                    self.scope["method"],
-                    get_path_with_query_string(self.scope),
-                    self.scope["http_version"],
-                    status_code,
-                    status_code=status_code,
-                    headers=self.scope["headers"]
-                )
+            if logger.enabled_for(LoggerLevel.DEBUG):
+                await logger.debug(
+                        '%s - "%s %s HTTP/%s" %d',
+                        get_client_addr(self.scope),
+                        self.scope["method"],
+                        get_path_with_query_string(self.scope),
+                        self.scope["http_version"],
+                        status_code,
+                        status_code=status_code,
+                        headers=self.scope["headers"]
+                    )
 
             # Write response status line and headers
             content = [STATUS_LINE[status_code]]
@@ -702,31 +779,49 @@ class RequestResponseCycle:
 
         elif not self.response_complete:
             # Sending response body
-            if message_type != "http.response.body":
-                msg = "Expected ASGI message 'http.response.body', but got '%s'."
-                raise RuntimeError(msg % message_type)
-
-            body = message.get("body", b"")
-            more_body = message.get("more_body", False)
+            if message_type == "http.response.body":
+                body = message.get("body", b"")
+                more_body = message.get("more_body", False)
 
-            # Write response body
-            if self.scope["method"] == "HEAD":
-                self.expected_content_length = 0
-            elif self.chunked_encoding:
-                if body:
-                    content = [b"%x\r\n" % len(body), body, b"\r\n"]
+                # Write response body
+                if self.scope["method"] == "HEAD":
+                    self.expected_content_length = 0
+                elif self.chunked_encoding:
+                    if body:
+                        content = [b"%x\r\n" % len(body), body, b"\r\n"]
+                    else:
+                        content = []
+                    if not more_body:
+                        content.append(b"0\r\n\r\n")
+                    self.transport.write(b"".join(content))
                 else:
-                    content = []
-                if not more_body:
-                    content.append(b"0\r\n\r\n")
-                self.transport.write(b"".join(content))
+                    num_bytes = len(body)
+                    if num_bytes > self.expected_content_length:
+                        raise RuntimeError("Response content longer than Content-Length")
+                    else:
+                        self.expected_content_length -= num_bytes
+                    self.transport.write(body)
+
+            elif message_type == "http.response.zerocopy":
+                more_body = message.get("more_body", False)
+                file = message["file"]
+                offset = message.get("offset")
+                if offset is None:
+                    offset = file.tell()
+                count = message.get("count")
+                if count is None:
+                    count = os.fstat(file.fileno()).st_size - offset
+                await self.send_file_body(file, offset, count, more_body)
+
+            elif message_type == "http.response.pathsend":
+                more_body = False
+                with open(message["path"], "rb") as file:
+                    count = os.fstat(file.fileno()).st_size
+                    await self.send_file_body(file, 0, count, more_body)
+
             else:
-                num_bytes = len(body)
-                if num_bytes > self.expected_content_length:
-                    raise RuntimeError("Response content longer than Content-Length")
-                else:
-                    self.expected_content_length -= num_bytes
-                self.transport.write(body)
+                msg = "Expected ASGI message 'http.response.body', but got '%s'."
+                raise RuntimeError(msg % message_type)
 
             # Handle response completion
             if not more_body:
@@ -742,6 +837,109 @@ class RequestResponseCycle:
             msg = "Unexpected ASGI message '%s' sent, after response already completed."
             raise RuntimeError(msg % message_type)
 
+    async def send_file_body(self, file, offset, count, more_body):
+        if self.scope["method"] == "HEAD":
+            self.expected_content_length = 0
+            if self.chunked_encoding and not more_body:
+                self.transport.write(b"0\r\n\r\n")
+            return
+
+        if not self.chunked_encoding:
+            if count > self.expected_content_length:
+                raise RuntimeError("Response content longer than Content-Length")
+            self.expected_content_length -= count
+        elif count:
+            self.transport.write(b"%x\r\n" % count)
+
+        if count:
+            if self.zerocopy:
+                sent = await self.sendfile(file, offset, count)
+            else:
+                sent = await self.send_file_chunks(file, offset, count)
+            if sent < count:
+                raise RuntimeError("Response content shorter than Content-Length")
+
+        if self.chunked_encoding:
+            content = [b"\r\n"] if count else []
+            if not more_body:
+                content.append(b"0\r\n\r\n")
+            if content:
+                self.transport.write(b"".join(content))
+
+    async def sendfile(self, file, offset, count):
+        """
+        Zero-copy send with loop.sendfile, or with non-blocking os.sendfile
+        on socket writability on loops without native sendfile (uvloop).
+        A client not taking the file within its deadline is disconnected.
+        """
+        try:
+            return await asyncio.wait_for(
+                self.sendfile_zerocopy(file, offset, count), sendfile_deadline(count)
+            )
+        except asyncio.TimeoutError:
+            self.transport.close()
+            self.disconnected = True
+            return count
+        except ConnectionError:
+            self.disconnected = True
+            return count
+
+    async def sendfile_zerocopy(self, file, offset, count):
+        try:
+            return await self.loop.sendfile(
+                self.transport, file, offset, count, fallback=False
+            )
+        except (NotImplementedError, asyncio.SendfileNotAvailableError):
+            pass
+
+        # the socket is written directly, so everything buffered by the
+        # transport (e.g. the response head) has to be flushed first
+        await self.flow.flush()
+        if self.disconnected:
+            return count
+        # the transport's own descriptor can not be watched by the loop
+        sock_fd = os.dup(self.transport.get_extra_info("socket").fileno())
+        in_fd = file.fileno()
+        sent_total = 0
+        try:
+            while sent_total < count and not self.disconnected:
+                try:
+                    sent = os.sendfile(
+                        sock_fd, in_fd, offset + sent_total,
+                        min(count - sent_total, FILE_CHUNK_MAX),
+                    )
+                except BlockingIOError:
+                    await self.flow.wait_writable(sock_fd)
+                    continue
+                if sent == 0:
+                    break
+                sent_total += sent
+        finally:
+            os.close(sock_fd)
+        if self.disconnected:
+            return count
+        return sent_total
+
+    async def send_file_chunks(self, file, offset, count):
+        fd = file.fileno()
+        chunk_size = FILE_CHUNK_MIN
+        sent = 0
+        while sent < count and not self.disconnected:
+            size = min(chunk_size, count - sent)
+            chunk = await self.loop.run_in_executor(None, os.pread, fd, size, offset + sent)
+            if not chunk:
+                break
+            self.transport.write(chunk)
+            sent += len(chunk)
+            if self.flow.write_paused:
+                chunk_size = max(chunk_size // 2, FILE_CHUNK_MIN)
+                await self.flow.drain()
+            else:
+                chunk_size = min(chunk_size * 2, FILE_CHUNK_MAX)
+        if self.disconnected:
+            return count
+        return sent
+
     async def receive(self):
         if self.waiting_for_100_continue and not self.transport.is_closing():
             self.transport.write(b"HTTP/1.1 100 Continue\r\n\r\n")
@@ -7,21 +7,23 @@ import email
 import email.utils
 import base64
 import time
+import hashlib
+import hmac
 import http.cookies
-import json
+from basepy import jsoncodec
 import typing
 from collections.abc import Mapping
 import asyncio
 
 from .datastructures import URL, FormData, Headers, QueryParams
 from .types import Message, Receive, Scope, Send
-from .errors import HTTPError, BadRequest
+from .errors import HTTPError, BadRequest, RequestEntityTooLarge
 from .utils import cached_property
 from .datastructures import MultiDict, FormsDict, HeaderDict
 from .formparsers import FormParser, MultiPartParser, parse_options_header
 from io import StringIO, BytesIO
 from http.cookies import SimpleCookie
-from .utils import (to_unicode, to_bytes, urlencode, urldecode, urlquote, urljoin, json)
+from .utils import (to_unicode, to_bytes, urlencode, urldecode, urlquote, urljoin)
 
 from .errors import BadRequest
 
@@ -112,6 +114,10 @@ class Request(object):
     #: happened when matching, this will be `None`.
     view_args = None
 
+    #: the largest accepted body in bytes, `None` for no limit.  Set from
+    #: the ``max_body_size`` option of the matched route.
+    max_body_size = None
+
     def __init__(self, scope, receive=empty_receive, send=empty_send, populate_request=True):
         self.scope = scope
         self._receive = receive
@@ -165,11 +171,21 @@ class Request(object):
             raise RuntimeError("Stream consumed")
 
         self._stream_consumed = True
+        limit = self.max_body_size
+        if limit is not None:
+            # refuse a declared oversized body before reading any of it
+            content_length = self.headers.get('content-length', '')
+            if content_length.isdigit() and int(content_length) > limit:
+                raise RequestEntityTooLarge()
+        received = 0
         while True:
             message = await self._receive()
             if message["type"] == "http.request":
                 body = message.get("body", b"")
                 if body:
+                    received += len(body)
+                    if limit is not None and received > limit:
+                        raise RequestEntityTooLarge()
                     yield body
                 if not message.get("more_body", False):
                     break
@@ -186,10 +202,26 @@ class Request(object):
             self._body = b"".join(chunks)
         return self._body
 
+    async def body_hmac(self, key, prefix=b'', digestmod=hashlib.sha256) -> str:
+        """Hex HMAC of ``prefix`` + body, updated while the body chunks
+        arrive.  The body is kept, so `body` and `json` do not read it
+        again.
+        """
+        mac = hmac.new(to_bytes(key), to_bytes(prefix), digestmod)
+        if hasattr(self, "_body"):
+            mac.update(self._body)
+        else:
+            chunks = []
+            async for chunk in self.stream():
+                mac.update(chunk)
+                chunks.append(chunk)
+            self._body = b"".join(chunks)
+        return mac.hexdigest()
+
     async def json(self) -> typing.Any:
         if not hasattr(self, "_json"):
             body = await self.body()
-            self._json = json.loads(body)
+            self._json = jsoncodec.loads(body)
         return self._json
 
     async def form(self) -> FormData:
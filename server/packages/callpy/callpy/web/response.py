@@ -8,11 +8,12 @@ import typing
 import os
 import inspect
 
-from .utils import json, to_bytes, to_unicode, guess_file_mimetype
+from .utils import to_bytes, to_unicode, guess_file_mimetype
 from .datastructures import HeaderProperty, HeaderDict
 from .errors import HTTPError, default_errors
 from .request import parse_date, Request
 from .types import Receive, Scope, Send
+from basepy import jsoncodec
 from http.cookies import SimpleCookie
 from urllib.parse import quote, quote_plus
 
@@ -80,10 +81,7 @@ def jsonify(*args, **kwargs):
 
     """
 
-    indent = None
-    separators = (',', ':')
-    rv = Response(json.dumps(dict(*args, **kwargs), indent=indent, separators=separators),
-        content_type='application/json')
+    rv = Response(jsoncodec.dumpb(dict(*args, **kwargs)), content_type='application/json')
     return rv
 
 def abort(code, *args, **kwargs):
@@ -436,13 +434,53 @@ class StreamingResponse(Response):
     async def __call__(self, send: Send) -> None:
         await run_until_first_complete(
             (self.stream_response, {"send": send}),
-            (self.listen_for_disconnect),
+            (self.listen_for_disconnect, {}),
         )
 
 
 
+def parse_range_header(value, size):
+    """Parse a single ``bytes=`` range against a file of ``size`` bytes.
+
+    Returns ``(start, end)`` (end inclusive), ``None`` when the header should
+    be ignored (malformed or multiple ranges) or ``False`` when the range is
+    not satisfiable.
+    """
+    if not value:
+        return None
+    unit, _, spec = value.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, sep, last = spec.strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else None
+            if start < 0 or (end is not None and end < start):
+                return None
+            if start >= size:
+                return False
+            if end is None or end >= size:
+                end = size - 1
+        else:
+            if not last:
+                return None
+            suffix = int(last)
+            if suffix <= 0:
+                return False
+            start = max(size - suffix, 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if size == 0:
+        return False
+    return start, end
+
+
 class FileResponse(Response):
-    chunk_size = 4096
+    chunk_size = 64 * 1024
 
     def __init__(
         self,
@@ -452,12 +490,17 @@ class FileResponse(Response):
         filename: str = None,
         stat_result: os.stat_result = None,
         method: str = None,
+        request: Request = None,
     ) -> None:
         assert aiofiles is not None, "'aiofiles' must be installed to use FileResponse"
         self.path = path
         self.status_code = status_code
         self.filename = filename
+        self.request = request
+        if method is None and request is not None:
+            method = request.method
         self.send_header_only = method is not None and method.upper() == "HEAD"
+        self.range = None
         more_headers = {}
 
         if 'content-type' not in headers:
@@ -490,6 +533,36 @@ class FileResponse(Response):
         self.headers.setdefault("content-length", content_length)
         self.headers.setdefault("last-modified", last_modified)
         self.headers.setdefault("etag", etag)
+        if self.status_code == 200:
+            self.headers.setdefault("accept-ranges", "bytes")
+            self.set_range_headers(stat_result.st_size)
+
+    def set_range_headers(self, size: int) -> None:
+        """Turn the response into a 206 (or 416) for a ``Range`` request."""
+        if self.request is None:
+            return
+        request_headers = self.request.headers
+        range_header = request_headers.get("range")
+        if not range_header:
+            return
+        if_range = request_headers.get("if-range")
+        if if_range and if_range not in (self.headers.get("etag"), self.headers.get("last-modified")):
+            return
+
+        byte_range = parse_range_header(range_header, size)
+        if byte_range is None:
+            return
+        if byte_range is False:
+            self.status_code = 416
+            self.headers["content-range"] = "bytes */%d" % size
+            self.headers["content-length"] = "0"
+            self.range = (0, -1)
+            return
+        start, end = byte_range
+        self.status_code = 206
+        self.range = byte_range
+        self.headers["content-range"] = "bytes %d-%d/%d" % (start, end, size)
+        self.headers["content-length"] = str(end - start + 1)
 
     async def __call__(self, send: Send) -> None:
         if self.stat_result is None:
@@ -502,6 +575,14 @@ class FileResponse(Response):
                 mode = stat_result.st_mode
                 if not stat.S_ISREG(mode):
                     raise RuntimeError(f"File at path {self.path} is not a file.")
+            size = stat_result.st_size
+        else:
+            size = self.stat_result.st_size
+        if self.range is not None:
+            offset, end = self.range
+            count = end - offset + 1
+        else:
+            offset, count = 0, size
         await send(
             {
                 "type": "http.response.start",
@@ -509,14 +590,28 @@ class FileResponse(Response):
                 "headers": self.raw_headers(),
             }
         )
-        if self.send_header_only:
+        if self.send_header_only or count == 0:
             await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif self.request is not None and "http.response.zerocopy" in self.request.scope.get("extensions", {}):
+            # let the server send the file, with os.sendfile where possible
+            with open(self.path, mode="rb") as file:
+                await send(
+                    {
+                        "type": "http.response.zerocopy",
+                        "file": file,
+                        "offset": offset,
+                        "count": count,
+                        "more_body": False,
+                    }
+                )
         else:
             async with aiofiles.open(self.path, mode="rb") as file:
+                await file.seek(offset)
                 more_body = True
                 while more_body:
-                    chunk = await file.read(self.chunk_size)
-                    more_body = len(chunk) == self.chunk_size
+                    chunk = await file.read(min(self.chunk_size, count))
+                    count -= len(chunk)
+                    more_body = count > 0 and len(chunk) > 0
                     await send(
                         {
                             "type": "http.response.body",
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Per-request timing spans, reported as a ``Server-Timing`` header, a log
+line and statsd timers.
+
+    from callpy.web.timing import RequestTiming, span, timed
+
+    RequestTiming(paths=('/service/',)).install(app)
+
+    @timed('storage.load')
+    async def load_player(...):
+        ...
+
+    with span('render'):
+        ...
+
+Spans are `basepy.timing` spans, so packages below callpy (postmodel)
+record into the same request. Requests that are not timed pay one
+context variable lookup per span.
+"""
+from basepy import timing
+from basepy.timing import span, timed
+from basepy.asynclog import logger
+
+__all__ = ['RequestTiming', 'span', 'timed', 'server_timing']
+
+
+def server_timing(timings, total):
+    """``Server-Timing`` header value of `Timings` and the total seconds."""
+    metrics = []
+    for name, (seconds, count) in timings.spans.items():
+        metric = f'{name};dur={seconds * 1000:.2f}'
+        if count > 1:
+            metric += f';desc="{count}x"'
+        metrics.append(metric)
+    metrics.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(metrics)
+
+
+class RequestTiming:
+    """Time requests with spans.
+
+    Args:
+
+      * paths: path prefixes of the requests to time, None for all.
+      * header: add the ``Server-Timing`` response header.
+      * log: log a ``request timing`` line with the spans.
+      * statsd: an optional `basepy.asyncstatsd.StatsdClient`, receives a
+                ``<prefix>.<span>`` and a ``<prefix>.total`` timer per
+                request.
+    """
+
+    def __init__(self, paths=None, header=True, log=True, statsd=None,
+                 stat_prefix='request.span'):
+        self.paths = tuple(paths) if paths is not None else None
+        self.header = header
+        self.log = log
+        self.statsd = statsd
+        self.stat_prefix = stat_prefix
+
+    def install(self, app):
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        return self
+
+    async def before_request(self, request):
+        if self.paths is None or request.path.startswith(self.paths):
+            timing.start()
+
+    async def after_request(self, request, response):
+        timings = timing.finish()
+        if timings is None:
+            return response
+        total = timings.elapsed()
+        if self.header:
+            response.set_header('Server-Timing', server_timing(timings, total))
+        if self.log:
+            await logger.info('request timing', method=request.method, path=request.path,
+                              status=response.status_code, total_ms=round(total * 1000, 3),
+                              spans=timings.as_dict())
+        if self.statsd is not None:
+            prefix = self.stat_prefix
+            async with self.statsd.pipeline() as pipe:
+                for name, (seconds, _) in timings.spans.items():
+                    await pipe.timing(f'{prefix}.{name}', seconds * 1000)
+                await pipe.timing(f'{prefix}.total', total * 1000)
+        return response
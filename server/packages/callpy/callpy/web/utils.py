@@ -2,7 +2,6 @@
 
 import os
 import sys
-import json
 
 from urllib.parse import urljoin
 from urllib.parse import urlencode, quote as urlquote, unquote as urlunquote
@@ -0,0 +1,84 @@
+"""Request round-trips of a JSON endpoint with each installed json codec.
+
+    python examples/json_bench.py [rounds]
+
+Every round parses a command payload with ``request.json()`` and answers
+with a ``ShowPageCommand`` sized response, through the full ASGI app.
+"""
+import asyncio
+import sys
+import time
+
+from basepy import jsoncodec
+from callpy import CallPy
+from callpy.web.response import Response
+
+
+def make_page(n):
+    return {
+        'type': 'show_page',
+        'page': {
+            'route': '/main',
+            'elements': [
+                {'type': 'card', 'name': f'card_{i}', 'title': f'卡片 {i}',
+                 'style': {'size': 3, 'color': 'primary'}, 'value': i * 1.5,
+                 'actions': [{'type': 'navigate', 'target': f'/item/{i}'}]}
+                for i in range(n)
+            ],
+        },
+    }
+
+
+app = CallPy('json_bench')
+page = make_page(300)
+
+
+@app.route('/main', methods=['POST', 'GET'])
+async def main(request):
+    data = await request.json()
+    return Response(jsoncodec.dumpb({'ok': True, 'data': {'commands': [page], 'echo': data}}),
+                    content_type='application/json')
+
+
+async def round_trip(body):
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+
+    async def receive():
+        return messages.pop(0)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/main', 'root_path': '',
+             'query_string': b'', 'headers': [(b'content-type', b'application/json')]}
+    await app(scope, receive, send)
+    return sent[-1]['body']
+
+
+async def bench(rounds):
+    body = jsoncodec.dumpb({'command': 'page_interact', 'context': make_page(20)})
+    size = len(await round_trip(body))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await round_trip(body)
+    elapsed = time.perf_counter() - start
+    return size, elapsed
+
+
+def main_bench():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for name in jsoncodec.codec_names():
+        try:
+            jsoncodec.use_codec(name)
+        except ImportError:
+            print(f'{name:8} not installed')
+            continue
+        size, elapsed = asyncio.run(bench(rounds))
+        print(f'{name:8} {rounds / elapsed:8.0f} req/s  {elapsed / rounds * 1e6:7.1f} us/req'
+              f'  response {size} bytes')
+
+
+if __name__ == '__main__':
+    main_bench()
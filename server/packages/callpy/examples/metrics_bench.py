@@ -0,0 +1,80 @@
+"""Overhead of request metrics on a small endpoint.
+
+    python examples/metrics_bench.py [rounds]
+
+Runs the same GET round-trips through the full ASGI app without and with
+`RequestMetrics` installed, then times `RequestMetrics.observe` alone and
+a ``/metrics`` render.
+"""
+import asyncio
+import sys
+import time
+
+from basepy.metrics import Registry
+from callpy import CallPy
+from callpy.web.metrics import RequestMetrics
+from callpy.web.response import Response
+
+
+def make_app(registry=None):
+    app = CallPy('metrics_bench')
+
+    @app.route('/service/main')
+    async def main(request):
+        return Response(b'{"ok":true}', content_type='application/json')
+
+    if registry is not None:
+        RequestMetrics(registry=registry).install(app)
+    return app
+
+
+async def round_trip(app, path):
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'root_path': '',
+             'query_string': b'', 'headers': []}
+    await app(scope, receive, send)
+    return sent[-1]['body']
+
+
+async def bench(app, rounds):
+    await round_trip(app, '/service/main')
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await round_trip(app, '/service/main')
+    return time.perf_counter() - start
+
+
+def main_bench():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    registry = Registry()
+    results = {}
+    # alternate to even out warm-up and frequency scaling
+    for _ in range(3):
+        for name, app in (('off', make_app()), ('on', make_app(registry))):
+            elapsed = asyncio.run(bench(app, rounds))
+            results[name] = min(results.get(name, elapsed), elapsed)
+    for name, elapsed in results.items():
+        print(f'metrics {name:3} {rounds / elapsed:8.0f} req/s  {elapsed / rounds * 1e6:6.2f} us/req')
+    overhead = (results['on'] - results['off']) / rounds * 1e6
+    print(f'overhead    {overhead:6.2f} us/req')
+
+    request_metrics = RequestMetrics(registry=Registry())
+    start = time.perf_counter()
+    for _ in range(rounds):
+        request_metrics.observe('main', 200, 0.001)
+    print(f'observe     {(time.perf_counter() - start) / rounds * 1e6:6.2f} us/call')
+
+    start = time.perf_counter()
+    text = registry.render()
+    print(f'render      {(time.perf_counter() - start) * 1e3:6.2f} ms  {len(text)} bytes')
+
+
+if __name__ == '__main__':
+    main_bench()
@@ -6,6 +6,8 @@ from callpy.web import Blueprint, response
 import copy
 import traceback
 import asyncio
+import gc
+import os
 
 
 scope1 = {'client': ('172.29.0.10', 34784),
@@ -362,4 +364,91 @@ async def test_hooks():
     assert before_start_runned
     assert after_start_runned
     assert before_stop_runned
-    assert after_stop_runned
\ No newline at end of file
+    assert after_stop_runned
+
+@pytest.mark.asyncio
+async def test_preload_in_worker():
+    app = CallPy()
+    called = []
+
+    @app.preload
+    async def preload_function():
+        called.append('preload')
+
+    @app.before_start
+    async def before_start_function():
+        called.append('before_start')
+
+    with pytest.raises(Exception):
+        @app.preload
+        def preload_function2():
+            pass
+
+    app.server = FakeServer(app)
+    await app.start_serve()
+    assert called == ['preload', 'before_start']
+
+
+def test_preload_before_fork():
+    app = CallPy()
+    warmed = {}
+    loops = []
+
+    @app.preload
+    async def preload_function():
+        loops.append(asyncio.get_running_loop())
+        warmed['pages'] = ['page'] * 100
+
+    @app.before_start
+    async def before_start_function():
+        loops.append(asyncio.get_running_loop())
+
+    try:
+        app._preload()
+    finally:
+        gc.unfreeze()
+    assert app.preloaded
+    assert loops[0].is_closed()
+
+    app.server = FakeServer(app)
+    pid = os.fork()
+    if pid == 0:
+        # the worker finds the caches warm and runs on a loop of its own
+        try:
+            app._serve_forever()
+            ok = warmed['pages'] and len(loops) == 2 and loops[1] is not loops[0]
+        except BaseException:
+            ok = False
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert len(loops) == 1
+
+
+@pytest.mark.asyncio
+async def test_route_max_body_size():
+    app = CallPy()
+
+    @app.route('/upload', methods=['POST', 'GET'], max_body_size=10)
+    async def upload(request):
+        return str(len(await request.body()))
+
+    async def call(body):
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+
+        async def receive():
+            return messages.pop(0)
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = dict(copy.deepcopy(scope1))
+        scope.update(method='POST', path='/upload', root_path='')
+        await app(scope, receive, send)
+        return sent[0]['status'], sent[-1]['body']
+
+    assert await call(b'x' * 10) == (200, b'10')
+    status, _ = await call(b'x' * 11)
+    assert status == 413
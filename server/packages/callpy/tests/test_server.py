@@ -1,6 +1,7 @@
 import threading
 import time
 import asyncio
+import os
 
 import requests
 from callpy.server import Server
@@ -77,4 +78,249 @@ def test_run_with_shutdown():
 
     server.should_exit = True
     thread.join()
-    assert exc is None
\ No newline at end of file
+    assert exc is None
+
+def test_serve_file_zerocopy(tmp_path):
+    from callpy.web.protocol import FILE_CHUNK_MAX
+
+    path = tmp_path / 'media.bin'
+    data = os.urandom(FILE_CHUNK_MAX * 3 + 123)
+    path.write_bytes(data)
+
+    class App:
+        async def __call__(self, scope, receive, send):
+            assert "http.response.zerocopy" in scope["extensions"]
+            start, end = 0, len(data) - 1
+            status = 200
+            headers = []
+            for name, value in scope["headers"]:
+                if name == b"range":
+                    first, last = value.decode()[6:].split("-")
+                    start, end, status = int(first), int(last), 206
+            if scope["path"] == "/pathsend":
+                await send({"type": "http.response.start", "status": 200,
+                            "headers": [(b"content-length", str(len(data)).encode())]})
+                await send({"type": "http.response.pathsend", "path": str(path)})
+                return
+            if scope["path"] == "/chunked":
+                headers = [(b"transfer-encoding", b"chunked")]
+            else:
+                headers = [(b"content-length", str(end - start + 1).encode())]
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            with open(path, "rb") as f:
+                await send({"type": "http.response.zerocopy", "file": f,
+                            "offset": start, "count": end - start + 1})
+
+    class CustomServer(Server):
+        def install_signal_handlers(self):
+            pass
+
+    for loop in ("asyncio", "uvloop"):
+        server = CustomServer(app=App(), loop=loop, limit_max_requests=4)
+        thread = threading.Thread(target=server.run)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        session = requests.Session()
+        response = session.get("http://127.0.0.1:5000/file")
+        assert response.status_code == 200
+        assert response.content == data
+        response = session.get("http://127.0.0.1:5000/file", headers={"range": "bytes=1000-1999"})
+        assert response.status_code == 206
+        assert response.content == data[1000:2000]
+        response = session.get("http://127.0.0.1:5000/chunked")
+        assert response.content == data
+        response = session.get("http://127.0.0.1:5000/pathsend")
+        assert response.content == data
+        session.close()
+        thread.join()
+
+
+def test_sendfile_slow_client(tmp_path, monkeypatch):
+    import socket
+    from callpy.web import protocol
+
+    # the file must be sent in about half a second
+    monkeypatch.setattr(protocol, "SENDFILE_TIMEOUT", 0.5)
+    monkeypatch.setattr(protocol, "SENDFILE_MIN_RATE", 1024 * 1024 * 1024)
+    path = tmp_path / 'media.bin'
+    data = os.urandom(32 * 1024 * 1024)
+    path.write_bytes(data)
+
+    class App:
+        async def __call__(self, scope, receive, send):
+            if scope["path"] == "/ping":
+                await send({"type": "http.response.start", "status": 200, "headers": []})
+                await send({"type": "http.response.body", "body": b"pong"})
+                return
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-length", str(len(data)).encode())]})
+            await send({"type": "http.response.pathsend", "path": str(path)})
+
+    class CustomServer(Server):
+        def install_signal_handlers(self):
+            pass
+
+    for loop in ("asyncio", "uvloop"):
+        server = CustomServer(app=App(), loop=loop)
+        thread = threading.Thread(target=server.run)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        slow = socket.socket()
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        slow.connect(("127.0.0.1", 5000))
+        slow.sendall(b"GET /media HTTP/1.1\r\nHost: test\r\n\r\n")
+        time.sleep(0.2)
+        # the stalled download does not hold up other requests
+        assert requests.get("http://127.0.0.1:5000/ping", timeout=5).content == b"pong"
+        time.sleep(1)
+        received = b""
+        slow.settimeout(5)
+        while True:
+            chunk = slow.recv(1024 * 1024)
+            if not chunk:
+                break
+            received += chunk
+        slow.close()
+        # disconnected after its deadline, before the whole file
+        assert received.startswith(b"HTTP/1.1 200")
+        assert len(received) < len(data)
+        server.should_exit = True
+        thread.join()
+
+
+def test_flow_control_flush():
+    import socket
+    import uvloop
+    from callpy.web.protocol import FlowControl
+
+    class Writer(asyncio.Protocol):
+        def connection_made(self, transport):
+            self.transport = transport
+            self.flow = FlowControl(transport)
+
+        def pause_writing(self):
+            self.flow.pause_writing()
+
+        def resume_writing(self):
+            self.flow.resume_writing()
+
+    async def flush():
+        loop = asyncio.get_running_loop()
+        ours, theirs = socket.socketpair()
+        theirs.setblocking(False)
+        _, writer = await loop.create_connection(Writer, sock=ours)
+        limits = writer.transport.get_write_buffer_limits()
+        writer.transport.write(b"x" * 8 * 1024 * 1024)
+        assert writer.transport.get_write_buffer_size()
+        task = asyncio.ensure_future(writer.flow.flush())
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        received = 0
+        while not task.done():
+            try:
+                received += len(theirs.recv(1024 * 1024))
+            except BlockingIOError:
+                await asyncio.sleep(0.001)
+        await task
+        assert writer.transport.get_write_buffer_size() == 0
+        assert writer.transport.get_write_buffer_limits() == limits
+        assert not writer.flow.write_paused
+        writer.transport.close()
+        theirs.close()
+
+    asyncio.run(flush())
+    uvloop.run(flush())
+
+
+def test_load_shedding():
+    release = None
+
+    class App:
+        async def __call__(self, scope, receive, send):
+            nonlocal release
+            if scope["path"] == "/slow":
+                release = asyncio.Event()
+                await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok", "more_body": False})
+
+    class CustomServer(Server):
+        def install_signal_handlers(self):
+            pass
+
+    server = CustomServer(
+        app=App(), loop="asyncio", limit_max_requests=4, shed_in_flight=1, shed_retry_after=3,
+        route_priorities=[("/assets/", "low"), ("/service/hola/", "high")],
+    )
+    thread = threading.Thread(target=server.run)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    slow = threading.Thread(target=requests.get, args=("http://127.0.0.1:5000/slow",))
+    slow.start()
+    while server.server_state.in_flight < 1:
+        time.sleep(0.01)
+
+    # one request in flight is the full load for normal priority routes
+    response = requests.get("http://127.0.0.1:5000/assets/app.js")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "3"
+    response = requests.get("http://127.0.0.1:5000/other")
+    assert response.status_code == 503
+    response = requests.get("http://127.0.0.1:5000/service/hola/main")
+    assert response.status_code == 200
+
+    loop = next(iter(server.server_state.tasks)).get_loop()
+    loop.call_soon_threadsafe(release.set)
+    slow.join()
+    thread.join()
+    metrics = server.server_state.metrics()
+    assert metrics["in_flight"] == 0
+    assert metrics["shed"] == {"low": 1, "normal": 1, "high": 0}
+
+
+def test_loop_lag():
+    from callpy.server import TICK_INTERVAL
+    from callpy.web.admission import AdmissionControl
+
+    server = Server(app=None, shed_loop_lag=0.2)
+    state = server.server_state
+    server.measure_loop_lag()
+    server.last_tick -= TICK_INTERVAL + 0.4
+    server.measure_loop_lag()
+    assert 0.19 < state.loop_lag < 0.25
+    assert state.loop_lag_max >= 0.4
+
+    admission = AdmissionControl(state, max_loop_lag=0.2,
+                                 route_priorities=[("/assets/", "low"), ("/service/", "high")])
+    assert not admission.admit("/assets/a.js")
+    assert admission.admit("/service/hola/main")
+    state.loop_lag = 0.05
+    assert admission.admit("/assets/a.js")
+
+
+def test_warm_up_before_ready():
+    events = []
+
+    class App:
+        async def __call__(self, scope, receive, send):
+            events.append(("request", scope["path"], dict(scope["headers"])[b"user-agent"]))
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok", "more_body": False})
+
+    async def ready():
+        events.append(("ready",))
+
+    class CustomServer(Server):
+        def install_signal_handlers(self):
+            pass
+
+    server = CustomServer(
+        app=App(), loop="asyncio", port=5001, limit_max_requests=0,
+        warmup_path="/", callback_ready=ready,
+    )
+    server.run()
+    assert events == [("request", "/", b"callpy-warmup"), ("ready",)]
+    assert server.server_state.total_requests == 0
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import os
+import signal
+import time
+
+import callpy.app
+from callpy import CallPy
+from callpy.supervisor import Supervisor, notify_ready
+from callpy.web.response import Response
+
+
+generation = 0
+
+
+def worker_target():
+    # runs in the forked worker, never returns into pytest
+    try:
+        if generation == 2:
+            os._exit(1)
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+        time.sleep(0.1)
+        notify_ready()
+        while not stopping:
+            time.sleep(0.01)
+    finally:
+        os._exit(0)
+
+
+def make_supervisor(workers=2):
+    sv = Supervisor('test', workers=workers, target=worker_target, ready_timeout=5)
+    sv.WORKERS = {}
+    sv.DRAINING = set()
+    sv.READY = {}
+    return sv
+
+
+def reap_all(sv, timeout=5):
+    limit = time.time() + timeout
+    while sv.DRAINING and time.time() < limit:
+        sv.reap_workers()
+        time.sleep(0.01)
+
+
+def test_rolling_reload():
+    global generation
+    generation = 1
+    sv = make_supervisor()
+    sv.manage_workers()
+    old = set(sv.active_workers())
+    assert len(old) == 2
+    for pid in old:
+        assert sv.wait_ready(pid, 5)
+
+    sv.reload()
+    new = set(sv.active_workers())
+    assert len(new) == 2 and not new & old
+    assert sv.DRAINING == old
+    reap_all(sv)
+    assert not sv.DRAINING
+    assert set(sv.WORKERS) == new
+    assert sv.num_workers == 2
+
+    for pid in new:
+        sv.stop_worker(pid)
+    reap_all(sv)
+    assert not sv.WORKERS
+
+
+def test_rolling_reload_aborted():
+    global generation
+    generation = 1
+    sv = make_supervisor(workers=1)
+    sv.manage_workers()
+    old = sv.active_workers()
+
+    # replacements exit before they get ready, the old worker stays
+    generation = 2
+    sv.reload()
+    reap_all(sv)
+    assert sv.active_workers() == old
+
+    sv.stop_worker(old[0])
+    reap_all(sv)
+    assert not sv.WORKERS
+
+
+def test_app_run_reports_ready(monkeypatch):
+    app = CallPy('ready_test')
+
+    @app.route('/warm')
+    async def warm(request):
+        return Response(b'ok')
+
+    runs = []
+
+    class OneWorkerSupervisor(Supervisor):
+        """Spawns one real worker running ``CallPy._serve_forever`` and
+        waits for its ready byte instead of supervising forever."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            target = self.target
+
+            def worker():
+                try:
+                    target()
+                finally:
+                    os._exit(0)
+            self.target = worker
+            self.WORKERS = {}
+            self.DRAINING = set()
+            self.READY = {}
+
+        def run(self):
+            self.manage_workers()
+            pid = self.active_workers()[0]
+            runs.append((self.ready_timeout, self.wait_ready(pid, 10)))
+            self.stop_worker(pid)
+            reap_all(self, timeout=10)
+
+    monkeypatch.setattr(callpy.app, 'Supervisor', OneWorkerSupervisor)
+    app.run(host='127.0.0.1', port=0, workers=1, ready_timeout=7, warmup_path='/warm')
+    assert runs == [(7, True)]
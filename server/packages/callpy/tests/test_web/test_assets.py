@@ -0,0 +1,115 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from callpy.web.assets import (
+    MANIFEST_NAME, AssetManifest, hashed_path, split_hashed_path,
+    negotiate_encoding, precompress_directory)
+from callpy.web.handlers import StaticHandler
+from callpy.web.request import Request
+
+
+def make_request(path, headers=()):
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'',
+             'root_path': '', 'headers': [(k.encode(), v.encode()) for k, v in headers]}
+    return Request(scope, None)
+
+
+async def get_response(handler, path, headers=()):
+    response = await handler(make_request('/static/' + path, headers), target=path)
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+    await response(send)
+    headers = dict((k.decode().lower(), v.decode()) for k, v in messages[0]['headers'])
+    return messages[0]['status'], headers, b''.join(m.get('body', b'') for m in messages[1:])
+
+
+def test_hashed_path():
+    assert hashed_path('img/logo.png', 'a1b2c3d4e5f6') == 'img/logo.a1b2c3d4e5f6.png'
+    assert hashed_path('LICENSE', 'a1b2c3d4e5f6') == 'LICENSE.a1b2c3d4e5f6'
+    assert split_hashed_path('img/logo.a1b2c3d4e5f6.png') == ('img/logo.png', 'a1b2c3d4e5f6')
+    assert split_hashed_path('LICENSE.a1b2c3d4e5f6') == ('LICENSE', 'a1b2c3d4e5f6')
+    assert split_hashed_path('img/logo.png') is None
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding('gzip, deflate, br', {'br': 1, 'gzip': 2}) == 'br'
+    assert negotiate_encoding('gzip, deflate, br', {'gzip': 2}) == 'gzip'
+    assert negotiate_encoding('br;q=0, gzip;q=0.5', {'br': 1, 'gzip': 2}) == 'gzip'
+    assert negotiate_encoding('*', {'gzip': 2}) == 'gzip'
+    assert negotiate_encoding('identity', {'gzip': 2}) is None
+    assert negotiate_encoding(None, {'gzip': 2}) is None
+
+
+def test_precompress_directory(tmp_path):
+    script = b'function hello() { return "hello"; }\n' * 200
+    (tmp_path / 'js').mkdir()
+    (tmp_path / 'js' / 'app.js').write_bytes(script)
+    (tmp_path / 'small.css').write_bytes(b'body {}')
+    (tmp_path / 'photo.jpg').write_bytes(os.urandom(4096))
+
+    manifest = precompress_directory(str(tmp_path))
+    files = manifest['files']
+    assert set(files) == {'js/app.js', 'small.css', 'photo.jpg'}
+    assert 'gzip' in files['js/app.js']['encodings']
+    assert files['small.css']['encodings'] == {}
+    assert files['photo.jpg']['encodings'] == {}
+    assert gzip.decompress((tmp_path / 'js' / 'app.js.gz').read_bytes()) == script
+    assert json.loads((tmp_path / MANIFEST_NAME).read_text()) == manifest
+
+    # unchanged files keep their variants, changed files get new ones
+    assert precompress_directory(str(tmp_path)) == manifest
+    (tmp_path / 'js' / 'app.js').write_bytes(b'x')
+    files = precompress_directory(str(tmp_path))['files']
+    assert files['js/app.js']['encodings'] == {}
+    assert not (tmp_path / 'js' / 'app.js.gz').exists()
+
+
+@pytest.mark.asyncio
+async def test_static_handler_assets(tmp_path):
+    script = b'console.log("precompressed");\n' * 100
+    (tmp_path / 'app.js').write_bytes(script)
+    (tmp_path / 'plain.txt').write_bytes(b'plain')
+    handler = StaticHandler(str(tmp_path))
+
+    # without a manifest files are served as before
+    status, headers, body = await get_response(handler, 'app.js', [('accept-encoding', 'gzip')])
+    assert status == 200 and body == script
+    assert 'content-encoding' not in headers
+
+    manifest = precompress_directory(str(tmp_path))
+    digest = manifest['files']['app.js']['hash']
+
+    status, headers, body = await get_response(handler, 'app.js', [('accept-encoding', 'gzip, br')])
+    assert status == 200
+    assert headers['content-encoding'] == 'gzip'
+    assert headers['content-type'].startswith('application/javascript') or \
+        headers['content-type'].startswith('text/javascript')
+    assert headers['vary'] == 'Accept-Encoding'
+    assert 'cache-control' not in headers
+    assert gzip.decompress(body) == script
+
+    status, headers, body = await get_response(handler, 'app.js')
+    assert body == script and 'content-encoding' not in headers
+
+    hashed = 'app.%s.js' % digest
+    status, headers, body = await get_response(handler, hashed, [('accept-encoding', 'gzip')])
+    assert status == 200
+    assert headers['cache-control'] == 'public, max-age=31536000, immutable'
+    assert gzip.decompress(body) == script
+
+    # an outdated hash still gets the current content, but not as immutable
+    status, headers, body = await get_response(handler, 'app.000000000000.js')
+    assert status == 200 and body == script
+    assert 'cache-control' not in headers
+
+    status, headers, _ = await get_response(
+        handler, hashed, [('accept-encoding', 'gzip'), ('if-none-match', digest + '-gzip')])
+    assert status == 304
+
+    assert AssetManifest.get(str(tmp_path)).url_path('app.js') == hashed
+    assert AssetManifest.get(str(tmp_path)).url_path('missing.js') == 'missing.js'
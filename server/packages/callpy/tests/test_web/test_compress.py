@@ -0,0 +1,143 @@
+import asyncio
+import gzip
+import json
+import zlib
+
+import pytest
+
+from callpy.app import CallPy
+from callpy.web.compress import Compressor, is_compressible_type
+from callpy.web.response import Response, StreamingResponse
+
+
+def make_scope(path, accept_encoding='gzip, deflate'):
+    headers = [[b'host', b'test.callpy.org']]
+    if accept_encoding is not None:
+        headers.append([b'accept-encoding', accept_encoding.encode()])
+    return {'type': 'http', 'method': 'GET', 'path': path, 'root_path': '',
+            'query_string': b'', 'scheme': 'http', 'headers': headers}
+
+
+def make_receive():
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # the client stays connected until the response is sent
+        await asyncio.Event().wait()
+    return receive
+
+
+async def call(app, path, accept_encoding='gzip, deflate'):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+    await app(make_scope(path, accept_encoding), make_receive(), send)
+    headers = dict((k.decode().lower(), v.decode()) for k, v in messages[0]['headers'])
+    return messages[0]['status'], headers, b''.join(m.get('body', b'') for m in messages[1:])
+
+
+payload = json.dumps({'ok': True, 'data': {'commands': [{'type': 'show_page', 'n': i} for i in range(200)]}})
+
+
+def make_app(**options):
+    app = CallPy(__name__)
+    compressor = Compressor(**options)
+    app.after_request(compressor)
+
+    @app.route('/json')
+    async def json_view(request):
+        return Response(payload, content_type='application/json')
+
+    @app.route('/small')
+    async def small_view(request):
+        return Response('{"ok":true}', content_type='application/json')
+
+    @app.route('/image')
+    async def image_view(request):
+        return Response(b'\x00' * 4096, content_type='image/png')
+
+    @app.route('/stream')
+    async def stream_view(request):
+        async def chunks():
+            for i in range(10):
+                yield 'line %d\n' % i * 50
+        return StreamingResponse(request, chunks(), headers={'content-type': 'text/plain'})
+
+    return app, compressor
+
+
+def test_is_compressible_type():
+    assert is_compressible_type('application/json')
+    assert is_compressible_type('text/html; charset=UTF-8')
+    assert is_compressible_type('application/vnd.api+json')
+    assert not is_compressible_type('image/png')
+
+
+@pytest.mark.asyncio
+async def test_compress_json():
+    app, compressor = make_app()
+    status, headers, body = await call(app, '/json')
+    assert status == 200
+    assert headers['content-encoding'] == 'gzip'
+    assert headers['vary'] == 'Accept-Encoding'
+    assert int(headers['content-length']) == len(body)
+    assert gzip.decompress(body).decode() == payload
+
+    status, headers, body = await call(app, '/json', 'deflate')
+    assert headers['content-encoding'] == 'deflate'
+    assert zlib.decompress(body).decode() == payload
+
+    stats = compressor.stats
+    assert stats.compressed == 2
+    assert stats.bytes_in == 2 * len(payload)
+    assert 0 < stats.ratio < 0.5
+    assert stats.cpu_time >= 0
+
+
+@pytest.mark.asyncio
+async def test_compress_bypass():
+    app, compressor = make_app()
+    status, headers, body = await call(app, '/small')
+    assert 'content-encoding' not in headers and 'vary' not in headers
+    assert body == b'{"ok":true}'
+
+    status, headers, body = await call(app, '/image')
+    assert 'content-encoding' not in headers
+    assert len(body) == 4096
+
+    status, headers, body = await call(app, '/json', None)
+    assert 'content-encoding' not in headers
+    assert headers['vary'] == 'Accept-Encoding'
+    assert body.decode() == payload
+
+    status, headers, body = await call(app, '/json', 'gzip;q=0, identity')
+    assert 'content-encoding' not in headers
+    assert compressor.stats.compressed == 0
+
+
+@pytest.mark.asyncio
+async def test_compress_threshold_and_level():
+    app, _ = make_app(min_size=10 * len(payload))
+    status, headers, body = await call(app, '/json')
+    assert 'content-encoding' not in headers
+
+    fast_app, _ = make_app(level=1)
+    best_app, _ = make_app(level=9)
+    _, _, fast = await call(fast_app, '/json')
+    _, _, best = await call(best_app, '/json')
+    assert gzip.decompress(fast) == gzip.decompress(best) == payload.encode()
+    assert fast != best
+
+
+@pytest.mark.asyncio
+async def test_compress_stream():
+    app, compressor = make_app()
+    status, headers, body = await call(app, '/stream')
+    assert headers['content-encoding'] == 'gzip'
+    assert 'content-length' not in headers
+    expected = ''.join('line %d\n' % i * 50 for i in range(10))
+    assert gzip.decompress(body).decode() == expected
+    assert compressor.stats.bytes_in == len(expected)
@@ -0,0 +1,65 @@
+import pytest
+
+from basepy.metrics import Registry
+from callpy.app import CallPy
+from callpy.web.errors import NotFound
+from callpy.web.metrics import RequestMetrics
+
+
+async def call(app, path):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'root_path': '',
+             'query_string': b'', 'scheme': 'http', 'headers': [[b'host', b'test.callpy.org']]}
+    await app(scope, receive, send)
+    return messages[0]['status'], b''.join(m.get('body', b'') for m in messages[1:])
+
+
+@pytest.mark.asyncio
+async def test_request_metrics():
+    app = CallPy()
+    registry = Registry()
+    RequestMetrics(registry=registry).install(app)
+
+    @app.route('/service/main')
+    async def main(request):
+        return 'ok'
+
+    @app.route('/missing')
+    async def missing(request):
+        raise NotFound()
+
+    for _ in range(3):
+        await call(app, '/service/main')
+    await call(app, '/missing')
+    await call(app, '/nowhere')
+
+    status, body = await call(app, '/metrics')
+    assert status == 200
+    text = body.decode()
+    assert 'callpy_request_seconds_count{endpoint="main"} 3\n' in text
+    assert 'callpy_responses_total{endpoint="main",status="200"} 3\n' in text
+    assert 'callpy_responses_total{endpoint="missing",status="404"} 1\n' in text
+    assert 'callpy_responses_total{endpoint="_unmatched",status="404"} 1\n' in text
+
+
+@pytest.mark.asyncio
+async def test_request_metrics_without_endpoint():
+    app = CallPy()
+    registry = Registry()
+    RequestMetrics(path=None, registry=registry).install(app)
+
+    @app.route('/')
+    async def index(request):
+        return 'ok'
+
+    status, _ = await call(app, '/metrics')
+    assert status == 404
+    await call(app, '/')
+    assert registry.summary('callpy_request_seconds', {'endpoint': 'index'}).count == 1
@@ -1,7 +1,7 @@
 import pytest
 
 from callpy.web.request import (Request, parse_auth, parse_content_type, parse_date, parse_range_header)
-from callpy.web.errors import BadRequest, NotFound, MethodNotAllowed
+from callpy.web.errors import BadRequest, NotFound, MethodNotAllowed, RequestEntityTooLarge
 from callpy.web.datastructures import MultiDict, FormsDict
 from callpy.web.utils import to_bytes, to_unicode
 from io import BytesIO
@@ -10,6 +10,8 @@ import base64
 import copy
 import inspect
 import json
+import hashlib
+import hmac
 
 scope1 = {'client': ('172.29.0.10', 34784),
  'headers': [[b'host', b'test.callpy.org'],
@@ -141,6 +143,49 @@ async def test_request_json():
     assert json_data['hello'] == 'world'
     assert json_data['code'] == 200
 
+def chunked_receive(chunks):
+    messages = [{'type': 'http.request', 'body': chunk, 'more_body': True} for chunk in chunks]
+    messages.append({'type': 'http.request', 'body': b'', 'more_body': False})
+    received = []
+
+    async def receive():
+        message = messages.pop(0)
+        received.append(message)
+        return message
+
+    return receive, received
+
+@pytest.mark.asyncio
+async def test_request_body_hmac():
+    body = json.dumps({'hello': 'world', 'code': 200}).encode()
+    receive, received = chunked_receive([body[:10], body[10:]])
+    req = Request(dict(copy.deepcopy(scope1)), receive=receive)
+    sign = await req.body_hmac('secret', prefix='app1000')
+    assert sign == hmac.new(b'secret', b'app1000' + body, hashlib.sha256).hexdigest()
+    # the body is parsed from the same buffer, not read again
+    assert (await req.json())['code'] == 200
+    assert len(received) == 3
+    assert await req.body_hmac('secret', prefix='app1000') == sign
+
+@pytest.mark.asyncio
+async def test_request_max_body_size():
+    scope = dict(copy.deepcopy(scope1))
+    scope['headers'].append([b'content-length', b'100'])
+    receive, received = chunked_receive([b'x' * 100])
+    req = Request(scope, receive=receive)
+    req.max_body_size = 50
+    with pytest.raises(RequestEntityTooLarge):
+        await req.body()
+    assert not received
+
+    # no content-length: refused at the chunk that crosses the limit
+    receive, received = chunked_receive([b'x' * 40, b'x' * 40, b'x' * 40])
+    req = Request(dict(copy.deepcopy(scope1)), receive=receive)
+    req.max_body_size = 50
+    with pytest.raises(RequestEntityTooLarge):
+        await req.json()
+    assert len(received) == 2
+
 def test_basic_error():
     scope = dict(copy.deepcopy(scope1))
     scope['headers'].append([b'content-length', b'20a'])
@@ -207,3 +207,75 @@ def test_expires_header():
     now2 = datetime.datetime.utcfromtimestamp(
         parse_date(response.headers['Expires']))
     assert 0 == seconds(now, now2)
+
+
+def test_parse_range_header():
+    from callpy.web.response import parse_range_header
+    assert parse_range_header('bytes=0-99', 1000) == (0, 99)
+    assert parse_range_header('bytes=900-', 1000) == (900, 999)
+    assert parse_range_header('bytes=-100', 1000) == (900, 999)
+    assert parse_range_header('bytes=-2000', 1000) == (0, 999)
+    assert parse_range_header('bytes=500-5000', 1000) == (500, 999)
+    assert parse_range_header('bytes=1000-', 1000) is False
+    assert parse_range_header('bytes=0-1,5-9', 1000) is None
+    assert parse_range_header('items=0-1', 1000) is None
+    assert parse_range_header('bytes=9-1', 1000) is None
+    assert parse_range_header('bytes=a-b', 1000) is None
+    assert parse_range_header(None, 1000) is None
+
+
+@pytest.mark.asyncio
+async def test_file_response_range(tmp_path):
+    import os
+    from callpy.web.request import Request
+    from callpy.web.response import FileResponse
+
+    path = tmp_path / 'video.mp4'
+    data = bytes(range(256)) * 100
+    path.write_bytes(data)
+
+    def make_request(headers, extensions=None):
+        scope = {'type': 'http', 'method': 'GET', 'path': '/video.mp4', 'headers': headers,
+                 'query_string': b'', 'root_path': ''}
+        if extensions is not None:
+            scope['extensions'] = extensions
+        return Request(scope, None)
+
+    async def collect(response):
+        messages = []
+        async def send(message):
+            if message['type'] == 'http.response.zerocopy':
+                message = dict(message, body=os.pread(message['file'].fileno(),
+                                                      message['count'], message['offset']))
+            messages.append(message)
+        await response(send)
+        headers = dict((k.decode().lower(), v.decode()) for k, v in messages[0]['headers'])
+        return messages[0]['status'], headers, b''.join(m['body'] for m in messages[1:]), messages
+
+    request = make_request([(b'range', b'bytes=100-199')])
+    response = FileResponse(str(path), stat_result=os.stat(path), request=request)
+    status, headers, body, _ = await collect(response)
+    assert status == 206
+    assert headers['content-range'] == 'bytes 100-199/25600'
+    assert headers['content-length'] == '100'
+    assert body == data[100:200]
+
+    # the server sends the file with the zero-copy extension
+    request = make_request([(b'range', b'bytes=-10')], {'http.response.zerocopy': {}})
+    status, headers, body, messages = await collect(FileResponse(str(path), request=request))
+    assert status == 206
+    assert messages[1]['type'] == 'http.response.zerocopy'
+    assert (messages[1]['offset'], messages[1]['count']) == (25590, 10)
+    assert body == data[-10:]
+
+    request = make_request([(b'range', b'bytes=30000-')])
+    status, headers, body, _ = await collect(FileResponse(str(path), request=request))
+    assert status == 416
+    assert headers['content-range'] == 'bytes */25600'
+    assert body == b''
+
+    request = make_request([(b'range', b'bytes=0-9'), (b'if-range', b'"stale"')])
+    status, headers, body, _ = await collect(FileResponse(str(path), request=request))
+    assert status == 200
+    assert headers['accept-ranges'] == 'bytes'
+    assert body == data
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from basepy import timing
+from callpy.app import CallPy
+from callpy.web.timing import RequestTiming, server_timing, span, timed
+
+
+class FakeStatsd:
+    def __init__(self):
+        self.timings = {}
+
+    def pipeline(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def timing(self, stat, delta, rate=1):
+        self.timings[stat] = delta
+
+
+async def call(app, path):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'root_path': '',
+             'query_string': b'', 'scheme': 'http', 'headers': [[b'host', b'test.callpy.org']]}
+    await app(scope, receive, send)
+    return dict((k.decode().lower(), v.decode()) for k, v in messages[0]['headers'])
+
+
+@pytest.mark.asyncio
+async def test_request_timing():
+    app = CallPy()
+    statsd = FakeStatsd()
+    RequestTiming(paths=('/service/',), log=False, statsd=statsd).install(app)
+
+    @timed('load')
+    async def load():
+        await asyncio.sleep(0.01)
+
+    @app.route('/service/main')
+    async def main(request):
+        await load()
+        for _ in range(3):
+            with span('expr'):
+                pass
+        return 'ok'
+
+    @app.route('/other')
+    async def other(request):
+        with span('expr'):
+            pass
+        return 'ok'
+
+    headers = await call(app, '/service/main')
+    metrics = dict(item.split(';', 1) for item in headers['server-timing'].split(', '))
+    assert list(metrics) == ['load', 'expr', 'total']
+    assert metrics['expr'].endswith(';desc="3x"')
+    assert float(metrics['load'][len('dur='):]) >= 10
+    assert set(statsd.timings) == {'request.span.load', 'request.span.expr', 'request.span.total'}
+    assert timing.current() is None
+
+    headers = await call(app, '/other')
+    assert 'server-timing' not in headers
+
+
+def test_server_timing():
+    timings = timing.Timings()
+    timings.add('db', 0.0125)
+    assert server_timing(timings, 0.02) == 'db;dur=12.50, total;dur=20.00'
@@ -3,6 +3,8 @@ import hashlib
 import os
 import shutil
 from basepy.asynclib.threaded import threaded
+from callpy.web.assets import precompress_directory
+from highorder.base.datafile import index_directory, INDEX_SUFFIX
 import zipfile
 
 
@@ -87,7 +89,9 @@ class FileSystem:
                     for name in files:
                         full = os.path.join(base, name)
                         arc = os.path.relpath(full, build_root)
-                        zf.write(full, arcname=arc)
+                        # indexed datafiles are stored, servers map them as they are
+                        compress_type = zipfile.ZIP_STORED if name.endswith(INDEX_SUFFIX) else None
+                        zf.write(full, arcname=arc, compress_type=compress_type)
 
     @classmethod
     @threaded
@@ -102,6 +106,18 @@ class FileSystem:
                 for m in members:
                     zf.extract(m, dest_root)
 
+    @classmethod
+    @threaded
+    def index_datafiles(cls, folder):
+        # <name>.idx of list datafiles, read record by record by the server
+        return index_directory(folder)
+
+    @classmethod
+    @threaded
+    def precompress_folder(cls, folder):
+        # gzip/brotli variants and the content-hash manifest for StaticHandler
+        return precompress_directory(folder)
+
     @classmethod
     @threaded
     def update_folder_checksum(cls, folder):
@@ -11,9 +11,15 @@ import json
 import hmac
 import hashlib
 import httpx
+from highorder.base.compiler import IncrementalCompiler
+from highorder.base import release
 
 
 class ApplicationStorage:
+    # one incremental compiler per (app_id, hola file), edits are re-parsed
+    # against the last successfully compiled source
+    hola_compilers = {}
+
     @classmethod
     @threaded
     def load_app_configs(cls, app_id, name):
@@ -47,6 +53,14 @@ class ApplicationStorage:
             f.write(code)
 
 
+    @classmethod
+    def compile_app_hola(cls, app_id, name, code):
+        key = (app_id, name)
+        compiler = cls.hola_compilers.get(key)
+        if compiler is None:
+            compiler = cls.hola_compilers[key] = IncrementalCompiler()
+        return compiler.compile(code)
+
     @classmethod
     @threaded
     def load_app_hola(cls, app_id, name):
@@ -311,6 +325,9 @@ class ApplicationDB():
     async def save_hola_code(self, code, name="main.hola"):
         await ApplicationStorage.write_app_hola(self.app_id, name, code)
 
+    def compile_hola_code(self, code, name="main.hola"):
+        return ApplicationStorage.compile_app_hola(self.app_id, name, code)
+
     # --- Publish helpers and operations ---
     def next_major_version(self, version):
         major, minor = version.split('.') if version else ('0', '0')
@@ -403,6 +420,7 @@ class ApplicationDB():
         await self._write_all_app_configs(package_data)
 
         build_root = ApplicationFolder.get_app_build_root(self.app_id)
+        await FileSystem.index_datafiles(os.path.join(build_root, 'datafile'))
         # core zip
         target_path = os.path.join(get_publish_package_root(self.app_id), f'APP_{self.app_id}_{app_version}_core.zip')
         await FileSystem.zip_folder_to(build_root, target_path=target_path, subfolders=['app', 'datafile'])
@@ -453,6 +471,7 @@ class ApplicationDB():
         # apply content
         content_file = os.path.join(get_publish_package_root(self.app_id), f'APP_{self.app_id}_{version}_content.zip')
         await FileSystem.unzip_to(content_file, get_publish_content_root(self.app_id), subfolder='content')
+        await FileSystem.precompress_folder(get_publish_content_root(self.app_id))
 
         # copy core to release root
         core_file = os.path.join(get_publish_package_root(self.app_id), f'APP_{self.app_id}_{version}_core.zip')
@@ -481,6 +500,7 @@ class ApplicationDB():
         state.previous_version = previous_version
         state.current_version = version
         state.save()
+        await release.publish(self.app_id)
 
     async def publish_building(self):
         package_data = await self.get_package_data()
@@ -493,6 +513,7 @@ class ApplicationDB():
 
         await self._write_all_app_configs(package_data)
 
+        await FileSystem.index_datafiles(os.path.join(ApplicationFolder.get_app_build_root(self.app_id), 'datafile'))
         # core zip to release root
         target_path = os.path.join(get_publish_release_root(self.app_id), f'APP_{self.app_id}_{version}.zip')
         await FileSystem.zip_folder_to(ApplicationFolder.get_app_build_root(self.app_id), target_path=target_path, subfolders=['app', 'datafile'])
@@ -501,6 +522,7 @@ class ApplicationDB():
         content_folder = os.path.join(ApplicationFolder.get_app_build_root(self.app_id), 'content')
         await FileSystem.update_folder_checksum(content_folder)
         await FileSystem.copy_dir_to(ApplicationFolder.get_app_build_root(self.app_id), get_publish_content_root(self.app_id), subfolder='content')
+        await FileSystem.precompress_folder(get_publish_content_root(self.app_id))
 
         await self.update_publish_state(version)
 
@@ -8,7 +8,6 @@ from highorder_editor.base.helpers import get_readable_date, get_readable_filesi
 import json
 import datetime
 import os
-from highorder.base.compiler import Compiler
 import asyncio
 from urllib.parse import urlparse
 
@@ -791,8 +790,7 @@ class ApplicationHolaEditorView:
             new_code = q.events.hola_editor['codechange']
             if new_code:
                 try:
-                    c = Compiler()
-                    json_obj = c.compile(new_code)
+                    json_obj = app.compile_hola_code(new_code)
                     await app.save_hola_code(new_code)
                     await app.save_hola_json(json_obj)
                 except Exception as ex:
@@ -1138,8 +1136,7 @@ class ApplicationSetupView:
             new_code = q.events.hola_editor['codechange']
             if new_code:
                 try:
-                    c = Compiler()
-                    json_obj = c.compile(new_code)
+                    app.compile_hola_code(new_code, name='setup.hola')
                     setup_svc = await self.load_setup_service()
                     await setup_svc.save_setup_hola(new_code)
                 except Exception as ex:
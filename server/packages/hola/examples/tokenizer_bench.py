@@ -0,0 +1,39 @@
+"""Tokenizer throughput on a large .hola source.
+
+    python examples/tokenizer_bench.py [units]
+
+Tokenizes ``units`` copies (2000 by default) of a page with strings,
+comments, colors, numbers and expressions, and reports MB/s.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from hola.tokenizer import Tokenizer
+
+UNIT = '''Page {
+    title: "标题 {{ user.name }}"
+    // comment
+    color: #ff00aa
+    items: [1, 2.5, 3_000, true, null]
+    Button { text: "go", visible: {{ count >= 10 && flag || !x }} }
+}
+'''
+
+
+def main_bench():
+    units = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = UNIT * units
+    size = len(source.encode('utf-8'))
+    elapsed = None
+    for _ in range(3):
+        start = time.perf_counter()
+        tokens = Tokenizer(source).tokenize()
+        elapsed = min(elapsed or float('inf'), time.perf_counter() - start)
+    print(f'tokenize {size / 1e6:.2f} MB, {len(tokens)} tokens: {size / elapsed / 1e6:.2f} MB/s')
+
+
+if __name__ == '__main__':
+    main_bench()
@@ -0,0 +1,65 @@
+"""Compiled expressions against a new VM per evaluation.
+
+    python examples/vm_bench.py [rounds]
+
+Evaluates a mixed logical, arithmetic and call expression over 20
+contexts, once with a VM built for every context and once with one VM
+reusing the compiled closures.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from hola.parser import Parser
+from hola.tokenizer import Tokenizer
+from hola.vm import VM
+
+SOURCE = '{{ user.level > 10 && len(items) + user.score * 2 >= min(a, b) || user.name == "tom" }}'
+
+
+def get_expression(source):
+    tokens = Tokenizer(f'Object {{ value: {source} }}').tokenize()
+    ast = Parser(tokens).parse()
+    return ast.objects[0].properties['value'].value
+
+
+def bench_fresh(expr, contexts, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for context in contexts:
+            VM(dict(context)).evaluate(expr)
+    return time.perf_counter() - start
+
+
+def bench_compiled(expr, contexts, rounds):
+    vm = VM()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for context in contexts:
+            vm.evaluate(expr, context)
+    return time.perf_counter() - start
+
+
+def main_bench():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    expr = get_expression(SOURCE)
+    contexts = [
+        {'user': {'level': i, 'score': i * 3, 'name': 'tom'}, 'items': [1, 2, 3], 'a': i, 'b': 7}
+        for i in range(20)
+    ]
+    evaluations = rounds * len(contexts)
+    results = {}
+    # alternate to even out warm-up and frequency scaling
+    for _ in range(3):
+        for name, bench in (('fresh', bench_fresh), ('compiled', bench_compiled)):
+            elapsed = bench(expr, contexts, rounds)
+            results[name] = min(results.get(name, elapsed), elapsed)
+    for name, elapsed in results.items():
+        print(f'{name:8} {elapsed:8.4f}s  {elapsed / evaluations * 1e6:6.2f} us/eval')
+    print(f'speedup  {results["fresh"] / results["compiled"]:6.1f}x')
+
+
+if __name__ == '__main__':
+    main_bench()
@@ -2,8 +2,9 @@
 Hola词法分析器
 """
 
+import re
+from bisect import bisect_right
 from enum import Enum, auto
-from dataclasses import dataclass
 from typing import List, Optional, Iterator
 from .error import TokenizeError, ErrorPosition
 
@@ -59,15 +60,76 @@ class TokenKind(Enum):
     Unknown = auto()
 
 
-@dataclass
+class LineIndex:
+    """源代码行索引, 首次查询位置时才计算各行起始偏移"""
+
+    __slots__ = ('source', '_starts')
+
+    def __init__(self, source: str):
+        self.source = source
+        self._starts: Optional[List[int]] = None
+
+    def position(self, index: int) -> tuple:
+        """返回偏移对应的(行, 列), 均从1开始"""
+        starts = self._starts
+        if starts is None:
+            starts = [0]
+            find = self.source.find
+            pos = find('\n')
+            while pos >= 0:
+                starts.append(pos + 1)
+                pos = find('\n', pos + 1)
+            self._starts = starts
+        line = bisect_right(starts, index)
+        return line, index - starts[line - 1] + 1
+
+
 class Token:
-    """Token数据结构"""
-    kind: TokenKind
-    value: str
-    line: int
-    column: int
-    index: int
-    
+    """Token数据结构
+
+    只记录起始偏移, 行列号在首次访问时通过LineIndex计算。
+    """
+
+    __slots__ = ('kind', 'value', 'index', '_line', '_column', '_lines')
+
+    def __init__(self, kind: TokenKind, value: str, line: int = None, column: int = None,
+                 index: int = 0, lines: LineIndex = None):
+        self.kind = kind
+        self.value = value
+        self.index = index
+        self._line = line
+        self._column = column
+        self._lines = lines
+
+    def _resolve_position(self):
+        if self._lines is None:
+            self._line, self._column = 0, 0
+        else:
+            self._line, self._column = self._lines.position(self.index)
+
+    @property
+    def line(self) -> int:
+        if self._line is None:
+            self._resolve_position()
+        return self._line
+
+    @property
+    def column(self) -> int:
+        if self._column is None:
+            self._resolve_position()
+        return self._column
+
+    def __eq__(self, other):
+        if not isinstance(other, Token):
+            return NotImplemented
+        return (self.kind == other.kind and self.value == other.value
+                and self.index == other.index and self.line == other.line
+                and self.column == other.column)
+
+    def __repr__(self) -> str:
+        return (f"Token(kind={self.kind!r}, value={self.value!r}, line={self.line}, "
+                f"column={self.column}, index={self.index})")
+
     def __str__(self) -> str:
         return f"Token({self.kind.name}, {repr(self.value)}, line={self.line}, col={self.column})"
     
@@ -82,366 +144,282 @@ class TokenizerState(Enum):
     InExpression = auto()
 
 
+# 扫描表: 每种状态一个主正则, 前缀跳过空白(不包括换行), 按分组名分派
+_DEFAULT_PATTERN = re.compile(r"""
+    [^\S\n]*
+    (?:
+        (?P<name>[A-Za-z_]\w*)
+      | (?P<open_expr>\{\{)
+      | (?P<punct>[{}\[\]:,\n.])
+      | (?P<quote>["'])
+      | //(?P<line_comment>[^\n]*)
+      | /\*(?P<block_comment>[\s\S]*?)(?:\*/|\Z)
+      | (?P<slash>/)
+      | (?P<color>\#[0-9a-fA-F]*)
+      | (?P<number>[0-9][0-9_]*(?:\.[0-9_]*)?)
+      | (?P<other>[\s\S])
+      | (?P<eof>\Z)
+    )
+""", re.VERBOSE)
+
+_EXPRESSION_PATTERN = re.compile(r"""
+    [^\S\n]*
+    (?:
+        (?P<name>[A-Za-z_]\w*)
+      | (?P<close_expr>\}\})
+      | (?P<operator>==|!=|>=|<=|&&|\|\||[}+\-*/()\[\],.=!><])
+      | (?P<quote>["'])
+      | (?P<color>\#[0-9a-fA-F]*)
+      | (?P<number>[0-9][0-9_]*(?:\.[0-9_]*)?)
+      | (?P<other>[\s\S])
+      | (?P<eof>\Z)
+    )
+""", re.VERBOSE)
+
+_PUNCTUATION_KINDS = {
+    '{': TokenKind.LBrace,
+    '}': TokenKind.RBrace,
+    '[': TokenKind.LBracket,
+    ']': TokenKind.RBracket,
+    ':': TokenKind.Colon,
+    ',': TokenKind.Comma,
+    '\n': TokenKind.LineBreak,
+    '.': TokenKind.Dot,
+}
+
+_OPERATOR_KINDS = {
+    '}': TokenKind.RBrace,
+    '+': TokenKind.Plus,
+    '-': TokenKind.Minus,
+    '*': TokenKind.Star,
+    '/': TokenKind.Slash,
+    '(': TokenKind.LParen,
+    ')': TokenKind.RParen,
+    '[': TokenKind.LBracket,
+    ']': TokenKind.RBracket,
+    ',': TokenKind.Comma,
+    '.': TokenKind.Dot,
+    '=': TokenKind.Equal,
+    '!': TokenKind.Bang,
+    '>': TokenKind.Greater,
+    '<': TokenKind.Less,
+    '==': TokenKind.EqualEqual,
+    '!=': TokenKind.BangEqual,
+    '>=': TokenKind.GreaterEqual,
+    '<=': TokenKind.LessEqual,
+    '&&': TokenKind.AndAnd,
+    '||': TokenKind.OrOr,
+}
+
+_KEYWORD_KINDS = {
+    'true': TokenKind.BoolLiteral,
+    'false': TokenKind.BoolLiteral,
+    'null': TokenKind.NullLiteral,
+}
+
+_STRING_BODY = {
+    '"': re.compile(r'(?:[^"\\]|\\[\s\S])*'),
+    "'": re.compile(r"(?:[^'\\]|\\[\s\S])*"),
+}
+
+_ESCAPE_PATTERN = re.compile(r'\\([\s\S])')
+
+_ESCAPE_MAP = {
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+    'v': '\v',
+    'b': '\b',
+    'f': '\f',
+    'a': '\a',
+    '\\': '\\',
+    '"': '"',
+    "'": "'",
+}
+
+
+def _unescape(match) -> str:
+    ch = match.group(1)
+    return _ESCAPE_MAP.get(ch, ch)
+
+
 class Tokenizer:
-    """Hola词法分析器"""
+    """Hola词法分析器
+
+    基于扫描表(每种状态一个主正则)逐个匹配token, 只跟踪字符偏移,
+    行列号由LineIndex按需计算。
+    """
     
     def __init__(self, source: str):
         self.source = source
-        self.chars = iter(source)
         self.state = TokenizerState.Default
-        self._peek: Optional[str] = None
-        
-        # 位置跟踪
-        self.line = 1
-        self.column = 1
         self.index = 0
+        self.lines = LineIndex(source)
+
+    @property
+    def line(self) -> int:
+        return self.lines.position(self.index)[0]
+
+    @property
+    def column(self) -> int:
+        return self.lines.position(self.index)[1]
     
     def tokenize(self) -> List[Token]:
-        """将源代码转换为token列表"""
+        """将源代码转换为token列表
+
+        标识符和标点这类高频token在循环内直接构造, 其余交给_scan处理。
+        """
         tokens = []
+        append = tokens.append
+        source = self.source
+        lines = self.lines
+        scan = self._scan
+        keywords = _KEYWORD_KINDS
+        property_name = TokenKind.PropertyName
+        identifier = TokenKind.Identifier
+        eof = TokenKind.Eof
         while True:
-            token = self.next_token()
-            tokens.append(token)
-            if token.kind == TokenKind.Eof:
-                break
+            in_expression = self.state is TokenizerState.InExpression
+            if in_expression:
+                m = _EXPRESSION_PATTERN.match(source, self.index)
+                simple_kinds = _OPERATOR_KINDS
+                simple_group = 'operator'
+            else:
+                m = _DEFAULT_PATTERN.match(source, self.index)
+                simple_kinds = _PUNCTUATION_KINDS
+                simple_group = 'punct'
+            group = m.lastgroup
+            if group == 'name':
+                self.index = m.end()
+                value = m.group(group)
+                kind = keywords.get(value)
+                if kind is None:
+                    kind = property_name if not in_expression and value[0].islower() else identifier
+                append(Token(kind, value, None, None, m.start(group), lines))
+            elif group == simple_group:
+                self.index = m.end()
+                value = m.group(group)
+                append(Token(simple_kinds[value], value, None, None, m.start(group), lines))
+            else:
+                token = scan(m, group, in_expression)
+                append(token)
+                if token.kind is eof:
+                    break
         return tokens
     
     def next_token(self) -> Token:
         """获取下一个token"""
-        if self.state == TokenizerState.Default:
-            return self._next_default()
-        else:
-            return self._next_expression()
-    
-    def _next_default(self) -> Token:
-        """默认模式下的token生成"""
-        self._skip_whitespace()
-        
-        start_line = self.line
-        start_column = self.column
-        start_index = self.index
-        
-        ch = self._advance()
-        
-        if ch is None:
-            return Token(TokenKind.Eof, "", start_line, start_column, start_index)
-        
-        match ch:
-            case '{':
-                if self._peek_char() == '{':
-                    self._advance()
-                    self.state = TokenizerState.InExpression
-                    return Token(TokenKind.LBraceLBrace, "{{", start_line, start_column, start_index)
-                return Token(TokenKind.LBrace, "{", start_line, start_column, start_index)
-            
-            case '}':
-                return Token(TokenKind.RBrace, "}", start_line, start_column, start_index)
-            
-            case '[':
-                return Token(TokenKind.LBracket, "[", start_line, start_column, start_index)
-            
-            case ']':
-                return Token(TokenKind.RBracket, "]", start_line, start_column, start_index)
-            
-            case ':':
-                return Token(TokenKind.Colon, ":", start_line, start_column, start_index)
-            
-            case ',':
-                return Token(TokenKind.Comma, ",", start_line, start_column, start_index)
-            
-            case '\n':
-                return Token(TokenKind.LineBreak, "\n", start_line, start_column, start_index)
-            
-            case '.':
-                return Token(TokenKind.Dot, ".", start_line, start_column, start_index)
-            
-            case '/':
-                if self._peek_char() == '/':
-                    return self._read_line_comment(start_line, start_column, start_index)
-                elif self._peek_char() == '*':
-                    return self._read_block_comment(start_line, start_column, start_index)
-                return Token(TokenKind.Slash, "/", start_line, start_column, start_index)
-            
-            case '#':
-                return self._read_color(start_line, start_column, start_index)
-            
-            case '"' | "'":
-                return self._read_string(ch, start_line, start_column, start_index)
-            
-            case _:
-                if ch.isalpha() or ch == '_':
-                    return self._read_identifier(ch, start_line, start_column, start_index)
-                elif ch.isdigit():
-                    return self._read_number(ch, start_line, start_column, start_index)
-                else:
-                    return Token(TokenKind.Unknown, ch, start_line, start_column, start_index)
-    
-    def _next_expression(self) -> Token:
-        """表达式模式下的token生成"""
-        self._skip_whitespace()
-        
-        start_line = self.line
-        start_column = self.column
-        start_index = self.index
-        
-        ch = self._advance()
-        
-        if ch is None:
-            return Token(TokenKind.Eof, "", start_line, start_column, start_index)
-        
-        match ch:
-            case '}':
-                if self._peek_char() == '}':
-                    self._advance()
-                    self.state = TokenizerState.Default
-                    return Token(TokenKind.RBraceRBrace, "}}", start_line, start_column, start_index)
-                return Token(TokenKind.RBrace, "}", start_line, start_column, start_index)
-            
-            case '+':
-                return Token(TokenKind.Plus, "+", start_line, start_column, start_index)
-            
-            case '-':
-                return Token(TokenKind.Minus, "-", start_line, start_column, start_index)
-            
-            case '*':
-                return Token(TokenKind.Star, "*", start_line, start_column, start_index)
-            
-            case '/':
-                return Token(TokenKind.Slash, "/", start_line, start_column, start_index)
-            
-            case '(':
-                return Token(TokenKind.LParen, "(", start_line, start_column, start_index)
-            
-            case ')':
-                return Token(TokenKind.RParen, ")", start_line, start_column, start_index)
-            
-            case '[':
-                return Token(TokenKind.LBracket, "[", start_line, start_column, start_index)
-            
-            case ']':
-                return Token(TokenKind.RBracket, "]", start_line, start_column, start_index)
-            
-            case ',':
-                return Token(TokenKind.Comma, ",", start_line, start_column, start_index)
-            
-            case '.':
-                return Token(TokenKind.Dot, ".", start_line, start_column, start_index)
-            
-            case '=':
-                if self._peek_char() == '=':
-                    self._advance()
-                    return Token(TokenKind.EqualEqual, "==", start_line, start_column, start_index)
-                return Token(TokenKind.Equal, "=", start_line, start_column, start_index)
-            
-            case '!':
-                if self._peek_char() == '=':
-                    self._advance()
-                    return Token(TokenKind.BangEqual, "!=", start_line, start_column, start_index)
-                return Token(TokenKind.Bang, "!", start_line, start_column, start_index)
-            
-            case '>':
-                if self._peek_char() == '=':
-                    self._advance()
-                    return Token(TokenKind.GreaterEqual, ">=", start_line, start_column, start_index)
-                return Token(TokenKind.Greater, ">", start_line, start_column, start_index)
-            
-            case '<':
-                if self._peek_char() == '=':
-                    self._advance()
-                    return Token(TokenKind.LessEqual, "<=", start_line, start_column, start_index)
-                return Token(TokenKind.Less, "<", start_line, start_column, start_index)
-            
-            case '&':
-                if self._peek_char() == '&':
-                    self._advance()
-                    return Token(TokenKind.AndAnd, "&&", start_line, start_column, start_index)
-                return Token(TokenKind.Unknown, "&", start_line, start_column, start_index)
-            
-            case '|':
-                if self._peek_char() == '|':
-                    self._advance()
-                    return Token(TokenKind.OrOr, "||", start_line, start_column, start_index)
-                return Token(TokenKind.Unknown, "|", start_line, start_column, start_index)
-            
-            case '#':
-                return self._read_color(start_line, start_column, start_index)
-            
-            case '"' | "'":
-                return self._read_string(ch, start_line, start_column, start_index)
-            
-            case _:
-                if ch.isalpha() or ch == '_':
-                    return self._read_identifier(ch, start_line, start_column, start_index)
-                elif ch.isdigit():
-                    return self._read_number(ch, start_line, start_column, start_index)
+        in_expression = self.state is TokenizerState.InExpression
+        pattern = _EXPRESSION_PATTERN if in_expression else _DEFAULT_PATTERN
+        m = pattern.match(self.source, self.index)
+        return self._scan(m, m.lastgroup, in_expression)
+
+    def _scan(self, m, group: str, in_expression: bool) -> Token:
+        """根据主正则匹配到的分组生成token"""
+        start = m.start(group)
+        self.index = m.end()
+        lines = self.lines
+
+        if group == 'name':
+            value = m.group(group)
+            kind = _KEYWORD_KINDS.get(value)
+            if kind is None:
+                if not in_expression and value[0].islower():
+                    kind = TokenKind.PropertyName
                 else:
-                    return Token(TokenKind.Unknown, ch, start_line, start_column, start_index)
-    
-    def _skip_whitespace(self):
-        """跳过空白字符（不包括换行）"""
-        while True:
-            ch = self._peek_char()
-            if ch and ch.isspace() and ch != '\n':
-                self._advance()
-            else:
-                break
-    
-    def _read_string(self, quote: str, start_line: int, start_column: int, start_index: int) -> Token:
-        """读取字符串字面量"""
-        value = []
-        while True:
-            ch = self._advance()
-            if ch is None:
-                break
-            
-            if ch == quote:
-                return Token(TokenKind.StringLiteral, ''.join(value), start_line, start_column, start_index)
-            
-            if ch == '\\':
-                ch = self._advance()
-                if ch is None:
-                    break
-                
-                # 处理转义序列
-                escape_map = {
-                    'n': '\n',
-                    'r': '\r',
-                    't': '\t',
-                    'v': '\v',
-                    'b': '\b',
-                    'f': '\f',
-                    'a': '\a',
-                    '\\': '\\',
-                    '"': '"',
-                    "'": "'",
-                }
-                value.append(escape_map.get(ch, ch))
-            else:
-                value.append(ch)
-        
-        return Token(TokenKind.Unknown, ''.join(value), start_line, start_column, start_index)
-    
-    def _read_identifier(self, first: str, start_line: int, start_column: int, start_index: int) -> Token:
-        """读取标识符"""
-        value = [first]
-        while True:
-            ch = self._peek_char()
-            if ch and (ch.isalnum() or ch == '_'):
-                value.append(self._advance())
-            else:
-                break
-        
-        value_str = ''.join(value)
-        
-        # 判断token类型
-        if value_str in ('true', 'false'):
-            return Token(TokenKind.BoolLiteral, value_str, start_line, start_column, start_index)
-        elif value_str == 'null':
-            return Token(TokenKind.NullLiteral, value_str, start_line, start_column, start_index)
-        elif self.state == TokenizerState.Default and first.islower():
-            return Token(TokenKind.PropertyName, value_str, start_line, start_column, start_index)
-        else:
-            return Token(TokenKind.Identifier, value_str, start_line, start_column, start_index)
-    
-    def _read_number(self, first: str, start_line: int, start_column: int, start_index: int) -> Token:
-        """读取数字字面量"""
-        value = [first]
-        has_dot = False
-        
-        while True:
-            ch = self._peek_char()
-            if ch and (ch.isdigit() or ch == '_' or ch == '.'):
+                    kind = TokenKind.Identifier
+            return Token(kind, value, None, None, start, lines)
+
+        if group == 'punct':
+            value = m.group(group)
+            return Token(_PUNCTUATION_KINDS[value], value, None, None, start, lines)
+
+        if group == 'operator':
+            value = m.group(group)
+            return Token(_OPERATOR_KINDS[value], value, None, None, start, lines)
+
+        if group == 'quote':
+            return self._read_string(m.group(group), start)
+
+        if group == 'number':
+            return self._read_number(m.group(group), start)
+
+        if group == 'open_expr':
+            self.state = TokenizerState.InExpression
+            return Token(TokenKind.LBraceLBrace, "{{", None, None, start, lines)
+
+        if group == 'close_expr':
+            self.state = TokenizerState.Default
+            return Token(TokenKind.RBraceRBrace, "}}", None, None, start, lines)
+
+        if group == 'line_comment' or group == 'block_comment':
+            # 注释token从"//"或"/*"处开始
+            return Token(TokenKind.Comment, m.group(group), None, None, start - 2, lines)
+
+        if group == 'slash':
+            return Token(TokenKind.Slash, "/", None, None, start, lines)
+
+        if group == 'color':
+            value = m.group(group)
+            kind = TokenKind.ColorLiteral if len(value) - 1 in (3, 4, 6, 8) else TokenKind.Unknown
+            return Token(kind, value, None, None, start, lines)
+
+        if group == 'other':
+            ch = m.group(group)
+            if ch.isalpha():
+                # 非ASCII字母开头的标识符
+                return self._read_identifier(ch, start)
+            if ch.isdigit():
+                return self._read_number(ch, start)
+            return Token(TokenKind.Unknown, ch, None, None, start, lines)
+
+        # eof
+        return Token(TokenKind.Eof, "", None, None, start, lines)
+
+    def _read_string(self, quote: str, start: int) -> Token:
+        """读取字符串字面量, 未闭合时返回Unknown"""
+        source = self.source
+        m = _STRING_BODY[quote].match(source, start + 1)
+        raw = m.group()
+        end = m.end()
+        if '\\' in raw:
+            raw = _ESCAPE_PATTERN.sub(_unescape, raw)
+        if end < len(source) and source[end] == quote:
+            self.index = end + 1
+            return Token(TokenKind.StringLiteral, raw, None, None, start, self.lines)
+        self.index = len(source)
+        return Token(TokenKind.Unknown, raw, None, None, start, self.lines)
+
+    def _read_identifier(self, first: str, start: int) -> Token:
+        """读取以非ASCII字母开头的标识符"""
+        source = self.source
+        index = start + 1
+        length = len(source)
+        while index < length and (source[index].isalnum() or source[index] == '_'):
+            index += 1
+        self.index = index
+        value = source[start:index]
+        kind = TokenKind.Identifier
+        if self.state is TokenizerState.Default and first.islower():
+            kind = TokenKind.PropertyName
+        return Token(kind, value, None, None, start, self.lines)
+
+    def _read_number(self, text: str, start: int) -> Token:
+        """读取数字字面量, 非ASCII数字字符按str.isdigit逐个读取"""
+        source = self.source
+        index = start + len(text)
+        length = len(source)
+        if (index < length and ord(source[index]) > 127) or not text.isascii():
+            has_dot = '.' in text
+            while index < length:
+                ch = source[index]
                 if ch == '.':
                     if has_dot:
                         break
                     has_dot = True
-                if ch != '_':
-                    value.append(self._advance())
-                else:
-                    self._advance()
-            else:
-                break
-        
-        value_str = ''.join(value)
-        return Token(TokenKind.NumberLiteral, value_str, start_line, start_column, start_index)
-    
-    def _read_line_comment(self, start_line: int, start_column: int, start_index: int) -> Token:
-        """读取单行注释"""
-        self._advance()  # 消费第二个'/'
-        value = []
-        while True:
-            ch = self._peek_char()
-            if ch and ch != '\n':
-                value.append(self._advance())
-            else:
-                break
-        return Token(TokenKind.Comment, ''.join(value), start_line, start_column, start_index)
-    
-    def _read_block_comment(self, start_line: int, start_column: int, start_index: int) -> Token:
-        """读取块注释"""
-        self._advance()  # 消费'*'
-        value = []
-        
-        while True:
-            ch = self._advance()
-            if ch is None:
-                break
-            
-            if ch == '*' and self._peek_char() == '/':
-                self._advance()  # 消费'/'
-                break
-            
-            value.append(ch)
-        
-        return Token(TokenKind.Comment, ''.join(value), start_line, start_column, start_index)
-    
-    def _read_color(self, start_line: int, start_column: int, start_index: int) -> Token:
-        """读取颜色字面量"""
-        value = ['#']
-        
-        while True:
-            ch = self._peek_char()
-            if ch and ch.lower() in '0123456789abcdef':
-                value.append(self._advance())
-            else:
-                break
-        
-        value_str = ''.join(value)
-        hex_len = len(value_str) - 1  # 减去'#'
-        
-        # 有效的十六进制颜色长度: 3, 4, 6, 8
-        if hex_len in (3, 4, 6, 8):
-            return Token(TokenKind.ColorLiteral, value_str, start_line, start_column, start_index)
-        
-        return Token(TokenKind.Unknown, value_str, start_line, start_column, start_index)
-    
-    def _advance(self) -> Optional[str]:
-        """前进一个字符"""
-        if self._peek is not None:
-            ch = self._peek
-            self._peek = None
-        else:
-            try:
-                ch = next(self.chars)
-            except StopIteration:
-                return None
-        
-        if ch == '\n':
-            self.line += 1
-            self.column = 1
-        else:
-            self.column += 1
-        
-        self.index += 1
-        return ch
-    
-    def _peek_char(self) -> Optional[str]:
-        """查看下一个字符但不消费"""
-        if self._peek is not None:
-            return self._peek
-        
-        try:
-            self._peek = next(self.chars)
-            return self._peek
-        except StopIteration:
-            return None
+                elif not (ch.isdigit() or ch == '_'):
+                    break
+                index += 1
+            text = source[start:index]
+        self.index = index
+        return Token(TokenKind.NumberLiteral, text.replace('_', ''), None, None, start, self.lines)
@@ -2,6 +2,7 @@
 Hola虚拟机 - 表达式求值
 """
 
+import operator
 from typing import Any, Dict, Callable, List
 from .ast import (
     Expr, BinaryExpr, LogicalExpr, UnaryExpr, VariableExpr,
@@ -60,298 +61,403 @@ class VMValue:
         return f"VMValue({self.type}: {repr(self.value)})"
 
 
+def _type_name(value: Any) -> str:
+    """返回值的VM类型名, 与VMValue.type一致"""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, list):
+        return 'list'
+    if isinstance(value, dict):
+        return 'object'
+    if callable(value):
+        return 'function'
+    return 'unknown'
+
+
+def _is_number(value: Any) -> bool:
+    """判断值是否为int或float(不含bool)"""
+    cls = value.__class__
+    if cls is int or cls is float:
+        return True
+    if cls is bool:
+        return False
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_truthy(value: Any) -> bool:
+    """判断值是否为真, 与VMValue.is_truthy一致"""
+    if value is None:
+        return False
+    if isinstance(value, (bool, int, float, str, list, dict)):
+        return bool(value)
+    return True
+
+
+# ========== 内置函数 ==========
+
+def _builtin_len(obj: Any) -> int:
+    """内置函数: len"""
+    if isinstance(obj, (str, list, dict)):
+        return len(obj)
+    else:
+        raise RuntimeError(f"Object of type {type(obj).__name__} has no len()")
+
+
+def _builtin_min(*args: int | float) -> int | float:
+    """内置函数: min"""
+    if len(args) == 0:
+        raise RuntimeError("min() requires at least one argument")
+    return min(args)
+
+
+def _builtin_max(*args: int | float) -> int | float:
+    """内置函数: max"""
+    if len(args) == 0:
+        raise RuntimeError("max() requires at least one argument")
+    return max(args)
+
+
+BUILTINS: Dict[str, Callable] = {
+    'len': _builtin_len,
+    'abs': abs,
+    'min': _builtin_min,
+    'max': _builtin_max,
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+}
+
+
+def _add(left: Any, right: Any) -> Any:
+    if _is_number(left) and _is_number(right):
+        return left + right
+    if isinstance(left, str) and isinstance(right, str):
+        return left + right
+    raise RuntimeError(f"Cannot add {_type_name(left)} and {_type_name(right)}")
+
+
+def _subtract(left: Any, right: Any) -> Any:
+    if _is_number(left) and _is_number(right):
+        return left - right
+    raise RuntimeError(f"Cannot subtract {_type_name(right)} from {_type_name(left)}")
+
+
+def _multiply(left: Any, right: Any) -> Any:
+    if _is_number(left) and _is_number(right):
+        return left * right
+    raise RuntimeError(f"Cannot multiply {_type_name(left)} and {_type_name(right)}")
+
+
+def _divide(left: Any, right: Any) -> Any:
+    if _is_number(left) and _is_number(right):
+        if right == 0:
+            raise RuntimeError("Division by zero")
+        return left / right
+    raise RuntimeError(f"Cannot divide {_type_name(left)} by {_type_name(right)}")
+
+
+def _comparison(compare: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    def compare_numbers(left: Any, right: Any) -> bool:
+        if _is_number(left) and _is_number(right):
+            return compare(left, right)
+        raise RuntimeError(f"Cannot compare {_type_name(left)} and {_type_name(right)}")
+    return compare_numbers
+
+
+BINARY_OPERATIONS: Dict[BinaryOperator, Callable[[Any, Any], Any]] = {
+    BinaryOperator.Add: _add,
+    BinaryOperator.Subtract: _subtract,
+    BinaryOperator.Multiply: _multiply,
+    BinaryOperator.Divide: _divide,
+    BinaryOperator.Equal: operator.eq,
+    BinaryOperator.NotEqual: operator.ne,
+    BinaryOperator.Less: _comparison(operator.lt),
+    BinaryOperator.LessEqual: _comparison(operator.le),
+    BinaryOperator.Greater: _comparison(operator.gt),
+    BinaryOperator.GreaterEqual: _comparison(operator.ge),
+}
+
+
+def _negate(value: Any) -> Any:
+    if _is_number(value):
+        return -value
+    raise RuntimeError(f"Cannot negate {_type_name(value)}")
+
+
+def _get_property(value: Any, name: str) -> Any:
+    if isinstance(value, dict):
+        if name in value:
+            return value[name]
+        raise RuntimeError(f"Property '{name}' not found on object")
+    if name == 'length' and isinstance(value, (list, str)):
+        return len(value)
+    raise RuntimeError(f"Cannot access property '{name}' on {_type_name(value)}")
+
+
+class Constant:
+    """编译期常量, 调用时直接返回值"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __call__(self, context: Dict[str, Any]) -> Any:
+        return self.value
+
+
+CompiledExpr = Callable[[Dict[str, Any]], Any]
+
+
 class VM:
-    """Hola虚拟机"""
-    
+    """Hola虚拟机
+
+    表达式先编译为嵌套的Python闭包(常量折叠, 变量路径预先展开),
+    编译结果按表达式缓存, 同一个VM可以在不同上下文中重复求值。
+    """
+
+    builtins = BUILTINS
+
     def __init__(self, context: Dict[str, Any] = None):
         """
         初始化VM
-        
+
         Args:
-            context: 变量上下文
+            context: 默认变量上下文
         """
         self.context = context or {}
-        self._add_builtins()
-    
-    def _add_builtins(self):
-        """添加内置函数"""
-        self.context.update({
-            'len': self._builtin_len,
-            'abs': self._builtin_abs,
-            'min': self._builtin_min,
-            'max': self._builtin_max,
-            'str': self._builtin_str,
-            'int': self._builtin_int,
-            'float': self._builtin_float,
-            'bool': self._builtin_bool,
-        })
-    
-    def evaluate(self, expr: Expr) -> Any:
+        self._compiled: Dict[int, tuple] = {}
+
+    def evaluate(self, expr: Expr, context: Dict[str, Any] = None) -> Any:
         """
         求值表达式
-        
+
         Args:
             expr: 表达式AST节点
-            
+            context: 变量上下文, 为空时使用VM的默认上下文
+
         Returns:
             求值结果
         """
-        result = self._eval_expr(expr)
-        return result.value if isinstance(result, VMValue) else result
-    
-    def _eval_expr(self, expr: Expr) -> VMValue:
-        """求值表达式并返回VMValue"""
+        return self.compile(expr)(self.context if context is None else context)
+
+    def compile(self, expr: Expr) -> CompiledExpr:
+        """
+        编译表达式为可调用对象, 结果按表达式缓存
+
+        Args:
+            expr: 表达式AST节点
+
+        Returns:
+            接收上下文并返回求值结果的函数
+        """
+        cached = self._compiled.get(id(expr))
+        if cached is not None and cached[0] is expr:
+            return cached[1]
+        compiled = self._compile_expr(expr)
+        self._compiled[id(expr)] = (expr, compiled)
+        return compiled
+
+    def _compile_expr(self, expr: Expr) -> CompiledExpr:
+        """编译表达式"""
         match expr:
             case BinaryExpr(left, op, right):
-                return self._eval_binary(left, op, right)
-            
+                return self._compile_binary(left, op, right)
+
             case LogicalExpr(left, op, right):
-                return self._eval_logical(left, op, right)
-            
+                return self._compile_logical(left, op, right)
+
             case UnaryExpr(op, operand):
-                return self._eval_unary(op, operand)
-            
+                return self._compile_unary(op, operand)
+
             case VariableExpr(name):
-                return self._eval_variable(name)
-            
+                return self._compile_variable(name, ())
+
             case CallExpr(callee, arguments):
-                return self._eval_call(callee, arguments)
-            
+                return self._compile_call(callee, arguments)
+
             case GetExpr(object, name):
-                return self._eval_get(object, name)
-            
+                return self._compile_get(object, name)
+
             case LiteralExpr(value):
-                return self._eval_literal(value)
-            
+                return self._compile_literal(value)
+
             case GroupingExpr(expression):
-                return self._eval_expr(expression)
-            
+                return self._compile_expr(expression)
+
             case ListExpr(elements):
-                return self._eval_list(elements)
-            
+                return self._compile_list(elements)
+
             case ListGetExpr(list, index):
-                return self._eval_list_get(list, index)
-            
+                return self._compile_list_get(list, index)
+
             case _:
                 raise RuntimeError(f"Unknown expression type: {type(expr)}")
-    
-    def _eval_binary(self, left: Expr, op: BinaryOperator, right: Expr) -> VMValue:
-        """求值二元表达式"""
-        left_val = self._eval_expr(left)
-        right_val = self._eval_expr(right)
-        
-        match op:
-            case BinaryOperator.Add:
-                if left_val.type in ('int', 'float') and right_val.type in ('int', 'float'):
-                    result = left_val.value + right_val.value
-                    return VMValue(result)
-                elif left_val.type == 'string' and right_val.type == 'string':
-                    return VMValue(left_val.value + right_val.value)
-                else:
-                    raise RuntimeError(f"Cannot add {left_val.type} and {right_val.type}")
-            
-            case BinaryOperator.Subtract:
-                if left_val.type in ('int', 'float') and right_val.type in ('int', 'float'):
-                    return VMValue(left_val.value - right_val.value)
-                else:
-                    raise RuntimeError(f"Cannot subtract {right_val.type} from {left_val.type}")
-            
-            case BinaryOperator.Multiply:
-                if left_val.type in ('int', 'float') and right_val.type in ('int', 'float'):
-                    return VMValue(left_val.value * right_val.value)
-                else:
-                    raise RuntimeError(f"Cannot multiply {left_val.type} and {right_val.type}")
-            
-            case BinaryOperator.Divide:
-                if left_val.type in ('int', 'float') and right_val.type in ('int', 'float'):
-                    if right_val.value == 0:
-                        raise RuntimeError("Division by zero")
-                    return VMValue(left_val.value / right_val.value)
-                else:
-                    raise RuntimeError(f"Cannot divide {left_val.type} by {right_val.type}")
-            
-            case BinaryOperator.Equal:
-                return VMValue(left_val.value == right_val.value)
-            
-            case BinaryOperator.NotEqual:
-                return VMValue(left_val.value != right_val.value)
-            
-            case BinaryOperator.Less:
-                if left_val.type in ('int', 'float') and right_val.type in ('int', 'float'):
-                    return VMValue(left_val.value < right_val.value)
-                else:
-                    raise RuntimeError(f"Cannot compare {left_val.type} and {right_val.type}")
-            
-            case BinaryOperator.LessEqual:
-                if left_val.type in ('int', 'float') and right_val.type in ('int', 'float'):
-                    return VMValue(left_val.value <= right_val.value)
-                else:
-                    raise RuntimeError(f"Cannot compare {left_val.type} and {right_val.type}")
-            
-            case BinaryOperator.Greater:
-                if left_val.type in ('int', 'float') and right_val.type in ('int', 'float'):
-                    return VMValue(left_val.value > right_val.value)
-                else:
-                    raise RuntimeError(f"Cannot compare {left_val.type} and {right_val.type}")
-            
-            case BinaryOperator.GreaterEqual:
-                if left_val.type in ('int', 'float') and right_val.type in ('int', 'float'):
-                    return VMValue(left_val.value >= right_val.value)
-                else:
-                    raise RuntimeError(f"Cannot compare {left_val.type} and {right_val.type}")
-    
-    def _eval_logical(self, left: Expr, op: LogicalOperator, right: Expr) -> VMValue:
-        """求值逻辑表达式"""
-        left_val = self._eval_expr(left)
-        
-        match op:
-            case LogicalOperator.And:
-                # 短路求值
-                if not left_val.is_truthy():
-                    return left_val
-                return self._eval_expr(right)
-            
-            case LogicalOperator.Or:
-                # 短路求值
-                if left_val.is_truthy():
-                    return left_val
-                return self._eval_expr(right)
-    
-    def _eval_unary(self, op: UnaryOperator, operand: Expr) -> VMValue:
-        """求值一元表达式"""
-        val = self._eval_expr(operand)
-        
-        match op:
-            case UnaryOperator.Not:
-                return VMValue(not val.is_truthy())
-            
-            case UnaryOperator.Negate:
-                if val.type in ('int', 'float'):
-                    return VMValue(-val.value)
-                else:
-                    raise RuntimeError(f"Cannot negate {val.type}")
-    
-    def _eval_variable(self, name: str) -> VMValue:
-        """求值变量"""
-        if name in self.context:
-            value = self.context[name]
-            return VMValue(value)
+
+    def _compile_binary(self, left: Expr, op: BinaryOperator, right: Expr) -> CompiledExpr:
+        """编译二元表达式"""
+        left_fn = self._compile_expr(left)
+        right_fn = self._compile_expr(right)
+        operation = BINARY_OPERATIONS[op]
+
+        if isinstance(left_fn, Constant) and isinstance(right_fn, Constant):
+            try:
+                return Constant(operation(left_fn.value, right_fn.value))
+            except Exception:
+                # 保留到求值时再报错
+                pass
+
+        def binary(context):
+            return operation(left_fn(context), right_fn(context))
+        return binary
+
+    def _compile_logical(self, left: Expr, op: LogicalOperator, right: Expr) -> CompiledExpr:
+        """编译逻辑表达式(短路求值)"""
+        left_fn = self._compile_expr(left)
+        right_fn = self._compile_expr(right)
+
+        if op == LogicalOperator.And:
+            if isinstance(left_fn, Constant):
+                return right_fn if _is_truthy(left_fn.value) else left_fn
+
+            def logical_and(context):
+                value = left_fn(context)
+                if not _is_truthy(value):
+                    return value
+                return right_fn(context)
+            return logical_and
+
+        if isinstance(left_fn, Constant):
+            return left_fn if _is_truthy(left_fn.value) else right_fn
+
+        def logical_or(context):
+            value = left_fn(context)
+            if _is_truthy(value):
+                return value
+            return right_fn(context)
+        return logical_or
+
+    def _compile_unary(self, op: UnaryOperator, operand: Expr) -> CompiledExpr:
+        """编译一元表达式"""
+        operand_fn = self._compile_expr(operand)
+
+        if op == UnaryOperator.Not:
+            if isinstance(operand_fn, Constant):
+                return Constant(not _is_truthy(operand_fn.value))
+            return lambda context: not _is_truthy(operand_fn(context))
+
+        if isinstance(operand_fn, Constant) and _is_number(operand_fn.value):
+            return Constant(-operand_fn.value)
+        return lambda context: _negate(operand_fn(context))
+
+    def _compile_variable(self, name: str, path: tuple) -> CompiledExpr:
+        """编译变量及其成员访问路径, 如 a.b.c"""
+        builtin = self.builtins.get(name)
+        if builtin is not None:
+            root = Constant(builtin)
         else:
-            raise RuntimeError(f"Undefined variable: {name}")
-    
-    def _eval_call(self, callee: Expr, arguments: List[Expr]) -> VMValue:
-        """求值函数调用"""
-        # 求值被调用对象
-        callee_val = self._eval_expr(callee)
-        
-        # 求值参数
-        args = [self._eval_expr(arg).value for arg in arguments]
-        
-        # 调用函数
-        if callable(callee_val.value):
+            def root(context):
+                if name in context:
+                    return context[name]
+                raise RuntimeError(f"Undefined variable: {name}")
+
+        if not path:
+            return root
+        if len(path) == 1:
+            prop = path[0]
+
+            def get_one(context):
+                value = root(context)
+                if value.__class__ is dict and prop in value:
+                    return value[prop]
+                return _get_property(value, prop)
+            return get_one
+
+        def get_path(context):
+            value = root(context)
+            for prop in path:
+                if value.__class__ is dict and prop in value:
+                    value = value[prop]
+                else:
+                    value = _get_property(value, prop)
+            return value
+        return get_path
+
+    def _compile_call(self, callee: Expr, arguments: List[Expr]) -> CompiledExpr:
+        """编译函数调用"""
+        callee_fn = self._compile_expr(callee)
+        arg_fns = [self._compile_expr(arg) for arg in arguments]
+
+        def call(context):
+            func = callee_fn(context)
+            args = [arg(context) for arg in arg_fns]
+            if not callable(func):
+                raise RuntimeError(f"{func} is not callable")
             try:
-                result = callee_val.value(*args)
-                return VMValue(result)
+                return func(*args)
             except Exception as e:
                 raise RuntimeError(f"Function call failed: {e}")
-        else:
-            raise RuntimeError(f"{callee_val.value} is not callable")
-    
-    def _eval_get(self, object: Expr, name: str) -> VMValue:
-        """求值成员访问"""
-        obj_val = self._eval_expr(object)
-        
-        if obj_val.type == 'object':
-            if name in obj_val.value:
-                return VMValue(obj_val.value[name])
-            else:
-                raise RuntimeError(f"Property '{name}' not found on object")
-        elif obj_val.type == 'list' and name == 'length':
-            return VMValue(len(obj_val.value))
-        elif obj_val.type == 'string' and name == 'length':
-            return VMValue(len(obj_val.value))
-        else:
-            raise RuntimeError(f"Cannot access property '{name}' on {obj_val.type}")
-    
-    def _eval_literal(self, literal: LiteralKind) -> VMValue:
-        """求值字面量"""
+        return call
+
+    def _compile_get(self, object: Expr, name: str) -> CompiledExpr:
+        """编译成员访问"""
+        path = [name]
+        while isinstance(object, GetExpr):
+            path.append(object.name)
+            object = object.object
+        if isinstance(object, VariableExpr):
+            return self._compile_variable(object.name, tuple(reversed(path)))
+
+        object_fn = self._compile_expr(object)
+        path = tuple(reversed(path))
+
+        def get(context):
+            value = object_fn(context)
+            for prop in path:
+                value = _get_property(value, prop)
+            return value
+        return get
+
+    def _compile_literal(self, literal: LiteralKind) -> CompiledExpr:
+        """编译字面量"""
         match literal.type:
-            case 'string':
-                return VMValue(literal.value)
+            case 'string' | 'bool' | 'color':
+                return Constant(literal.value)
             case 'number':
-                if literal.value.is_int:
-                    return VMValue(literal.value.value)
-                else:
-                    return VMValue(literal.value.value)
-            case 'bool':
-                return VMValue(literal.value)
+                return Constant(literal.value.value)
             case 'null':
-                return VMValue(None)
-            case 'color':
-                return VMValue(literal.value)
+                return Constant(None)
             case _:
                 raise RuntimeError(f"Unknown literal type: {literal.type}")
-    
-    def _eval_list(self, elements: List[Expr]) -> VMValue:
-        """求值列表"""
-        values = [self._eval_expr(elem).value for elem in elements]
-        return VMValue(values)
-    
-    def _eval_list_get(self, list_expr: Expr, index_expr: Expr) -> VMValue:
-        """求值列表索引"""
-        list_val = self._eval_expr(list_expr)
-        index_val = self._eval_expr(index_expr)
-        
-        if list_val.type != 'list':
-            raise RuntimeError(f"Cannot index {list_val.type}")
-        
-        if index_val.type not in ('int', 'float'):
-            raise RuntimeError(f"List index must be number, got {index_val.type}")
-        
-        index = int(index_val.value)
-        
-        if index < 0 or index >= len(list_val.value):
-            raise RuntimeError(f"List index out of range: {index}")
-        
-        return VMValue(list_val.value[index])
-    
-    # ========== 内置函数 ==========
-    
-    def _builtin_len(self, obj: Any) -> int:
-        """内置函数: len"""
-        if isinstance(obj, (str, list, dict)):
-            return len(obj)
-        else:
-            raise RuntimeError(f"Object of type {type(obj).__name__} has no len()")
-    
-    def _builtin_abs(self, x: int | float) -> int | float:
-        """内置函数: abs"""
-        return abs(x)
-    
-    def _builtin_min(self, *args: int | float) -> int | float:
-        """内置函数: min"""
-        if len(args) == 0:
-            raise RuntimeError("min() requires at least one argument")
-        return min(args)
-    
-    def _builtin_max(self, *args: int | float) -> int | float:
-        """内置函数: max"""
-        if len(args) == 0:
-            raise RuntimeError("max() requires at least one argument")
-        return max(args)
-    
-    def _builtin_str(self, x: Any) -> str:
-        """内置函数: str"""
-        return str(x)
-    
-    def _builtin_int(self, x: Any) -> int:
-        """内置函数: int"""
-        return int(x)
-    
-    def _builtin_float(self, x: Any) -> float:
-        """内置函数: float"""
-        return float(x)
-    
-    def _builtin_bool(self, x: Any) -> bool:
-        """内置函数: bool"""
-        return bool(x)
+
+    def _compile_list(self, elements: List[Expr]) -> CompiledExpr:
+        """编译列表"""
+        element_fns = [self._compile_expr(elem) for elem in elements]
+        return lambda context: [elem(context) for elem in element_fns]
+
+    def _compile_list_get(self, list_expr: Expr, index_expr: Expr) -> CompiledExpr:
+        """编译列表索引"""
+        list_fn = self._compile_expr(list_expr)
+        index_fn = self._compile_expr(index_expr)
+
+        def list_get(context):
+            values = list_fn(context)
+            index = index_fn(context)
+            if not isinstance(values, list):
+                raise RuntimeError(f"Cannot index {_type_name(values)}")
+            if not _is_number(index):
+                raise RuntimeError(f"List index must be number, got {_type_name(index)}")
+            index = int(index)
+            if index < 0 or index >= len(values):
+                raise RuntimeError(f"List index out of range: {index}")
+            return values[index]
+        return list_get
@@ -256,3 +256,41 @@ class TestTokenizer(unittest.TestCase):
         
         assert len(tokens) == 1
         assert tokens[0].kind == TokenKind.Eof
+
+    def test_multiline_positions(self):
+        """测试多行源代码的位置信息(按偏移延迟计算)"""
+        source = 'Page {\n  title: "a\\nb"\n  // note\n  count: {{ n + 1 }}\n}'
+        tokens = Tokenizer(source).tokenize()
+        
+        by_value = {(t.kind, t.value): t for t in tokens}
+        title = by_value[(TokenKind.PropertyName, 'title')]
+        assert (title.line, title.column, title.index) == (2, 3, 9)
+        comment = by_value[(TokenKind.Comment, ' note')]
+        assert (comment.line, comment.column) == (3, 3)
+        plus = by_value[(TokenKind.Plus, '+')]
+        assert (plus.line, plus.column) == (4, 15)
+        assert tokens[-1].kind == TokenKind.Eof
+        assert (tokens[-1].line, tokens[-1].column) == (5, 2)
+    
+    def test_unterminated_string(self):
+        """测试未闭合的字符串"""
+        tokens = Tokenizer('title: "abc').tokenize()
+        
+        assert tokens[2].kind == TokenKind.Unknown
+        assert tokens[2].value == 'abc'
+        assert tokens[3].kind == TokenKind.Eof
+    
+    def test_large_source(self):
+        """测试大文件词法分析"""
+        unit = '''Page {
+    title: "标题 {{ user.name }}"
+    // comment
+    color: #ff00aa
+    items: [1, 2.5, 3_000, true, null]
+    Button { text: "go", visible: {{ count >= 10 && flag || !x }} }
+}
+'''
+        unit_tokens = len(Tokenizer(unit).tokenize()) - 1
+        tokens = Tokenizer(unit * 2000).tokenize()
+        assert len(tokens) == unit_tokens * 2000 + 1
+        assert tokens[-1].kind == TokenKind.Eof
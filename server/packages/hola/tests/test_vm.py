@@ -13,7 +13,8 @@ sys.path.insert(0, src_dir)
 from hola.tokenizer import Tokenizer
 from hola.parser import Parser
 from hola.vm import VM
-from hola.hola_ast import LiteralKind, NumberValue
+from hola.error import RuntimeError as HolaRuntimeError
+from hola.ast import LiteralKind, NumberValue
 
 
 class TestVM(unittest.TestCase):
@@ -342,3 +343,39 @@ class TestVM(unittest.TestCase):
         vm = VM({'items': [1, 2, 3]})
         result = vm.evaluate(expr)
         assert result == 4
+
+    def test_reuse_across_contexts(self):
+        """测试同一VM在不同上下文中求值"""
+        expr = self._get_expression('{{ user.level * 2 + bonus }}')
+        vm = VM()
+        assert vm.evaluate(expr, {'user': {'level': 3}, 'bonus': 1}) == 7
+        assert vm.evaluate(expr, {'user': {'level': 5}, 'bonus': 0}) == 10
+        assert vm.compile(expr) is vm.compile(expr)
+
+    def test_constant_folding(self):
+        """测试常量折叠"""
+        expr = self._get_expression('{{ (2 + 3) * 4 }}')
+        compiled = VM().compile(expr)
+        assert compiled.value == 20
+
+    def test_constant_folding_keeps_runtime_error(self):
+        """测试常量折叠不提前抛出错误"""
+        expr = self._get_expression('{{ false && 1 / 0 }}')
+        assert VM().evaluate(expr) is False
+        expr = self._get_expression('{{ 1 / 0 }}')
+        with self.assertRaises(HolaRuntimeError):
+            VM().evaluate(expr)
+
+    def test_compiled_reused_across_contexts(self):
+        """测试编译一次多次求值与每次新建VM结果一致"""
+        expr = self._get_expression(
+            '{{ user.level > 10 && len(items) + user.score * 2 >= min(a, b) || user.name == "tom" }}'
+        )
+        contexts = [
+            {'user': {'level': i, 'score': i * 3, 'name': name}, 'items': [1, 2, 3], 'a': i, 'b': 7}
+            for i in range(20) for name in ('tom', 'ann')
+        ]
+        vm = VM()
+        for context in contexts:
+            assert vm.evaluate(expr, context) == VM(dict(context)).evaluate(expr)
+
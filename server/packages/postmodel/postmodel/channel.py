@@ -0,0 +1,125 @@
+import asyncio
+import inspect
+from typing import Callable, Optional
+
+from basepy.asynclog import logger
+from postmodel.main import Postmodel
+
+
+class NotifyChannel:
+    """
+    A Postgres LISTEN/NOTIFY channel between processes sharing a database.
+
+    While started, a process listens on one pool connection. A payload
+    published by any process is delivered to the subscribers of all of
+    them, the publisher included. A lost connection is replaced, tried
+    every ``reconnect_interval`` seconds; notifications sent meanwhile are
+    lost, so the ``on_reconnect`` callbacks are called to let subscribers
+    catch up::
+
+        releases = NotifyChannel('releases')
+        releases.subscribe(on_release)
+        await releases.start()
+        await releases.publish(app_id)
+
+    Callbacks take the payload (``on_reconnect`` ones nothing) and may be
+    async. `publish` notifies the other processes even when this one is
+    not listening, `deliver` calls the local subscribers only.
+    """
+
+    def __init__(self, channel: str, db_name: Optional[str] = None,
+                 reconnect_interval: float = 5):
+        self.channel = channel
+        self.db_name = db_name
+        self.reconnect_interval = reconnect_interval
+        self._subscribers = []
+        self._reconnect_callbacks = []
+        self._connection = None
+        self._task = None
+        # running async callbacks, referenced until done
+        self._pending = set()
+
+    @property
+    def listening(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    def subscribe(self, callback: Callable) -> None:
+        self._subscribers.append(callback)
+
+    def on_reconnect(self, callback: Callable) -> None:
+        self._reconnect_callbacks.append(callback)
+
+    async def start(self) -> None:
+        """Listen, a first connection failing is raised."""
+        if self._task is not None:
+            return
+        await self._listen()
+        self._task = asyncio.ensure_future(self._keep_listening())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self._unlisten()
+
+    async def publish(self, payload: str = '') -> None:
+        db = Postmodel.get_database(self.db_name)
+        await db.notify(self.channel, payload)
+
+    def deliver(self, payload: str = '') -> None:
+        """Call the subscribers of this process only, as a notification
+        would."""
+        self._on_notification(None, None, self.channel, payload)
+
+    async def _listen(self):
+        db = Postmodel.get_database(self.db_name)
+        self._connection = await db.listen(self.channel, self._on_notification)
+
+    async def _unlisten(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            db = Postmodel.get_database(self.db_name)
+            try:
+                await db.unlisten(connection, self.channel, self._on_notification)
+            except Exception:
+                pass
+
+    async def _keep_listening(self):
+        while True:
+            await asyncio.sleep(self.reconnect_interval)
+            if self.listening:
+                continue
+            await self._unlisten()
+            try:
+                await self._listen()
+            except Exception as e:
+                await logger.warning('listen failed', channel=self.channel, error=str(e))
+                continue
+            await logger.info('listening again', channel=self.channel)
+            for callback in list(self._reconnect_callbacks):
+                self._call(callback)
+
+    def _on_notification(self, connection, pid, channel, payload):
+        for callback in list(self._subscribers):
+            self._call(callback, payload)
+
+    def _call(self, callback, *args):
+        try:
+            result = callback(*args)
+        except Exception as e:
+            logger.sync().error('notification callback failed', channel=self.channel, error=str(e))
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._pending.add(task)
+            task.add_done_callback(self._callback_done)
+
+    def _callback_done(self, task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.sync().error('notification callback failed', channel=self.channel,
+                                error=str(task.exception()))
@@ -0,0 +1,62 @@
+import asyncio
+import hashlib
+import time
+from typing import Optional
+
+from postmodel.main import Postmodel
+
+
+def advisory_lock_key(name: str) -> int:
+    """The signed 64 bit advisory lock key of a name."""
+    return int.from_bytes(hashlib.sha1(name.encode('utf-8')).digest()[:8], 'big', signed=True)
+
+
+class AdvisoryLockLeader:
+    """
+    Leader election between processes sharing a database.
+
+    The process holding the session advisory lock ``name`` is the leader.
+    It keeps one pool connection for as long as it leads; when that
+    connection is lost Postgres releases the lock and another process
+    takes over at its next try. A process that is not the leader tries
+    again at most every ``retry_interval`` seconds.
+
+    Usable as the ``leader`` of a ``basepy.schedule.AsyncScheduler``::
+
+        scheduler = AsyncScheduler(leader=AdvisoryLockLeader('maintenance'))
+
+    """
+
+    def __init__(self, name: str, db_name: Optional[str] = None, retry_interval: float = 30):
+        self.name = name
+        self.key = advisory_lock_key(name)
+        self.db_name = db_name
+        self.retry_interval = retry_interval
+        self._connection = None
+        self._next_try = 0.0
+        self._lock = None
+
+    async def is_leader(self) -> bool:
+        connection = self._connection
+        if connection is not None:
+            if not connection.is_closed():
+                return True
+            await self.release()
+        if time.monotonic() < self._next_try:
+            return False
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._connection is not None:
+                return True
+            self._next_try = time.monotonic() + self.retry_interval
+            db = Postmodel.get_database(self.db_name)
+            self._connection = await db.try_advisory_lock(self.key)
+            return self._connection is not None
+
+    async def release(self) -> None:
+        """Give up the leadership."""
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            db = Postmodel.get_database(self.db_name)
+            await db.release_advisory_lock(connection, self.key)
@@ -23,7 +23,8 @@ from .query import (
     QuerySet,
     QueryExpression,
     Q,
-    FilterBuilder
+    FilterBuilder,
+    value_shape
 )
 
 from .functions import (
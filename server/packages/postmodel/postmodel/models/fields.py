@@ -1,6 +1,4 @@
 import datetime
-import functools
-import json
 import uuid
 from decimal import Decimal
 from enum import Enum, IntEnum
@@ -9,12 +7,13 @@ from typing import Any, Optional, Type, TypeVar, Union
 from uuid import UUID
 
 import ciso8601
+from basepy import jsoncodec
 
 from postmodel.exceptions import ConfigurationError, NoValuesFetched, OperationalError, FieldValueError
 
-# Doing this we can replace json dumps/loads with different implementations
-JSON_DUMPS = functools.partial(json.dumps, separators=(",", ":"))
-JSON_LOADS = json.loads
+# the process wide codec, see basepy.jsoncodec to switch implementations
+JSON_DUMPS = jsoncodec.dumps
+JSON_LOADS = jsoncodec.loads
 
 
 class Field:
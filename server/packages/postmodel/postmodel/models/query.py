@@ -5,6 +5,7 @@ from enum import Enum
 
 from postmodel.exceptions import FieldError, OperationalError
 from .fields import Field
+from .functions import Function
 from functools import partial
 
 
@@ -210,6 +211,25 @@ class QueryExpression:
 
 Q = QueryExpression
 
+
+def value_shape(value):
+    """
+    Returns the part of a filter value that the rendered SQL depends on.
+
+    Two filters with the same keys and value shapes render the same SQL, so
+    callers can build a ``QuerySet.sql_shape`` key from these.
+    """
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, len(value))
+    if isinstance(value, Function):
+        return (type(value).__name__, value.field_name,
+                tuple(value_shape(arg) if isinstance(arg, Function) else arg
+                      for arg in value.args))
+    return type(value).__name__
+
+
 class QuerySet:
     def __init__(self, model_class):
         self.model_class = model_class
@@ -224,6 +244,7 @@ class QuerySet:
         self._orderings: List[Tuple[str, Any]] = []
         self._expressions: List[QueryExpression] = []
         self._distinct: bool = False
+        self._shape_key: Any = None
 
     def _clone(self):
         return self
@@ -398,6 +419,17 @@ class QuerySet:
         mapper = self.model_class.get_mapper(self.db_name)
         return await mapper.explain(self)
 
+    def sql_shape(self, key):
+        """
+        Marks the QuerySet with a caller computed shape key.
+
+        QuerySets sharing a key must only differ in their filter values (see
+        ``value_shape``), the mapper then renders the SQL once and reuses it.
+        """
+        queryset = self._clone()
+        queryset._shape_key = key
+        return queryset
+
     def using_db(self, db_name):
         """
         Executes query in provided db client.
@@ -10,7 +10,7 @@ from pypika.utils import format_alias_sql
 from functools import partial
 from copy import deepcopy
 from postmodel.models.functions import Function
-import json
+from basepy import jsoncodec
 
 def parameter(index: int) -> Parameter:
     return Parameter("$%d" % (index + 1,))
@@ -248,9 +248,9 @@ def encode_json_value(value):
     elif isinstance(value, (int, float)):
         return SqlTypes.NUMERIC, value
     elif isinstance(value, str):
-        return SqlTypes.VARCHAR, json.dumps(value)
+        return SqlTypes.VARCHAR, jsoncodec.dumps(value)
     elif isinstance(value, (dict, list, tuple)):
-        return SqlType("jsonb"), json.dumps(value)
+        return SqlType("jsonb"), jsoncodec.dumps(value)
     else:
         raise Exception(f'unsupported json value {value} to encode')
 
@@ -368,6 +368,29 @@ JSON_FILTER_OPERATORS = {
     'endswith': JSONFilterFunctions.ends_with
 }
 
+
+def _encoded_json_value(value):
+    return encode_json_value(value)[1]
+
+def _unchanged_value(value):
+    return value
+
+JSON_VALUE_ENCODERS = {
+    'equal': _encoded_json_value,
+    'not': _encoded_json_value,
+    'has_key': _unchanged_value,
+    'has_keys': _unchanged_value,
+    'has_anykeys': _unchanged_value,
+    'contains': _encoded_json_value,
+    'in': _encoded_json_value,
+    'gte': _encoded_json_value,
+    'gt': _encoded_json_value,
+    'lte': _encoded_json_value,
+    'lt': _encoded_json_value,
+    'startswith': lambda value: f'"{value}%',
+    'endswith': lambda value: f'%{value}"'
+}
+
 class JsonFieldFilter:
     def __init__(self, table):
         self.table = table
@@ -416,6 +439,10 @@ class JsonFieldFilter:
             param = parameter(param_index) if param_index != None else None
             return operator_func(pika_field, param=param, value=value)
 
+    def get_value(self, key, value):
+        _, operator, _ = self.parse_json_key_expr(key)
+        return JSON_VALUE_ENCODERS[operator](value)
+
 
 class FieldFilterFunctions:
 
@@ -562,6 +589,16 @@ class PikaTableFilters:
         else:
             return JsonFieldFilter(self.table).get_criterion(key, param_index, value)
 
+    def get_value(self, key, value):
+        """Encodes the parameter value of a filter the same way get_criterion does."""
+        ff = self.filters.get(key)
+        if ff:
+            if 'value_encoder' in ff:
+                return ff['value_encoder'](value)
+            return value
+        else:
+            return JsonFieldFilter(self.table).get_value(key, value)
+
 
 
 class FunctionResolve:
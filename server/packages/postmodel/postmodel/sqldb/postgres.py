@@ -6,6 +6,10 @@ from .base import (TransactedConnections,
         TransactedConnectionWrapper)
 import asyncio
 import asyncpg
+import re
+import time
+from basepy import metrics
+from basepy.timing import span
 from postmodel.exceptions import (OperationalError,
         DBConnectionError,
         IntegrityError,
@@ -14,6 +18,7 @@ from postmodel.exceptions import (OperationalError,
         DoesNotExist)
 from postmodel.main import Postmodel
 from postmodel.models.query import QueryExpression
+from postmodel.models.functions import Function
 from .common import (
         get_json_field,
         BaseTableSchemaGenerator,
@@ -28,37 +33,84 @@ import operator
 from copy import deepcopy
 
 
+_statement_table = re.compile(
+    r'^\s*(SELECT\b.*?\bFROM|INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+"?([\w.]+)"?',
+    re.IGNORECASE | re.DOTALL)
+
+
+def statement_shape(query):
+    """``<verb>.<table>`` of a statement, the metrics label of its queries."""
+    match = _statement_table.match(query)
+    if match:
+        return '%s.%s' % (match.group(1).split(None, 1)[0].lower(), match.group(2))
+    words = query.split(None, 1)
+    return words[0].lower() if words else 'empty'
+
+
 def translate_exceptions(func):
     @wraps(func)
     async def translate_exceptions_(self, *args):
+        started = time.perf_counter()
         try:
-            return await func(self, *args)
+            with span("db"):
+                return await func(self, *args)
         except asyncpg.SyntaxOrAccessError as exc: # pragma: nocoverage
             raise OperationalError(exc)
         except asyncpg.IntegrityConstraintViolationError as exc:
             raise IntegrityError(exc)
         except asyncpg.InvalidTransactionStateError as exc:  # pragma: nocoverage
             raise TransactionManagementError(exc)
+        finally:
+            self.observe_query(args[0] if args else func.__name__,
+                               time.perf_counter() - started)
 
     return translate_exceptions_
 
 
+class MeasuredAcquireContext:
+    """Wraps a pool acquire context, the wait for a connection goes into
+    the ``postmodel_pool_acquire_seconds`` summary."""
+
+    __slots__ = ('context', 'metric')
+
+    def __init__(self, context, metric):
+        self.context = context
+        self.metric = metric
+
+    async def __aenter__(self):
+        started = time.perf_counter()
+        try:
+            return await self.context.__aenter__()
+        finally:
+            self.metric.observe(time.perf_counter() - started)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return await self.context.__aexit__(exc_type, exc_val, exc_tb)
+
+
 class PooledTransactionContext:
 
-    __slots__ = ('name', 'token', 'timeout', 'connection', 'transaction', 'done', 'pool')
+    __slots__ = ('name', 'token', 'timeout', 'connection', 'transaction', 'done', 'pool',
+                 'engine', 'started')
 
-    def __init__(self, name, pool, timeout):
+    def __init__(self, name, pool, timeout, engine=None):
         self.name = name
         self.pool = pool
         self.timeout = timeout
         self.connection = None
         self.done = False
         self.transaction = None
+        self.engine = engine
+        self.started = None
 
     async def __aenter__(self):
         if self.connection is not None or self.done: # pragma: nocoverage
             raise Exception('a connection is already acquired')
+        started = time.perf_counter()
         self.connection = await self.pool._acquire(self.timeout)
+        self.started = time.perf_counter()
+        if self.engine is not None:
+            self.engine.acquire_seconds.observe(self.started - started)
         self.transaction = self.connection.transaction()
         conn_proxy = TransactedConnectionProxy(self.connection)
         self.token = TransactedConnections.set(self.name, conn_proxy)
@@ -73,6 +125,9 @@ class PooledTransactionContext:
                 pass
         else:
             await self.transaction.commit()
+        if self.engine is not None:
+            self.engine.observe_transaction('rollback' if exc_type else 'commit',
+                                            time.perf_counter() - self.started)
         self.done = True
         con = self.connection
         self.connection = None
@@ -82,6 +137,7 @@ class PooledTransactionContext:
 
 class PostgresMapper(BaseDatabaseMapper):
     EXPLAIN_PREFIX: str = "EXPLAIN"
+    QUERY_CACHE_SIZE: int = 1024
 
     def init(self):
         self.meta = self.model_class._meta
@@ -122,6 +178,7 @@ class PostgresMapper(BaseDatabaseMapper):
             f"DROP TABLE IF EXISTS {self.meta.table};"
         )
         self.update_cache = {}
+        self.query_cache = {}
 
     def parameter(self, pos: int) -> Parameter:
         return Parameter("$%d" % (pos + 1,))
@@ -167,6 +224,26 @@ class PostgresMapper(BaseDatabaseMapper):
         expr = QueryExpression(*expressions, join_type=join_type)
         return self._expression_to_criterion(expr, param_index)
 
+    def _expression_to_values(self, expr, values):
+        """
+        Collects the parameter values of an expression in the same order as
+        _expression_to_criterion, without building the criterion.
+        """
+        if expr.children:
+            for sub_expression in expr.children:
+                self._expression_to_values(sub_expression, values)
+        else:
+            for key, value in expr.filters.items():
+                if isinstance(value, Function):
+                    continue
+                value = self.filters.get_value(key, value)
+                if value != None:
+                    if (key.endswith('__has_keys') or key.endswith('__has_anykeys')) and isinstance(value, (list, tuple)):
+                        values.extend(value)
+                    else:
+                        values.append(value)
+        return values
+
 
     async def explain(self, queryset) -> Any:
         sql, values = self._get_query_sql(queryset)
@@ -358,6 +435,17 @@ class PostgresMapper(BaseDatabaseMapper):
         return int(rows[0]['count'])
 
     def _get_query_sql(self, queryset):
+        cache_key = None
+        if queryset._shape_key is not None:
+            cache_key = (queryset._shape_key, queryset._distinct, queryset._limit,
+                    tuple(queryset._orderings), queryset._offset)
+            sql = self.query_cache.get(cache_key)
+            if sql:
+                values = []
+                for expr in queryset._expressions:
+                    self._expression_to_values(expr, values)
+                return sql, values
+
         values = []
         table = self.pika_table
         query = PostgreSQLQuery.from_(table).select(*self.column_names)
@@ -387,6 +475,10 @@ class PostgresMapper(BaseDatabaseMapper):
             query = query.offset(queryset._offset)
 
         sql = str(query.get_sql())
+        if cache_key is not None:
+            if len(self.query_cache) >= self.QUERY_CACHE_SIZE:
+                self.query_cache.clear()
+            self.query_cache[cache_key] = sql
         return sql, values
 
     async def query(self, queryset):
@@ -420,6 +512,8 @@ class PostgresEngine(BaseDatabaseEngine):
         'min_size': 10,
         'max_size': 30,
     }
+    # distinct statements with a cached query summary
+    QUERY_METRICS_SIZE: int = 4096
 
     def __init__(self, name,  config, parameters={}):
         super(PostgresEngine, self).__init__(name, config=config, parameters=parameters)
@@ -438,6 +532,49 @@ class PostgresEngine(BaseDatabaseEngine):
             }
         self._pool = None
         self._db_url = f'postgresql://{self.user}:{self.password}@{self.host}:{self.port}/'
+        self._query_metrics = {}
+        self._transaction_metrics = {}
+        self.acquire_seconds = metrics.summary(
+            'postmodel_pool_acquire_seconds', {'db': self.name},
+            help='wait for a pool connection')
+        labels = {'db': self.name}
+        metrics.gauge('postmodel_pool_size', self.pool_size, labels,
+                      help='connections open in the pool')
+        metrics.gauge('postmodel_pool_in_use', self.pool_in_use, labels,
+                      help='connections acquired from the pool')
+        metrics.gauge('postmodel_pool_saturation', self.pool_saturation, labels,
+                      help='connections in use / pool max size')
+
+    def pool_size(self):
+        return self._pool.get_size() if self._pool else 0
+
+    def pool_in_use(self):
+        if not self._pool:
+            return 0
+        return self._pool.get_size() - self._pool.get_idle_size()
+
+    def pool_saturation(self):
+        if not self._pool:
+            return 0.0
+        return self.pool_in_use() / self._pool.get_max_size()
+
+    def observe_query(self, query, seconds):
+        metric = self._query_metrics.get(query)
+        if metric is None:
+            if len(self._query_metrics) >= self.QUERY_METRICS_SIZE:
+                self._query_metrics.clear()
+            metric = self._query_metrics[query] = metrics.summary(
+                'postmodel_query_seconds', {'db': self.name, 'statement': statement_shape(query)},
+                help='query latency by statement verb and table')
+        metric.observe(seconds)
+
+    def observe_transaction(self, outcome, seconds):
+        metric = self._transaction_metrics.get(outcome)
+        if metric is None:
+            metric = self._transaction_metrics[outcome] = metrics.summary(
+                'postmodel_transaction_seconds', {'db': self.name, 'outcome': outcome},
+                help='transaction duration by outcome')
+        metric.observe(seconds)
 
     async def init(self, create_db=True):
         if not self._pool:
@@ -492,7 +629,7 @@ class PostgresEngine(BaseDatabaseEngine):
         if transacted_conn:
             raise Exception('nested in_transaction not allowed.')
         else:
-            return PooledTransactionContext(self.name, self._pool, timeout=None)
+            return PooledTransactionContext(self.name, self._pool, timeout=None, engine=self)
 
     def _current_transacted_conn(self):
         try:
@@ -500,6 +637,57 @@ class PostgresEngine(BaseDatabaseEngine):
         except: # pragma: nocoverage
             return None
 
+    async def try_advisory_lock(self, key):
+        """A session level advisory lock on a connection taken out of the
+        pool, the connection holding it or None if another session does."""
+        if not self._pool:
+            raise Exception('Database init() not called.')
+        connection = await self._pool.acquire()
+        try:
+            locked = await connection.fetchval('SELECT pg_try_advisory_lock($1)', key)
+        except BaseException:
+            await self._pool.release(connection)
+            raise
+        if not locked:
+            await self._pool.release(connection)
+            return None
+        return connection
+
+    async def release_advisory_lock(self, connection, key):
+        try:
+            if not connection.is_closed():
+                await connection.execute('SELECT pg_advisory_unlock($1)', key)
+        finally:
+            if self._pool:
+                await self._pool.release(connection)
+
+    async def listen(self, channel, callback):
+        """LISTEN to ``channel`` on a connection taken out of the pool,
+        asyncpg calls ``callback(connection, pid, channel, payload)`` for
+        each notification. Returns the connection."""
+        if not self._pool:
+            raise Exception('Database init() not called.')
+        connection = await self._pool.acquire()
+        try:
+            await connection.add_listener(channel, callback)
+        except BaseException:
+            await self._pool.release(connection)
+            raise
+        return connection
+
+    async def unlisten(self, connection, channel, callback):
+        try:
+            if not connection.is_closed():
+                await connection.remove_listener(channel, callback)
+        finally:
+            if self._pool:
+                await self._pool.release(connection)
+
+    async def notify(self, channel, payload=''):
+        """NOTIFY ``channel``, sent when the current transaction commits."""
+        async with self.acquire_connection() as connection:
+            await connection.execute('SELECT pg_notify($1, $2)', channel, payload)
+
     def acquire_connection(self, timeout=None):
         if not self._pool:
             raise Exception('Database init() not called.')
@@ -507,7 +695,7 @@ class PostgresEngine(BaseDatabaseEngine):
         if transacted_conn:
             return TransactedConnectionWrapper(transacted_conn)
         else:
-            return self._pool.acquire(timeout=timeout)
+            return MeasuredAcquireContext(self._pool.acquire(timeout=timeout), self.acquire_seconds)
 
     @translate_exceptions
     async def execute_insert(self, query: str, values: list) -> int:
@@ -0,0 +1,44 @@
+import asyncio
+
+from postmodel import Postmodel
+from postmodel.channel import NotifyChannel
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_deliver():
+    channel = NotifyChannel('test_deliver')
+    received = []
+
+    async def on_async(payload):
+        received.append(('async', payload))
+
+    channel.subscribe(lambda payload: received.append(('sync', payload)))
+    channel.subscribe(on_async)
+    channel.subscribe(lambda payload: 1 / 0)
+    channel.deliver('app')
+    await asyncio.sleep(0)
+    assert received == [('sync', 'app'), ('async', 'app')]
+
+
+@pytest.mark.asyncio
+async def test_notify_channel(db_url):
+    await Postmodel.init(db_url, modules=["tests.testmodels"])
+    first = NotifyChannel('test_channel')
+    second = NotifyChannel('test_channel')
+    received = []
+    first.subscribe(lambda payload: received.append(('first', payload)))
+    second.subscribe(lambda payload: received.append(('second', payload)))
+    await first.start()
+    await second.start()
+    assert first.listening
+    await first.publish('app_1')
+    for _ in range(50):
+        if len(received) == 2:
+            break
+        await asyncio.sleep(0.01)
+    assert sorted(received) == [('first', 'app_1'), ('second', 'app_1')]
+    await first.stop()
+    await second.stop()
+    assert not first.listening
+    await Postmodel.close()
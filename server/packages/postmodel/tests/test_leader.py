@@ -0,0 +1,25 @@
+from postmodel import Postmodel
+from postmodel.leader import AdvisoryLockLeader, advisory_lock_key
+import pytest
+
+
+def test_advisory_lock_key():
+    key = advisory_lock_key('maintenance')
+    assert key == advisory_lock_key('maintenance')
+    assert key != advisory_lock_key('other')
+    assert -2 ** 63 <= key < 2 ** 63
+
+
+@pytest.mark.asyncio
+async def test_leader(db_url):
+    await Postmodel.init(db_url, modules=["tests.testmodels"])
+    first = AdvisoryLockLeader('test_leader', retry_interval=0)
+    second = AdvisoryLockLeader('test_leader', retry_interval=0)
+    assert await first.is_leader()
+    assert await first.is_leader()
+    assert not await second.is_leader()
+    await first.release()
+    assert await second.is_leader()
+    assert not await first.is_leader()
+    await second.release()
+    await Postmodel.close()
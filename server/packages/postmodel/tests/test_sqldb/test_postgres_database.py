@@ -3,7 +3,8 @@ from postmodel import Postmodel
 import pytest
 from postmodel import models
 from basepy.asynclog import logger
-from postmodel.sqldb.postgres import PostgresEngine
+from postmodel.sqldb.postgres import PostgresEngine, statement_shape
+from basepy import metrics
 from postmodel.exceptions import DBConnectionError
 
 logger.add('stdout')
@@ -85,4 +86,25 @@ async def test_database_transaction(db_url):
     async with db.in_transaction():
         with pytest.raises(Exception):
             db.in_transaction()
-    await Postmodel.close()
\ No newline at end of file
+    await Postmodel.close()
+
+def test_statement_shape():
+    assert statement_shape('SELECT "a","b" FROM "players" WHERE "a"=$1') == 'select.players'
+    assert statement_shape('INSERT INTO test_db_report (report_id) VALUES($1)') == 'insert.test_db_report'
+    assert statement_shape('UPDATE "players" SET "a"=$1') == 'update.players'
+    assert statement_shape('DELETE FROM "players" WHERE "a"=$1') == 'delete.players'
+    assert statement_shape('\n  CREATE TABLE IF NOT EXISTS "x" ()') == 'create'
+    assert statement_shape('') == 'empty'
+
+
+def test_engine_metrics():
+    db = PostgresEngine('metrics_test', config={'db_path': 'test_db'})
+    assert db.pool_in_use() == 0
+    assert db.pool_saturation() == 0.0
+    db.observe_query('SELECT * FROM "players"', 0.002)
+    db.observe_query('SELECT * FROM "players"', 0.004)
+    db.observe_transaction('commit', 0.01)
+    text = metrics.registry.render()
+    assert 'postmodel_query_seconds_count{db="metrics_test",statement="select.players"} 2' in text
+    assert 'postmodel_transaction_seconds_count{db="metrics_test",outcome="commit"} 1' in text
+    assert 'postmodel_pool_saturation{db="metrics_test"} 0.0' in text
@@ -189,4 +189,30 @@ async def test_mapper_functions_1(db_url):
     foo = foo[0]
     assert foo.foo_id == 6
 
-    await Postmodel.close()
\ No newline at end of file
+    await Postmodel.close()
+
+def test_mapper_query_sql_shape():
+    from postmodel.sqldb.postgres import PostgresMapper
+    from tests.testmodels import FooJsonModel
+    mapper = PostgresMapper(Foo, None)
+
+    def query_sql(name, ids):
+        queryset = Foo.filter(Q(name=name) | Q(foo_id__in=ids)).limit(3)
+        return mapper._get_query_sql(queryset.sql_shape(("by_name_or_ids",)))
+
+    sql, values = query_sql("a", [1, 2])
+    assert values == ["a", [1, 2]]
+    assert len(mapper.query_cache) == 1
+    cached_sql, cached_values = query_sql("b", [3])
+    assert cached_sql == sql
+    assert cached_values == ["b", [3]]
+
+    json_mapper = PostgresMapper(FooJsonModel, None)
+    for name, tags in [("a", ["x"]), ("b", ["y"])]:
+        queryset = FooJsonModel.filter(
+            Q(**{"value.name": name}) & Q(**{"value.tags__has_keys": tags})
+        ).sql_shape(("json", models.value_shape(name), models.value_shape(tags)))
+        sql, values = json_mapper._get_query_sql(queryset)
+        queryset._shape_key = None
+        assert (sql, values) == json_mapper._get_query_sql(queryset)
+    assert len(json_mapper.query_cache) == 1
@@ -19,7 +19,7 @@ from starlette.types import Receive, Scope, Send
 import importlib.resources
 import traceback
 import logging
-import json
+from basepy import jsoncodec
 import asyncio
 from asyncio import CancelledError
 from .utils import IDGenerator, sanitize
@@ -109,7 +109,7 @@ class ClientRequest:
         if not self.data:
             return {}
         try:
-            return json.loads(self.data)
+            return jsoncodec.loads(self.data)
         except:
             return {'#': self.data}
 
@@ -185,11 +185,11 @@ class WaveClient:
         page = self.session.page(self.page_route)
         page_data = await page.start_sync()
         if page_data:
-            await self.send_text(json.dumps(page_data))
+            await self.send_text(jsoncodec.dumps(page_data))
 
         while not self.quit:
             data = await page.changes()
-            await self.send_text(json.dumps(data))
+            await self.send_text(jsoncodec.dumps(data))
             page.send_done()
 
 
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+import zipfile
+import zlib
+
+import pytest
+
+from highorder.base.archive import ReleaseArchive
+from highorder.base.loader import FileCache
+
+
+def write_zip(path, members, compression=zipfile.ZIP_DEFLATED):
+    with zipfile.ZipFile(path, "w", compression=compression) as z:
+        for name, data in members.items():
+            z.writestr(name, data)
+
+
+def test_release_archive_reads(tmp_path):
+    path = str(tmp_path / "APP_demo_1.zip")
+    big = b"x" * 100000
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("stored.bin", big, compress_type=zipfile.ZIP_STORED)
+        z.writestr("app/app.json", b'{"app_id": "demo"}', compress_type=zipfile.ZIP_DEFLATED)
+        z.writestr("deflated.bin", big, compress_type=zipfile.ZIP_DEFLATED)
+
+    archive = ReleaseArchive.get(path)
+    assert ReleaseArchive.get(path) is archive
+    assert "app/app.json" in archive
+    view = archive.view("stored.bin")
+    assert isinstance(view, memoryview)
+    assert view == big
+    assert archive.read("stored.bin") == big
+    assert archive.read("deflated.bin") == big
+    assert archive.read("app/app.json") == b'{"app_id": "demo"}'
+    with pytest.raises(KeyError):
+        archive.read("missing.json")
+    del view
+
+
+def test_release_archive_rewritten(tmp_path):
+    path = str(tmp_path / "APP_demo_1.zip")
+    write_zip(path, {"a.json": "1"})
+    archive = ReleaseArchive.get(path)
+    assert archive.read("a.json") == b"1"
+    write_zip(path, {"a.json": "22", "b.json": "3"})
+    os.utime(path, ns=(1, 1))
+    reopened = ReleaseArchive.get(path)
+    assert reopened is not archive
+    assert reopened.read("a.json") == b"22"
+
+
+def test_release_archive_bad_crc(tmp_path):
+    path = str(tmp_path / "APP_demo_1.zip")
+    write_zip(path, {"a.json": "a" * 1000})
+    with open(path, "r+b") as f:
+        content = f.read()
+        # flip a byte of the deflated data, after the 30 byte local header
+        # and the member name
+        offset = 30 + len("a.json") + 1
+        f.seek(offset)
+        f.write(bytes([content[offset] ^ 0xFF]))
+    archive = ReleaseArchive(path)
+    with pytest.raises((zipfile.BadZipFile, zlib.error)):
+        archive.read("a.json")
+
+
+def test_file_cache_reads_archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(FileCache, "_cache", {})
+    path = str(tmp_path / "APP_demo_1.zip")
+    write_zip(path, {"app/app.json": json.dumps({"app_id": "demo"})})
+
+    async def run():
+        meta, data = await FileCache.get((path, "app/app.json"), parse_method="json")
+        assert data == {"app_id": "demo"}
+        assert meta["exist"] and meta["bytes"] == len(json.dumps({"app_id": "demo"}))
+
+    asyncio.run(run())
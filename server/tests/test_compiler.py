@@ -1,5 +1,4 @@
-
-from highorder.base.compiler import Tokenizer, TokenKind, NodeKind, Parser, Compiler
+from highorder.base.compiler import Tokenizer, TokenKind, NodeKind, Parser, Compiler, IncrementalCompiler
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
 
@@ -493,4 +492,98 @@ def test_compiler_simple_3():
                 "name": "home"
             }]
         }
-    )
\ No newline at end of file
+    )
+
+def test_tokenizer_positions():
+    code = 'Page {\n  route: "/home\\n"  // main\n  size: 1_024 }'
+    tokens = Tokenizer().tokenize(code)
+    route = tokens[3]
+    assert (route.kind, route.value) == (TokenKind.PropertyName, "route")
+    assert (route.start_pos.line, route.start_pos.column) == (1, 2)
+    assert (route.end_pos.line, route.end_pos.column) == (1, 6)
+    string_token = tokens[5]
+    assert string_token.value == "/home\n"
+    assert (string_token.start_pos.index, string_token.end_pos.index) == (16, 24)
+    comment = tokens[6]
+    assert (comment.kind, comment.value) == (TokenKind.Comment, " main")
+    number = tokens[10]
+    assert (number.kind, number.value) == (TokenKind.NumberLiteral, 1024)
+    assert (number.start_pos.line, number.start_pos.column) == (2, 8)
+
+
+def test_tokenizer_large_source():
+    unit = '''Page {
+    route: "/home"
+    // landing page
+    Header { title: "Hello, \\"world\\"", visible: true }
+    List { items: [1, 2.5, 3_000, null], style: {color: "#ff0000"} }
+}
+'''
+    tokens = Tokenizer().tokenize(unit * 5000)
+    assert len(tokens) == 45 * 5000
+
+
+def test_incremental_compiler():
+    code = '''Page { route: "/home"
+    Button { text: "go" }
+}
+
+Action { name: "open" }
+Variable { name: "count", value: 1 }
+'''
+    edits = [
+        code.replace('"go"', '"go now"'),
+        code.replace('Action { name: "open" }', 'Action { name: "open" }\nTask { name: "sync" }'),
+        code.replace('Variable { name: "count", value: 1 }\n', ''),
+        code.replace('/home', '/home2').replace('value: 1', 'value: 2'),
+        'Modal { name: "m" }\n' + code,
+        code + 'Item { name: "sword" }',
+    ]
+    compiler = IncrementalCompiler()
+    assert compiler.compile(code) == Compiler().compile(code)
+    for new_code in edits:
+        assert compiler.compile(new_code) == Compiler().compile(new_code)
+
+
+def test_incremental_compiler_reparse():
+    code = 'Page { route: "/a" }\nPage { route: "/b" }\nPage { route: "/c" }\n'
+    compiler = IncrementalCompiler()
+    compiler.compile(code)
+    first, second, third = [x.node for x in compiler.parser.objects]
+
+    new_code = code.replace('"/b"', '"/bb"')
+    result = compiler.compile(new_code)
+    assert [x["route"] for x in result["interfaces"]] == ["/a", "/bb", "/c"]
+    objects = compiler.parser.objects
+    assert objects[0].node is first and objects[2].node is third
+    assert objects[1].node is not second
+    assert new_code[objects[2].start:objects[2].end + 1] == 'Page { route: "/c" }'
+
+    # an unterminated string runs over the following objects
+    broken = new_code.replace('"/bb"', '"/bb')
+    try:
+        compiler.compile(broken)
+    except Exception:
+        pass
+    else:
+        assert False, "syntax error expected"
+    # the last good source is kept after a failed compile
+    assert compiler.parser.code == new_code
+    assert compiler.compile(code) == Compiler().compile(code)
+
+
+def test_incremental_compiler_large_source():
+    unit = '''Page {{ route: "/page{0}"
+    Header {{ title: "Page {0}" }}
+    List {{ items: [1, 2, 3], style: {{ color: "#ff0000" }} }}
+}}
+Action {{ name: "action{0}", args: ["a", "b"] }}
+'''
+    code = "".join(unit.format(i) for i in range(2000))
+    compiler = IncrementalCompiler()
+    compiler.compile(code)
+
+    new_code = code.replace('title: "Page 1000"', 'title: "Page one thousand"')
+    result = compiler.compile(new_code)
+    assert result["interfaces"][1000]["elements"][0]["title"] == "Page one thousand"
+    assert result == Compiler().compile(new_code)
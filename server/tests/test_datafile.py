@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+import random
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+
+import pytest
+
+from highorder.base.datafile import IndexedDatafile, compile_datafile, index_directory
+from highorder.base.loader import ApplicationFolder, ConfigLoader, FileCache
+
+LEVELS = [{"level_id": f"l{i}", "words": ["a"] * (i % 3)} for i in range(200)]
+
+
+def test_indexed_datafile():
+    datafile = IndexedDatafile(compile_datafile(LEVELS))
+    assert datafile.key_field == "level_id"
+    assert len(datafile) == 200
+    assert datafile[0] == LEVELS[0]
+    assert datafile[-1] == LEVELS[-1]
+    assert datafile[10:13] == LEVELS[10:13]
+    with pytest.raises(IndexError):
+        datafile[200]
+    assert datafile.get("l57") == LEVELS[57]
+    assert datafile.position("l57") == 57
+    assert datafile.get("missing") is None
+    assert list(datafile.scan("l198")) == LEVELS[198:]
+    assert list(datafile.scan("l10", limit=1, after=True)) == [LEVELS[11]]
+    assert random.choice(datafile) in LEVELS
+    assert list(datafile) == LEVELS
+
+
+def test_indexed_datafile_keys():
+    records = [{"id": 2, "v": "first"}, {"id": 1}, {"id": 2, "v": "second"}]
+    datafile = IndexedDatafile(compile_datafile(records))
+    assert datafile.key_field == "id"
+    # keys compare as strings, the first of equal keys is found
+    assert datafile.get(2) == {"id": 2, "v": "first"}
+    assert datafile.get("1") == {"id": 1}
+
+    datafile = IndexedDatafile(compile_datafile([{"a": 1}, {"b": 2}]))
+    assert datafile.key_field is None
+    assert datafile.get("a") is None
+    assert datafile[1] == {"b": 2}
+
+    assert len(IndexedDatafile(compile_datafile([]))) == 0
+    with pytest.raises(ValueError):
+        compile_datafile({"levels": []})
+    with pytest.raises(ValueError):
+        IndexedDatafile(b"not a datafile")
+
+
+def test_index_directory(tmp_path):
+    folder = str(tmp_path)
+    with open(os.path.join(folder, "levels.json"), "w") as f:
+        json.dump(LEVELS, f)
+    with open(os.path.join(folder, "settings.json"), "w") as f:
+        json.dump({"a": 1}, f)
+    with open(os.path.join(folder, "removed.idx"), "wb") as f:
+        f.write(compile_datafile([]))
+    assert index_directory(folder) == ["levels"]
+    assert sorted(os.listdir(folder)) == ["levels.idx", "levels.json", "settings.json"]
+
+
+def test_config_loader_indexed_datafile(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    app_dir = os.path.join(root, "APP_demo")
+    os.makedirs(app_dir)
+    with open(os.path.join(app_dir, "release.json"), "w") as f:
+        json.dump({"current": "1"}, f)
+    with ZipFile(os.path.join(app_dir, "APP_demo_1.zip"), "w", compression=ZIP_DEFLATED) as z:
+        z.writestr("app/app.json", json.dumps({"app_id": "demo", "app_name": "demo"}))
+        z.writestr("datafile/levels.json", json.dumps(LEVELS))
+        z.writestr("datafile/levels.idx", compile_datafile(LEVELS), compress_type=ZIP_STORED)
+        z.writestr("datafile/words.json", json.dumps(["a", "b"]))
+    monkeypatch.setattr(ApplicationFolder, "_root_dir", root)
+    monkeypatch.setattr(FileCache, "_cache", {})
+
+    async def run():
+        loader = ConfigLoader("demo")
+        await loader.load()
+        datafile = await loader.get_indexed_datafile("levels")
+        assert isinstance(datafile, IndexedDatafile)
+        assert datafile.get("l3") == LEVELS[3]
+        assert await loader.get_indexed_datafile("words") is None
+        assert await loader.get_datafile("words") == ["a", "b"]
+
+    asyncio.run(run())
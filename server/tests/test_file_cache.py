@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from basepy.asynclib import inotify
+from highorder.base.loader import FileCache
+
+
+@pytest.fixture
+def file_cache(monkeypatch):
+    monkeypatch.setattr(FileCache, "_cache", {})
+    monkeypatch.setattr(FileCache, "_loading", {})
+    monkeypatch.setattr(FileCache, "_bytes", 0)
+    yield FileCache
+    FileCache.unwatch()
+
+
+def write(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def test_file_cache_stat_debounce(tmp_path, file_cache, monkeypatch):
+    path = str(tmp_path / "a.json")
+    write(path, {"v": 1})
+    stats = []
+    get_meta = FileCache.get_meta.__func__
+
+    async def counted_get_meta(cls, filepath):
+        stats.append(filepath)
+        return await get_meta(cls, filepath)
+
+    monkeypatch.setattr(FileCache, "get_meta", classmethod(counted_get_meta))
+
+    async def run():
+        _, data = await FileCache.get(path, parse_method="json")
+        assert data == {"v": 1}
+        for _ in range(10):
+            await FileCache.get(path, parse_method="json")
+        assert stats == []
+        write(path, {"v": 22})
+        FileCache._cache[path]["checked"] -= FileCache.stat_interval
+        _, data = await FileCache.get(path, parse_method="json")
+        assert data == {"v": 22}
+        assert stats == [path]
+
+    asyncio.run(run())
+
+
+def test_file_cache_single_flight(tmp_path, file_cache, monkeypatch):
+    path = str(tmp_path / "a.json")
+    write(path, {"v": 1})
+    reads = []
+    get_file_info = FileCache.get_file_info.__func__
+
+    async def counted_get_file_info(cls, filepath, parse_method):
+        reads.append(filepath)
+        return await get_file_info(cls, filepath, parse_method)
+
+    monkeypatch.setattr(FileCache, "get_file_info", classmethod(counted_get_file_info))
+
+    async def run():
+        results = await asyncio.gather(
+            *[FileCache.get(path, parse_method="json") for _ in range(10)]
+        )
+        assert [data for _, data in results] == [{"v": 1}] * 10
+        assert reads == [path]
+        assert FileCache._loading == {}
+
+    asyncio.run(run())
+
+
+def test_file_cache_bounds(tmp_path, file_cache, monkeypatch):
+    monkeypatch.setattr(FileCache, "max_entries", 2)
+    monkeypatch.setattr(FileCache, "max_bytes", 30)
+    paths = []
+    for name in "abc":
+        path = str(tmp_path / name)
+        with open(path, "w") as f:
+            f.write("x" * 10)
+        paths.append(path)
+
+    async def run():
+        a, b, c = paths
+        await FileCache.get(a)
+        await FileCache.get(b)
+        # a hit makes `a` the most recently used
+        await FileCache.get(a)
+        await FileCache.get(c)
+        assert list(FileCache._cache) == [a, c]
+        assert FileCache._bytes == 20
+        with open(b, "w") as f:
+            f.write("x" * 25)
+        await FileCache.get(b)
+        assert list(FileCache._cache) == [b]
+        assert FileCache.stats() == {"entries": 1, "bytes": 25}
+
+    asyncio.run(run())
+
+
+@pytest.mark.skipif(not inotify.available(), reason="inotify not available")
+def test_file_cache_watch(tmp_path, file_cache, monkeypatch):
+    monkeypatch.setattr(FileCache, "stat_interval", 0)
+    path = str(tmp_path / "a.json")
+    write(path, {"v": 1})
+
+    async def run():
+        assert FileCache.watch()
+        await FileCache.get(path, parse_method="json")
+        assert FileCache._watcher.watching(str(tmp_path))
+        # watched entries are not checked with stat
+        FileCache._cache[path]["meta"]["size"] = -1
+        _, data = await FileCache.get(path, parse_method="json")
+        assert data == {"v": 1}
+        write(path, {"v": 2})
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if path not in FileCache._cache:
+                break
+        _, data = await FileCache.get(path, parse_method="json")
+        assert data == {"v": 2}
+
+    asyncio.run(run())
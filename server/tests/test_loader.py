@@ -0,0 +1,37 @@
+import os
+
+from callpy.web.assets import precompress_directory
+from highorder.base import loader
+from highorder.base.loader import ApplicationFolder
+
+
+def write_content(root, app_id):
+    content_root = os.path.join(root, "live", f"APP_{app_id}", "content")
+    os.makedirs(content_root)
+    with open(os.path.join(content_root, "logo.png"), "wb") as f:
+        f.write(b"png")
+    precompress_directory(content_root)
+
+
+def test_content_url_hashed(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    write_content(root, "demo")
+    monkeypatch.setattr(ApplicationFolder, "_root_dir", root)
+    monkeypatch.setattr(loader, "settings", {})
+
+    url = ApplicationFolder.get_content_url("demo", "http://host/", "/logo.png")
+    assert url.startswith("http://host/static/APP_demo/content/logo.")
+    assert url != "http://host/static/APP_demo/content/logo.png"
+    assert ApplicationFolder.get_content_url("demo", "http://host", "missing.png") == \
+        "http://host/static/APP_demo/content/missing.png"
+
+
+def test_content_url_external(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    write_content(root, "demo")
+    monkeypatch.setattr(ApplicationFolder, "_root_dir", root)
+    # a CDN or bucket only has the files under their published names
+    monkeypatch.setattr(loader, "settings", {"content_url": "https://cdn.example.com/"})
+
+    url = ApplicationFolder.get_content_url("demo", "http://host", "logo.png")
+    assert url == "https://cdn.example.com/static/APP_demo/content/logo.png"
@@ -0,0 +1,58 @@
+import asyncio
+import json
+import os
+from zipfile import ZipFile
+
+from highorder.base.loader import ApplicationFolder, FileCache
+from highorder.hola.preload import iter_expressions, preload_apps
+from highorder.hola.transformer import CompiledExpression, FormatTemplate
+
+
+HOLA = {
+    "interfaces": [
+        {
+            "type": "page",
+            "route": "/main",
+            "elements": [
+                {"type": "text", "text": {"format": "hello {user.name}"}},
+                {"type": "button", "condition": "user.level > 2",
+                 "actions": [{"value": {"expr": "user.level + 1"}}]},
+            ],
+        }
+    ],
+    "objects": [],
+}
+
+
+def write_app(root, app_id, version="1"):
+    app_dir = os.path.join(root, f"APP_{app_id}")
+    os.makedirs(app_dir)
+    with open(os.path.join(app_dir, "release.json"), "w") as f:
+        json.dump({"current": version}, f)
+    with ZipFile(os.path.join(app_dir, f"APP_{app_id}_{version}.zip"), "w") as z:
+        z.writestr("app/app.json", json.dumps({"app_id": app_id, "app_name": app_id}))
+        z.writestr("app/main.hola.json", json.dumps(HOLA))
+    return os.path.join(app_dir, f"APP_{app_id}_{version}.zip")
+
+
+def test_iter_expressions():
+    assert sorted(iter_expressions(HOLA)) == [
+        ("expr", "user.level + 1"),
+        ("expr", "user.level > 2"),
+        ("format", "hello {user.name}"),
+    ]
+
+
+def test_preload_apps(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    release = write_app(root, "demo")
+    os.makedirs(os.path.join(root, "APP_broken"))
+    monkeypatch.setattr(ApplicationFolder, "_root_dir", root)
+    monkeypatch.setattr(FileCache, "_cache", {})
+
+    assert ApplicationFolder.list_app_ids() == ["broken", "demo"]
+    loaded = asyncio.run(preload_apps())
+    assert loaded == {"broken": 0, "demo": 3}
+    assert (release, "app/main.hola.json") in FileCache._cache
+    assert "hello {user.name}" in FormatTemplate._cache[release]
+    assert "user.level > 2" in CompiledExpression._cache[release]
@@ -0,0 +1,47 @@
+import asyncio
+import os
+
+from highorder.base import release
+from highorder.base.loader import ApplicationFolder, FileCache
+from highorder.hola.preload import reload_app
+from highorder.hola.transformer import CompiledExpression, FormatTemplate
+
+from test_preload import write_app
+
+
+def test_publish_without_channel(monkeypatch):
+    received = []
+    monkeypatch.setattr(release.channel, "_subscribers", [received.append])
+    monkeypatch.setitem(release.release_settings, "notify", False)
+    asyncio.run(release.publish("demo"))
+    assert received == ["demo"]
+
+
+def test_reload_app(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    first = write_app(root, "demo")
+    other = write_app(root, "other")
+    monkeypatch.setattr(ApplicationFolder, "_root_dir", root)
+    monkeypatch.setattr(FileCache, "_cache", {})
+    monkeypatch.setattr(FormatTemplate, "_cache", {})
+    monkeypatch.setattr(CompiledExpression, "_cache", {})
+
+    assert asyncio.run(reload_app("demo")) == 3
+    assert asyncio.run(reload_app("other")) == 3
+    assert first in FormatTemplate._cache
+
+    # a new release of demo, an unchanged other
+    second = write_app(root + "/v2", "demo", version="2")
+    os.replace(second, os.path.join(root, "APP_demo", "APP_demo_2.zip"))
+    with open(os.path.join(root, "APP_demo", "release.json"), "w") as f:
+        f.write('{"current": "2"}')
+    assert asyncio.run(reload_app("demo")) == 3
+    second = os.path.join(root, "APP_demo", "APP_demo_2.zip")
+    assert first not in FormatTemplate._cache
+    assert second in FormatTemplate._cache
+    assert other in FormatTemplate._cache
+    assert (first, "app/main.hola.json") not in FileCache._cache
+    assert (second, "app/main.hola.json") in FileCache._cache
+    assert (other, "app/main.hola.json") in FileCache._cache
+
+    assert asyncio.run(reload_app("../demo")) is None
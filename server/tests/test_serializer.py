@@ -0,0 +1,99 @@
+import json
+
+import dataclass_factory
+import pytest
+
+from basepy import jsoncodec
+from highorder.base.serializer import serializer
+from highorder.hola.data import (
+    ClientRequestCommand, ClientRequestContext, HolaInterfaceDefine, HookDefine,
+    PageDefine, PageInterface, PlayableChallengeConfig, PlayableCompletedArg,
+    SetSessionCommand, SetSessionCommandArg, ShowAlertCommand, ShowAlertCommandArg,
+    ShowModalCommand, ShowModalCommandArg, ShowPageCommand, ShowPageCommandArg,
+    UpdatePageCommand, UpdatePageCommandArg, UpdatePageInterface,
+)
+
+factory = dataclass_factory.Factory()
+
+
+def make_commands(n=3):
+    elements = [
+        {"type": "card", "name": f"card_{i}", "title": "卡片", "style": {"size": 3},
+         "actions": [{"type": "navigate", "target": f"/item/{i}"}]}
+        for i in range(n)
+    ]
+    return [
+        ShowPageCommand(args=ShowPageCommandArg(
+            page=PageInterface(name="main", route="/main", elements=elements))),
+        UpdatePageCommand(args=UpdatePageCommandArg(
+            changed_page=UpdatePageInterface("main", "/main", {"card_1": {"value": 2}}))),
+        ShowModalCommand(args=ShowModalCommandArg(title="title", elements=elements[:1])),
+        SetSessionCommand(args=SetSessionCommandArg(session={"token": "t"})),
+        ShowAlertCommand(args=ShowAlertCommandArg(text="hello")),
+    ]
+
+
+def test_dump_same_as_factory():
+    commands = make_commands()
+    assert serializer.dump({"commands": commands}) == factory.dump({"commands": commands})
+    assert serializer.dump(commands[0]) == factory.dump(commands[0])
+    # a dataclass field left at its dict default
+    assert serializer.dump(ShowModalCommand()) == {"args": {}, "type": "command", "name": "show_modal"}
+
+
+@pytest.mark.parametrize("codec", ["json", "orjson"])
+def test_dumpb(codec):
+    previous = jsoncodec.get_codec()
+    try:
+        jsoncodec.use_codec(codec)
+        commands = make_commands()
+        data = serializer.dumpb({"ok": True, "data": {"commands": commands}})
+        assert isinstance(data, bytes)
+        assert json.loads(data) == {"ok": True, "data": factory.dump({"commands": commands})}
+    except ImportError:
+        pytest.skip(f"{codec} not installed")
+    finally:
+        jsoncodec._codec = previous
+
+
+def test_load():
+    context = {"route": "/", "platform": "web", "os": "linux", "os_version": "1",
+               "is_virtual": False, "page_size": {"width": 100}}
+    cmd = serializer.load({"command": "page_interact", "context": context, "extra": 1},
+                          ClientRequestCommand)
+    assert cmd == factory.load({"command": "page_interact", "context": context},
+                               ClientRequestCommand)
+    assert isinstance(cmd.context, ClientRequestContext)
+    assert cmd.args == {}
+
+    page = serializer.load({"type": "page", "route": "/", "hooks": [{"name": "before_leave", "tag": "t"}]},
+                           PageDefine)
+    assert page.hooks == [HookDefine(name="before_leave", tag="t")]
+
+    hola = serializer.load({"playable": {"challenges": [
+        {"name": "c", "type": "t", "levels": {"count": "3"}, "limit": {"daily": 1}}]}},
+        HolaInterfaceDefine)
+    challenge = hola.playable.challenges[0]
+    assert isinstance(challenge, PlayableChallengeConfig)
+    assert challenge.levels.count == 3 and challenge.limit.value == 1
+    assert serializer.load({"playable": None}, HolaInterfaceDefine).playable is None
+
+    completed = serializer.load({"succeed": 1, "level": {"level_id": "x"}}, PlayableCompletedArg)
+    assert completed.succeed is True and completed.level.level_id == "x"
+
+
+def test_load_errors():
+    with pytest.raises(ValueError):
+        serializer.load({"text": 1}, ShowAlertCommandArg)
+    with pytest.raises(TypeError):
+        serializer.load({}, ShowAlertCommandArg)
+    with pytest.raises(TypeError):
+        serializer.load([], ShowAlertCommandArg)
+
+
+def test_dumpb_large():
+    commands = make_commands(300)
+    encoded = serializer.dumpb({"ok": True, "data": {"commands": commands}})
+    expected = json.dumps({"ok": True, "data": factory.dump({"commands": commands})},
+                          ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    assert json.loads(encoded) == json.loads(expected)
@@ -0,0 +1,104 @@
+import asyncio
+
+from highorder.hola.account import SessionService, session_cache, session_channel
+from highorder.hola.model import Session
+
+
+class OpenConnection:
+    def is_closed(self):
+        return False
+
+
+def use_sessions(monkeypatch, listening=True):
+    """Sessions in a dict instead of the database, notifications
+    delivered to this process."""
+    stored = {}
+    loads = []
+
+    async def load(app_id, session_token):
+        loads.append((app_id, session_token))
+        model = stored.get((app_id, session_token))
+        if model is None:
+            return None
+        return Session(app_id=model.app_id, session_token=model.session_token,
+                       session_type=model.session_type, user_id=model.user_id,
+                       session_data=dict(model.session_data), device_info={})
+
+    async def save(self):
+        stored[(self.app_id, self.session_token)] = self
+
+    async def publish(payload=''):
+        session_channel.deliver(payload)
+
+    monkeypatch.setattr(Session, "load", load)
+    monkeypatch.setattr(Session, "save", save)
+    monkeypatch.setattr(session_channel, "publish", publish)
+    monkeypatch.setattr(session_channel, "_connection", OpenConnection() if listening else None)
+    session_cache.clear()
+    return stored, loads
+
+
+def add_session(stored, token="S1"):
+    stored[("demo", token)] = Session(app_id="demo", session_token=token,
+                                      session_type="anonymous", session_data={},
+                                      device_info={})
+
+
+def test_cached_session_is_a_copy(monkeypatch):
+    stored, loads = use_sessions(monkeypatch)
+    add_session(stored)
+
+    async def run():
+        first = await SessionService.load("demo", "S1")
+        # changed by a request whose transaction does not commit
+        first.update(user_id="U1")
+        first.model.session_data["step"] = 1
+        second = await SessionService.load("demo", "S1")
+        return second
+
+    second = asyncio.run(run())
+    assert loads == [("demo", "S1")]
+    assert second.model.user_id is None
+    assert second.model.session_data == {}
+
+
+def test_saved_session_invalidated(monkeypatch):
+    stored, loads = use_sessions(monkeypatch)
+    add_session(stored)
+
+    async def run():
+        session = await SessionService.load("demo", "S1")
+        session.update(user_id="U1")
+        await session.save()
+        return await SessionService.load("demo", "S1")
+
+    assert asyncio.run(run()).model.user_id == "U1"
+    assert len(loads) == 2
+
+
+def test_notification_invalidates(monkeypatch):
+    stored, loads = use_sessions(monkeypatch)
+    add_session(stored)
+
+    async def run():
+        await SessionService.load("demo", "S1")
+        # saved by another worker
+        stored[("demo", "S1")].user_id = "U2"
+        session_channel.deliver('["demo", "S1"]')
+        return await SessionService.load("demo", "S1")
+
+    assert asyncio.run(run()).model.user_id == "U2"
+    assert len(loads) == 2
+
+
+def test_not_cached_without_channel(monkeypatch):
+    stored, loads = use_sessions(monkeypatch, listening=False)
+    add_session(stored)
+
+    async def run():
+        await SessionService.load("demo", "S1")
+        await SessionService.load("demo", "S1")
+
+    asyncio.run(run())
+    assert len(loads) == 2
+    assert session_cache.peek(("demo", "S1")) is None
@@ -1,5 +1,10 @@
 
-from highorder.hola.transformer import FilterExprTransformer
+from highorder.hola.transformer import FilterExprTransformer, FormatTemplate, CompiledExpression
+from likepy import restrictedpy
+from likepy.exceptions import CompileError
+import pytest
+from highorder.base.munch import munchify
+from string import Formatter
 import ast
 import pprint
 
@@ -153,4 +158,81 @@ def test_filter_expr_7():
         "operator": "AND",
         "negate": False,
         "value.name": "tom"
-    })
\ No newline at end of file
+    })
+
+def test_format_template_constant():
+    t = FormatTemplate('plain text')
+    assert t.constant == 'plain text'
+    assert t.render({}) == 'plain text'
+    assert FormatTemplate('a{{b}}').constant == 'a{b}'
+
+
+def test_format_template_fields():
+    context = munchify({"user": {"name": "tom", "tags": ["x", "y"]}, "count": 3})
+    for expr in [
+        'hello {user.name}',
+        '{user.tags[1]}-{count:03d}',
+        '{user.name!r} has {count} items',
+        '{user[name]}',
+    ]:
+        t = FormatTemplate(expr)
+        assert t.constant is None
+        assert t.render(context) == Formatter().vformat(expr, [], context)
+
+
+def test_format_template_fallback():
+    context = munchify({"value": 3.14159, "width": 8})
+    t = FormatTemplate('{value:>{width}}')
+    assert t.render(context) == Formatter().vformat('{value:>{width}}', [], context)
+
+
+def test_format_template_cache():
+    t1 = FormatTemplate.get('it.name == "{user.name}"', release='r1')
+    t2 = FormatTemplate.get('it.name == "{user.name}"', release='r1')
+    assert t1 is t2
+    assert FormatTemplate.get('it.name == "{user.name}"', release='r2') is not t1
+
+
+def test_filter_expr_template_cached():
+    context = {"user": {"user_id": "UIDXXX", "level": 3}}
+    t = FilterExprTransformer(target="it", rename="value", context=context)
+    expr1, shape1 = t.transform_with_shape('it.name == "aaa" and it.level >= user.level')
+    expr2, shape2 = t.transform_with_shape('it.name == "bbb" and it.level >= user.level')
+    assert shape1 == shape2
+    assert expr_to_dict(expr2)["elements"][0] == {
+        "type": "expression",
+        "operator": "AND",
+        "negate": False,
+        "value.name": "bbb"
+    }
+    assert expr_to_dict(expr2)["elements"][1]["value.level__gte"] == 3
+
+    expr3, shape3 = t.transform_with_shape('it.name == 12 and it.level >= user.level')
+    assert shape3 != shape1
+    assert expr_to_dict(expr3)["elements"][0]["value.name"] == 12
+
+
+def test_filter_expr_template_escaped():
+    t = FilterExprTransformer(target="it", rename="")
+    compare_transformed(t.transform(r'it.name in ("a\"b", "c")'), {
+        "type": "expression",
+        "operator": "AND",
+        "negate": False,
+        "name__in": ['a"b', 'c']
+    })
+    compare_transformed(t.transform('it.name == "a" "b"'), {
+        "type": "expression",
+        "operator": "AND",
+        "negate": False,
+        "name": "ab"
+    })
+
+
+def test_compiled_expression():
+    context = {"level": 3, "items": [1, 2, 3]}
+    for expr in ['level > 2', 'len(items) + 1', 'len(items) * 2']:
+        assert CompiledExpression(expr).eval(context) == restrictedpy.eval(expr, context)
+    assert "__builtins__" not in context
+    assert CompiledExpression.get('len(items)', release='r1') is CompiledExpression.get('len(items)', release='r1')
+    with pytest.raises(CompileError):
+        CompiledExpression('__import__("os")')
@@ -0,0 +1,60 @@
+import asyncio
+import hashlib
+import hmac
+
+from highorder.hola import view
+
+
+class Loader:
+    client_keys = []
+
+
+class Config:
+    loader = Loader()
+
+    def get_client_secret(self, client_key):
+        return "secret" if client_key == "key" else None
+
+
+class Request:
+    body = b'{"command": "page_interact"}'
+
+    async def body_hmac(self, key, prefix="", digestmod=hashlib.sha256):
+        return hmac.new(key.encode(), prefix.encode() + self.body, digestmod).hexdigest()
+
+
+def test_validate_client(monkeypatch):
+    async def get(app_id):
+        return Config()
+
+    monkeypatch.setattr(view.AppConfig, "get", get)
+    request = Request()
+    sign = asyncio.run(request.body_hmac("secret", prefix="demo1700000000"))
+
+    async def validate(header):
+        return await view.validate_client("demo", header, request)
+
+    assert asyncio.run(validate(f"{sign},1700000000,key")) is True
+    assert asyncio.run(validate(f"{'0' * 64},1700000000,key")) is False
+    assert asyncio.run(validate(f"{sign},1700000000,other")) is False
+    # a latin-1 decoded header with non-ASCII characters
+    bad = b"\xe9\xff".decode("latin-1") + sign[2:]
+    assert asyncio.run(validate(f"{bad},1700000000,key")) is False
+
+
+def test_validate_editor(monkeypatch):
+    async def get(app_id):
+        return Config()
+
+    monkeypatch.setattr(view.AppConfig, "get", get)
+    monkeypatch.setattr(view, "settings",
+                        {"setup_keys": [{"client_key": "key", "client_secret": "secret"}]})
+    request = Request()
+    sign = asyncio.run(request.body_hmac("secret", prefix="demo1700000000"))
+
+    async def validate(header):
+        return await view.validate_editor("demo", header, request)
+
+    assert asyncio.run(validate(f"{sign},1700000000,key")) is True
+    bad = "\u00e9" + sign[1:]
+    assert asyncio.run(validate(f"{bad},1700000000,key")) is False